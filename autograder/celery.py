@@ -13,13 +13,19 @@ app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
 @receiver(worker_ready)
 def detect_queues(sender, **kwargs):
-    import autograder.core.models as ag_models
-    from autograder.grading_tasks.tasks.queueing import get_worker_prefix, register_project_queues
+    from autograder.grading_tasks.tasks.queueing import (
+        clear_registered_project_queues, get_project_pks_to_register, get_worker_prefix,
+        register_project_queues)
 
     if get_worker_prefix(sender.hostname) not in settings.WORKER_PREFIX_TO_QUEUE_TMPLS:
         return
 
-    project_pks = [project.pk for project in ag_models.Project.objects.all()]
+    if settings.PROJECT_QUEUE_REGISTRATION_MODE == 'active':
+        # Projects registered on demand before this worker started
+        # need to be registered again for this worker.
+        clear_registered_project_queues()
+
+    project_pks = get_project_pks_to_register()
 
     page_size = 50
     for i in range(0, len(project_pks), page_size):
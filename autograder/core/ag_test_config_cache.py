@@ -0,0 +1,151 @@
+"""
+Caches the test configuration (AG test suites, cases, and commands, and
+mutation test suites) that AGTestPreLoader and
+MutationTestSuitePreLoader load for a project.
+
+Cached configuration is keyed by the project's "test config version",
+which must be bumped (see bump_test_config_version()) whenever any of
+the project's test configuration changes.
+Configuration is cached both in Redis (shared by all processes) and
+in a small per-process LRU cache. The per-process cache holds pickled
+objects so that every caller gets its own copies.
+"""
+
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Tuple, TypeVar
+
+from django.core.cache import cache, caches
+from django.db import models, transaction
+from django.dispatch import Signal
+
+_ModelType = TypeVar('_ModelType', bound=models.Model)
+
+# Sent with a "project_pk" argument after a transaction that bumped a
+# project's test config version commits.
+test_config_version_bumped = Signal()
+
+
+def get_test_config_version(project_pk: int) -> str:
+    """
+    Returns the current test config version for the given project.
+    """
+    cache_key = _version_cache_key(project_pk)
+    version = cache.get(cache_key)
+    if version is None:
+        # cache.add() is a no-op if another process set the version
+        # first, in which case we use theirs.
+        cache.add(cache_key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(cache_key)
+
+    return version
+
+
+def bump_test_config_version(project_pk: int) -> None:
+    """
+    Invalidates the cached test configuration for the given project.
+
+    The version is bumped immediately and again when the current
+    transaction commits. Otherwise, a request that read the new version
+    before the transaction committed could cache the old configuration
+    under the new version.
+    """
+    _set_new_version(project_pk)
+    transaction.on_commit(lambda: _on_bump_committed(project_pk))
+
+
+def _on_bump_committed(project_pk: int) -> None:
+    _set_new_version(project_pk)
+    test_config_version_bumped.send(sender=None, project_pk=project_pk)
+
+
+def _set_new_version(project_pk: int) -> None:
+    cache.set(_version_cache_key(project_pk), uuid.uuid4().hex, timeout=None)
+
+
+def _version_cache_key(project_pk: int) -> str:
+    return f'project_{project_pk}_test_config_version'
+
+
+# Old versions of a project's configuration are never explicitly
+# deleted from Redis, so we let them expire.
+_TEST_CONFIG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# The maximum number of (project, version, kind) entries to keep in
+# the per-process cache.
+_MAX_PROCESS_CACHE_ENTRIES = 64
+
+_process_cache: 'OrderedDict[Tuple[int, str, str], bytes]' = OrderedDict()
+_process_cache_lock = threading.Lock()
+
+
+def load_test_config(
+    project_pk: int,
+    version: str,
+    kind: str,
+    load_fn: Callable[[], Iterable[_ModelType]]
+) -> Dict[int, _ModelType]:
+    """
+    Returns a dictionary of (pk -> object) for the given kind of test
+    configuration object (e.g., "ag_test_suites") belonging to the given
+    project, using the cached objects for the given version if there
+    are any. Otherwise, loads the objects with load_fn() and caches them.
+
+    Each call returns its own copies of the objects. Django caches
+    related objects on model instances, so sharing instances between
+    requests or threads isn't safe.
+    """
+    process_cache_key = (project_pk, version, kind)
+    with _process_cache_lock:
+        pickled = _process_cache.get(process_cache_key)
+        if pickled is not None:
+            _process_cache.move_to_end(process_cache_key)
+
+    if pickled is not None:
+        return pickle.loads(pickled)
+
+    redis_cache = caches['test_config']
+    redis_cache_key = f'project_{project_pk}_test_config_{version}_{kind}'
+    result: Dict[int, _ModelType] = redis_cache.get(redis_cache_key)
+    if result is None:
+        result = {obj.pk: obj for obj in load_fn()}
+        redis_cache.set(redis_cache_key, result, timeout=_TEST_CONFIG_CACHE_TIMEOUT)
+
+    with _process_cache_lock:
+        _process_cache[process_cache_key] = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        while len(_process_cache) > _MAX_PROCESS_CACHE_ENTRIES:
+            _process_cache.popitem(last=False)
+
+    # Nothing else has a reference to this copy.
+    return result
+
+
+def bump_test_config_version_on_reorder() -> None:
+    """
+    Makes the set_<model>_order() methods that Django adds to the
+    parents of test configuration models (e.g.,
+    Project.set_agtestsuite_order()) bump the project's test config
+    version. Reordering doesn't send any signals, and the cached
+    objects include their "_order" field.
+
+    Django adds these methods once all models are loaded, so this must
+    be called from an AppConfig's ready() method.
+    """
+    from autograder.core.models import AGTestCase, AGTestSuite, Project
+
+    def _bump_after(model: type, method_name: str, get_project_pk: Callable[[models.Model], int]):
+        set_order = getattr(model, method_name)
+
+        def _set_order_and_bump_version(self: models.Model, *args, **kwargs) -> None:
+            set_order(self, *args, **kwargs)
+            bump_test_config_version(get_project_pk(self))
+
+        setattr(model, method_name, _set_order_and_bump_version)
+
+    _bump_after(Project, 'set_agtestsuite_order', lambda project: project.pk)
+    _bump_after(Project, 'set_mutationtestsuite_order', lambda project: project.pk)
+    _bump_after(AGTestSuite, 'set_agtestcase_order', lambda suite: suite.project_id)
+    _bump_after(AGTestCase, 'set_agtestcommand_order',
+                lambda case: case.ag_test_suite.project_id)
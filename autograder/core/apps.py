@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'autograder.core'
+
+    def ready(self):
+        from .ag_test_config_cache import bump_test_config_version_on_reorder
+        bump_test_config_version_on_reorder()
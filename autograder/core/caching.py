@@ -1,41 +1,177 @@
 from typing import Dict, Optional
+
+from django.conf import settings
 from django.core.cache import cache
 
 import autograder.core.models as ag_models
+import autograder.core.utils as core_ut
+from autograder.core.ag_test_config_cache import get_test_config_version
 from autograder.core.submission_feedback import SubmissionResultFeedback
 
+# Results for submissions with other statuses can still change,
+# so we don't cache them.
+_CACHEABLE_STATUSES = (
+    ag_models.Submission.GradingStatus.waiting_for_deferred,
+    ag_models.Submission.GradingStatus.finished_grading,
+)
+
+# Cached feedback can either include all the result details
+# or only the submission's total points.
+_FULL_PROJECTION = 'full'
+_TOTALS_ONLY_PROJECTION = 'totals'
+
+# Cached results are invalidated by bumping the project's cache
+# generation, so results from old generations need to expire.
+_SUBMISSION_RESULTS_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
 
 def clear_submission_results_cache(project_pk: int) -> None:
-    keys = cache.client.iter_keys(f'project_{project_pk}_submission_normal_results_*',
-                                  itersize=5000)
-    cache.delete_many(list(keys))
+    core_ut.bump_cache_generation(_submission_results_cache_namespace(project_pk))
 
 
 def delete_cached_submission_result(submission: ag_models.Submission) -> None:
-    cache_key = submission_fdbk_cache_key(
-        project_pk=submission.group.project.pk, submission_pk=submission.pk)
-    cache.delete(cache_key)
+    generation = _get_submission_results_cache_generation(submission.project_id)
+    cache.delete_many([
+        _make_submission_fdbk_cache_key(
+            project_pk=submission.project_id,
+            generation=generation,
+            submission_pk=submission.pk,
+            fdbk_category=fdbk_category,
+            totals_only=totals_only)
+        for fdbk_category in ag_models.FeedbackCategory
+        for totals_only in (False, True)
+    ])
 
 
 def get_cached_submission_feedback(submission: ag_models.Submission,
-                                   feedback: SubmissionResultFeedback) -> Dict[str, object]:
+                                   feedback: SubmissionResultFeedback,
+                                   *, totals_only: bool = False) -> Dict[str, object]:
     """
-    Loads the serialized normal feedback for the given submission from
-    the cache and returns it.
-    If the serialized feedback is not cached, adds it to the cache
-    before returning it.
+    Loads the serialized feedback (in feedback's feedback category) for
+    the given submission from the cache and returns it.
+    If totals_only is True, the serialized feedback only contains
+    "total_points" and "total_points_possible".
+
+    If the serialized feedback is not cached, or if it was cached
+    before the project's test configuration or the submission's
+    grading status changed, adds it to the cache before returning it.
+    Feedback for submissions that are still being graded is never
+    cached.
     """
+    if submission.status not in _CACHEABLE_STATUSES:
+        return _serialize_feedback(feedback, totals_only)
+
     cache_key = submission_fdbk_cache_key(
-        project_pk=submission.group.project.pk,
-        submission_pk=submission.pk)
+        project_pk=submission.project_id,
+        submission_pk=submission.pk,
+        fdbk_category=feedback.fdbk_category,
+        totals_only=totals_only)
+    test_config_version = get_test_config_version(submission.project_id)
 
-    result: Optional[Dict[str, object]] = cache.get(cache_key)
-    if result is None:
-        result = feedback.to_dict()
-        cache.set(cache_key, result, timeout=None)
+    cached: Optional[Dict[str, object]] = cache.get(cache_key)
+    if (cached is not None
+            and cached['test_config_version'] == test_config_version
+            and cached['status'] == submission.status):
+        _record_cache_lookup(feedback.fdbk_category, hit=True)
+        return cached['results']  # type: ignore
 
+    _record_cache_lookup(feedback.fdbk_category, hit=False)
+    result = _serialize_feedback(feedback, totals_only)
+    cache.set(
+        cache_key,
+        {
+            'test_config_version': test_config_version,
+            'status': submission.status,
+            'results': result,
+        },
+        timeout=_SUBMISSION_RESULTS_CACHE_TIMEOUT
+    )
     return result
 
 
-def submission_fdbk_cache_key(*, project_pk: int, submission_pk: int) -> str:
-    return f'project_{project_pk}_submission_normal_results_{submission_pk}'
+def submission_fdbk_cache_key(
+    *, project_pk: int,
+    submission_pk: int,
+    fdbk_category: ag_models.FeedbackCategory = ag_models.FeedbackCategory.normal,
+    totals_only: bool = False
+) -> str:
+    """
+    Returns the cache key for the given submission's serialized
+    feedback in the project's current cache generation.
+    """
+    return _make_submission_fdbk_cache_key(
+        project_pk=project_pk,
+        generation=_get_submission_results_cache_generation(project_pk),
+        submission_pk=submission_pk,
+        fdbk_category=fdbk_category,
+        totals_only=totals_only)
+
+
+def _make_submission_fdbk_cache_key(*, project_pk: int,
+                                    generation: int,
+                                    submission_pk: int,
+                                    fdbk_category: ag_models.FeedbackCategory,
+                                    totals_only: bool) -> str:
+    projection = _TOTALS_ONLY_PROJECTION if totals_only else _FULL_PROJECTION
+    return (f'project_{project_pk}_submission_results_{generation}'
+            f'_{fdbk_category.value}_{projection}_{submission_pk}')
+
+
+def _get_submission_results_cache_generation(project_pk: int) -> int:
+    return core_ut.get_cache_generation(_submission_results_cache_namespace(project_pk))
+
+
+def _submission_results_cache_namespace(project_pk: int) -> str:
+    return f'project_{project_pk}_submission_results'
+
+
+def _serialize_feedback(feedback: SubmissionResultFeedback,
+                        totals_only: bool) -> Dict[str, object]:
+    if not totals_only:
+        return feedback.to_dict()
+
+    return {
+        'total_points': str(feedback.total_points),
+        'total_points_possible': str(feedback.total_points_possible)
+    }
+
+
+def get_submission_results_cache_stats() -> Dict[str, Dict[str, object]]:
+    """
+    Returns a dictionary of (feedback category -> {
+        "hits": <int>, "misses": <int>, "hit_ratio": <float or None>})
+    counted across all processes since the counters were last reset.
+    Lookups are only counted when settings.SUBMISSION_RESULTS_CACHE_STATS
+    is True.
+    """
+    result: Dict[str, Dict[str, object]] = {}
+    for fdbk_category in ag_models.FeedbackCategory:
+        hits = cache.get(_cache_lookup_counter_key(fdbk_category, hit=True), 0)
+        misses = cache.get(_cache_lookup_counter_key(fdbk_category, hit=False), 0)
+        result[fdbk_category.value] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else None,
+        }
+
+    return result
+
+
+def reset_submission_results_cache_stats() -> None:
+    cache.delete_many([
+        _cache_lookup_counter_key(fdbk_category, hit=hit)
+        for fdbk_category in ag_models.FeedbackCategory
+        for hit in (True, False)
+    ])
+
+
+def _record_cache_lookup(fdbk_category: ag_models.FeedbackCategory, *, hit: bool) -> None:
+    # Counting costs an extra cache round trip per lookup.
+    if not settings.SUBMISSION_RESULTS_CACHE_STATS:
+        return
+
+    cache.incr(_cache_lookup_counter_key(fdbk_category, hit=hit), ignore_key_check=True)
+
+
+def _cache_lookup_counter_key(fdbk_category: ag_models.FeedbackCategory, *, hit: bool) -> str:
+    return f'submission_results_cache_{"hits" if hit else "misses"}_{fdbk_category.value}'
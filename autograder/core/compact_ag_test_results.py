@@ -0,0 +1,238 @@
+"""
+A compact binary encoding of a submission's denormalized AG test
+results (see Submission.denormalized_ag_test_results and
+Submission.compact_ag_test_results).
+
+The JSON format repeats every field name and primary key for every
+result. This format packs each result into a fixed-size record, stores
+booleans as bits, and omits ids that can be inferred from the
+enclosing result. It also stores the byte offset of each suite's
+results so that readers can decode only the suites they need.
+
+Layout (all integers are little-endian):
+    Header: magic (4 bytes), submission pk (int32), number of suites (uint32)
+    One index entry per suite:
+        ag_test_suite_id (int32), offset (uint32), length (uint32)
+    One segment per suite, at the offset given by its index entry:
+        Suite result: pk (int32), setup_return_code (int32),
+                      flags (uint8), number of case results (uint32)
+        For each case result:
+            pk (int32), ag_test_case_id (int32),
+            number of command results (uint32)
+            For each command result:
+                pk (int32), ag_test_command_id (int32),
+                return_code (int32), flags (uint16)
+"""
+
+import struct
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+# The primary key of an object as a string
+PkStr = str
+
+_MAGIC = b'AGR1'
+
+_HEADER = struct.Struct('<4siI')
+_SUITE_INDEX_ENTRY = struct.Struct('<iII')
+_SUITE_RESULT = struct.Struct('<iiBI')
+_CASE_RESULT = struct.Struct('<iiI')
+_CMD_RESULT = struct.Struct('<iiiH')
+
+# Suite result flags
+_HAS_SETUP_RETURN_CODE = 1 << 0
+_SETUP_TIMED_OUT = 1 << 1
+_SETUP_STDOUT_TRUNCATED = 1 << 2
+_SETUP_STDERR_TRUNCATED = 1 << 3
+
+# Command result flags. return_code_correct, stdout_correct, and
+# stderr_correct can be None, so they each get one bit that is set
+# when the value is not None and one bit for the value.
+_HAS_RETURN_CODE = 1 << 0
+_CMD_NULLABLE_BOOL_FIELDS = (
+    ('return_code_correct', 1),
+    ('stdout_correct', 3),
+    ('stderr_correct', 5),
+)
+_CMD_BOOL_FIELDS = (
+    ('timed_out', 1 << 7),
+    ('stdout_truncated', 1 << 8),
+    ('stderr_truncated', 1 << 9),
+)
+
+
+def encode_ag_test_results(submission_pk: int,
+                           ag_test_results: Mapping[PkStr, Mapping[str, object]]) -> bytes:
+    """
+    Encodes the given denormalized AG test results (in the format
+    stored in Submission.denormalized_ag_test_results) for the
+    submission with the given primary key.
+    """
+    segments: List[bytes] = []
+    suite_ids: List[int] = []
+    for suite_id, suite_result in ag_test_results.items():
+        suite_ids.append(int(suite_id))
+        segments.append(_encode_suite_result(suite_result))
+
+    index_size = _HEADER.size + _SUITE_INDEX_ENTRY.size * len(segments)
+    parts = [_HEADER.pack(_MAGIC, submission_pk, len(segments))]
+    offset = index_size
+    for suite_id, segment in zip(suite_ids, segments):
+        parts.append(_SUITE_INDEX_ENTRY.pack(suite_id, offset, len(segment)))
+        offset += len(segment)
+
+    return b''.join(parts + segments)
+
+
+def _encode_suite_result(suite_result: Mapping[str, object]) -> bytes:
+    setup_return_code = suite_result['setup_return_code']
+    flags = 0
+    if setup_return_code is not None:
+        flags |= _HAS_SETUP_RETURN_CODE
+    if suite_result['setup_timed_out']:
+        flags |= _SETUP_TIMED_OUT
+    if suite_result['setup_stdout_truncated']:
+        flags |= _SETUP_STDOUT_TRUNCATED
+    if suite_result['setup_stderr_truncated']:
+        flags |= _SETUP_STDERR_TRUNCATED
+
+    case_results: Mapping[PkStr, Mapping[str, object]] = (
+        suite_result['ag_test_case_results'])  # type: ignore
+    parts = [
+        _SUITE_RESULT.pack(
+            suite_result['pk'],
+            setup_return_code if setup_return_code is not None else 0,
+            flags,
+            len(case_results))
+    ]
+    for case_result in case_results.values():
+        cmd_results: Mapping[PkStr, Mapping[str, object]] = (
+            case_result['ag_test_command_results'])  # type: ignore
+        parts.append(_CASE_RESULT.pack(
+            case_result['pk'], case_result['ag_test_case_id'], len(cmd_results)))
+        for cmd_result in cmd_results.values():
+            parts.append(_encode_cmd_result(cmd_result))
+
+    return b''.join(parts)
+
+
+def _encode_cmd_result(cmd_result: Mapping[str, object]) -> bytes:
+    return_code = cmd_result['return_code']
+    flags = 0
+    if return_code is not None:
+        flags |= _HAS_RETURN_CODE
+    for field_name, bit in _CMD_NULLABLE_BOOL_FIELDS:
+        value = cmd_result[field_name]
+        if value is not None:
+            flags |= 1 << bit
+            if value:
+                flags |= 1 << (bit + 1)
+    for field_name, flag in _CMD_BOOL_FIELDS:
+        if cmd_result[field_name]:
+            flags |= flag
+
+    return _CMD_RESULT.pack(
+        cmd_result['pk'],
+        cmd_result['ag_test_command_id'],
+        return_code if return_code is not None else 0,
+        flags)
+
+
+class CompactAGTestResults(Mapping[PkStr, Dict[str, object]]):
+    """
+    A read-only view of AG test results encoded with
+    encode_ag_test_results(). Maps AG test suite pks (as strings) to
+    suite results in the same format as
+    Submission.denormalized_ag_test_results.
+
+    Only the header is decoded up front. Each suite's results are
+    decoded when they're accessed (and are not cached).
+    """
+
+    def __init__(self, data: bytes):
+        magic, self._submission_pk, num_suites = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError('Data is not in the compact AG test results format')
+
+        self._data = data
+        self._index: Dict[PkStr, Tuple[int, int]] = {}
+        for i in range(num_suites):
+            suite_id, offset, length = _SUITE_INDEX_ENTRY.unpack_from(
+                data, _HEADER.size + i * _SUITE_INDEX_ENTRY.size)
+            self._index[str(suite_id)] = (offset, length)
+
+    def __getitem__(self, suite_id: PkStr) -> Dict[str, object]:
+        suite_result = self.get_suite_result(suite_id)
+        suite_result['ag_test_case_results'] = self.get_case_results(suite_id)
+        return suite_result
+
+    def __iter__(self) -> Iterator[PkStr]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_suite_result(self, suite_id: PkStr) -> Dict[str, object]:
+        """
+        Decodes the given suite's result, without its case results.
+        """
+        offset, _ = self._index[suite_id]
+        pk, setup_return_code, flags, _ = _SUITE_RESULT.unpack_from(self._data, offset)
+        return {
+            'pk': pk,
+            'ag_test_suite_id': int(suite_id),
+            'submission_id': self._submission_pk,
+            'setup_return_code': (
+                setup_return_code if flags & _HAS_SETUP_RETURN_CODE else None),
+            'setup_timed_out': bool(flags & _SETUP_TIMED_OUT),
+            'setup_stdout_truncated': bool(flags & _SETUP_STDOUT_TRUNCATED),
+            'setup_stderr_truncated': bool(flags & _SETUP_STDERR_TRUNCATED),
+        }
+
+    def get_case_results(self, suite_id: PkStr) -> Dict[PkStr, Dict[str, object]]:
+        """
+        Decodes the given suite's case results (and their command
+        results).
+        """
+        offset, _ = self._index[suite_id]
+        suite_result_pk, _, _, num_cases = _SUITE_RESULT.unpack_from(self._data, offset)
+        offset += _SUITE_RESULT.size
+
+        case_results: Dict[PkStr, Dict[str, object]] = {}
+        for _ in range(num_cases):
+            case_result_pk, case_id, num_cmds = _CASE_RESULT.unpack_from(self._data, offset)
+            offset += _CASE_RESULT.size
+
+            cmd_results: Dict[PkStr, Dict[str, object]] = {}
+            for cmd_result_pk, cmd_id, return_code, flags in _CMD_RESULT.iter_unpack(
+                    self._data[offset:offset + _CMD_RESULT.size * num_cmds]):
+                cmd_results[str(cmd_id)] = _decode_cmd_result(
+                    cmd_result_pk, cmd_id, case_result_pk, return_code, flags)
+            offset += _CMD_RESULT.size * num_cmds
+
+            case_results[str(case_id)] = {
+                'pk': case_result_pk,
+                'ag_test_case_id': case_id,
+                'ag_test_suite_result_id': suite_result_pk,
+                'ag_test_command_results': cmd_results,
+            }
+
+        return case_results
+
+
+def _decode_cmd_result(pk: int, cmd_id: int, case_result_pk: int,
+                       return_code: int, flags: int) -> Dict[str, object]:
+    result: Dict[str, object] = {
+        'pk': pk,
+        'ag_test_command_id': cmd_id,
+        'ag_test_case_result_id': case_result_pk,
+        'return_code': return_code if flags & _HAS_RETURN_CODE else None,
+    }
+    for field_name, bit in _CMD_NULLABLE_BOOL_FIELDS:
+        value: Optional[bool] = None
+        if flags & (1 << bit):
+            value = bool(flags & (1 << (bit + 1)))
+        result[field_name] = value
+    for field_name, flag in _CMD_BOOL_FIELDS:
+        result[field_name] = bool(flags & flag)
+
+    return result
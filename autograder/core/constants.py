@@ -48,6 +48,18 @@ DEFAULT_PROCESS_LIMIT = 0
 MEDIUM_PROCESS_LIMIT = 16
 MAX_PROCESS_LIMIT = 150
 
+# The maximum number of test cases in a suite that can be run
+# concurrently in the same sandbox.
+MAX_PARALLEL_AG_TEST_CASES = 16
+
+# The maximum number of a mutation test suite's buggy impls that can
+# be graded concurrently in the same sandbox.
+MAX_PARALLEL_BUGGY_IMPLS = 16
+
+# The maximum number of student test validity checks that can be run
+# concurrently in the same sandbox.
+MAX_PARALLEL_VALIDITY_CHECKS = 16
+
 
 # DO NOT USE. This will be removed soon.
 class SupportedImages(enum.Enum):
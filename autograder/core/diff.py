@@ -0,0 +1,694 @@
+"""
+An in-process implementation of the GNU diff behavior that
+autograder.core.utils.get_diff() relies on.
+
+get_diff() runs GNU diff with --text and with line formats that print
+every line of the first file, prefixed with "  " if it is unchanged
+or "- " if it was removed, along with every line added by the second
+file, prefixed with "+ ". The functions here produce the same output
+(and the same notion of whether the inputs match) without spawning a
+process. The line matching is a port of the algorithm in GNU diffutils
+(analyze.c and gnulib's diffseq.h), including the preprocessing and
+postprocessing steps that affect which lines are reported as changed.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+# The characters for which C's isspace() returns true.
+_WHITESPACE = b' \t\n\v\f\r'
+
+_UNCHANGED = b'  '
+_REMOVED = b'- '
+_ADDED = b'+ '
+
+
+def diff_bytes(first: bytes, second: bytes, *,
+               ignore_case: bool = False,
+               ignore_whitespace: bool = False,
+               ignore_whitespace_changes: bool = False,
+               ignore_blank_lines: bool = False) -> Tuple[bool, List[bytes]]:
+    """
+    Compares first and second line by line.
+    Returns a tuple of (diff_pass, diff_lines), where diff_pass is True
+    if first and second are considered equivalent, and diff_lines is a
+    list of the lines from both inputs, each prefixed with "  ", "- ",
+    or "+ " as described in the module docstring.
+
+    The ignore_* options have the same meaning as GNU diff's
+    --ignore-case, --ignore-all-space, --ignore-space-change, and
+    --ignore-blank-lines flags.
+    """
+    lines0 = _split_lines(first)
+    lines1 = _split_lines(second)
+
+    keys0 = _get_comparison_keys(
+        lines0, ignore_case, ignore_whitespace, ignore_whitespace_changes)
+    keys1 = _get_comparison_keys(
+        lines1, ignore_case, ignore_whitespace, ignore_whitespace_changes)
+
+    # Fast path: nothing is different, so there's nothing to diff.
+    if keys0 == keys1:
+        return True, [_UNCHANGED + line for line in lines0]
+
+    return _diff_lines(lines0, lines1, keys0, keys1,
+                       ignore_blank_lines=ignore_blank_lines,
+                       skip_white_space=ignore_whitespace or ignore_whitespace_changes)
+
+
+def outputs_match(first: bytes, second: bytes, *,
+                  ignore_case: bool = False,
+                  ignore_whitespace: bool = False,
+                  ignore_whitespace_changes: bool = False,
+                  ignore_blank_lines: bool = False) -> bool:
+    """
+    Equivalent to diff_bytes(...)[0], but avoids computing a diff
+    except when ignore_blank_lines is True and first and second differ
+    only in blank lines.
+    """
+    lines0 = _split_lines(first)
+    lines1 = _split_lines(second)
+
+    keys0 = _get_comparison_keys(
+        lines0, ignore_case, ignore_whitespace, ignore_whitespace_changes)
+    keys1 = _get_comparison_keys(
+        lines1, ignore_case, ignore_whitespace, ignore_whitespace_changes)
+
+    if keys0 == keys1:
+        return True
+
+    if not ignore_blank_lines:
+        return False
+
+    # If every change is ignored, then the lines that are left after
+    # removing blank lines must be the same in both inputs.
+    skip_white_space = ignore_whitespace or ignore_whitespace_changes
+    nonblank0 = [key for line, key in zip(lines0, keys0) if not _is_blank(line, skip_white_space)]
+    nonblank1 = [key for line, key in zip(lines1, keys1) if not _is_blank(line, skip_white_space)]
+    if nonblank0 != nonblank1:
+        return False
+
+    return _diff_lines(lines0, lines1, keys0, keys1,
+                       ignore_blank_lines=ignore_blank_lines,
+                       skip_white_space=skip_white_space)[0]
+
+
+def _diff_lines(lines0: List[bytes], lines1: List[bytes],
+                keys0: List[bytes], keys1: List[bytes], *,
+                ignore_blank_lines: bool,
+                skip_white_space: bool) -> Tuple[bool, List[bytes]]:
+    changed0, changed1 = _find_changed_lines(lines0, lines1, keys0, keys1)
+
+    diff_pass = True
+    result = []
+    next0 = 0
+    for start0, end0, start1, end1 in _get_hunks(changed0, changed1):
+        if ignore_blank_lines and all(
+            _is_blank(line, skip_white_space)
+            for line in lines0[start0:end0] + lines1[start1:end1]
+        ):
+            # GNU diff treats the removed lines in an ignored hunk as
+            # unchanged and omits the added lines.
+            continue
+
+        diff_pass = False
+        result += (_UNCHANGED + line for line in lines0[next0:start0])
+        result += (_REMOVED + line for line in lines0[start0:end0])
+        result += (_ADDED + line for line in lines1[start1:end1])
+        next0 = end0
+
+    result += (_UNCHANGED + line for line in lines0[next0:])
+    return diff_pass, result
+
+
+def _split_lines(data: bytes) -> List[bytes]:
+    """
+    Splits data into lines on b'\\n' only, keeping line endings.
+    The last line will not end in b'\\n' if data doesn't.
+    """
+    lines = data.split(b'\n')
+    last = lines.pop()
+    lines = [line + b'\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def _get_comparison_keys(lines: List[bytes],
+                         ignore_case: bool,
+                         ignore_whitespace: bool,
+                         ignore_whitespace_changes: bool) -> List[bytes]:
+    """
+    Returns a list of values that compare equal exactly when GNU diff
+    would consider the corresponding lines to be equal.
+    """
+    if ignore_whitespace:
+        keys = [line.translate(None, _WHITESPACE) for line in lines]
+    elif ignore_whitespace_changes:
+        # Runs of whitespace compare equal to a single space, and
+        # trailing whitespace (including a missing newline at the end
+        # of the input) is ignored.
+        keys = []
+        for line in lines:
+            key = b' '.join(line.split())
+            if key and line[0] in _WHITESPACE:
+                key = b' ' + key
+            keys.append(key)
+    else:
+        # The line ending is part of the key so that a last line with
+        # no newline only compares equal to another such line.
+        keys = list(lines)
+
+    if ignore_case:
+        keys = [key.lower() for key in keys]
+
+    return keys
+
+
+def _is_blank(line: bytes, skip_white_space: bool) -> bool:
+    if skip_white_space:
+        return not line.translate(None, _WHITESPACE)
+    return line == b'\n' or line == b''
+
+
+def _find_changed_lines(lines0: List[bytes], lines1: List[bytes],
+                        keys0: List[bytes], keys1: List[bytes]) -> Tuple[List[bool], List[bool]]:
+    """
+    Returns two lists of flags indicating which lines of the first and
+    second input were removed and added, respectively. Each list has
+    one extra False element at the end.
+    """
+    len0 = len(lines0)
+    len1 = len(lines1)
+
+    # Like GNU diff, we exclude lines that are byte-for-byte identical
+    # at the beginning and end of both inputs before doing anything
+    # else. This affects which lines are considered "confusing" below.
+    prefix = 0
+    max_prefix = min(len0, len1)
+    while prefix < max_prefix and lines0[prefix] == lines1[prefix]:
+        prefix += 1
+
+    suffix = 0
+    max_suffix = max_prefix - prefix
+    while suffix < max_suffix and lines0[len0 - 1 - suffix] == lines1[len1 - 1 - suffix]:
+        suffix += 1
+
+    # Map each distinct key to an equivalence class number.
+    # Class 0 is not used.
+    classes: Dict[bytes, int] = {}
+    equivs0 = [classes.setdefault(key, len(classes) + 1)
+               for key in keys0[prefix:len0 - suffix]]
+    equivs1 = [classes.setdefault(key, len(classes) + 1)
+               for key in keys1[prefix:len1 - suffix]]
+
+    # As in GNU diff, the flag arrays have a False sentinel
+    # at each end.
+    changed0 = [False] * (len(equivs0) + 2)
+    changed1 = [False] * (len(equivs1) + 2)
+
+    undiscarded0, realindexes0, undiscarded1, realindexes1 = _discard_confusing_lines(
+        equivs0, equivs1, changed0, changed1)
+    _compareseq(undiscarded0, realindexes0, changed0, undiscarded1, realindexes1, changed1)
+    _shift_boundaries(equivs0, changed0, changed1)
+    _shift_boundaries(equivs1, changed1, changed0)
+
+    return (
+        [False] * prefix + changed0[1:-1] + [False] * (suffix + 1),
+        [False] * prefix + changed1[1:-1] + [False] * (suffix + 1),
+    )
+
+
+def _discard_confusing_lines(
+    equivs0: List[int], equivs1: List[int], changed0: List[bool], changed1: List[bool]
+) -> Tuple[List[int], List[int], List[int], List[int]]:
+    """
+    Discards lines that have no match in the other input and marks them
+    as changed. Lines that match many lines in the other input are
+    discarded when they are in a run of other discarded lines.
+    Returns the equivalence classes of the remaining lines of each input
+    and their indices in equivs0 and equivs1.
+
+    This speeds up the main comparison and, since it is what GNU diff
+    does, it lets us choose the same set of changes that GNU diff does
+    when there's more than one minimal set.
+    """
+    counts0: Dict[int, int] = {}
+    for equiv in equivs0:
+        counts0[equiv] = counts0.get(equiv, 0) + 1
+    counts1: Dict[int, int] = {}
+    for equiv in equivs1:
+        counts1[equiv] = counts1.get(equiv, 0) + 1
+
+    discards0 = _get_provisional_discards(equivs0, counts1)
+    discards1 = _get_provisional_discards(equivs1, counts0)
+    _filter_provisional_discards(discards0)
+    _filter_provisional_discards(discards1)
+
+    results: List[List[int]] = []
+    for equivs, discards, changed in ((equivs0, discards0, changed0),
+                                      (equivs1, discards1, changed1)):
+        undiscarded = []
+        realindexes = []
+        for i, equiv in enumerate(equivs):
+            if discards[i] == 0:
+                undiscarded.append(equiv)
+                realindexes.append(i)
+            else:
+                changed[i + 1] = True
+        results += [undiscarded, realindexes]
+
+    return results[0], results[1], results[2], results[3]
+
+
+def _get_provisional_discards(equivs: List[int], other_counts: Dict[int, int]) -> List[int]:
+    """
+    Returns a list containing 1 for each line that matches no line in
+    the other input, 2 for each line that matches many lines, and 0
+    for all other lines.
+    """
+    # Multiply many by the approximate square root of the number of
+    # lines. That is the threshold for provisionally discardable lines.
+    many = 5
+    tem = len(equivs) // 64
+    while True:
+        tem >>= 2
+        if tem <= 0:
+            break
+        many *= 2
+
+    discards = []
+    for equiv in equivs:
+        num_matches = other_counts.get(equiv, 0)
+        if num_matches == 0:
+            discards.append(1)
+        elif num_matches > many:
+            discards.append(2)
+        else:
+            discards.append(0)
+
+    return discards
+
+
+def _filter_provisional_discards(discards: List[int]) -> None:
+    """
+    Cancels provisional discards that are not in the middle of a run of
+    discards, and cancels some provisional discards within runs.
+    Modifies discards in-place.
+    """
+    end = len(discards)
+    i = 0
+    while i < end:
+        if discards[i] == 2:
+            discards[i] = 0
+        elif discards[i] != 0:
+            # We have found a nonprovisional discard.
+            # Find the end of this run of discardable lines, and count
+            # how many are provisionally discardable.
+            provisional = 0
+            j = i
+            while j < end:
+                if discards[j] == 0:
+                    break
+                if discards[j] == 2:
+                    provisional += 1
+                j += 1
+
+            # Cancel provisional discards at end, and shrink the run.
+            while j > i and discards[j - 1] == 2:
+                j -= 1
+                discards[j] = 0
+                provisional -= 1
+
+            # Now we have the length of a run of discardable lines
+            # whose first and last are not provisional.
+            length = j - i
+
+            if provisional * 4 > length:
+                # If 1/4 of the lines in the run are provisional,
+                # cancel discarding of all provisional lines in the run.
+                while j > i:
+                    j -= 1
+                    if discards[j] == 2:
+                        discards[j] = 0
+            else:
+                # minimum is the approximate square root of length/4.
+                minimum = 1
+                tem = length >> 2
+                while True:
+                    tem >>= 2
+                    if tem <= 0:
+                        break
+                    minimum <<= 1
+                minimum += 1
+
+                # Cancel any subrun of minimum or more provisionals
+                # within the larger run.
+                j = 0
+                consec = 0
+                while j < length:
+                    if discards[i + j] != 2:
+                        consec = 0
+                    else:
+                        consec += 1
+                        if consec == minimum:
+                            # Back up to the start of the subrun, to
+                            # cancel it all.
+                            j -= consec
+                        elif consec > minimum:
+                            discards[i + j] = 0
+                    j += 1
+
+                # Scan from the beginning of the run until we find 3 or
+                # more nonprovisionals in a row or until the first
+                # nonprovisional at least 8 lines in. Until that point,
+                # cancel any provisionals.
+                consec = 0
+                for j in range(length):
+                    if j >= 8 and discards[i + j] == 1:
+                        break
+                    if discards[i + j] == 2:
+                        consec = 0
+                        discards[i + j] = 0
+                    elif discards[i + j] == 0:
+                        consec = 0
+                    else:
+                        consec += 1
+                    if consec == 3:
+                        break
+
+                # i advances to the last line of the run.
+                i += length - 1
+
+                # Same thing, from the end.
+                consec = 0
+                for j in range(length):
+                    if j >= 8 and discards[i - j] == 1:
+                        break
+                    if discards[i - j] == 2:
+                        consec = 0
+                        discards[i - j] = 0
+                    elif discards[i - j] == 0:
+                        consec = 0
+                    else:
+                        consec += 1
+                    if consec == 3:
+                        break
+        i += 1
+
+
+def _compareseq(xvec: Sequence[int], xindexes: Sequence[int], xchanged: List[bool],
+                yvec: Sequence[int], yindexes: Sequence[int], ychanged: List[bool]) -> None:
+    """
+    Finds a (nearly) minimal set of lines to remove from xvec and add
+    from yvec to turn xvec into yvec, using the divide-and-conquer
+    version of Myers' O(ND) algorithm. Marks those lines in xchanged
+    and ychanged (through xindexes and yindexes, respectively).
+    """
+    num_diags = len(xvec) + len(yvec) + 3
+    # fdiag and bdiag are indexed by diagonal number plus this offset
+    # so that negative diagonals map to valid indices.
+    diag_offset = len(yvec) + 1
+    fdiag = [0] * num_diags
+    bdiag = [0] * num_diags
+
+    # When the search for a midpoint gets this expensive, give up and
+    # use the best point found so far.
+    too_expensive = 1
+    i = num_diags
+    while i != 0:
+        too_expensive <<= 1
+        i >>= 2
+    too_expensive = max(4096, too_expensive)
+
+    stack = [(0, len(xvec), 0, len(yvec), False)]
+    while stack:
+        xoff, xlim, yoff, ylim, find_minimal = stack.pop()
+
+        # Slide down the bottom initial diagonal.
+        while xoff < xlim and yoff < ylim and xvec[xoff] == yvec[yoff]:
+            xoff += 1
+            yoff += 1
+
+        # Slide up the top initial diagonal.
+        while xoff < xlim and yoff < ylim and xvec[xlim - 1] == yvec[ylim - 1]:
+            xlim -= 1
+            ylim -= 1
+
+        if xoff == xlim:
+            for y in range(yoff, ylim):
+                ychanged[yindexes[y] + 1] = True
+        elif yoff == ylim:
+            for x in range(xoff, xlim):
+                xchanged[xindexes[x] + 1] = True
+        else:
+            xmid, ymid, lo_minimal, hi_minimal = _diag(
+                xvec, yvec, xoff, xlim, yoff, ylim, find_minimal,
+                fdiag, bdiag, diag_offset, too_expensive)
+            # Push the second half first so that the first half is
+            # processed first, as with the recursive version.
+            stack.append((xmid, xlim, ymid, ylim, hi_minimal))
+            stack.append((xoff, xmid, yoff, ymid, lo_minimal))
+
+
+def _diag(xvec: Sequence[int], yvec: Sequence[int],
+          xoff: int, xlim: int, yoff: int, ylim: int, find_minimal: bool,
+          fd: List[int], bd: List[int], offset: int,
+          too_expensive: int) -> Tuple[int, int, bool, bool]:
+    """
+    Finds the midpoint of the shortest edit script for the given
+    subsequences of xvec and yvec.
+    Returns a tuple of (xmid, ymid, lo_minimal, hi_minimal), where
+    lo_minimal and hi_minimal indicate whether the subproblems before
+    and after the midpoint should be solved minimally.
+    """
+    dmin = xoff - ylim  # Minimum valid diagonal.
+    dmax = xlim - yoff  # Maximum valid diagonal.
+    fmid = xoff - yoff  # Center diagonal of top-down search.
+    bmid = xlim - ylim  # Center diagonal of bottom-up search.
+    fmin = fmax = fmid  # Limits of top-down search.
+    bmin = bmax = bmid  # Limits of bottom-up search.
+    # True if the southeast corner is on an odd diagonal with respect
+    # to the northwest.
+    odd = (fmid - bmid) & 1 != 0
+
+    fd[fmid + offset] = xoff
+    bd[bmid + offset] = xlim
+
+    cost = 0
+    while True:
+        cost += 1
+
+        # Extend the top-down search by an edit step in each diagonal.
+        if fmin > dmin:
+            fmin -= 1
+            fd[fmin - 1 + offset] = -1
+        else:
+            fmin += 1
+        if fmax < dmax:
+            fmax += 1
+            fd[fmax + 1 + offset] = -1
+        else:
+            fmax -= 1
+
+        for d in range(fmax, fmin - 1, -2):
+            tlo = fd[d - 1 + offset]
+            thi = fd[d + 1 + offset]
+            x = thi if tlo < thi else tlo + 1
+            y = x - d
+            while x < xlim and y < ylim and xvec[x] == yvec[y]:
+                x += 1
+                y += 1
+            fd[d + offset] = x
+            if odd and bmin <= d <= bmax and bd[d + offset] <= x:
+                return x, y, True, True
+
+        # Similarly extend the bottom-up search.
+        if bmin > dmin:
+            bmin -= 1
+            bd[bmin - 1 + offset] = _OFFSET_MAX
+        else:
+            bmin += 1
+        if bmax < dmax:
+            bmax += 1
+            bd[bmax + 1 + offset] = _OFFSET_MAX
+        else:
+            bmax -= 1
+
+        for d in range(bmax, bmin - 1, -2):
+            tlo = bd[d - 1 + offset]
+            thi = bd[d + 1 + offset]
+            x = tlo if tlo < thi else thi - 1
+            y = x - d
+            while xoff < x and yoff < y and xvec[x - 1] == yvec[y - 1]:
+                x -= 1
+                y -= 1
+            bd[d + offset] = x
+            if not odd and fmin <= d <= fmax and x <= fd[d + offset]:
+                return x, y, True, True
+
+        if find_minimal:
+            continue
+
+        # If we've gone well beyond the call of duty, give up and
+        # report halfway between our best results so far.
+        if cost >= too_expensive:
+            # Find the forward diagonal that maximizes x + y.
+            fxybest = -1
+            fxbest = 0
+            for d in range(fmax, fmin - 1, -2):
+                x = min(fd[d + offset], xlim)
+                y = x - d
+                if ylim < y:
+                    x = ylim + d
+                    y = ylim
+                if fxybest < x + y:
+                    fxybest = x + y
+                    fxbest = x
+
+            # Find the backward diagonal that minimizes x + y.
+            bxybest = _OFFSET_MAX
+            bxbest = 0
+            for d in range(bmax, bmin - 1, -2):
+                x = max(xoff, bd[d + offset])
+                y = x - d
+                if y < yoff:
+                    x = yoff + d
+                    y = yoff
+                if x + y < bxybest:
+                    bxybest = x + y
+                    bxbest = x
+
+            # Use the better of the two diagonals.
+            if (xlim + ylim) - bxybest < fxybest - (xoff + yoff):
+                return fxbest, fxybest - fxbest, True, False
+            return bxbest, bxybest - bxbest, False, True
+
+
+# Larger than any valid line index.
+_OFFSET_MAX = 2 ** 63 - 1
+
+
+def _shift_boundaries(equivs: List[int], changed: List[bool], other_changed: List[bool]) -> None:
+    """
+    Adjusts the runs of changed lines in one input to make the output
+    more readable without changing the number of lines that are marked
+    as changed: runs are merged with adjacent runs where possible, moved
+    as far forward as possible, and then moved back to line up with a
+    run of changes in the other input if possible.
+
+    changed and other_changed have a sentinel at each end, so changed[k]
+    is the flag for equivs[k - 1].
+    """
+    # To keep the indexing the same as GNU diff's, we use a helper for
+    # equivs that accounts for the leading sentinel.
+    def equiv(k: int) -> int:
+        return equivs[k - 1]
+
+    i = 1
+    j = 1
+    i_end = len(equivs) + 1
+
+    while True:
+        # Scan forwards to find the beginning of another run of changes.
+        # Also keep track of the corresponding point in the other file.
+        while i < i_end and not changed[i]:
+            while other_changed[j]:
+                j += 1
+            j += 1
+            i += 1
+
+        if i == i_end:
+            break
+
+        start = i
+
+        # Find the end of this run of changes.
+        i += 1
+        while changed[i]:
+            i += 1
+        while other_changed[j]:
+            j += 1
+
+        while True:
+            # Record the length of this run of changes, so that we can
+            # later determine whether the run has grown.
+            runlength = i - start
+
+            # Move the changed region back, so long as the previous
+            # unchanged line matches the last changed one. This merges
+            # with previous changed regions.
+            while start > 1 and equiv(start - 1) == equiv(i - 1):
+                start -= 1
+                changed[start] = True
+                i -= 1
+                changed[i] = False
+                while changed[start - 1]:
+                    start -= 1
+                j -= 1
+                while other_changed[j]:
+                    j -= 1
+
+            # Set corresponding to the end of the changed run, at the
+            # last point where it corresponds to a changed run in the
+            # other file. corresponding == i_end means no such point
+            # has been found.
+            corresponding = i if other_changed[j - 1] else i_end
+
+            # Move the changed region forward, so long as the first
+            # changed line matches the following unchanged one. This
+            # merges with following changed regions. Do this second,
+            # so that if there are no merges, the changed region is
+            # moved forward as far as possible.
+            while i != i_end and equiv(start) == equiv(i):
+                changed[start] = False
+                start += 1
+                changed[i] = True
+                i += 1
+                while changed[i]:
+                    i += 1
+                j += 1
+                while other_changed[j]:
+                    corresponding = i
+                    j += 1
+
+            if runlength == i - start:
+                break
+
+        # If possible, move the fully-merged run of changes back to a
+        # corresponding run in the other file.
+        while corresponding < i:
+            start -= 1
+            changed[start] = True
+            i -= 1
+            changed[i] = False
+            j -= 1
+            while other_changed[j]:
+                j -= 1
+
+
+def _get_hunks(changed0: List[bool], changed1: List[bool]) -> List[Tuple[int, int, int, int]]:
+    """
+    Returns a list of (start0, end0, start1, end1) tuples, one for each
+    group of adjacent changes, where lines [start0, end0) of the first
+    input were replaced by lines [start1, end1) of the second input.
+    changed0 and changed1 must each end with a False sentinel.
+    """
+    hunks = []
+    len0 = len(changed0) - 1
+    len1 = len(changed1) - 1
+    i = 0
+    j = 0
+    while i < len0 or j < len1:
+        if changed0[i] or changed1[j]:
+            start0 = i
+            start1 = j
+            while changed0[i]:
+                i += 1
+            while changed1[j]:
+                j += 1
+            hunks.append((start0, i, start1, j))
+        else:
+            i += 1
+            j += 1
+
+    return hunks
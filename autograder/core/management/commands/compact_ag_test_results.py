@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+import autograder.core.models as ag_models
+from autograder.core.submission_feedback import compact_denormalized_ag_test_results_in_bulk
+
+
+class Command(BaseCommand):
+    help = """Re-encodes submissions' denormalized AG test results in the
+              compact binary format (see autograder.core.compact_ag_test_results),
+              or in the JSON format if --expand is passed. Run this after
+              changing settings.COMPACT_DENORMALIZED_AG_TEST_RESULTS so that
+              existing submissions use the new format. Submissions can be
+              read in either format, so this can safely be run while the
+              server is running."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--expand', action='store_true',
+            help='Re-encode compact results as JSON instead.')
+        parser.add_argument(
+            '--project', type=int, default=None,
+            help='Only re-encode results for the project with this primary key.')
+        parser.add_argument(
+            '--batch_size', type=int, default=500,
+            help='The number of submissions to lock and update at a time.')
+
+    def handle(self, *args, **options):
+        compact = not options['expand']
+        submissions = ag_models.Submission.objects.filter(
+            compact_ag_test_results__isnull=compact)
+        if options['project'] is not None:
+            submissions = submissions.filter(project=options['project'])
+
+        submission_pks = list(submissions.order_by('pk').values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        num_updated = 0
+        for i in range(0, len(submission_pks), batch_size):
+            with transaction.atomic():
+                num_updated += compact_denormalized_ag_test_results_in_bulk(
+                    ag_models.Submission.objects.filter(
+                        pk__in=submission_pks[i:i + batch_size]),
+                    compact=compact)
+
+            self.stdout.write(f'{num_updated}/{len(submission_pks)} submissions re-encoded')
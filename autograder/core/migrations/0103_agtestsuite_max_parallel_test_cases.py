@@ -0,0 +1,19 @@
+# Generated by Django 3.2.2 on 2026-10-17 09:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0102_alter_project_submission_limit_reset_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agtestsuite',
+            name='max_parallel_test_cases',
+            field=models.IntegerField(default=1, help_text="The maximum number of this suite's test cases that can be run at the\n            same time in the suite's sandbox. Commands within a single test case are\n            always run in order.\n            Only set this to a value greater than 1 if the suite's test cases do not\n            depend on each other (e.g., they do not write to the same files).\n            Results are always recorded in test case order.\n            Must be >= 1\n            Must be <= 16", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(16)]),
+        ),
+    ]
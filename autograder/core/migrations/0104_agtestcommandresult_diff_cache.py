@@ -0,0 +1,28 @@
+# Generated by Django 3.2.2 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0103_agtestsuite_max_parallel_test_cases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agtestcommandresult',
+            name='diff_cache_key',
+            field=models.CharField(blank=True, default='', help_text='Identifies the expected output, actual output, and diff\n                     settings that stdout_diff_size and stderr_diff_size\n                     were computed for. If these change, the cached diff\n                     sizes and the cached diffs in stdout_diff_filename and\n                     stderr_diff_filename are no longer valid.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='agtestcommandresult',
+            name='stderr_diff_size',
+            field=models.IntegerField(blank=True, default=None, help_text='The total length of the lines in the cached stderr diff.', null=True),
+        ),
+        migrations.AddField(
+            model_name='agtestcommandresult',
+            name='stdout_diff_size',
+            field=models.IntegerField(blank=True, default=None, help_text='The total length of the lines in the cached stdout diff.', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.2 on 2026-10-17 06:26
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0104_agtestcommandresult_diff_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='downloadtask',
+            name='chunk_progress',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, help_text='For downloads that are generated in chunks, a list of\n            percentages indicating how close each chunk is to completion.', size=None),
+        ),
+    ]
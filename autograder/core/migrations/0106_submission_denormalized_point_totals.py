@@ -0,0 +1,18 @@
+# Generated by Django 3.2.2 on 2026-10-17 06:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0105_downloadtask_chunk_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='denormalized_point_totals',
+            field=models.JSONField(blank=True, default=dict, help_text='Stores the submission\'s total points and total points\n                     possible in each feedback category so that they don\'t\n                     need to be recomputed from the submission\'s results.\n                     The totals are only used if they were computed with the\n                     project\'s current test config version and the\n                     submission\'s current status.\n                     To update this field, use\n                     autograder.core.submission_feedback.update_denormalized_point_totals\n\n                     Data format:\n{\n    "test_config_version": <str>,\n    "status": <str>,\n    "<feedback category>": {\n        "total_points": <int or decimal string>,\n        "total_points_possible": <int or decimal string>\n    }\n}\n        '),
+        ),
+    ]
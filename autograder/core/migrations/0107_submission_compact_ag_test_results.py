@@ -0,0 +1,18 @@
+# Generated by Django 3.2.2 on 2026-10-17 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0106_submission_denormalized_point_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='compact_ag_test_results',
+            field=models.BinaryField(blank=True, default=None, help_text="When not None, stores the submission's denormalized AG test\n                     results (in place of denormalized_ag_test_results) in\n                     the compact binary format described in\n                     autograder.core.compact_ag_test_results.\n                     Submissions' results are stored in this format when\n                     settings.COMPACT_DENORMALIZED_AG_TEST_RESULTS is True.", null=True),
+        ),
+    ]
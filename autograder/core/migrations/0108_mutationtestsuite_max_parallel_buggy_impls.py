@@ -0,0 +1,19 @@
+# Generated by Django 3.2.2 on 2026-10-17 07:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0107_submission_compact_ag_test_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mutationtestsuite',
+            name='max_parallel_buggy_impls',
+            field=models.IntegerField(default=1, help_text="The maximum number of buggy impls that student tests can be run\n            against at the same time in the suite's sandbox. When student tests are\n            run individually, each buggy impl's commands are still run in order, and\n            no more tests are run against a buggy impl once one of them exposes it.\n            Only set this to a value greater than 1 if grade_buggy_impl_command can\n            safely be run for different buggy impls at the same time (e.g., it does\n            not build every buggy impl into the same file).\n            Output is always recorded in the order of buggy_impl_names.\n            Must be >= 1\n            Must be <= 16", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(16)]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.2 on 2026-10-17 07:02
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0108_mutationtestsuite_max_parallel_buggy_impls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mutationtestsuite',
+            name='max_parallel_validity_checks',
+            field=models.IntegerField(default=1, help_text="The maximum number of student tests whose validity can be\n            checked at the same time in the suite's sandbox.\n            Only set this to a value greater than 1 if\n            student_test_validity_check_command can safely be run for different\n            student tests at the same time.\n            Output is always recorded in the order the student tests were discovered.\n            Must be >= 1\n            Must be <= 16", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(16)]),
+        ),
+    ]
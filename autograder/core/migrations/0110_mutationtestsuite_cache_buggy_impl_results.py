@@ -0,0 +1,18 @@
+# Generated by Django 3.2.2 on 2026-10-17 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0109_mutationtestsuite_max_parallel_validity_checks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mutationtestsuite',
+            name='cache_buggy_impl_results',
+            field=models.BooleanField(default=False, help_text='When true, the return code and output of each grade_buggy_impl_command\n            run are cached and reused when grading later submissions whose\n            student files are identical. Cached results are keyed by the contents\n            of the student and instructor files added to the sandbox, the sandbox\n            docker image, the setup and grade_buggy_impl commands (including\n            their resource limits), and the names of the buggy impl and student\n            tests being run. Commands that time out are never cached.\n            Only set this to true if grade_buggy_impl_command always produces the\n            same result for the same inputs.'),
+        ),
+    ]
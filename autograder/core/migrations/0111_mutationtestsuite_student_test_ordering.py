@@ -0,0 +1,23 @@
+# Generated by Django 3.2.2 on 2026-10-17 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0110_mutationtestsuite_cache_buggy_impl_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mutationtestsuite',
+            name='student_test_ordering',
+            field=models.TextField(blank=True, choices=[('discovery_order', 'Discovery Order'), ('group_history', 'Group History'), ('project_history', 'Project History')], default='discovery_order', help_text='The order in which valid student tests are run against each buggy\n            impl when grade_buggy_impl_command contains ${student_test_name}.\n            Since no more tests are run against a buggy impl once one of them\n            exposes it, running the tests most likely to expose each buggy impl\n            first reduces the number of commands run. The set of exposed bugs\n            is the same for every ordering.\n            "discovery_order": The order in which the tests were discovered.\n            "group_history": Tests that exposed the buggy impl most often in the\n                group\'s earlier submissions are run first.\n            "project_history": Tests that exposed the buggy impl most often in\n                recent submissions from all groups are run first.'),
+        ),
+        migrations.AddField(
+            model_name='mutationtestsuiteresult',
+            name='exposing_tests',
+            field=models.JSONField(blank=True, default=dict, help_text='Maps the names of exposed buggy impls to the name of the student\n                     test that exposed them. Only recorded when student tests are\n                     run against buggy impls individually.'),
+        ),
+    ]
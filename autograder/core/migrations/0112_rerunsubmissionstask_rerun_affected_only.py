@@ -0,0 +1,28 @@
+# Generated by Django 3.2.2 on 2026-10-17 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0111_mutationtestsuite_student_test_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agtestcommandresult',
+            name='evaluation_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='A hash of the expected return code, expected output,\n                     and output comparison settings that return_code_correct,\n                     stdout_correct, and stderr_correct were computed with.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='agtestcommandresult',
+            name='execution_fingerprint',
+            field=models.CharField(blank=True, default='', help_text="A hash of the inputs that determined the command's\n                     actual output when this result was recorded\n                     (the command, its stdin, its resource limits, and the\n                     suite's instructor files, setup command, and sandbox\n                     image). Used to skip unaffected commands when\n                     rerunning submissions.", max_length=64),
+        ),
+        migrations.AddField(
+            model_name='rerunsubmissionstask',
+            name='rerun_affected_only',
+            field=models.BooleanField(default=False, help_text="When True, AGTestCommands whose inputs (command, stdin,\n                     resource limits, instructor files, sandbox image, and\n                     suite setup) have not changed since a submission's\n                     result was recorded are not rerun. If only a command's\n                     expected output or expected return code has changed,\n                     the stored result is re-checked without rerunning the\n                     command. Commands whose inputs have changed are rerun\n                     along with the rest of their AGTestCase.\n                     MutationTestSuites are always rerun."),
+        ),
+    ]
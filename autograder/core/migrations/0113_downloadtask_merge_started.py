@@ -0,0 +1,18 @@
+# Generated by Django 3.2.2 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0112_rerunsubmissionstask_rerun_affected_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='downloadtask',
+            name='merge_started',
+            field=models.BooleanField(default=False, help_text='For downloads that are generated in chunks, whether a\n            task has been started to merge the finished chunks. Used to\n            make sure that only one merge task runs.'),
+        ),
+    ]
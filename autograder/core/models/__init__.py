@@ -27,6 +27,7 @@ from .mutation_test_suite import BugsExposedFeedbackLevel as BugsExposedFeedback
 from .mutation_test_suite import MutationTestSuite as MutationTestSuite
 from .mutation_test_suite import MutationTestSuiteFeedbackConfig as MutationTestSuiteFeedbackConfig
 from .mutation_test_suite import MutationTestSuiteResult as MutationTestSuiteResult
+from .mutation_test_suite import StudentTestOrdering as StudentTestOrdering
 from .project import Project as Project
 from .project import UltimateSubmissionPolicy as UltimateSubmissionPolicy
 from .project.download_task import DownloadTask as DownloadTask
@@ -5,8 +5,8 @@ import decimal
 import enum
 import inspect
 from typing import (
-    TYPE_CHECKING, Callable, Dict, Generic, List, Mapping, Sequence, Type, TypedDict, TypeVar,
-    Union, cast, get_type_hints
+    TYPE_CHECKING, Any, Callable, Dict, Generic, List, Mapping, NamedTuple, Optional, Sequence,
+    Tuple, Type, TypedDict, TypeVar, Union, cast, get_type_hints
 )
 
 from django.contrib.auth.models import User
@@ -14,6 +14,7 @@ from django.core import exceptions
 from django.core.exceptions import FieldDoesNotExist
 from django.db import models, transaction
 from django.db.models import Model
+from django.db.models.options import Options
 
 from autograder.core.fields import ValidatedJSONField
 from autograder.rest_api.serialize_user import serialize_user
@@ -142,6 +143,9 @@ def _load_related_to_many_objs(
 
 
 class ToDictMixin:
+    # Lets subclasses that define __slots__ avoid having a __dict__.
+    __slots__ = ()
+
     @classmethod
     def get_serializable_fields(cls) -> Sequence[str]:
         """
@@ -195,58 +199,120 @@ class ToDictMixin:
         """
         Returns a dictionary representation of this model instance.
         """
-        result = {}
+        return {
+            field_name: serialize(getattr(self, field_name))
+            for field_name, serialize in _get_to_dict_plan(type(self))
+        }
 
-        for field_name in self.get_serializable_fields():
-            result[field_name] = getattr(self, field_name)
 
-            if isinstance(result[field_name], enum.Enum):
-                result[field_name] = result[field_name].value
-                continue
+# A list of (field name, function that serializes the field's value).
+_ToDictPlan = List[Tuple[str, Callable[[Any], object]]]
 
-            if isinstance(result[field_name], decimal.Decimal):
-                # Note: We may want to make the precision customizable
-                # in the future.
-                quantized = result[field_name].quantize(decimal.Decimal('.01'))
-                result[field_name] = str(quantized)
-                continue
 
-            # If this isn't a Django Model (or if it's None), skip the field logic
-            if not hasattr(self, '_meta'):
-                continue
+class _CachedToDictPlan(NamedTuple):
+    serializable_fields: Sequence[str]
+    serialize_related: Sequence[str]
+    plan: _ToDictPlan
 
-            try:
-                field = cast(Model, self)._meta.get_field(field_name)
 
-                if isinstance(field, ValidatedJSONField):
-                    value = getattr(self, field_name)
+_to_dict_plans: Dict[type, _CachedToDictPlan] = {}
 
-                    result[field_name] = value.to_dict() if value is not None else None
-                    continue
 
-                if field.many_to_one or field.one_to_one:
-                    field_val = getattr(self, field_name)
-                    if field_val is None:
-                        continue
+def _get_to_dict_plan(cls: Type[ToDictMixin]) -> _ToDictPlan:
+    """
+    Returns the plan that ToDictMixin.to_dict() follows to serialize
+    instances of cls, building it the first time it's needed.
+    Deciding how to serialize each field (which requires looking up
+    model fields) is done once per class instead of once per call.
 
-                    if field_name in self.get_serialize_related_fields():
-                        result[field_name] = _serialize_model_obj(field_val)
-                    else:
-                        if isinstance(field_val, int):  # serializing an '_id' field
-                            result[field_name] = field_val
-                        else:
-                            result[field_name] = field_val.pk
-                elif field.many_to_many or field.one_to_many:
-                    if field_name in self.get_serialize_related_fields():
-                        result[field_name] = [
-                            _serialize_model_obj(obj) for obj in getattr(self, field_name).all()
-                        ]
-                    else:
-                        result[field_name] = [obj.pk for obj in getattr(self, field_name).all()]
-            except exceptions.FieldDoesNotExist:
-                pass
+    The plan is rebuilt if cls.SERIALIZABLE_FIELDS or
+    cls.SERIALIZE_RELATED is replaced (e.g., by mock.patch in tests).
+    """
+    serializable_fields = cls.SERIALIZABLE_FIELDS
+    serialize_related = cls.SERIALIZE_RELATED
+    cached = _to_dict_plans.get(cls)
+    if (cached is not None
+            and cached.serializable_fields is serializable_fields
+            and cached.serialize_related is serialize_related):
+        return cached.plan
 
-        return result
+    meta = getattr(cls, '_meta', None)
+    serialize_related_fields = cls.get_serialize_related_fields()
+    plan = [
+        (field_name,
+         _get_field_serializer(meta, field_name, field_name in serialize_related_fields))
+        for field_name in cls.get_serializable_fields()
+    ]
+    _to_dict_plans[cls] = _CachedToDictPlan(serializable_fields, serialize_related, plan)
+    return plan
+
+
+def _get_field_serializer(meta: Optional[Options[Model]],
+                          field_name: str,
+                          serialize_related: bool) -> Callable[[Any], object]:
+    # If this isn't a Django Model, or if field_name isn't a model
+    # field (e.g., it's a property), the field is serialized based on
+    # its value.
+    if meta is None:
+        return _serialize_value
+
+    try:
+        field = meta.get_field(field_name)
+    except exceptions.FieldDoesNotExist:
+        return _serialize_value
+
+    if isinstance(field, ValidatedJSONField):
+        return _serialize_validated_json_value
+
+    if field.many_to_one or field.one_to_one:
+        return _serialize_to_one if serialize_related else _serialize_to_one_as_pk
+
+    if field.many_to_many or field.one_to_many:
+        return _serialize_to_many if serialize_related else _serialize_to_many_as_pks
+
+    return _serialize_value
+
+
+# Values of these exact types are serialized as-is.
+_PASSTHROUGH_TYPES = frozenset({str, int, bool, float, type(None)})
+
+
+def _serialize_value(value: object) -> object:
+    if type(value) in _PASSTHROUGH_TYPES:
+        return value
+
+    if isinstance(value, enum.Enum):
+        return value.value
+
+    if isinstance(value, decimal.Decimal):
+        # Note: We may want to make the precision customizable
+        # in the future.
+        return str(value.quantize(decimal.Decimal('.01')))
+
+    return value
+
+
+def _serialize_validated_json_value(value: Optional[ToDictMixin]) -> object:
+    return value.to_dict() if value is not None else None
+
+
+def _serialize_to_one(value: Union[ToDictMixin, User, None]) -> object:
+    return _serialize_model_obj(value) if value is not None else None
+
+
+def _serialize_to_one_as_pk(value: Union[Model, int, None]) -> object:
+    if value is None or isinstance(value, int):  # int if serializing an '_id' field
+        return value
+
+    return value.pk
+
+
+def _serialize_to_many(value: models.Manager[Model]) -> object:
+    return [_serialize_model_obj(cast(Union[ToDictMixin, User], obj)) for obj in value.all()]
+
+
+def _serialize_to_many_as_pks(value: models.Manager[Model]) -> object:
+    return [obj.pk for obj in value.all()]
 
 
 def _serialize_model_obj(obj: Union[ToDictMixin, User]) -> Dict[str, object]:
@@ -36,6 +36,34 @@ class AGTestCommandResult(AGCommandResultBase):
     stdout_correct = models.BooleanField(blank=True, null=True, default=None)
     stderr_correct = models.BooleanField(blank=True, null=True, default=None)
 
+    diff_cache_key = models.CharField(
+        max_length=64, blank=True, default='',
+        help_text='''Identifies the expected output, actual output, and diff
+                     settings that stdout_diff_size and stderr_diff_size
+                     were computed for. If these change, the cached diff
+                     sizes and the cached diffs in stdout_diff_filename and
+                     stderr_diff_filename are no longer valid.''')
+    stdout_diff_size = models.IntegerField(
+        blank=True, null=True, default=None,
+        help_text='The total length of the lines in the cached stdout diff.')
+    stderr_diff_size = models.IntegerField(
+        blank=True, null=True, default=None,
+        help_text='The total length of the lines in the cached stderr diff.')
+
+    execution_fingerprint = models.CharField(
+        max_length=64, blank=True, default='',
+        help_text='''A hash of the inputs that determined the command's
+                     actual output when this result was recorded
+                     (the command, its stdin, its resource limits, and the
+                     suite's instructor files, setup command, and sandbox
+                     image). Used to skip unaffected commands when
+                     rerunning submissions.''')
+    evaluation_fingerprint = models.CharField(
+        max_length=64, blank=True, default='',
+        help_text='''A hash of the expected return code, expected output,
+                     and output comparison settings that return_code_correct,
+                     stdout_correct, and stderr_correct were computed with.''')
+
     @property
     def stdout_filename(self) -> str:
         result_output_dir = core_ut.get_result_output_dir(
@@ -48,6 +76,14 @@ class AGTestCommandResult(AGCommandResultBase):
             self.ag_test_case_result.ag_test_suite_result.submission)
         return os.path.join(result_output_dir, 'cmd_result_{}_stderr'.format(self.pk))
 
+    @property
+    def stdout_diff_filename(self) -> str:
+        return self.stdout_filename + '_diff.json.gz'
+
+    @property
+    def stderr_diff_filename(self) -> str:
+        return self.stderr_filename + '_diff.json.gz'
+
     # Serializing AGTestCommandResults should be used for DENORMALIZATION
     # ONLY.
     SERIALIZABLE_FIELDS = (
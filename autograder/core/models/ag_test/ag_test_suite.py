@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Tuple
 
 from django.core import exceptions
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import connection, models, transaction
 
 import autograder.core.fields as ag_fields
@@ -152,6 +153,19 @@ class AGTestSuite(AutograderModel):
                      have yet to be graded do not prevent members of a group from submitting
                      again.''')
 
+    max_parallel_test_cases = models.IntegerField(
+        default=1,
+        validators=[MinValueValidator(1),
+                    MaxValueValidator(constants.MAX_PARALLEL_AG_TEST_CASES)],
+        help_text=f'''The maximum number of this suite's test cases that can be run at the
+            same time in the suite's sandbox. Commands within a single test case are
+            always run in order.
+            Only set this to a value greater than 1 if the suite's test cases do not
+            depend on each other (e.g., they do not write to the same files).
+            Results are always recorded in test case order.
+            Must be >= 1
+            Must be <= {constants.MAX_PARALLEL_AG_TEST_CASES}''')
+
     normal_fdbk_config = ag_fields.ValidatedJSONField(
         AGTestSuiteFeedbackConfig, default=AGTestSuiteFeedbackConfig)
     ultimate_submission_fdbk_config = ag_fields.ValidatedJSONField(
@@ -249,6 +263,7 @@ class AGTestSuite(AutograderModel):
         'sandbox_docker_image',
         'allow_network_access',
         'deferred',
+        'max_parallel_test_cases',
 
         'normal_fdbk_config',
         'ultimate_submission_fdbk_config',
@@ -278,6 +293,7 @@ class AGTestSuite(AutograderModel):
 
         'allow_network_access',
         'deferred',
+        'max_parallel_test_cases',
         'sandbox_docker_image',
 
         'normal_fdbk_config',
@@ -1,13 +1,13 @@
 import os
-from typing import Any, Optional, TypedDict, cast
+from typing import Any, Dict, Iterable, List, TypedDict, cast
 
 from django.contrib.auth.models import User
 from django.core import validators
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models
-from django.db.models import Case, Value, When
+from django.db import models, transaction
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
 
 import autograder.core.utils as core_ut
 from autograder.core.constants import MAX_CHAR_FIELD_LEN
@@ -138,28 +138,52 @@ class Course(AutograderModel):
         return self.get_user_roles(user)['is_student']
 
     def get_user_roles(self, user: User) -> UserRolesDict:
-        # To prevent different permissions checks from causing redundant
-        # cache hits, we'll store the user roles in self.
-        user_roles_attr = f'_user_roles_{user.pk}'
-        if hasattr(self, user_roles_attr):
-            return cast(UserRolesDict, getattr(self, user_roles_attr))
+        return self.get_users_roles([user])[user.pk]
 
-        cache_key = f'course_{self.pk}_user_{user.pk}'
-        user_roles = cast(Optional[UserRolesDict], cache.get(cache_key))
-
-        if user_roles is None:
-            is_admin = self.admins.filter(pk=user.pk).exists()
-            user_roles = {
-                'is_admin': is_admin,
-                'is_staff': is_admin or self.staff.filter(pk=user.pk).exists(),
-                'is_handgrader': self.handgraders.filter(pk=user.pk).exists(),
-                'is_student': self.students.filter(pk=user.pk).exists(),
-            }
-            cache.set(cache_key, user_roles, timeout=None)
+    def get_users_roles(self, users: Iterable[User]) -> Dict[int, UserRolesDict]:
+        """
+        Returns a dictionary of (user pk -> roles in this Course) for
+        the given users. Roles that aren't cached are loaded with a
+        single query.
+        """
+        result: Dict[int, UserRolesDict] = {}
+        to_load: List[int] = []
+        for user in users:
+            # To prevent different permissions checks from causing redundant
+            # cache hits, we'll store the user roles in self.
+            user_roles_attr = f'_user_roles_{user.pk}'
+            if hasattr(self, user_roles_attr):
+                result[user.pk] = cast(UserRolesDict, getattr(self, user_roles_attr))
+            else:
+                to_load.append(user.pk)
+
+        if not to_load:
+            return result
+
+        generation = core_ut.get_cache_generation(_user_roles_cache_namespace(self.pk))
+        cache_keys = {
+            user_pk: _user_roles_cache_key(self.pk, generation, user_pk) for user_pk in to_load
+        }
+        cached = cache.get_many(list(cache_keys.values()))
+
+        not_cached = [user_pk for user_pk in to_load if cache_keys[user_pk] not in cached]
+        loaded = load_user_roles(self.pk, Q(pk__in=not_cached)) if not_cached else {}
+        cache.set_many(
+            {
+                cache_keys[user_pk]: loaded.get(user_pk, _NO_ROLES)
+                for user_pk in not_cached
+            },
+            timeout=_USER_ROLES_CACHE_TIMEOUT
+        )
 
-        setattr(self, user_roles_attr, user_roles)
+        for user_pk in to_load:
+            user_roles = cast(
+                UserRolesDict,
+                cached.get(cache_keys[user_pk], loaded.get(user_pk, _NO_ROLES)))
+            setattr(self, f'_user_roles_{user_pk}', user_roles)
+            result[user_pk] = user_roles
 
-        return user_roles
+        return result
 
     def is_allowed_guest(self, user: User) -> bool:
         """
@@ -255,5 +279,85 @@ class LateDaysRemaining(AutograderModel):
 
 
 def clear_cached_user_roles(course_pk: int) -> None:
-    keys = cache.client.iter_keys(f'course_{course_pk}_user_*', itersize=5000)
-    cache.delete_many(list(keys))
+    core_ut.bump_cache_generation(_user_roles_cache_namespace(course_pk))
+
+
+def refresh_cached_user_roles(course_pk: int) -> None:
+    """
+    Clears the cached user roles for the given course and, once the
+    current transaction commits, caches the roles of every user on
+    the course's rosters.
+    Use this instead of clear_cached_user_roles() after changing
+    a course's rosters.
+    """
+    clear_cached_user_roles(course_pk)
+    transaction.on_commit(lambda: _cache_roster_user_roles(course_pk))
+
+
+def _cache_roster_user_roles(course_pk: int) -> None:
+    generation = core_ut.get_cache_generation(_user_roles_cache_namespace(course_pk))
+    roster_roles = load_user_roles(
+        course_pk,
+        Q(courses_is_admin_for=course_pk)
+        | Q(courses_is_staff_for=course_pk)
+        | Q(courses_is_handgrader_for=course_pk)
+        | Q(courses_is_enrolled_in=course_pk)
+    )
+    cache.set_many(
+        {
+            _user_roles_cache_key(course_pk, generation, user_pk): user_roles
+            for user_pk, user_roles in roster_roles.items()
+        },
+        timeout=_USER_ROLES_CACHE_TIMEOUT
+    )
+
+
+def load_user_roles(course_pk: int, user_filter: Q) -> Dict[int, UserRolesDict]:
+    """
+    Loads the roles in the given course of the users that match
+    user_filter with a single query.
+    Returns a dictionary of (user pk -> roles).
+    """
+    def _has_role(roster: Any) -> Exists:
+        return Exists(roster.through.objects.filter(course=course_pk, user=OuterRef('pk')))
+
+    rows = User.objects.filter(
+        user_filter
+    ).annotate(
+        has_admin_role=_has_role(Course.admins),
+        has_staff_role=_has_role(Course.staff),
+        has_handgrader_role=_has_role(Course.handgraders),
+        has_student_role=_has_role(Course.students),
+    ).values_list(
+        'pk', 'has_admin_role', 'has_staff_role', 'has_handgrader_role', 'has_student_role'
+    ).distinct()
+
+    return {
+        user_pk: {
+            'is_admin': is_admin,
+            'is_staff': is_admin or is_staff,
+            'is_handgrader': is_handgrader,
+            'is_student': is_student,
+        }
+        for user_pk, is_admin, is_staff, is_handgrader, is_student in rows
+    }
+
+
+_NO_ROLES: UserRolesDict = {
+    'is_admin': False,
+    'is_staff': False,
+    'is_handgrader': False,
+    'is_student': False,
+}
+
+# Cached user roles are invalidated by bumping the course's cache
+# generation, so roles from old generations need to expire.
+_USER_ROLES_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _user_roles_cache_key(course_pk: int, generation: int, user_pk: int) -> str:
+    return f'course_{course_pk}_user_roles_{generation}_user_{user_pk}'
+
+
+def _user_roles_cache_namespace(course_pk: int) -> str:
+    return f'course_{course_pk}_user_roles'
@@ -4,9 +4,13 @@ import warnings
 from typing import Collection, Iterator, Optional
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Prefetch
 from django.db.models.query import QuerySet
 
+import autograder.core.utils as core_ut
+from autograder.core.ag_test_config_cache import get_test_config_version
 from autograder.core.submission_feedback import (
     AGTestPreLoader, MutationTestSuitePreLoader, SubmissionResultFeedback
 )
@@ -18,8 +22,95 @@ from .submission import Submission, get_submissions_with_results_queryset
 
 
 def get_ultimate_submission(group: Group, user: Optional[User] = None) -> Optional[Submission]:
+    """
+    Returns the given group's ultimate submission, or None if the
+    group has no finished submissions.
+    If user is not None, returns the ultimate submission for that
+    member of the group, ignoring submissions that don't count for
+    them.
+
+    The result is cached until clear_cached_ultimate_submission() is
+    called for the group or the project's ultimate submission policy
+    or test configuration changes.
+    """
+    cache_key = _ultimate_submission_cache_key(group, user)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        if cached['submission_pk'] is None:
+            return None
+
+        # Load the same related data as _load_ultimate_submission() so
+        # that callers don't make extra queries on a cache hit.
+        submission = get_submissions_with_results_queryset().filter(
+            pk=cached['submission_pk']).first()
+        if submission is not None:
+            submission.group = group
+            return submission
+
+    ultimate_submission = _load_ultimate_submission(group, user)
+    cache.set(
+        cache_key,
+        {'submission_pk': ultimate_submission.pk if ultimate_submission is not None else None},
+        timeout=_ULTIMATE_SUBMISSION_CACHE_TIMEOUT
+    )
+    return ultimate_submission
+
+
+def clear_cached_ultimate_submission(group_pk: int) -> None:
+    """
+    Invalidates the cached ultimate submissions of the given group and
+    its members. Call this whenever one of the group's submissions
+    changes in a way that can change which one is the ultimate
+    submission (e.g., its status, results, or does_not_count_for).
+
+    The cache is cleared immediately and again when the current
+    transaction commits. Otherwise, a request that loaded the group's
+    submissions before the transaction committed could cache an
+    outdated ultimate submission.
+    """
+    namespace = _ultimate_submission_cache_namespace(group_pk)
+    core_ut.bump_cache_generation(namespace)
+    transaction.on_commit(lambda: core_ut.bump_cache_generation(namespace))
+
+
+def refresh_cached_ultimate_submission(group: Group) -> None:
+    """
+    Clears the given group's cached ultimate submissions and then
+    caches its ultimate submission.
+    """
+    clear_cached_ultimate_submission(group.pk)
+    get_ultimate_submission(group)
+
+
+# Cached ultimate submissions are invalidated by bumping the group's
+# cache generation, so entries from old generations need to expire.
+_ULTIMATE_SUBMISSION_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _ultimate_submission_cache_key(group: Group, user: Optional[User]) -> str:
+    # The cache generation (and test config version) must be loaded
+    # before the group's submissions so that results computed from
+    # outdated submissions are cached under an outdated key.
+    project = group.project
+    generation = core_ut.get_cache_generation(_ultimate_submission_cache_namespace(group.pk))
+    key = (f'group_{group.pk}_ultimate_submission_{generation}'
+           f'_{project.ultimate_submission_policy}_user_{user.pk if user is not None else None}')
+
+    # Which submission is best depends on the project's test configuration.
+    if project.ultimate_submission_policy != UltimateSubmissionPolicy.most_recent:
+        key += f'_{get_test_config_version(project.pk)}'
+
+    return key
+
+
+def _ultimate_submission_cache_namespace(group_pk: int) -> str:
+    return f'group_{group_pk}_ultimate_submission'
+
+
+def _load_ultimate_submission(group: Group, user: Optional[User]) -> Optional[Submission]:
     project = group.project
-    [group] = _prefetch_submissions(project, [group])
+    # Choosing the ultimate submission only needs point totals.
+    [group] = _prefetch_submissions(project, [group], totals_only=True)
     if project.ultimate_submission_policy == UltimateSubmissionPolicy.most_recent:
         return _get_most_recent_submission(group, user)
     elif project.ultimate_submission_policy == UltimateSubmissionPolicy.best_with_normal_fdbk:
@@ -47,7 +138,8 @@ def get_ultimate_submission(group: Group, user: Optional[User] = None) -> Option
 
 def get_ultimate_submissions(
     project: Project,
-    *, filter_groups: Optional[Collection[Group]], ag_test_preloader: AGTestPreLoader
+    *, filter_groups: Optional[Collection[Group]], ag_test_preloader: AGTestPreLoader,
+    totals_only: bool = False
 ) -> Iterator[SubmissionResultFeedback]:
     """
     :param project: The Project to load final graded submissions from.
@@ -56,10 +148,13 @@ def get_ultimate_submissions(
         for all groups belonging to project.
     :param ag_test_preloader: An instance of AGTestPreloader that can be
         used to efficiently fetch test case data for project.
+    :param totals_only: When True, the submissions' denormalized AG test
+        results aren't loaded up front. Pass True when only the
+        feedback's point totals will be used.
     :return: An iterator of feedback results for ultimate submissions
         belonging to project.
     """
-    filter_groups = _prefetch_submissions(project, filter_groups)
+    filter_groups = _prefetch_submissions(project, filter_groups, totals_only=totals_only)
 
     mutation_test_suite_preloader = MutationTestSuitePreLoader(project)
 
@@ -104,10 +199,16 @@ def get_ultimate_submissions(
 
 def _prefetch_submissions(
     project: Project,
-    groups: Optional[Collection[Group]]
+    groups: Optional[Collection[Group]],
+    *, totals_only: bool = False
 ) -> QuerySet[Group]:
     finished_submissions_queryset = Submission.objects.filter(
         status=Submission.GradingStatus.finished_grading)
+    if totals_only:
+        # The results are only read if a submission's denormalized
+        # point totals are out of date.
+        finished_submissions_queryset = finished_submissions_queryset.defer(
+            'denormalized_ag_test_results', 'compact_ag_test_results')
 
     base_group_queryset = project.groups
     if groups is not None:
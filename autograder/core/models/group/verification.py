@@ -40,9 +40,10 @@ def verify_users_have_same_enrollment_status(users: Iterable[User], project: Pro
     If these conditions are not met, then ValidationError will be raised.
     """
     users = tuple(users)
+    roles = project.course.get_users_roles(users)
 
     num_staff = utils.count_if(
-        users, lambda member: project.course.is_staff(member))
+        users, lambda member: roles[member.pk]['is_staff'])
 
     if num_staff != 0:
         if num_staff == len(users):
@@ -55,7 +56,7 @@ def verify_users_have_same_enrollment_status(users: Iterable[User], project: Pro
         return
 
     num_enrolled = utils.count_if(
-        users, lambda member: project.course.is_student(member))
+        users, lambda member: roles[member.pk]['is_student'])
 
     if num_enrolled:
         if num_enrolled != len(users):
@@ -155,12 +156,15 @@ def verify_users_not_in_other_group(
     """
     users = tuple(users)
 
-    for member in users:
-        query = member.groups_is_member_of.filter(project=project)
-        if group_to_ignore:
-            query = query.exclude(pk=group_to_ignore.pk)
+    other_groups = project.groups.filter(members__in=users)
+    if group_to_ignore:
+        other_groups = other_groups.exclude(pk=group_to_ignore.pk)
+    # This can include members of those groups that aren't in users,
+    # which is fine since we only check the members of users.
+    other_group_member_pks = set(other_groups.values_list('members', flat=True))
 
-        if query.exists():
+    for member in users:
+        if member.pk in other_group_member_pks:
             raise exceptions.ValidationError({
                 error_dict_field_name: (
                     "User {} is already part of a submission "
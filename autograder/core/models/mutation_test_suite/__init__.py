@@ -1,4 +1,5 @@
 from .mutation_test_suite import BugsExposedFeedbackLevel as BugsExposedFeedbackLevel
 from .mutation_test_suite import MutationTestSuite as MutationTestSuite
 from .mutation_test_suite import MutationTestSuiteFeedbackConfig as MutationTestSuiteFeedbackConfig
+from .mutation_test_suite import StudentTestOrdering as StudentTestOrdering
 from .mutation_test_suite_result import MutationTestSuiteResult as MutationTestSuiteResult
@@ -21,6 +21,23 @@ class BugsExposedFeedbackLevel(core_ut.OrderedEnum):
     all_bug_names = 'all_bug_names'
 
 
+class StudentTestOrdering(models.TextChoices):
+    """
+    Options for the order in which student tests are run against each
+    buggy impl when they are run individually.
+    """
+    # The order in which the tests were discovered.
+    discovery_order = 'discovery_order'
+
+    # Tests that exposed the buggy impl (or, as a tie-breaker, any
+    # buggy impl) most often in the group's earlier submissions are
+    # run first.
+    group_history = 'group_history'
+
+    # Like group_history, but using recent submissions from all groups.
+    project_history = 'project_history'
+
+
 class MutationTestSuiteFeedbackConfig(DictSerializable):
     """
     Contains feedback options for a MutationTestSuite
@@ -253,6 +270,19 @@ class MutationTestSuite(AutograderModel):
                      """.format(STUDENT_TEST_NAME_PLACEHOLDER)
     )
 
+    max_parallel_validity_checks = models.IntegerField(
+        default=1,
+        validators=[MinValueValidator(1),
+                    MaxValueValidator(constants.MAX_PARALLEL_VALIDITY_CHECKS)],
+        help_text=f'''The maximum number of student tests whose validity can be
+            checked at the same time in the suite's sandbox.
+            Only set this to a value greater than 1 if
+            student_test_validity_check_command can safely be run for different
+            student tests at the same time.
+            Output is always recorded in the order the student tests were discovered.
+            Must be >= 1
+            Must be <= {constants.MAX_PARALLEL_VALIDITY_CHECKS}''')
+
     grade_buggy_impl_command = ag_fields.ValidatedJSONField(
         Command,
         default=new_make_default_grade_buggy_impl_command,
@@ -283,6 +313,49 @@ class MutationTestSuite(AutograderModel):
         """.strip()
     )
 
+    student_test_ordering = models.TextField(
+        choices=StudentTestOrdering.choices,
+        default=StudentTestOrdering.discovery_order,
+        blank=True,
+        help_text=f"""The order in which valid student tests are run against each buggy
+            impl when grade_buggy_impl_command contains {STUDENT_TEST_NAME_PLACEHOLDER}.
+            Since no more tests are run against a buggy impl once one of them
+            exposes it, running the tests most likely to expose each buggy impl
+            first reduces the number of commands run. The set of exposed bugs
+            is the same for every ordering.
+            "discovery_order": The order in which the tests were discovered.
+            "group_history": Tests that exposed the buggy impl most often in the
+                group's earlier submissions are run first.
+            "project_history": Tests that exposed the buggy impl most often in
+                recent submissions from all groups are run first.""")
+
+    max_parallel_buggy_impls = models.IntegerField(
+        default=1,
+        validators=[MinValueValidator(1),
+                    MaxValueValidator(constants.MAX_PARALLEL_BUGGY_IMPLS)],
+        help_text=f'''The maximum number of buggy impls that student tests can be run
+            against at the same time in the suite's sandbox. When student tests are
+            run individually, each buggy impl's commands are still run in order, and
+            no more tests are run against a buggy impl once one of them exposes it.
+            Only set this to a value greater than 1 if grade_buggy_impl_command can
+            safely be run for different buggy impls at the same time (e.g., it does
+            not build every buggy impl into the same file).
+            Output is always recorded in the order of buggy_impl_names.
+            Must be >= 1
+            Must be <= {constants.MAX_PARALLEL_BUGGY_IMPLS}''')
+
+    cache_buggy_impl_results = models.BooleanField(
+        default=False,
+        help_text='''When true, the return code and output of each grade_buggy_impl_command
+            run are cached and reused when grading later submissions whose
+            student files are identical. Cached results are keyed by the contents
+            of the student and instructor files added to the sandbox, the sandbox
+            docker image, the setup and grade_buggy_impl commands (including
+            their resource limits), and the names of the buggy impl and student
+            tests being run. Commands that time out are never cached.
+            Only set this to true if grade_buggy_impl_command always produces the
+            same result for the same inputs.''')
+
     points_per_exposed_bug = models.DecimalField(
         decimal_places=2, max_digits=4,
         default=0, validators=[MinValueValidator(0)],
@@ -417,7 +490,11 @@ class MutationTestSuite(AutograderModel):
         'test_name_discovery_whitespace_handling',
         'max_num_student_tests',
         'student_test_validity_check_command',
+        'max_parallel_validity_checks',
         'grade_buggy_impl_command',
+        'student_test_ordering',
+        'max_parallel_buggy_impls',
+        'cache_buggy_impl_results',
 
         'points_per_exposed_bug',
         'max_points',
@@ -448,7 +525,11 @@ class MutationTestSuite(AutograderModel):
         'test_name_discovery_whitespace_handling',
         'max_num_student_tests',
         'student_test_validity_check_command',
+        'max_parallel_validity_checks',
         'grade_buggy_impl_command',
+        'student_test_ordering',
+        'max_parallel_buggy_impls',
+        'cache_buggy_impl_results',
 
         'points_per_exposed_bug',
         'max_points',
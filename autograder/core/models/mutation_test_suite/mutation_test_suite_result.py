@@ -61,6 +61,11 @@ class MutationTestSuiteResult(AutograderModel):
         blank=True, default=list,
         help_text="""The names of instructor buggy implementations that were exposed
                      by the student's test cases.""")
+    exposing_tests = models.JSONField(
+        default=dict, blank=True,
+        help_text="""Maps the names of exposed buggy impls to the name of the student
+                     test that exposed them. Only recorded when student tests are
+                     run against buggy impls individually.""")
 
     setup_result = models.OneToOneField(
         AGCommandResult,
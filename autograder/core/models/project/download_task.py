@@ -1,3 +1,4 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
 from autograder.core.models.ag_model_base import AutograderModelManager
@@ -24,6 +25,15 @@ class DownloadTask(Task):
             included in final_graded_submission_scores download CSV files.'''
     )
     result_filename = models.TextField(blank=True)
+    chunk_progress = ArrayField(
+        models.IntegerField(), blank=True, default=list,
+        help_text='''For downloads that are generated in chunks, a list of
+            percentages indicating how close each chunk is to completion.''')
+    merge_started = models.BooleanField(
+        default=False,
+        help_text='''For downloads that are generated in chunks, whether a
+            task has been started to merge the finished chunks. Used to
+            make sure that only one merge task runs.''')
 
     SERIALIZABLE_FIELDS = (
         'pk',
@@ -65,6 +65,18 @@ class RerunSubmissionsTask(Task):
         help_text="""When rerun_all_mutation_test_suites is False, specifies which
                      mutation test suites should be rerun.""")
 
+    rerun_affected_only = models.BooleanField(
+        default=False,
+        help_text="""When True, AGTestCommands whose inputs (command, stdin,
+                     resource limits, instructor files, sandbox image, and
+                     suite setup) have not changed since a submission's
+                     result was recorded are not rerun. If only a command's
+                     expected output or expected return code has changed,
+                     the stored result is re-checked without rerunning the
+                     command. Commands whose inputs have changed are rerun
+                     along with the rest of their AGTestCase.
+                     MutationTestSuites are always rerun.""")
+
     is_cancelled = models.BooleanField(
         blank=True, default=False,
         help_text="Indicates whether the task has been cancelled by the user."
@@ -186,4 +198,5 @@ class RerunSubmissionsTask(Task):
         'ag_test_suite_data',
         'rerun_all_mutation_test_suites',
         'mutation_suite_pks',
+        'rerun_affected_only',
     ]
@@ -303,6 +303,39 @@ class Submission(ag_model_base.AutograderModel):
         """
     )
 
+    compact_ag_test_results = models.BinaryField(
+        blank=True, null=True, default=None,
+        help_text="""When not None, stores the submission's denormalized AG test
+                     results (in place of denormalized_ag_test_results) in
+                     the compact binary format described in
+                     autograder.core.compact_ag_test_results.
+                     Submissions' results are stored in this format when
+                     settings.COMPACT_DENORMALIZED_AG_TEST_RESULTS is True."""
+    )
+
+    denormalized_point_totals = models.JSONField(
+        default=dict, blank=True,
+        help_text="""Stores the submission's total points and total points
+                     possible in each feedback category so that they don't
+                     need to be recomputed from the submission's results.
+                     The totals are only used if they were computed with the
+                     project's current test config version and the
+                     submission's current status.
+                     To update this field, use
+                     autograder.core.submission_feedback.update_denormalized_point_totals
+
+                     Data format:
+{
+    "test_config_version": <str>,
+    "status": <str>,
+    "<feedback category>": {
+        "total_points": <int or decimal string>,
+        "total_points_possible": <int or decimal string>
+    }
+}
+        """
+    )
+
     @property
     def position_in_queue(self) -> int:
         """
@@ -1,18 +1,24 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
+import json
 import os
 import tempfile
 from decimal import Decimal
 from pathlib import Path
 from typing import (
-    BinaryIO, Dict, Iterable, List, Mapping, Optional, Protocol, Sequence, TypedDict, Union, cast
+    BinaryIO, Callable, Dict, Iterable, List, Literal, Mapping, Optional, Protocol, Sequence,
+    Tuple, TypedDict, TypeVar, Union, cast
 )
 
+from django.conf import settings
 from django.db import transaction
-from django.db.models import Prefetch
-from django.utils.functional import cached_property
+from django.db.models import Model, Prefetch, QuerySet
 
-from autograder.core.models import AGTestCommandResult, MutationTestSuiteResult, Submission
+from autograder.core.models import (
+    AGTestCommandResult, MutationTestSuiteResult, Submission, get_submissions_with_results_queryset
+)
 from autograder.core.models.ag_model_base import ToDictMixin
 from autograder.core.models.ag_test.ag_test_case import AGTestCase, AGTestCaseFeedbackConfig
 from autograder.core.models.ag_test.ag_test_case_result import AGTestCaseResult
@@ -24,14 +30,44 @@ from autograder.core.models.ag_test.ag_test_suite import AGTestSuite, AGTestSuit
 from autograder.core.models.ag_test.ag_test_suite_result import AGTestSuiteResult
 from autograder.core.models.ag_test.feedback_category import FeedbackCategory
 from autograder.core.models.mutation_test_suite import MutationTestSuite
-from autograder.core.models.project import Project
+from autograder.core.models.project import InstructorFile, Project
 
 from . import utils as core_ut
+from .ag_test_config_cache import get_test_config_version, load_test_config
+from .compact_ag_test_results import CompactAGTestResults, encode_ag_test_results
+
+_ModelType = TypeVar('_ModelType', bound=Model)
 
 
-class AGTestPreLoader:
+class _TestConfigPreLoader:
+    """
+    Base class for objects that load a project's test configuration
+    through autograder.core.ag_test_config_cache. All of the configuration
+    loaded by one instance comes from the same test config version.
+    """
     def __init__(self, project: Project):
         self._project = project
+        self._test_config_version: Optional[str] = None
+
+    def _load(self, kind: str,
+              load_fn: Callable[[], Iterable[_ModelType]]) -> Dict[int, _ModelType]:
+        return load_test_config(self._project.pk, self.test_config_version, kind, load_fn)
+
+    @property
+    def test_config_version(self) -> str:
+        """
+        The test config version that this object loads configuration
+        from. Loaded the first time it's needed.
+        """
+        if self._test_config_version is None:
+            self._test_config_version = get_test_config_version(self._project.pk)
+
+        return self._test_config_version
+
+
+class AGTestPreLoader(_TestConfigPreLoader):
+    def __init__(self, project: Project):
+        super().__init__(project)
 
         self._suites_by_pk: Optional[Dict[int, AGTestSuite]] = None
         self._cases_by_pk: Optional[Dict[int, AGTestCase]] = None
@@ -43,10 +79,8 @@ class AGTestPreLoader:
     @property
     def _suites(self) -> Dict[int, AGTestSuite]:
         if self._suites_by_pk is None:
-            suites = AGTestSuite.objects.filter(project=self._project)
-            self._suites_by_pk = {
-                suite.pk: suite for suite in suites
-            }
+            self._suites_by_pk = self._load(
+                'ag_test_suites', lambda: AGTestSuite.objects.filter(project=self._project))
 
         return self._suites_by_pk
 
@@ -56,10 +90,9 @@ class AGTestPreLoader:
     @property
     def _cases(self) -> Dict[int, AGTestCase]:
         if self._cases_by_pk is None:
-            cases = AGTestCase.objects.filter(ag_test_suite__project=self._project)
-            self._cases_by_pk = {
-                case.pk: case for case in cases
-            }
+            self._cases_by_pk = self._load(
+                'ag_test_cases',
+                lambda: AGTestCase.objects.filter(ag_test_suite__project=self._project))
 
         return self._cases_by_pk
 
@@ -69,17 +102,17 @@ class AGTestPreLoader:
     @property
     def _cmds(self) -> Dict[int, AGTestCommand]:
         if self._cmds_by_pk is None:
-            cmds = AGTestCommand.objects.filter(ag_test_case__ag_test_suite__project=self._project)
-            self._cmds_by_pk = {
-                cmd.pk: cmd for cmd in cmds
-            }
+            self._cmds_by_pk = self._load(
+                'ag_test_commands',
+                lambda: AGTestCommand.objects.filter(
+                    ag_test_case__ag_test_suite__project=self._project))
 
         return self._cmds_by_pk
 
 
-class MutationTestSuitePreLoader:
+class MutationTestSuitePreLoader(_TestConfigPreLoader):
     def __init__(self, project: Project):
-        self._project = project
+        super().__init__(project)
         self._suites_by_pk: Optional[Dict[int, MutationTestSuite]] = None
 
     def get_mutation_test_suite(self, suite_pk: int) -> MutationTestSuite:
@@ -88,10 +121,9 @@ class MutationTestSuitePreLoader:
     @property
     def _suites(self) -> Dict[int, MutationTestSuite]:
         if self._suites_by_pk is None:
-            suites = MutationTestSuite.objects.filter(project=self._project)
-            self._suites_by_pk = {
-                suite.pk: suite for suite in suites
-            }
+            self._suites_by_pk = self._load(
+                'mutation_test_suites',
+                lambda: MutationTestSuite.objects.filter(project=self._project))
 
         return self._suites_by_pk
 
@@ -109,17 +141,115 @@ class AGTestCaseResultDict(TypedDict):
 
 
 class DenormalizedAGTestSuiteResult:
+    __slots__ = ('ag_test_suite_result', '_ag_test_case_results')
+
     def __init__(self, ag_test_suite_result: AGTestSuiteResultProtocol,
-                 ag_test_case_results: List[DenormalizedAGTestCaseResult]):
+                 ag_test_case_results: Optional[List[DenormalizedAGTestCaseResult]]):
+        """
+        :param ag_test_case_results: If None, the case results are
+            loaded by _load_ag_test_case_results() the first time
+            they're needed.
+        """
         self.ag_test_suite_result = ag_test_suite_result
-        self.ag_test_case_results = ag_test_case_results
+        self._ag_test_case_results = ag_test_case_results
+
+    @property
+    def ag_test_case_results(self) -> List[DenormalizedAGTestCaseResult]:
+        if self._ag_test_case_results is None:
+            self._ag_test_case_results = self._load_ag_test_case_results()
+
+        return self._ag_test_case_results
+
+    def _load_ag_test_case_results(self) -> List[DenormalizedAGTestCaseResult]:
+        raise NotImplementedError
+
+
+class _SerializedDenormalizedAGTestSuiteResult(DenormalizedAGTestSuiteResult):
+    """
+    An AG test suite result loaded from a submission's
+    denormalized_ag_test_results. Its case results are wrapped the
+    first time they're needed.
+    """
+    __slots__ = ('_suite_result_dict',)
+
+    def __init__(self, suite_result_dict: AGTestSuiteResultDict):
+        super().__init__(
+            SerializedAGTestSuiteResultWrapper(cast(Mapping[str, object], suite_result_dict)),
+            None)
+        self._suite_result_dict = suite_result_dict
+
+    def _load_ag_test_case_results(self) -> List[DenormalizedAGTestCaseResult]:
+        return [
+            _SerializedDenormalizedAGTestCaseResult(case_result)
+            for case_result in self._suite_result_dict['ag_test_case_results'].values()
+        ]
+
+
+class _CompactDenormalizedAGTestSuiteResult(DenormalizedAGTestSuiteResult):
+    """
+    An AG test suite result loaded from a submission's
+    compact_ag_test_results. Its case results are decoded the first
+    time they're needed.
+    """
+    __slots__ = ('_compact_results', '_suite_id')
+
+    def __init__(self, compact_results: CompactAGTestResults, suite_id: PkStr):
+        super().__init__(
+            SerializedAGTestSuiteResultWrapper(compact_results.get_suite_result(suite_id)),
+            None)
+        self._compact_results = compact_results
+        self._suite_id = suite_id
+
+    def _load_ag_test_case_results(self) -> List[DenormalizedAGTestCaseResult]:
+        return [
+            _SerializedDenormalizedAGTestCaseResult(cast(AGTestCaseResultDict, case_result))
+            for case_result in self._compact_results.get_case_results(self._suite_id).values()
+        ]
 
 
 class DenormalizedAGTestCaseResult:
+    __slots__ = ('ag_test_case_result', '_ag_test_command_results')
+
     def __init__(self, ag_test_case_result: AGTestCaseResultProtocol,
-                 ag_test_command_results: Sequence[AGTestCommandResultProtocol]):
+                 ag_test_command_results: Optional[Sequence[AGTestCommandResultProtocol]]):
+        """
+        :param ag_test_command_results: If None, the command results
+            are loaded by _load_ag_test_command_results() the first time
+            they're needed.
+        """
         self.ag_test_case_result = ag_test_case_result
-        self.ag_test_command_results = ag_test_command_results
+        self._ag_test_command_results = ag_test_command_results
+
+    @property
+    def ag_test_command_results(self) -> Sequence[AGTestCommandResultProtocol]:
+        if self._ag_test_command_results is None:
+            self._ag_test_command_results = self._load_ag_test_command_results()
+
+        return self._ag_test_command_results
+
+    def _load_ag_test_command_results(self) -> Sequence[AGTestCommandResultProtocol]:
+        raise NotImplementedError
+
+
+class _SerializedDenormalizedAGTestCaseResult(DenormalizedAGTestCaseResult):
+    """
+    An AG test case result loaded from a submission's denormalized AG
+    test results. Its command results are wrapped the first time
+    they're needed.
+    """
+    __slots__ = ('_case_result_dict',)
+
+    def __init__(self, case_result_dict: AGTestCaseResultDict):
+        super().__init__(
+            SerializedAGTestCaseResultWrapper(cast(Mapping[str, object], case_result_dict)),
+            None)
+        self._case_result_dict = case_result_dict
+
+    def _load_ag_test_command_results(self) -> Sequence[AGTestCommandResultProtocol]:
+        return [
+            SerializedAGTestCommandResultWrapper(cmd_result)
+            for cmd_result in self._case_result_dict['ag_test_command_results'].values()
+        ]
 
 
 class AGTestSuiteResultProtocol(Protocol):
@@ -161,50 +291,48 @@ class AGTestSuiteResultProtocol(Protocol):
 
 
 class SerializedAGTestSuiteResultWrapper:
-    def __init__(self, suite_result_dict: Mapping[str, object]):
-        self._suite_result_dict = suite_result_dict
-
-    @property
-    def pk(self) -> int:
-        return cast(int, self._suite_result_dict['pk'])
-
-    @property
-    def ag_test_suite_id(self) -> int:
-        return cast(int, self._suite_result_dict['ag_test_suite_id'])
-
-    @property
-    def submission_id(self) -> int:
-        return cast(int, self._suite_result_dict['submission_id'])
-
-    @property
-    def setup_return_code(self) -> int:
-        return cast(int, self._suite_result_dict['setup_return_code'])
-
-    @property
-    def setup_timed_out(self) -> bool:
-        return cast(bool, self._suite_result_dict['setup_timed_out'])
+    """
+    Provides the AGTestSuiteResultProtocol attributes of a serialized
+    AG test suite result. The serialized fields are copied into slots
+    up front so that reading them is a plain attribute lookup.
+    """
+    __slots__ = (
+        'pk',
+        'ag_test_suite_id',
+        'submission_id',
+        'setup_return_code',
+        'setup_timed_out',
+        'setup_stdout_truncated',
+        'setup_stderr_truncated',
+        '_ag_test_suite_result',
+    )
 
-    @property
-    def setup_stdout_truncated(self) -> bool:
-        return cast(bool, self._suite_result_dict['setup_stdout_truncated'])
+    def __init__(self, suite_result_dict: Mapping[str, object]):
+        self.pk = cast(int, suite_result_dict['pk'])
+        self.ag_test_suite_id = cast(int, suite_result_dict['ag_test_suite_id'])
+        self.submission_id = cast(int, suite_result_dict['submission_id'])
+        self.setup_return_code = cast(int, suite_result_dict['setup_return_code'])
+        self.setup_timed_out = cast(bool, suite_result_dict['setup_timed_out'])
+        self.setup_stdout_truncated = cast(bool, suite_result_dict['setup_stdout_truncated'])
+        self.setup_stderr_truncated = cast(bool, suite_result_dict['setup_stderr_truncated'])
 
-    @property
-    def setup_stderr_truncated(self) -> bool:
-        return cast(bool, self._suite_result_dict['setup_stderr_truncated'])
+        self._ag_test_suite_result: Optional[AGTestSuiteResult] = None
 
     # ------------------------------------------------------------------
 
     @property
     def setup_stdout_filename(self) -> str:
-        return self._ag_test_suite_result.setup_stdout_filename
+        return self._load_ag_test_suite_result().setup_stdout_filename
 
     @property
     def setup_stderr_filename(self) -> str:
-        return self._ag_test_suite_result.setup_stderr_filename
+        return self._load_ag_test_suite_result().setup_stderr_filename
+
+    def _load_ag_test_suite_result(self) -> AGTestSuiteResult:
+        if self._ag_test_suite_result is None:
+            self._ag_test_suite_result = AGTestSuiteResult.objects.get(pk=self.pk)
 
-    @cached_property
-    def _ag_test_suite_result(self) -> AGTestSuiteResult:
-        return AGTestSuiteResult.objects.get(pk=self.pk)
+        return self._ag_test_suite_result
 
 
 class AGTestCaseResultProtocol(Protocol):
@@ -222,20 +350,12 @@ class AGTestCaseResultProtocol(Protocol):
 
 
 class SerializedAGTestCaseResultWrapper:
-    def __init__(self, case_result_dict: Mapping[str, object]):
-        self._case_result_dict = case_result_dict
-
-    @property
-    def pk(self) -> int:
-        return cast(int, self._case_result_dict['pk'])
+    __slots__ = ('pk', 'ag_test_case_id', 'ag_test_suite_result_id')
 
-    @property
-    def ag_test_case_id(self) -> int:
-        return cast(int, self._case_result_dict['ag_test_case_id'])
-
-    @property
-    def ag_test_suite_result_id(self) -> int:
-        return cast(int, self._case_result_dict['ag_test_suite_result_id'])
+    def __init__(self, case_result_dict: Mapping[str, object]):
+        self.pk = cast(int, case_result_dict['pk'])
+        self.ag_test_case_id = cast(int, case_result_dict['ag_test_case_id'])
+        self.ag_test_suite_result_id = cast(int, case_result_dict['ag_test_suite_result_id'])
 
 
 class AGTestCommandResultProtocol(Protocol):
@@ -287,102 +407,113 @@ class AGTestCommandResultProtocol(Protocol):
     def stderr_filename(self) -> str:
         ...
 
-
-class SerializedAGTestCommandResultWrapper:
-    def __init__(self, cmd_result_dict: Dict[str, object]):
-        self._cmd_result_dict = cmd_result_dict
-
     @property
-    def pk(self) -> int:
-        return cast(int, self._cmd_result_dict['pk'])
+    def stdout_diff_filename(self) -> str:
+        ...
 
     @property
-    def ag_test_command_id(self) -> int:
-        return cast(int, self._cmd_result_dict['ag_test_command_id'])
+    def stderr_diff_filename(self) -> str:
+        ...
 
     @property
-    def ag_test_case_result_id(self) -> int:
-        return cast(int, self._cmd_result_dict['ag_test_case_result_id'])
+    def diff_cache_key(self) -> str:
+        ...
 
     @property
-    def return_code(self) -> int:
-        return cast(int, self._cmd_result_dict['return_code'])
+    def stdout_diff_size(self) -> Optional[int]:
+        ...
 
     @property
-    def return_code_correct(self) -> bool:
-        return cast(bool, self._cmd_result_dict['return_code_correct'])
+    def stderr_diff_size(self) -> Optional[int]:
+        ...
 
-    @property
-    def stdout_correct(self) -> bool:
-        return cast(bool, self._cmd_result_dict['stdout_correct'])
+
+class SerializedAGTestCommandResultWrapper:
+    """
+    Provides the AGTestCommandResultProtocol attributes of a serialized
+    AG test command result. See SerializedAGTestSuiteResultWrapper.
+    """
+    __slots__ = (
+        'pk',
+        'ag_test_command_id',
+        'ag_test_case_result_id',
+        'return_code',
+        'return_code_correct',
+        'stdout_correct',
+        'stderr_correct',
+        'timed_out',
+        'stdout_truncated',
+        'stderr_truncated',
+        '_ag_test_command_result',
+    )
+
+    def __init__(self, cmd_result_dict: Mapping[str, object]):
+        self.pk = cast(int, cmd_result_dict['pk'])
+        self.ag_test_command_id = cast(int, cmd_result_dict['ag_test_command_id'])
+        self.ag_test_case_result_id = cast(int, cmd_result_dict['ag_test_case_result_id'])
+        self.return_code = cast(int, cmd_result_dict['return_code'])
+        self.return_code_correct = cast(bool, cmd_result_dict['return_code_correct'])
+        self.stdout_correct = cast(bool, cmd_result_dict['stdout_correct'])
+        self.stderr_correct = cast(bool, cmd_result_dict['stderr_correct'])
+        self.timed_out = cast(bool, cmd_result_dict['timed_out'])
+        self.stdout_truncated = cast(bool, cmd_result_dict['stdout_truncated'])
+        self.stderr_truncated = cast(bool, cmd_result_dict['stderr_truncated'])
+
+        self._ag_test_command_result: Optional[AGTestCommandResult] = None
+
+    # ------------------------------------------------------------------
 
     @property
-    def stderr_correct(self) -> bool:
-        return cast(bool, self._cmd_result_dict['stderr_correct'])
+    def stdout_filename(self) -> str:
+        return self._load_ag_test_command_result().stdout_filename
 
     @property
-    def timed_out(self) -> bool:
-        return cast(bool, self._cmd_result_dict['timed_out'])
+    def stderr_filename(self) -> str:
+        return self._load_ag_test_command_result().stderr_filename
 
     @property
-    def stdout_truncated(self) -> bool:
-        return cast(bool, self._cmd_result_dict['stdout_truncated'])
+    def stdout_diff_filename(self) -> str:
+        return self._load_ag_test_command_result().stdout_diff_filename
 
     @property
-    def stderr_truncated(self) -> bool:
-        return cast(bool, self._cmd_result_dict['stderr_truncated'])
+    def stderr_diff_filename(self) -> str:
+        return self._load_ag_test_command_result().stderr_diff_filename
 
-    # ------------------------------------------------------------------
+    @property
+    def diff_cache_key(self) -> str:
+        return self._load_ag_test_command_result().diff_cache_key
 
     @property
-    def stdout_filename(self) -> str:
-        return self._ag_test_command_result.stdout_filename
+    def stdout_diff_size(self) -> Optional[int]:
+        return self._load_ag_test_command_result().stdout_diff_size
 
     @property
-    def stderr_filename(self) -> str:
-        return self._ag_test_command_result.stderr_filename
+    def stderr_diff_size(self) -> Optional[int]:
+        return self._load_ag_test_command_result().stderr_diff_size
 
-    @cached_property
-    def _ag_test_command_result(self) -> AGTestCommandResult:
-        return AGTestCommandResult.objects.get(pk=self.pk)
+    def _load_ag_test_command_result(self) -> AGTestCommandResult:
+        if self._ag_test_command_result is None:
+            self._ag_test_command_result = AGTestCommandResult.objects.get(pk=self.pk)
+
+        return self._ag_test_command_result
 
 
 def _deserialize_denormed_ag_test_results(
     submission: Submission
 ) -> List[DenormalizedAGTestSuiteResult]:
-    result = []
-    data = cast(Dict[PkStr, AGTestSuiteResultDict], submission.denormalized_ag_test_results)
-    for serialized_suite_result in data.values():
-        deserialized_suite_result = SerializedAGTestSuiteResultWrapper(serialized_suite_result)
-
-        case_results = [
-            _deserialize_denormed_ag_test_case_result(case_result)
-            for case_result in serialized_suite_result['ag_test_case_results'].values()
+    if submission.compact_ag_test_results is not None:
+        compact_results = CompactAGTestResults(bytes(submission.compact_ag_test_results))
+        return [
+            _CompactDenormalizedAGTestSuiteResult(compact_results, suite_id)
+            for suite_id in compact_results
         ]
 
-        result.append(DenormalizedAGTestSuiteResult(deserialized_suite_result, case_results))
-
-    return result
-
-
-def _deserialize_denormed_ag_test_case_result(
-    case_result: AGTestCaseResultDict
-) -> DenormalizedAGTestCaseResult:
-    deserialized_case_result = SerializedAGTestCaseResultWrapper(case_result)
-
-    cmd_results = [
-        _deserialize_denormed_ag_test_cmd_result(cmd_result)
-        for cmd_result in case_result['ag_test_command_results'].values()
+    data = cast(Dict[PkStr, AGTestSuiteResultDict], submission.denormalized_ag_test_results)
+    return [
+        _SerializedDenormalizedAGTestSuiteResult(serialized_suite_result)
+        for serialized_suite_result in data.values()
     ]
 
-    return DenormalizedAGTestCaseResult(deserialized_case_result, cmd_results)
-
-
-def _deserialize_denormed_ag_test_cmd_result(
-    cmd_result: Dict[str, object]
-) -> SerializedAGTestCommandResultWrapper:
-    return SerializedAGTestCommandResultWrapper(cmd_result)
-
 
 @transaction.atomic()
 def update_denormalized_ag_test_results(submission_pk: int) -> Submission:
@@ -407,20 +538,160 @@ def update_denormalized_ag_test_results(submission_pk: int) -> Submission:
     )
 
     submission = submission_manager.get(pk=submission_pk)
-    submission.denormalized_ag_test_results = {
-        str(suite_res.ag_test_suite_id): suite_res.to_dict()
-        for suite_res in submission.ag_test_suite_results.all()
-    }
+    _set_denormalized_ag_test_results(
+        submission,
+        {
+            str(suite_res.ag_test_suite_id): suite_res.to_dict()
+            for suite_res in submission.ag_test_suite_results.all()
+        },
+        compact=settings.COMPACT_DENORMALIZED_AG_TEST_RESULTS
+    )
+    # The submission's point totals can no longer be trusted.
+    # See update_denormalized_point_totals().
+    submission.denormalized_point_totals = {}
 
     submission.save()
     return submission
 
 
+def compact_denormalized_ag_test_results_in_bulk(
+    submissions: QuerySet[Submission], *, compact: bool = True
+) -> int:
+    """
+    Locks the given submissions and re-encodes their denormalized AG
+    test results in the compact binary format (see
+    autograder.core.compact_ag_test_results) if compact is True, or
+    in the JSON format if compact is False. Must be called inside a
+    transaction.
+
+    Returns the number of submissions that were re-encoded.
+    """
+    if compact:
+        to_update = submissions.filter(compact_ag_test_results__isnull=True)
+    else:
+        to_update = submissions.filter(compact_ag_test_results__isnull=False)
+
+    loaded_submissions = list(to_update.select_for_update().only(
+        'pk', 'denormalized_ag_test_results', 'compact_ag_test_results'))
+    for submission in loaded_submissions:
+        _set_denormalized_ag_test_results(
+            submission, _load_denormalized_ag_test_results(submission), compact=compact)
+
+    Submission.objects.bulk_update(
+        loaded_submissions, ['denormalized_ag_test_results', 'compact_ag_test_results'])
+    return len(loaded_submissions)
+
+
+def _load_denormalized_ag_test_results(submission: Submission) -> Dict[PkStr, object]:
+    if submission.compact_ag_test_results is None:
+        return submission.denormalized_ag_test_results
+
+    return dict(CompactAGTestResults(bytes(submission.compact_ag_test_results)))
+
+
+def _set_denormalized_ag_test_results(submission: Submission,
+                                      ag_test_results: Mapping[PkStr, object],
+                                      *, compact: bool) -> None:
+    if compact:
+        submission.compact_ag_test_results = encode_ag_test_results(
+            submission.pk, cast(Mapping[PkStr, Mapping[str, object]], ag_test_results))
+        submission.denormalized_ag_test_results = {}
+    else:
+        submission.denormalized_ag_test_results = ag_test_results
+        submission.compact_ag_test_results = None
+
+
+def update_denormalized_point_totals(submission_pk: int) -> None:
+    """
+    Updates the denormalized_point_totals field for the submission with
+    the given primary key.
+    """
+    with transaction.atomic():
+        update_denormalized_point_totals_in_bulk(Submission.objects.filter(pk=submission_pk))
+
+
+def update_denormalized_point_totals_in_bulk(
+    submissions: QuerySet[Submission]
+) -> List[Submission]:
+    """
+    Locks the given submissions and updates their
+    denormalized_point_totals fields. All of the submissions must
+    belong to the same project. Must be called inside a transaction.
+
+    Returns the updated submissions.
+    """
+    locked_submissions = submissions.select_for_update(of=('self',)).select_related(
+        'group__project').order_by('pk')
+    loaded_submissions = list(get_submissions_with_results_queryset(locked_submissions))
+    if not loaded_submissions:
+        return []
+
+    project = loaded_submissions[0].group.project
+    # The version must be loaded before the preloaders load the test
+    # configuration so that totals computed from outdated configuration
+    # are stamped with an outdated version.
+    test_config_version = get_test_config_version(project.pk)
+    ag_test_preloader = AGTestPreLoader(project)
+    mutation_test_suite_preloader = MutationTestSuitePreLoader(project)
+
+    for submission in loaded_submissions:
+        totals: Dict[str, object] = {
+            'test_config_version': test_config_version,
+            'status': submission.status,
+        }
+        for fdbk_category in FeedbackCategory:
+            fdbk = SubmissionResultFeedback(
+                submission, fdbk_category, ag_test_preloader, mutation_test_suite_preloader,
+                use_denormalized_point_totals=False)
+            totals[fdbk_category.value] = {
+                'total_points': _serialize_points(fdbk.total_points),
+                'total_points_possible': _serialize_points(fdbk.total_points_possible),
+            }
+
+        submission.denormalized_point_totals = totals
+
+    Submission.objects.bulk_update(loaded_submissions, ['denormalized_point_totals'])
+    return loaded_submissions
+
+
+# Points are either ints or Decimals. We store Decimals as strings so
+# that they don't lose precision, and we store ints as-is so that
+# they're still ints when we load them.
+def _serialize_points(points: Union[int, Decimal]) -> Union[int, str]:
+    return points if isinstance(points, int) else str(points)
+
+
+def _deserialize_points(points: Union[int, str]) -> Union[int, Decimal]:
+    return points if isinstance(points, int) else Decimal(points)
+
+
 class SubmissionResultFeedback(ToDictMixin):
+    __slots__ = (
+        '_submission',
+        '_fdbk_category',
+        '_project',
+        '_ag_test_loader',
+        '_mutation_test_suite_preloader',
+        '_use_denormalized_point_totals',
+        '_total_points',
+        '_total_points_possible',
+        '_denormalized_ag_test_suite_results',
+        '_ag_test_suite_results',
+        '_mutation_test_suite_results',
+    )
+
     def __init__(self, submission: Submission,
                  fdbk_category: FeedbackCategory,
                  ag_test_preloader: AGTestPreLoader,
-                 mutation_test_suite_preloader: Optional[MutationTestSuitePreLoader] = None):
+                 mutation_test_suite_preloader: Optional[MutationTestSuitePreLoader] = None,
+                 *, use_denormalized_point_totals: bool = True):
+        """
+        :param use_denormalized_point_totals: When True, total_points
+            and total_points_possible are loaded from the submission's
+            denormalized_point_totals if they were computed with the
+            preloaders' test config version and the submission's
+            current status.
+        """
         self._submission = submission
         self._fdbk_category = fdbk_category
         self._project = self._submission.group.project
@@ -430,7 +701,16 @@ class SubmissionResultFeedback(ToDictMixin):
             mutation_test_suite_preloader if mutation_test_suite_preloader is not None
             else MutationTestSuitePreLoader(self._project))
 
-        self._ag_test_suite_results = _deserialize_denormed_ag_test_results(self._submission)
+        self._use_denormalized_point_totals = use_denormalized_point_totals
+
+        # The rest of these are loaded the first time they're needed.
+        self._total_points: Optional[Union[int, Decimal]] = None
+        self._total_points_possible: Optional[Union[int, Decimal]] = None
+        self._denormalized_ag_test_suite_results: Optional[
+            List[DenormalizedAGTestSuiteResult]] = None
+        self._ag_test_suite_results: Optional[List[AGTestSuiteResultFeedback]] = None
+        self._mutation_test_suite_results: Optional[
+            List[MutationTestSuiteResult.FeedbackCalculator]] = None
 
     @property
     def ag_test_preloader(self) -> AGTestPreLoader:
@@ -448,36 +728,88 @@ class SubmissionResultFeedback(ToDictMixin):
     def submission(self) -> Submission:
         return self._submission
 
-    @cached_property
-    def total_points(self) -> Union[int, Decimal]:
-        ag_suite_points = sum((
-            ag_test_suite_result.total_points
-            for ag_test_suite_result in self.ag_test_suite_results
-        ))
+    @property
+    def fdbk_category(self) -> FeedbackCategory:
+        return self._fdbk_category
 
-        mutation_suite_points = sum((
-            fdbk.total_points for fdbk in self.mutation_test_suite_results
-        ))
+    @property
+    def total_points(self) -> Union[int, Decimal]:
+        if self._total_points is None:
+            self._load_point_totals()
+            assert self._total_points is not None
 
-        return ag_suite_points + mutation_suite_points
+        return self._total_points
 
-    @cached_property
+    @property
     def total_points_possible(self) -> Union[int, Decimal]:
-        ag_suite_points = sum((
-            ag_test_suite_result.total_points_possible
-            for ag_test_suite_result in self.ag_test_suite_results
-        ))
+        if self._total_points_possible is None:
+            self._load_point_totals()
+            assert self._total_points_possible is not None
+
+        return self._total_points_possible
+
+    def _load_point_totals(self) -> None:
+        denormalized_point_totals = self._get_denormalized_point_totals()
+        if denormalized_point_totals is not None:
+            self._total_points = _deserialize_points(denormalized_point_totals['total_points'])
+            self._total_points_possible = _deserialize_points(
+                denormalized_point_totals['total_points_possible'])
+            return
+
+        # If we've already built the AG test feedback objects, adding
+        # up their totals is cheaper than evaluating the results again.
+        if self._ag_test_suite_results is not None:
+            ag_suite_points = sum((
+                ag_test_suite_result.total_points
+                for ag_test_suite_result in self._ag_test_suite_results
+            ))
+            ag_suite_points_possible = sum((
+                ag_test_suite_result.total_points_possible
+                for ag_test_suite_result in self._ag_test_suite_results
+            ))
+        else:
+            ag_suite_points, ag_suite_points_possible = compute_ag_test_point_totals(
+                self._get_denormalized_ag_test_suite_results(),
+                self._fdbk_category,
+                self._ag_test_loader)
 
         mutation_suite_points = sum((
+            fdbk.total_points for fdbk in self.mutation_test_suite_results
+        ))
+        mutation_suite_points_possible = sum((
             fdbk.total_points_possible for fdbk in self.mutation_test_suite_results
         ))
 
-        return ag_suite_points + mutation_suite_points
+        self._total_points = ag_suite_points + mutation_suite_points
+        self._total_points_possible = ag_suite_points_possible + mutation_suite_points_possible
 
-    @cached_property
+    def _get_denormalized_point_totals(self) -> Optional[Dict[str, Union[int, str]]]:
+        if not self._use_denormalized_point_totals:
+            return None
+
+        totals = self._submission.denormalized_point_totals
+        is_up_to_date = (
+            totals.get('status') == self._submission.status
+            and totals.get('test_config_version') == self._ag_test_loader.test_config_version
+            and totals.get('test_config_version') == (
+                self._mutation_test_suite_preloader.test_config_version)
+        )
+        return totals.get(self._fdbk_category.value) if is_up_to_date else None
+
+    def _get_denormalized_ag_test_suite_results(self) -> List[DenormalizedAGTestSuiteResult]:
+        if self._denormalized_ag_test_suite_results is None:
+            self._denormalized_ag_test_suite_results = _deserialize_denormed_ag_test_results(
+                self._submission)
+
+        return self._denormalized_ag_test_suite_results
+
+    @property
     def ag_test_suite_results(self) -> List[AGTestSuiteResultFeedback]:
+        if self._ag_test_suite_results is not None:
+            return self._ag_test_suite_results
+
         visible = []
-        for result in self._ag_test_suite_results:
+        for result in self._get_denormalized_ag_test_suite_results():
             try:
                 fdbk = AGTestSuiteResultFeedback(result, self._fdbk_category, self._ag_test_loader)
                 if fdbk.fdbk_conf.visible:
@@ -492,19 +824,28 @@ class SubmissionResultFeedback(ToDictMixin):
                 continue
 
         visible.sort(key=lambda item: item.ag_test_suite_order)
+        self._ag_test_suite_results = visible
         return visible
 
-    @cached_property
+    @property
     def mutation_test_suite_results(self) -> List[MutationTestSuiteResult.FeedbackCalculator]:
+        if self._mutation_test_suite_results is not None:
+            return self._mutation_test_suite_results
+
         visible = []
         for result in self._submission.mutation_test_suite_results.all():
             fdbk = result.get_fdbk(self._fdbk_category, self._mutation_test_suite_preloader)
             if fdbk.fdbk_conf.visible:
                 visible.append(fdbk)
 
+        self._mutation_test_suite_results = visible
         return visible
 
     def to_dict(self) -> Dict[str, object]:
+        # The serialized AG test results include every suite's totals,
+        # so build them first and add those up for our own totals.
+        self.ag_test_suite_results
+
         result = super().to_dict()
 
         result['ag_test_suite_results'] = [
@@ -529,32 +870,31 @@ class SubmissionResultFeedback(ToDictMixin):
 
 
 class AGTestSuiteResultFeedback(ToDictMixin):
-    _fdbk: AGTestSuiteFeedbackConfig
+    __slots__ = (
+        '_denormalized_ag_test_suite_result',
+        '_ag_test_suite_result',
+        '_fdbk_category',
+        '_ag_test_preloader',
+        '_ag_test_suite',
+        '_fdbk',
+        '_visible_ag_test_case_results',
+    )
 
     def __init__(self, ag_test_suite_result: DenormalizedAGTestSuiteResult,
                  fdbk_category: FeedbackCategory,
                  ag_test_preloader: AGTestPreLoader):
+        self._denormalized_ag_test_suite_result = ag_test_suite_result
         self._ag_test_suite_result = ag_test_suite_result.ag_test_suite_result
         self._fdbk_category = fdbk_category
-        self._ag_test_case_results = ag_test_suite_result.ag_test_case_results
 
         self._ag_test_preloader = ag_test_preloader
 
         self._ag_test_suite = ag_test_preloader.get_ag_test_suite(
             self._ag_test_suite_result.ag_test_suite_id)
+        self._fdbk = _get_ag_test_suite_fdbk_conf(self._ag_test_suite, fdbk_category)
 
-        if fdbk_category == FeedbackCategory.normal:
-            self._fdbk = self._ag_test_suite.normal_fdbk_config
-        elif fdbk_category == FeedbackCategory.ultimate_submission:
-            self._fdbk = self._ag_test_suite.ultimate_submission_fdbk_config
-        elif fdbk_category == FeedbackCategory.past_limit_submission:
-            self._fdbk = self._ag_test_suite.past_limit_submission_fdbk_config
-        elif fdbk_category == FeedbackCategory.staff_viewer:
-            self._fdbk = self._ag_test_suite.staff_viewer_fdbk_config
-        elif fdbk_category == FeedbackCategory.max:
-            self._fdbk = AGTestSuiteFeedbackConfig()
-        else:
-            assert False, f'Unexpected feedback category: {fdbk_category}'
+        # Loaded the first time it's needed.
+        self._visible_ag_test_case_results: Optional[List[AGTestCaseResultFeedback]] = None
 
     @property
     def fdbk_conf(self) -> AGTestSuiteFeedbackConfig:
@@ -676,14 +1016,14 @@ class AGTestSuiteResultFeedback(ToDictMixin):
     def total_points(self) -> int:
         return sum((
             ag_test_case_result.total_points
-            for ag_test_case_result in self._visible_ag_test_case_results
+            for ag_test_case_result in self._get_visible_ag_test_case_results()
         ))
 
     @property
     def total_points_possible(self) -> int:
         return sum((
             ag_test_case_fdbk.total_points_possible
-            for ag_test_case_fdbk in self._visible_ag_test_case_results
+            for ag_test_case_fdbk in self._get_visible_ag_test_case_results()
         ))
 
     @property
@@ -691,13 +1031,15 @@ class AGTestSuiteResultFeedback(ToDictMixin):
         if not self._fdbk.show_individual_tests:
             return []
 
-        return self._visible_ag_test_case_results
+        return self._get_visible_ag_test_case_results()
+
+    def _get_visible_ag_test_case_results(self) -> List[AGTestCaseResultFeedback]:
+        if self._visible_ag_test_case_results is not None:
+            return self._visible_ag_test_case_results
 
-    @cached_property
-    def _visible_ag_test_case_results(self) -> List[AGTestCaseResultFeedback]:
         visible = []
         first_failure_found = False
-        for result in self._ag_test_case_results:
+        for result in self._denormalized_ag_test_suite_result.ag_test_case_results:
             try:
                 fdbk = AGTestCaseResultFeedback(
                     result, self._fdbk_category, self._ag_test_preloader)
@@ -714,6 +1056,7 @@ class AGTestSuiteResultFeedback(ToDictMixin):
                 continue
 
         visible.sort(key=lambda item: item.ag_test_case_order)
+        self._visible_ag_test_case_results = visible
         return visible
 
     SERIALIZABLE_FIELDS = (
@@ -741,7 +1084,16 @@ class AGTestSuiteResultFeedback(ToDictMixin):
 
 
 class AGTestCaseResultFeedback(ToDictMixin):
-    _fdbk: AGTestCaseFeedbackConfig
+    __slots__ = (
+        '_denormalized_ag_test_case_result',
+        '_ag_test_case_result',
+        '_fdbk_category',
+        '_ag_test_preloader',
+        '_ag_test_case',
+        '_fdbk',
+        '_is_first_failure',
+        '_visible_cmd_results',
+    )
 
     def __init__(self, ag_test_case_result: DenormalizedAGTestCaseResult,
                  fdbk_category: FeedbackCategory,
@@ -749,27 +1101,27 @@ class AGTestCaseResultFeedback(ToDictMixin):
                  is_first_failure: bool = False):
         self._denormalized_ag_test_case_result = ag_test_case_result
         self._ag_test_case_result = ag_test_case_result.ag_test_case_result
-        self._ag_test_command_results = ag_test_case_result.ag_test_command_results
         self._fdbk_category = fdbk_category
         self._ag_test_preloader = ag_test_preloader
 
         self._ag_test_case = self._ag_test_preloader.get_ag_test_case(
             self._ag_test_case_result.ag_test_case_id)
+        self._fdbk = _get_ag_test_case_fdbk_conf(self._ag_test_case, fdbk_category)
 
-        if fdbk_category == FeedbackCategory.normal:
-            self._fdbk = self._ag_test_case.normal_fdbk_config
-        elif fdbk_category == FeedbackCategory.ultimate_submission:
-            self._fdbk = self._ag_test_case.ultimate_submission_fdbk_config
-        elif fdbk_category == FeedbackCategory.past_limit_submission:
-            self._fdbk = self._ag_test_case.past_limit_submission_fdbk_config
-        elif fdbk_category == FeedbackCategory.staff_viewer:
-            self._fdbk = self._ag_test_case.staff_viewer_fdbk_config
-        elif fdbk_category == FeedbackCategory.max:
-            self._fdbk = AGTestCaseFeedbackConfig()
-        else:
-            assert False, f'Unexpected feedback category: {fdbk_category}'
+        self._is_first_failure = is_first_failure
 
-        self.is_first_failure = is_first_failure
+        # Loaded the first time it's needed.
+        self._visible_cmd_results: Optional[List[AGTestCommandResultFeedback]] = None
+
+    @property
+    def is_first_failure(self) -> bool:
+        return self._is_first_failure
+
+    @is_first_failure.setter
+    def is_first_failure(self, value: bool) -> None:
+        self._is_first_failure = value
+        # The command results' feedback depends on this.
+        self._visible_cmd_results = None
 
     @property
     def fdbk_conf(self) -> AGTestCaseFeedbackConfig:
@@ -801,28 +1153,32 @@ class AGTestCaseResultFeedback(ToDictMixin):
 
     @property
     def total_points(self) -> int:
-        points = sum((cmd_res.total_points for cmd_res in self._visible_cmd_results))
+        points = sum((cmd_res.total_points for cmd_res in self._get_visible_cmd_results()))
         return max(0, points)
 
     @property
     def total_points_possible(self) -> int:
-        return sum((cmd_res.total_points_possible for cmd_res in self._visible_cmd_results))
+        return sum((
+            cmd_res.total_points_possible for cmd_res in self._get_visible_cmd_results()
+        ))
 
     @property
     def ag_test_command_results(self) -> List[AGTestCommandResultFeedback]:
         if not self._fdbk.show_individual_commands:
             return []
 
-        return list(self._visible_cmd_results)
+        return list(self._get_visible_cmd_results())
+
+    def _get_visible_cmd_results(self) -> List[AGTestCommandResultFeedback]:
+        if self._visible_cmd_results is not None:
+            return self._visible_cmd_results
 
-    @property
-    def _visible_cmd_results(self) -> Iterable[AGTestCommandResultFeedback]:
         visible = []
-        for result in self._ag_test_command_results:
+        for result in self._denormalized_ag_test_case_result.ag_test_command_results:
             try:
                 fdbk = AGTestCommandResultFeedback(
                     result, self._fdbk_category, self._ag_test_preloader,
-                    is_in_first_failed_test=self.is_first_failure
+                    is_in_first_failed_test=self._is_first_failure
                 )
                 if fdbk.fdbk_conf.visible:
                     visible.append(fdbk)
@@ -830,6 +1186,7 @@ class AGTestCaseResultFeedback(ToDictMixin):
                 continue
 
         visible.sort(key=lambda item: item.ag_test_command_order)
+        self._visible_cmd_results = visible
         return visible
 
     SERIALIZABLE_FIELDS = (
@@ -859,7 +1216,15 @@ class AGTestCommandResultFeedback(ToDictMixin):
     feedback data to give for an AGTestCommandResult.
     """
 
-    _fdbk: AGTestCommandFeedbackConfig
+    __slots__ = (
+        '_ag_test_command_result',
+        '_ag_test_preloader',
+        '_cmd',
+        '_is_in_first_failed_test',
+        '_fdbk',
+        '_diff_cache_key',
+        '_diff_sizes_out_of_date',
+    )
 
     def __init__(
         self,
@@ -875,21 +1240,12 @@ class AGTestCommandResultFeedback(ToDictMixin):
             self._ag_test_command_result.ag_test_command_id)
 
         self._is_in_first_failed_test = is_in_first_failed_test
+        self._fdbk = _get_ag_test_cmd_fdbk_conf(
+            self._cmd, fdbk_category, is_in_first_failed_test)
 
-        if fdbk_category == FeedbackCategory.normal:
-            if (is_in_first_failed_test
-                    and self._cmd.first_failed_test_normal_fdbk_config is not None):
-                self._fdbk = self._cmd.first_failed_test_normal_fdbk_config
-            else:
-                self._fdbk = self._cmd.normal_fdbk_config
-        elif fdbk_category == FeedbackCategory.ultimate_submission:
-            self._fdbk = self._cmd.ultimate_submission_fdbk_config
-        elif fdbk_category == FeedbackCategory.past_limit_submission:
-            self._fdbk = self._cmd.past_limit_submission_fdbk_config
-        elif fdbk_category == FeedbackCategory.staff_viewer:
-            self._fdbk = self._cmd.staff_viewer_fdbk_config
-        elif fdbk_category == FeedbackCategory.max:
-            self._fdbk = AGTestCommandFeedbackConfig.max_fdbk_config()
+        # Computed the first time it's needed.
+        self._diff_cache_key: Optional[str] = None
+        self._diff_sizes_out_of_date = False
 
     @property
     def pk(self) -> int:
@@ -907,6 +1263,16 @@ class AGTestCommandResultFeedback(ToDictMixin):
     def ag_test_command_order(self) -> int:
         return self._cmd._order  # type: ignore
 
+    @property
+    def diff_sizes_out_of_date(self) -> bool:
+        """
+        True if get_stdout_diff_size() or get_stderr_diff_size() had to
+        compute a diff size that isn't stored in the database. Callers
+        should schedule update_diff_sizes() for this result rather than
+        saving the size while handling a request.
+        """
+        return self._diff_sizes_out_of_date
+
     @property
     def fdbk_conf(self) -> AGTestCommandFeedbackConfig:
         """
@@ -1007,40 +1373,21 @@ class AGTestCommandResultFeedback(ToDictMixin):
 
     @property
     def stdout_diff(self) -> Optional[core_ut.DiffResult]:
-        if (self._cmd.expected_stdout_source == ExpectedOutputSource.none
-                or self._fdbk.stdout_fdbk_level != ValueFeedbackLevel.expected_and_actual):
+        if not self._show_stdout_diff:
             return None
 
-        stdout_filename = self._ag_test_command_result.stdout_filename
-        diff_whitespace_kwargs = {
-            'ignore_blank_lines': self._cmd.ignore_blank_lines,
-            'ignore_case': self._cmd.ignore_case,
-            'ignore_whitespace': self._cmd.ignore_whitespace,
-            'ignore_whitespace_changes': self._cmd.ignore_whitespace_changes
-        }
-
-        # check source and return diff
-        if self._cmd.expected_stdout_source == ExpectedOutputSource.text:
-            with tempfile.NamedTemporaryFile('w') as expected_stdout:
-                expected_stdout.write(self._cmd.expected_stdout_text)
-                expected_stdout.flush()
-                return core_ut.get_diff(expected_stdout.name, stdout_filename,
-                                        **diff_whitespace_kwargs)
-        elif self._cmd.expected_stdout_source == ExpectedOutputSource.instructor_file:
-            assert self._cmd.expected_stdout_instructor_file is not None
-            return core_ut.get_diff(self._cmd.expected_stdout_instructor_file.abspath,
-                                    stdout_filename,
-                                    **diff_whitespace_kwargs)
-        else:
-            raise ValueError(
-                'Invalid expected stdout source: {}'.format(self._cmd.expected_stdout_source))
+        return self._get_diff('stdout')
 
     def get_stdout_diff_size(self) -> Optional[int]:
-        diff = self.stdout_diff
-        if diff is None:
+        if not self._show_stdout_diff:
             return None
 
-        return sum((len(line) for line in diff.diff_content))
+        return self._get_diff_size('stdout')
+
+    @property
+    def _show_stdout_diff(self) -> bool:
+        return (self._cmd.expected_stdout_source != ExpectedOutputSource.none
+                and self._fdbk.stdout_fdbk_level == ValueFeedbackLevel.expected_and_actual)
 
     @property
     def stdout_points(self) -> int:
@@ -1101,39 +1448,21 @@ class AGTestCommandResultFeedback(ToDictMixin):
 
     @property
     def stderr_diff(self) -> Optional[core_ut.DiffResult]:
-        if (self._cmd.expected_stderr_source == ExpectedOutputSource.none
-                or self._fdbk.stderr_fdbk_level != ValueFeedbackLevel.expected_and_actual):
+        if not self._show_stderr_diff:
             return None
 
-        stderr_filename = self._ag_test_command_result.stderr_filename
-        diff_whitespace_kwargs = {
-            'ignore_blank_lines': self._cmd.ignore_blank_lines,
-            'ignore_case': self._cmd.ignore_case,
-            'ignore_whitespace': self._cmd.ignore_whitespace,
-            'ignore_whitespace_changes': self._cmd.ignore_whitespace_changes
-        }
-
-        if self._cmd.expected_stderr_source == ExpectedOutputSource.text:
-            with tempfile.NamedTemporaryFile('w') as expected_stderr:
-                expected_stderr.write(self._cmd.expected_stderr_text)
-                expected_stderr.flush()
-                return core_ut.get_diff(expected_stderr.name, stderr_filename,
-                                        **diff_whitespace_kwargs)
-        elif self._cmd.expected_stderr_source == ExpectedOutputSource.instructor_file:
-            assert self._cmd.expected_stderr_instructor_file is not None
-            return core_ut.get_diff(self._cmd.expected_stderr_instructor_file.abspath,
-                                    stderr_filename,
-                                    **diff_whitespace_kwargs)
-        else:
-            raise ValueError(
-                'Invalid expected stderr source: {}'.format(self._cmd.expected_stdout_source))
+        return self._get_diff('stderr')
 
     def get_stderr_diff_size(self) -> Optional[int]:
-        diff = self.stderr_diff
-        if diff is None:
+        if not self._show_stderr_diff:
             return None
 
-        return sum((len(line) for line in diff.diff_content))
+        return self._get_diff_size('stderr')
+
+    @property
+    def _show_stderr_diff(self) -> bool:
+        return (self._cmd.expected_stderr_source != ExpectedOutputSource.none
+                and self._fdbk.stderr_fdbk_level == ValueFeedbackLevel.expected_and_actual)
 
     @property
     def stderr_points(self) -> int:
@@ -1154,18 +1483,34 @@ class AGTestCommandResultFeedback(ToDictMixin):
 
     @property
     def total_points(self) -> int:
-        if not self._fdbk.show_points:
-            return 0
-
-        return self.return_code_points + self.stdout_points + self.stderr_points
+        return _get_ag_test_cmd_point_totals(
+            self._cmd, self._fdbk, self._ag_test_command_result)[0]
 
     @property
     def total_points_possible(self) -> int:
-        if not self._fdbk.show_points:
-            return 0
+        return _get_ag_test_cmd_point_totals(
+            self._cmd, self._fdbk, self._ag_test_command_result)[1]
 
-        return (self.return_code_points_possible + self.stdout_points_possible
-                + self.stderr_points_possible)
+    def _get_diff(self, stream: Literal['stdout', 'stderr']) -> core_ut.DiffResult:
+        return _get_cached_diff(
+            self._cmd, self._ag_test_command_result, stream, self._get_diff_cache_key())
+
+    def _get_diff_size(self, stream: Literal['stdout', 'stderr']) -> int:
+        if self._ag_test_command_result.diff_cache_key == self._get_diff_cache_key():
+            size = (self._ag_test_command_result.stdout_diff_size if stream == 'stdout'
+                    else self._ag_test_command_result.stderr_diff_size)
+            if size is not None:
+                return size
+
+        self._diff_sizes_out_of_date = True
+        return _get_diff_size(self._get_diff(stream))
+
+    def _get_diff_cache_key(self) -> str:
+        if self._diff_cache_key is None:
+            self._diff_cache_key = _compute_diff_cache_key(
+                self._cmd, self._ag_test_command_result)
+
+        return self._diff_cache_key
 
     SERIALIZABLE_FIELDS = (
         'pk',
@@ -1192,3 +1537,341 @@ class AGTestCommandResultFeedback(ToDictMixin):
         'total_points',
         'total_points_possible'
     )
+
+
+def compute_ag_test_point_totals(
+    ag_test_suite_results: Iterable[DenormalizedAGTestSuiteResult],
+    fdbk_category: FeedbackCategory,
+    ag_test_preloader: AGTestPreLoader
+) -> Tuple[int, int]:
+    """
+    Returns the (total_points, total_points_possible) that the visible
+    AGTestSuiteResultFeedback objects for the given results would add
+    up to in the given feedback category, without creating any
+    feedback objects.
+    """
+    # The max feedback config is the same for every command and is
+    # relatively expensive to create.
+    max_cmd_fdbk_conf = (AGTestCommandFeedbackConfig.max_fdbk_config()
+                         if fdbk_category == FeedbackCategory.max else None)
+
+    total_points = 0
+    total_points_possible = 0
+    for suite_result in ag_test_suite_results:
+        try:
+            suite = ag_test_preloader.get_ag_test_suite(
+                suite_result.ag_test_suite_result.ag_test_suite_id)
+        except KeyError:  # See comment in AGTestSuiteResultFeedback.ag_test_suite_results
+            continue
+
+        if not _get_ag_test_suite_fdbk_conf(suite, fdbk_category).visible:
+            continue
+
+        first_failure_found = False
+        for case_result in suite_result.ag_test_case_results:
+            try:
+                case = ag_test_preloader.get_ag_test_case(
+                    case_result.ag_test_case_result.ag_test_case_id)
+            except KeyError:
+                continue
+
+            points, points_possible = _compute_ag_test_case_point_totals(
+                case_result, fdbk_category, ag_test_preloader, max_cmd_fdbk_conf,
+                is_first_failure=False)
+            if (fdbk_category == FeedbackCategory.normal
+                    and not first_failure_found
+                    and points < points_possible):
+                first_failure_found = True
+                points, points_possible = _compute_ag_test_case_point_totals(
+                    case_result, fdbk_category, ag_test_preloader, max_cmd_fdbk_conf,
+                    is_first_failure=True)
+
+            if _get_ag_test_case_fdbk_conf(case, fdbk_category).visible:
+                total_points += points
+                total_points_possible += points_possible
+
+    return total_points, total_points_possible
+
+
+def _compute_ag_test_case_point_totals(
+    ag_test_case_result: DenormalizedAGTestCaseResult,
+    fdbk_category: FeedbackCategory,
+    ag_test_preloader: AGTestPreLoader,
+    max_cmd_fdbk_conf: Optional[AGTestCommandFeedbackConfig],
+    *, is_first_failure: bool
+) -> Tuple[int, int]:
+    points = 0
+    points_possible = 0
+    for cmd_result in ag_test_case_result.ag_test_command_results:
+        try:
+            cmd = ag_test_preloader.get_ag_test_cmd(cmd_result.ag_test_command_id)
+        except KeyError:
+            continue
+
+        fdbk = (max_cmd_fdbk_conf if max_cmd_fdbk_conf is not None
+                else _get_ag_test_cmd_fdbk_conf(cmd, fdbk_category, is_first_failure))
+        if not fdbk.visible:
+            continue
+
+        cmd_points, cmd_points_possible = _get_ag_test_cmd_point_totals(cmd, fdbk, cmd_result)
+        points += cmd_points
+        points_possible += cmd_points_possible
+
+    return max(0, points), points_possible
+
+
+def _get_ag_test_suite_fdbk_conf(ag_test_suite: AGTestSuite,
+                                 fdbk_category: FeedbackCategory) -> AGTestSuiteFeedbackConfig:
+    if fdbk_category == FeedbackCategory.normal:
+        return ag_test_suite.normal_fdbk_config
+    elif fdbk_category == FeedbackCategory.ultimate_submission:
+        return ag_test_suite.ultimate_submission_fdbk_config
+    elif fdbk_category == FeedbackCategory.past_limit_submission:
+        return ag_test_suite.past_limit_submission_fdbk_config
+    elif fdbk_category == FeedbackCategory.staff_viewer:
+        return ag_test_suite.staff_viewer_fdbk_config
+    elif fdbk_category == FeedbackCategory.max:
+        return AGTestSuiteFeedbackConfig()
+    else:
+        assert False, f'Unexpected feedback category: {fdbk_category}'
+
+
+def _get_ag_test_case_fdbk_conf(ag_test_case: AGTestCase,
+                                fdbk_category: FeedbackCategory) -> AGTestCaseFeedbackConfig:
+    if fdbk_category == FeedbackCategory.normal:
+        return ag_test_case.normal_fdbk_config
+    elif fdbk_category == FeedbackCategory.ultimate_submission:
+        return ag_test_case.ultimate_submission_fdbk_config
+    elif fdbk_category == FeedbackCategory.past_limit_submission:
+        return ag_test_case.past_limit_submission_fdbk_config
+    elif fdbk_category == FeedbackCategory.staff_viewer:
+        return ag_test_case.staff_viewer_fdbk_config
+    elif fdbk_category == FeedbackCategory.max:
+        return AGTestCaseFeedbackConfig()
+    else:
+        assert False, f'Unexpected feedback category: {fdbk_category}'
+
+
+def _get_ag_test_cmd_fdbk_conf(cmd: AGTestCommand,
+                               fdbk_category: FeedbackCategory,
+                               is_in_first_failed_test: bool) -> AGTestCommandFeedbackConfig:
+    if fdbk_category == FeedbackCategory.normal:
+        if is_in_first_failed_test and cmd.first_failed_test_normal_fdbk_config is not None:
+            return cmd.first_failed_test_normal_fdbk_config
+        return cmd.normal_fdbk_config
+    elif fdbk_category == FeedbackCategory.ultimate_submission:
+        return cmd.ultimate_submission_fdbk_config
+    elif fdbk_category == FeedbackCategory.past_limit_submission:
+        return cmd.past_limit_submission_fdbk_config
+    elif fdbk_category == FeedbackCategory.staff_viewer:
+        return cmd.staff_viewer_fdbk_config
+    elif fdbk_category == FeedbackCategory.max:
+        return AGTestCommandFeedbackConfig.max_fdbk_config()
+    else:
+        assert False, f'Unexpected feedback category: {fdbk_category}'
+
+
+def _get_ag_test_cmd_point_totals(
+    cmd: AGTestCommand,
+    fdbk: AGTestCommandFeedbackConfig,
+    cmd_result: AGTestCommandResultProtocol
+) -> Tuple[int, int]:
+    """
+    Returns the (total_points, total_points_possible) for the given
+    command result with the given feedback config.
+    See AGTestCommandResultFeedback.return_code_points and friends.
+    """
+    if not fdbk.show_points:
+        return 0, 0
+
+    points = 0
+    points_possible = 0
+    if (cmd.expected_return_code != ExpectedReturnCode.none
+            and fdbk.return_code_fdbk_level != ValueFeedbackLevel.no_feedback
+            and cmd_result.return_code_correct is not None):
+        points_possible += cmd.points_for_correct_return_code
+        points += (cmd.points_for_correct_return_code if cmd_result.return_code_correct
+                   else cmd.deduction_for_wrong_return_code)
+
+    if (cmd.expected_stdout_source != ExpectedOutputSource.none
+            and fdbk.stdout_fdbk_level != ValueFeedbackLevel.no_feedback
+            and cmd_result.stdout_correct is not None):
+        points_possible += cmd.points_for_correct_stdout
+        points += (cmd.points_for_correct_stdout if cmd_result.stdout_correct
+                   else cmd.deduction_for_wrong_stdout)
+
+    if (cmd.expected_stderr_source != ExpectedOutputSource.none
+            and fdbk.stderr_fdbk_level != ValueFeedbackLevel.no_feedback
+            and cmd_result.stderr_correct is not None):
+        points_possible += cmd.points_for_correct_stderr
+        points += (cmd.points_for_correct_stderr if cmd_result.stderr_correct
+                   else cmd.deduction_for_wrong_stderr)
+
+    return points, points_possible
+
+
+# Increment this if the format of cached diffs or the way they are
+# computed changes.
+_DIFF_CACHE_VERSION = 1
+
+
+def update_diff_sizes(cmd_result: AGTestCommandResult) -> None:
+    """
+    Computes the sizes of cmd_result's stdout and stderr diffs (reusing
+    the cached diffs when they're up to date) and saves them, along
+    with the cache key they were computed for, in a single query.
+    """
+    cmd = cmd_result.ag_test_command
+    cache_key = _compute_diff_cache_key(cmd, cmd_result)
+
+    def _diff_size(stream: Literal['stdout', 'stderr'],
+                   expected_source: ExpectedOutputSource) -> Optional[int]:
+        if expected_source == ExpectedOutputSource.none:
+            return None
+
+        try:
+            return _get_diff_size(_get_cached_diff(cmd, cmd_result, stream, cache_key))
+        except FileNotFoundError:
+            return None
+
+    AGTestCommandResult.objects.filter(pk=cmd_result.pk).update(
+        diff_cache_key=cache_key,
+        stdout_diff_size=_diff_size('stdout', cmd.expected_stdout_source),
+        stderr_diff_size=_diff_size('stderr', cmd.expected_stderr_source),
+    )
+
+
+def _get_diff_size(diff: core_ut.DiffResult) -> int:
+    return sum((len(line) for line in diff.diff_content))
+
+
+def _get_cached_diff(
+    cmd: AGTestCommand,
+    cmd_result: AGTestCommandResultProtocol,
+    stream: Literal['stdout', 'stderr'],
+    cache_key: str
+) -> core_ut.DiffResult:
+    """
+    Loads the requested diff from the result's cached diff file, or
+    computes it and updates the cache if the cached diff is missing
+    or out of date.
+    """
+    diff_filename = (cmd_result.stdout_diff_filename if stream == 'stdout'
+                     else cmd_result.stderr_diff_filename)
+    diff = _load_cached_diff(diff_filename, cache_key)
+    if diff is not None:
+        return diff
+
+    diff = _compute_diff(cmd, cmd_result, stream)
+    _save_cached_diff(diff_filename, cache_key, diff)
+    return diff
+
+
+def _compute_diff_cache_key(cmd: AGTestCommand, cmd_result: AGTestCommandResultProtocol) -> str:
+    """
+    Returns a string that changes whenever the command's expected
+    output or diff settings or the result's actual output change.
+    Missing files are recorded as such so that one stream's diff can
+    still be cached when the other stream's output file is missing.
+    """
+    def _file_info(filename: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            return None
+
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _expected_output_info(source: str, text: str,
+                              instructor_file: Optional[InstructorFile]) -> List[object]:
+        if source == ExpectedOutputSource.text:
+            return [source, hashlib.sha256(text.encode()).hexdigest()]
+        if source == ExpectedOutputSource.instructor_file:
+            assert instructor_file is not None
+            return [source, instructor_file.pk, _file_info(instructor_file.abspath)]
+        return [source]
+
+    key_data = [
+        _DIFF_CACHE_VERSION,
+        _expected_output_info(
+            cmd.expected_stdout_source, cmd.expected_stdout_text,
+            cmd.expected_stdout_instructor_file),
+        _expected_output_info(
+            cmd.expected_stderr_source, cmd.expected_stderr_text,
+            cmd.expected_stderr_instructor_file),
+        cmd.ignore_case,
+        cmd.ignore_whitespace,
+        cmd.ignore_whitespace_changes,
+        cmd.ignore_blank_lines,
+        _file_info(cmd_result.stdout_filename),
+        _file_info(cmd_result.stderr_filename),
+    ]
+    return hashlib.sha256(json.dumps(key_data).encode()).hexdigest()
+
+
+def _compute_diff(
+    cmd: AGTestCommand,
+    cmd_result: AGTestCommandResultProtocol,
+    stream: Literal['stdout', 'stderr']
+) -> core_ut.DiffResult:
+    diff_whitespace_kwargs = {
+        'ignore_blank_lines': cmd.ignore_blank_lines,
+        'ignore_case': cmd.ignore_case,
+        'ignore_whitespace': cmd.ignore_whitespace,
+        'ignore_whitespace_changes': cmd.ignore_whitespace_changes
+    }
+
+    if stream == 'stdout':
+        expected_source = cmd.expected_stdout_source
+        expected_text = cmd.expected_stdout_text
+        expected_instructor_file = cmd.expected_stdout_instructor_file
+        actual_filename = cmd_result.stdout_filename
+    else:
+        expected_source = cmd.expected_stderr_source
+        expected_text = cmd.expected_stderr_text
+        expected_instructor_file = cmd.expected_stderr_instructor_file
+        actual_filename = cmd_result.stderr_filename
+
+    if expected_source == ExpectedOutputSource.text:
+        return core_ut.get_diff(expected_text.encode(), actual_filename,
+                                **diff_whitespace_kwargs)
+    elif expected_source == ExpectedOutputSource.instructor_file:
+        assert expected_instructor_file is not None
+        return core_ut.get_diff(expected_instructor_file.abspath, actual_filename,
+                                **diff_whitespace_kwargs)
+    else:
+        raise ValueError(f'Invalid expected {stream} source: {expected_source}')
+
+
+def _load_cached_diff(diff_filename: str, cache_key: str) -> Optional[core_ut.DiffResult]:
+    """
+    Returns the diff stored in diff_filename if it exists and was
+    computed for cache_key, otherwise None.
+    """
+    try:
+        with gzip.open(diff_filename, 'rt') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get('cache_key') != cache_key:
+        return None
+
+    return core_ut.DiffResult(cached['diff_pass'], cached['diff_content'])
+
+
+def _save_cached_diff(diff_filename: str, cache_key: str, diff: core_ut.DiffResult) -> None:
+    # Write to a temporary file and then rename it so that concurrent
+    # readers never see a partially-written diff.
+    fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(diff_filename))
+    try:
+        with os.fdopen(fd, 'wb') as raw_file, gzip.open(raw_file, 'wt') as f:
+            json.dump({
+                'cache_key': cache_key,
+                'diff_pass': diff.diff_pass,
+                'diff_content': diff.diff_content,
+            }, f)
+        os.replace(tmp_filename, diff_filename)
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
@@ -1,4 +1,5 @@
 import json
+import logging
 import os
 import signal
 import socket
@@ -14,8 +15,12 @@ from django.conf import settings
 from django.db import transaction
 
 import autograder.core.models as ag_models
+from autograder.core.caching import (get_submission_results_cache_stats,
+                                     reset_submission_results_cache_stats)
 from autograder.utils.retry import retry_should_recover
 
+logger = logging.getLogger(__name__)
+
 # See https://docs.docker.com/config/containers/resource_constraints/#memory
 # for allowed values for IMAGE_BUILD_MEMORY_LIMIT
 IMAGE_BUILD_MEMORY_LIMIT = os.environ.get('IMAGE_BUILD_MEMORY_LIMIT', '4g')
@@ -258,3 +263,19 @@ class _ImageBuilder(threading.Thread):
         except subprocess.TimeoutExpired:
             self._process.kill()
             self._process.wait()
+
+
+@celery.shared_task
+def log_submission_results_cache_stats() -> None:
+    """
+    Logs the submission results cache hit ratios counted since the last
+    run and resets the counters.
+    Does nothing unless settings.SUBMISSION_RESULTS_CACHE_STATS is True.
+    """
+    if not settings.SUBMISSION_RESULTS_CACHE_STATS:
+        return
+
+    stats = get_submission_results_cache_stats()
+    reset_submission_results_cache_stats()
+    for fdbk_category, category_stats in stats.items():
+        logger.info(f'submission results cache ({fdbk_category}): {category_stats}')
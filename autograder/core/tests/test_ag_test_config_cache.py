@@ -0,0 +1,112 @@
+from unittest import mock
+
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core import ag_test_config_cache
+from autograder.core.submission_feedback import AGTestPreLoader, MutationTestSuitePreLoader
+from autograder.core.ag_test_config_cache import get_test_config_version
+from autograder.utils.testing import UnitTestBase
+
+
+class TestConfigCacheTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        self.suite = obj_build.make_ag_test_suite(self.project)
+        self.case = obj_build.make_ag_test_case(self.suite)
+        self.cmd = obj_build.make_full_ag_test_command(self.case)
+        self.mutation_suite = obj_build.make_mutation_test_suite(self.project)
+
+        process_cache_patcher = mock.patch.dict(ag_test_config_cache._process_cache, clear=True)
+        process_cache_patcher.start()
+        self.addCleanup(process_cache_patcher.stop)
+
+    def test_test_config_loaded_once(self) -> None:
+        self._load_all()
+        with self.assertNumQueries(0):
+            self._load_all()
+
+    def test_each_caller_gets_own_copies(self) -> None:
+        first = AGTestPreLoader(self.project).get_ag_test_cmd(self.cmd.pk)
+        second = AGTestPreLoader(self.project).get_ag_test_cmd(self.cmd.pk)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+        # Caching a related object on one copy doesn't affect the others.
+        first.ag_test_case
+        self.assertTrue(first._state.fields_cache)
+        self.assertFalse(second._state.fields_cache)
+        self.assertFalse(
+            AGTestPreLoader(self.project).get_ag_test_cmd(self.cmd.pk)._state.fields_cache)
+
+    def test_test_config_shared_between_processes(self) -> None:
+        self._load_all()
+        ag_test_config_cache._process_cache.clear()
+        with self.assertNumQueries(0):
+            self._load_all()
+
+    def test_version_bumped_on_save(self) -> None:
+        self._load_all()
+
+        old_version = get_test_config_version(self.project.pk)
+        self.cmd.validate_and_update(name='Renamed command')
+        self.assertNotEqual(old_version, get_test_config_version(self.project.pk))
+        self.assertEqual(
+            'Renamed command', AGTestPreLoader(self.project).get_ag_test_cmd(self.cmd.pk).name)
+
+        self.suite.validate_and_update(name='Renamed suite')
+        self.assertEqual(
+            'Renamed suite', AGTestPreLoader(self.project).get_ag_test_suite(self.suite.pk).name)
+
+        self.mutation_suite.validate_and_update(points_per_exposed_bug=3)
+        self.assertEqual(
+            3,
+            MutationTestSuitePreLoader(self.project).get_mutation_test_suite(
+                self.mutation_suite.pk).points_per_exposed_bug)
+
+    def test_version_bumped_on_create_and_delete(self) -> None:
+        self._load_all()
+
+        new_case = obj_build.make_ag_test_case(self.suite)
+        self.assertEqual(new_case, AGTestPreLoader(self.project).get_ag_test_case(new_case.pk))
+
+        new_case.delete()
+        with self.assertRaises(KeyError):
+            AGTestPreLoader(self.project).get_ag_test_case(new_case.pk)
+
+    def test_version_bumped_on_reorder(self) -> None:
+        other_suite = obj_build.make_ag_test_suite(self.project)
+        self._load_all()
+
+        old_version = get_test_config_version(self.project.pk)
+        self.project.set_agtestsuite_order([other_suite.pk, self.suite.pk])
+        self.assertNotEqual(old_version, get_test_config_version(self.project.pk))
+
+        other_case = obj_build.make_ag_test_case(self.suite)
+        old_version = get_test_config_version(self.project.pk)
+        self.suite.set_agtestcase_order([other_case.pk, self.case.pk])
+        self.assertNotEqual(old_version, get_test_config_version(self.project.pk))
+
+    def test_other_projects_not_invalidated(self) -> None:
+        other_project = obj_build.make_project(self.project.course)
+        old_version = get_test_config_version(other_project.pk)
+        self.cmd.validate_and_update(name='Renamed command')
+        self.assertEqual(old_version, get_test_config_version(other_project.pk))
+
+    @mock.patch('autograder.core.ag_test_config_cache._MAX_PROCESS_CACHE_ENTRIES', new=2)
+    def test_process_cache_evicts_least_recently_used(self) -> None:
+        self._load_all()
+        self.assertEqual(2, len(ag_test_config_cache._process_cache))
+        self.assertEqual(
+            ['ag_test_commands', 'mutation_test_suites'],
+            [kind for _, _, kind in ag_test_config_cache._process_cache])
+
+    def _load_all(self) -> None:
+        preloader = AGTestPreLoader(self.project)
+        self.assertEqual(self.suite, preloader.get_ag_test_suite(self.suite.pk))
+        self.assertEqual(self.case, preloader.get_ag_test_case(self.case.pk))
+        self.assertEqual(self.cmd, preloader.get_ag_test_cmd(self.cmd.pk))
+
+        self.assertEqual(
+            self.mutation_suite,
+            MutationTestSuitePreLoader(self.project).get_mutation_test_suite(
+                self.mutation_suite.pk))
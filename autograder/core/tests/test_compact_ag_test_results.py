@@ -0,0 +1,227 @@
+import json
+import time
+from typing import Dict
+
+from django.test import SimpleTestCase, override_settings, tag
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.compact_ag_test_results import (CompactAGTestResults,
+                                                     encode_ag_test_results)
+from autograder.core.models import get_submissions_with_results_queryset
+from autograder.core.submission_feedback import (
+    AGTestPreLoader, SubmissionResultFeedback, compact_denormalized_ag_test_results_in_bulk,
+    update_denormalized_ag_test_results)
+from autograder.utils.testing import UnitTestBase
+
+
+def _make_ag_test_results(*, submission_pk: int,
+                          num_suites: int,
+                          num_cases_per_suite: int,
+                          num_cmds_per_case: int) -> Dict[str, object]:
+    results: Dict[str, object] = {}
+    pk = 1
+    for suite_num in range(num_suites):
+        suite_id = 1000 + suite_num
+        suite_result_pk = pk
+        pk += 1
+        case_results: Dict[str, object] = {}
+        for case_num in range(num_cases_per_suite):
+            case_id = 2000 + suite_num * num_cases_per_suite + case_num
+            case_result_pk = pk
+            pk += 1
+            cmd_results: Dict[str, object] = {}
+            for cmd_num in range(num_cmds_per_case):
+                cmd_id = 3000 + case_id * num_cmds_per_case + cmd_num
+                cmd_results[str(cmd_id)] = {
+                    'pk': pk,
+                    'ag_test_command_id': cmd_id,
+                    'ag_test_case_result_id': case_result_pk,
+                    'return_code': cmd_num - 1 if cmd_num % 3 else None,
+                    'return_code_correct': [None, True, False][cmd_num % 3],
+                    'stdout_correct': [True, None, False][cmd_num % 3],
+                    'stderr_correct': [False, True, None][cmd_num % 3],
+                    'timed_out': cmd_num % 2 == 0,
+                    'stdout_truncated': cmd_num % 2 == 1,
+                    'stderr_truncated': False,
+                }
+                pk += 1
+
+            case_results[str(case_id)] = {
+                'pk': case_result_pk,
+                'ag_test_case_id': case_id,
+                'ag_test_suite_result_id': suite_result_pk,
+                'ag_test_command_results': cmd_results,
+            }
+
+        results[str(suite_id)] = {
+            'pk': suite_result_pk,
+            'ag_test_suite_id': suite_id,
+            'submission_id': submission_pk,
+            'setup_return_code': suite_num if suite_num % 2 else None,
+            'setup_timed_out': suite_num % 2 == 1,
+            'setup_stdout_truncated': suite_num % 3 == 1,
+            'setup_stderr_truncated': suite_num % 3 == 2,
+            'ag_test_case_results': case_results,
+        }
+
+    return results
+
+
+class CompactAGTestResultsTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.maxDiff = None
+        self.results = _make_ag_test_results(
+            submission_pk=42, num_suites=3, num_cases_per_suite=4, num_cmds_per_case=6)
+
+    def test_round_trip(self) -> None:
+        decoded = CompactAGTestResults(encode_ag_test_results(42, self.results))
+        self.assertEqual(self.results, dict(decoded))
+        self.assertEqual(list(self.results), list(decoded))
+        self.assertEqual(len(self.results), len(decoded))
+
+    def test_smaller_than_json(self) -> None:
+        self.assertLess(len(encode_ag_test_results(42, self.results)),
+                        len(json.dumps(self.results).encode()))
+
+    def test_round_trip_no_results(self) -> None:
+        decoded = CompactAGTestResults(encode_ag_test_results(42, {}))
+        self.assertEqual({}, dict(decoded))
+
+        self.results['1000']['ag_test_case_results'] = {}
+        decoded = CompactAGTestResults(encode_ag_test_results(42, self.results))
+        self.assertEqual(self.results, dict(decoded))
+
+    def test_get_suite_result_without_case_results(self) -> None:
+        decoded = CompactAGTestResults(encode_ag_test_results(42, self.results))
+        expected = dict(self.results['1001'])
+        expected_case_results = expected.pop('ag_test_case_results')
+
+        self.assertEqual(expected, decoded.get_suite_result('1001'))
+        self.assertEqual(expected_case_results, decoded.get_case_results('1001'))
+
+    def test_missing_suite(self) -> None:
+        decoded = CompactAGTestResults(encode_ag_test_results(42, self.results))
+        self.assertNotIn('1', decoded)
+        with self.assertRaises(KeyError):
+            decoded['1']
+
+    def test_error_bad_magic(self) -> None:
+        data = b'JUNK' + encode_ag_test_results(42, self.results)[4:]
+        with self.assertRaises(ValueError):
+            CompactAGTestResults(data)
+
+
+class CompactDenormalizedAGTestResultsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.maxDiff = None
+
+        self.project = obj_build.make_project()
+        suite = obj_build.make_ag_test_suite(self.project)
+        self.cmd1 = obj_build.make_full_ag_test_command(
+            obj_build.make_ag_test_case(suite), set_arbitrary_points=True)
+        self.cmd2 = obj_build.make_full_ag_test_command(
+            obj_build.make_ag_test_case(obj_build.make_ag_test_suite(self.project)),
+            set_arbitrary_points=True)
+
+        self.submission = obj_build.make_submission(
+            group=obj_build.make_group(project=self.project),
+            status=ag_models.Submission.GradingStatus.finished_grading)
+        obj_build.make_correct_ag_test_command_result(self.cmd1, submission=self.submission)
+        obj_build.make_incorrect_ag_test_command_result(self.cmd2, submission=self.submission)
+
+    def test_compact_and_expand_results_feedback_unchanged(self) -> None:
+        self.submission = update_denormalized_ag_test_results(self.submission.pk)
+        json_results = self.submission.denormalized_ag_test_results
+        expected = self._get_fdbk_dicts()
+
+        self.assertEqual(
+            1, compact_denormalized_ag_test_results_in_bulk(
+                ag_models.Submission.objects.filter(pk=self.submission.pk)))
+        self.submission.refresh_from_db()
+        self.assertEqual({}, self.submission.denormalized_ag_test_results)
+        self.assertIsNotNone(self.submission.compact_ag_test_results)
+        self.assertEqual(expected, self._get_fdbk_dicts())
+
+        # Already compact
+        self.assertEqual(
+            0, compact_denormalized_ag_test_results_in_bulk(
+                ag_models.Submission.objects.filter(pk=self.submission.pk)))
+
+        self.assertEqual(
+            1, compact_denormalized_ag_test_results_in_bulk(
+                ag_models.Submission.objects.filter(pk=self.submission.pk), compact=False))
+        self.submission.refresh_from_db()
+        self.assertEqual(json_results, self.submission.denormalized_ag_test_results)
+        self.assertIsNone(self.submission.compact_ag_test_results)
+        self.assertEqual(expected, self._get_fdbk_dicts())
+
+    def test_update_denormalized_results_compact_setting(self) -> None:
+        expected = update_denormalized_ag_test_results(
+            self.submission.pk).denormalized_ag_test_results
+
+        with override_settings(COMPACT_DENORMALIZED_AG_TEST_RESULTS=True):
+            self.submission = update_denormalized_ag_test_results(self.submission.pk)
+        self.submission.refresh_from_db()
+        self.assertEqual({}, self.submission.denormalized_ag_test_results)
+        self.assertEqual(
+            expected,
+            dict(CompactAGTestResults(bytes(self.submission.compact_ag_test_results))))
+
+        self.submission = update_denormalized_ag_test_results(self.submission.pk)
+        self.submission.refresh_from_db()
+        self.assertEqual(expected, self.submission.denormalized_ag_test_results)
+        self.assertIsNone(self.submission.compact_ag_test_results)
+
+    def _get_fdbk_dicts(self) -> Dict[str, object]:
+        submission = get_submissions_with_results_queryset().get(pk=self.submission.pk)
+        return {
+            fdbk_category.value: SubmissionResultFeedback(
+                submission, fdbk_category, AGTestPreLoader(self.project),
+                use_denormalized_point_totals=False
+            ).to_dict()
+            for fdbk_category in ag_models.FeedbackCategory
+        }
+
+
+@tag('slow', 'benchmark')
+class CompactAGTestResultsBenchmarkTestCase(SimpleTestCase):
+    """
+    Compares the size and decoding time of the JSON and compact
+    formats of denormalized AG test results as the number of tests
+    grows. Run with: ./manage.py test --tag benchmark
+    """
+    num_repetitions = 20
+
+    def test_size_and_decode_time_vs_num_tests(self) -> None:
+        print(f'\n{"suites":>8} {"cmds":>8} {"json bytes":>12} {"compact bytes":>14} '
+              f'{"json all (ms)":>14} {"compact all (ms)":>17} {"compact one (ms)":>17}')
+        for num_suites, num_cases_per_suite, num_cmds_per_case in [
+            (2, 5, 2), (5, 20, 3), (10, 50, 4)
+        ]:
+            results = _make_ag_test_results(
+                submission_pk=42, num_suites=num_suites,
+                num_cases_per_suite=num_cases_per_suite,
+                num_cmds_per_case=num_cmds_per_case)
+            json_data = json.dumps(results).encode()
+            compact_data = encode_ag_test_results(42, results)
+
+            json_all = self._time(lambda: json.loads(json_data))
+            compact_all = self._time(lambda: dict(CompactAGTestResults(compact_data)))
+            one_suite_id = next(iter(results))
+            compact_one = self._time(
+                lambda: CompactAGTestResults(compact_data)[one_suite_id])
+
+            num_cmds = num_suites * num_cases_per_suite * num_cmds_per_case
+            print(f'{num_suites:>8} {num_cmds:>8} {len(json_data):>12} '
+                  f'{len(compact_data):>14} {json_all:>14.3f} {compact_all:>17.3f} '
+                  f'{compact_one:>17.3f}')
+            self.assertLess(len(compact_data), len(json_data))
+
+    def _time(self, func) -> float:
+        start = time.perf_counter()
+        for _ in range(self.num_repetitions):
+            func()
+        return (time.perf_counter() - start) / self.num_repetitions * 1000
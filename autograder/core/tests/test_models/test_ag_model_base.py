@@ -1,13 +1,20 @@
 import copy
+import decimal
 import enum
-from typing import Any, Callable, Dict, List, cast
+import json
+import time
+from typing import Any, Callable, Dict, List, Sequence, cast
 from unittest import mock
 
 from django.contrib.auth.models import User
 from django.core import exceptions
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, tag
 
-from autograder.core.models.ag_model_base import AutograderModel, DictSerializable
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.fields import ValidatedJSONField
+from autograder.core.models.ag_model_base import AutograderModel, DictSerializable, ToDictMixin
+from autograder.rest_api.serialize_user import serialize_user
 from autograder.utils.testing import UnitTestBase
 
 from .models import (
@@ -131,6 +138,45 @@ class AGModelBaseToDictTest(UnitTestBase):
         obj = AGModelWithDecimalField.objects.validate_and_create(decimal_field='.5')
         self.assertEqual('0.50', obj.to_dict()['decimal_field'])
 
+    def test_to_dict_matches_reference_implementation(self) -> None:
+        objs = [
+            self.ag_model,
+            self.ag_model.foreign_key,
+            AGModelWithDecimalField.objects.validate_and_create(decimal_field='.5'),
+            DictSerializableClass(num=3, string='spam', an_enum=AnEnum.egg),
+        ]
+        for obj in objs:
+            self.assertEqual(json.dumps(_reference_to_dict(obj)), json.dumps(obj.to_dict()))
+
+        serialize_related = ('one_to_one', 'nullable_one_to_one', 'foreign_key', 'many_to_many')
+        target = 'autograder.core.tests.test_models.models.DummyAutograderModel.SERIALIZE_RELATED'
+        with mock.patch(target, new=serialize_related):
+            self.assertEqual(json.dumps(_reference_to_dict(self.ag_model)),
+                             json.dumps(self.ag_model.to_dict()))
+
+    def test_to_dict_matches_reference_implementation_for_app_models(self) -> None:
+        group = obj_build.make_group(num_members=2)
+        objs = [
+            ag_models.Group.objects.prefetch_related('members').get(pk=group.pk),
+            obj_build.make_submission(group=group),
+            ag_models.AGTestCommandFeedbackConfig.default_ultimate_submission_fdbk_config(),
+        ]
+        for obj in objs:
+            # Call ToDictMixin.to_dict() directly to skip subclasses'
+            # post-processing (e.g., Group sorting its members).
+            self.assertEqual(json.dumps(_reference_to_dict(obj)),
+                             json.dumps(ToDictMixin.to_dict(obj)))
+
+    def test_serialize_related_changed_after_first_to_dict(self) -> None:
+        self.assertEqual(self.ag_model.foreign_key.pk, self.ag_model.to_dict()['foreign_key'])
+
+        target = 'autograder.core.tests.test_models.models.DummyAutograderModel.SERIALIZE_RELATED'
+        with mock.patch(target, new=('foreign_key',)):
+            self.assertEqual(self.ag_model.foreign_key.to_dict(),
+                             self.ag_model.to_dict()['foreign_key'])
+
+        self.assertEqual(self.ag_model.foreign_key.pk, self.ag_model.to_dict()['foreign_key'])
+
 
 class AGModelValidateAndCreateTestCase(UnitTestBase):
     many_to_manys: List[DummyToManyModel]
@@ -922,3 +968,108 @@ class DictSerializableMixinTestCase(SimpleTestCase):
         cloned = _SerializableClass.from_dict(obj.to_dict())
         for key, value in data.items():
             self.assertEqual(value, getattr(cloned, key))
+
+
+def _reference_to_dict(obj: ToDictMixin) -> Dict[str, object]:
+    """
+    The original, unplanned implementation of ToDictMixin.to_dict(),
+    which the current implementation must match exactly.
+    """
+    result: Dict[str, Any] = {}
+    for field_name in obj.get_serializable_fields():
+        result[field_name] = getattr(obj, field_name)
+
+        if isinstance(result[field_name], enum.Enum):
+            result[field_name] = result[field_name].value
+            continue
+
+        if isinstance(result[field_name], decimal.Decimal):
+            result[field_name] = str(result[field_name].quantize(decimal.Decimal('.01')))
+            continue
+
+        if not hasattr(obj, '_meta'):
+            continue
+
+        try:
+            field = cast(AutograderModel, obj)._meta.get_field(field_name)
+
+            if isinstance(field, ValidatedJSONField):
+                value = getattr(obj, field_name)
+                result[field_name] = value.to_dict() if value is not None else None
+                continue
+
+            if field.many_to_one or field.one_to_one:
+                field_val = getattr(obj, field_name)
+                if field_val is None:
+                    continue
+
+                if field_name in obj.get_serialize_related_fields():
+                    result[field_name] = _reference_serialize_model_obj(field_val)
+                elif isinstance(field_val, int):
+                    result[field_name] = field_val
+                else:
+                    result[field_name] = field_val.pk
+            elif field.many_to_many or field.one_to_many:
+                if field_name in obj.get_serialize_related_fields():
+                    result[field_name] = [
+                        _reference_serialize_model_obj(related)
+                        for related in getattr(obj, field_name).all()
+                    ]
+                else:
+                    result[field_name] = [
+                        related.pk for related in getattr(obj, field_name).all()]
+        except exceptions.FieldDoesNotExist:
+            pass
+
+    return result
+
+
+def _reference_serialize_model_obj(obj: object) -> Dict[str, object]:
+    if isinstance(obj, User):
+        return serialize_user(obj)
+
+    return _reference_to_dict(cast(ToDictMixin, obj))
+
+
+@tag('slow', 'benchmark')
+class ToDictBenchmarkTestCase(UnitTestBase):
+    """
+    Compares the time it takes to serialize lists of objects with
+    ToDictMixin.to_dict() and with the original implementation.
+    Run with: ./manage.py test --tag benchmark
+    """
+    num_objs = 200
+    num_repetitions = 5
+
+    def test_to_dict_time_vs_reference_implementation(self) -> None:
+        project = obj_build.make_project()
+        for _ in range(self.num_objs):
+            obj_build.make_submission(
+                group=obj_build.make_group(num_members=2, project=project))
+
+        objs_to_serialize: Dict[str, Sequence[ToDictMixin]] = {
+            'groups': list(
+                ag_models.Group.objects.filter(project=project).prefetch_related('members')),
+            'submissions': list(ag_models.Submission.objects.filter(project=project)),
+            'fdbk configs': [
+                ag_models.AGTestCommandFeedbackConfig.default_ultimate_submission_fdbk_config()
+                for _ in range(self.num_objs)
+            ],
+        }
+
+        print(f'\n{"objects":>14} {"reference (ms)":>15} {"to_dict (ms)":>13}')
+        for name, objs in objs_to_serialize.items():
+            reference_time = self._time(lambda: [_reference_to_dict(obj) for obj in objs])
+            # Call ToDictMixin.to_dict() directly to skip subclasses'
+            # post-processing (e.g., Group sorting its members).
+            to_dict_time = self._time(lambda: [ToDictMixin.to_dict(obj) for obj in objs])
+            print(f'{name:>14} {reference_time:>15.3f} {to_dict_time:>13.3f}')
+
+            self.assertEqual(json.dumps([_reference_to_dict(obj) for obj in objs]),
+                             json.dumps([ToDictMixin.to_dict(obj) for obj in objs]))
+
+    def _time(self, func: Callable[[], object]) -> float:
+        start = time.perf_counter()
+        for _ in range(self.num_repetitions):
+            func()
+        return (time.perf_counter() - start) / self.num_repetitions * 1000
@@ -34,6 +34,7 @@ class AGTestSuiteTestCase(UnitTestBase):
         self.assertEqual(ag_models.SandboxDockerImage.objects.get(name='default'),
                          suite.sandbox_docker_image)
         self.assertFalse(suite.deferred)
+        self.assertEqual(1, suite.max_parallel_test_cases)
 
         self.assertIsNotNone(suite.normal_fdbk_config)
         self.assertIsNotNone(suite.ultimate_submission_fdbk_config)
@@ -117,6 +118,13 @@ class AGTestSuiteTestCase(UnitTestBase):
         self.assertEqual(sandbox_image, suite.sandbox_docker_image)
         self.assertFalse(suite.normal_fdbk_config.visible)
 
+    def test_error_max_parallel_test_cases_out_of_range(self):
+        for bad_value in [0, -1, constants.MAX_PARALLEL_AG_TEST_CASES + 1]:
+            with self.assertRaises(exceptions.ValidationError) as cm:
+                ag_models.AGTestSuite.objects.validate_and_create(
+                    name='suitey', project=self.project, max_parallel_test_cases=bad_value)
+            self.assertIn('max_parallel_test_cases', cm.exception.message_dict)
+
     def test_error_suite_name_not_unique(self):
         name = 'steve'
         ag_models.AGTestSuite.objects.validate_and_create(name=name, project=self.project)
@@ -219,6 +227,7 @@ class AGTestSuiteTestCase(UnitTestBase):
             'sandbox_docker_image',
             'allow_network_access',
             'deferred',
+            'max_parallel_test_cases',
 
             'normal_fdbk_config',
             'ultimate_submission_fdbk_config',
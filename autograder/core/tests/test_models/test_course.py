@@ -5,7 +5,7 @@ from django.core.exceptions import ValidationError
 import autograder.core.utils as core_ut
 import autograder.utils.testing.model_obj_builders as obj_build
 from autograder.core.models import Course, LateDaysRemaining, Semester
-from autograder.core.models.course import clear_cached_user_roles
+from autograder.core.models.course import clear_cached_user_roles, refresh_cached_user_roles
 from autograder.utils.testing import UnitTestBase
 
 
@@ -405,3 +405,64 @@ class CourseRolesTestCase(UnitTestBase):
 
         self.course.validate_and_update(allowed_guest_domain='')
         self.assertTrue(self.course.is_allowed_guest(self.user))
+
+    def test_user_roles_loaded_in_one_query(self) -> None:
+        self.course.admins.add(self.user)
+        self.course.handgraders.add(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                {
+                    'is_admin': True,
+                    'is_staff': True,
+                    'is_handgrader': True,
+                    'is_student': False,
+                },
+                self.course.get_user_roles(self.user)
+            )
+
+        # The roles should now be cached.
+        self.course = Course.objects.get(pk=self.course.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.course.get_user_roles(self.user)['is_admin'])
+
+    def test_get_users_roles(self) -> None:
+        [admin] = obj_build.make_admin_users(self.course, 1)
+        [staff] = obj_build.make_staff_users(self.course, 1)
+        [handgrader] = obj_build.make_handgrader_users(self.course, 1)
+        students = obj_build.make_student_users(self.course, 3)
+        users = [admin, staff, handgrader, self.user, *students]
+
+        # One query for all the users that aren't cached yet.
+        self.course.get_user_roles(staff)
+        self.course = Course.objects.get(pk=self.course.pk)
+        with self.assertNumQueries(1):
+            roles = self.course.get_users_roles(users)
+
+        self.assertEqual({user.pk for user in users}, set(roles))
+        self.assertTrue(roles[admin.pk]['is_admin'])
+        self.assertTrue(roles[admin.pk]['is_staff'])
+        self.assertFalse(roles[staff.pk]['is_admin'])
+        self.assertTrue(roles[staff.pk]['is_staff'])
+        self.assertTrue(roles[handgrader.pk]['is_handgrader'])
+        self.assertFalse(roles[handgrader.pk]['is_staff'])
+        self.assertFalse(any(roles[self.user.pk].values()))
+        for student in students:
+            self.assertTrue(roles[student.pk]['is_student'])
+            self.assertFalse(roles[student.pk]['is_staff'])
+
+        self.course = Course.objects.get(pk=self.course.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(roles, self.course.get_users_roles(users))
+
+    def test_refresh_cached_user_roles_caches_roster_roles(self) -> None:
+        students = obj_build.make_student_users(self.course, 2)
+        self.assertFalse(self.course.is_student(self.user))
+
+        self.course.students.add(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_cached_user_roles(self.course.pk)
+
+        self.course = Course.objects.get(pk=self.course.pk)
+        with self.assertNumQueries(0):
+            roles = self.course.get_users_roles([*students, self.user])
+        self.assertTrue(all(user_roles['is_student'] for user_roles in roles.values()))
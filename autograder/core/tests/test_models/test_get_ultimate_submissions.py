@@ -1,10 +1,14 @@
 import sys
 from typing import List
+from unittest import mock
 
 import autograder.core.models as ag_models
+import autograder.core.models.get_ultimate_submissions as get_ultimate_submissions_module
 import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.ag_test_config_cache import bump_test_config_version
 from autograder.core.models.get_ultimate_submissions import (
-    get_ultimate_submissions, get_ultimate_submission)
+    clear_cached_ultimate_submission, get_ultimate_submissions, get_ultimate_submission,
+    refresh_cached_ultimate_submission)
 from autograder.core.submission_feedback import (
     update_denormalized_ag_test_results, AGTestPreLoader)
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import (
@@ -435,3 +439,136 @@ class GetUltimateSubmissionForUserTestCase(UnitTestBase):
             self.group, user=self.does_not_count_for_user
         )
         self.assertIsNone(does_not_count_for_user_ultimate_submission)
+
+
+class CachedUltimateSubmissionTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project(
+            ultimate_submission_policy=ag_models.UltimateSubmissionPolicy.best)
+        self.group = obj_build.make_group(project=self.project)
+
+        suite = obj_build.make_ag_test_suite(self.project)
+        self.cmd = obj_build.make_full_ag_test_command(obj_build.make_ag_test_case(suite))
+
+        self.best_submission = obj_build.make_finished_submission(self.group)
+        obj_build.make_correct_ag_test_command_result(
+            self.cmd, submission=self.best_submission)
+        self.best_submission = update_denormalized_ag_test_results(self.best_submission.pk)
+        self.most_recent_submission = obj_build.make_finished_submission(self.group)
+        obj_build.make_incorrect_ag_test_command_result(
+            self.cmd, submission=self.most_recent_submission)
+        self.most_recent_submission = update_denormalized_ag_test_results(
+            self.most_recent_submission.pk)
+
+        self.load_patcher = mock.patch.object(
+            get_ultimate_submissions_module, '_load_ultimate_submission',
+            wraps=get_ultimate_submissions_module._load_ultimate_submission)
+        self.mock_load = self.load_patcher.start()
+        self.addCleanup(self.load_patcher.stop)
+
+    def test_ultimate_submission_cached(self) -> None:
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group))
+        # One query for the submission and one for its prefetched
+        # mutation test suite results.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.best_submission, get_ultimate_submission(self.group))
+        self.mock_load.assert_called_once()
+
+    def test_cached_ultimate_submission_loaded_with_related_data(self) -> None:
+        get_ultimate_submission(self.group)
+        submission = get_ultimate_submission(self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.group, submission.group)
+            list(submission.mutation_test_suite_results.all())
+
+    def test_results_not_loaded_when_choosing_ultimate_submission(self) -> None:
+        submission = get_ultimate_submission(self.group)
+        self.assertEqual(self.best_submission, submission)
+        self.assertIn('denormalized_ag_test_results', submission.get_deferred_fields())
+
+    def test_results_not_loaded_for_totals_only(self) -> None:
+        [fdbk] = get_ultimate_submissions(
+            self.project, filter_groups=[self.group],
+            ag_test_preloader=AGTestPreLoader(self.project), totals_only=True)
+        self.assertEqual(self.best_submission, fdbk.submission)
+        self.assertIn('denormalized_ag_test_results', fdbk.submission.get_deferred_fields())
+
+        [fdbk] = get_ultimate_submissions(
+            self.project, filter_groups=[self.group],
+            ag_test_preloader=AGTestPreLoader(self.project))
+        self.assertNotIn('denormalized_ag_test_results', fdbk.submission.get_deferred_fields())
+
+    def test_no_ultimate_submission_cached(self) -> None:
+        group = obj_build.make_group(project=self.project)
+        self.assertIsNone(get_ultimate_submission(group))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_ultimate_submission(group))
+
+    def test_ultimate_submission_cached_per_user(self) -> None:
+        user = self.group.members.first()
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group, user))
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group))
+        self.assertEqual(2, self.mock_load.call_count)
+
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group, user))
+        self.assertEqual(2, self.mock_load.call_count)
+
+    def test_new_finished_submission_invalidates_cache(self) -> None:
+        get_ultimate_submission(self.group)
+
+        self.project.validate_and_update(
+            ultimate_submission_policy=ag_models.UltimateSubmissionPolicy.most_recent)
+        self.assertEqual(self.most_recent_submission, get_ultimate_submission(self.group))
+
+        new_submission = obj_build.make_finished_submission(self.group)
+        self.assertEqual(new_submission, get_ultimate_submission(self.group))
+
+    def test_status_change_invalidates_cache(self) -> None:
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group))
+
+        self.best_submission.status = ag_models.Submission.GradingStatus.removed_from_queue
+        self.best_submission.save()
+        self.assertEqual(self.most_recent_submission, get_ultimate_submission(self.group))
+
+    def test_does_not_count_for_change_invalidates_cache(self) -> None:
+        user = self.group.members.first()
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group, user))
+
+        self.best_submission.does_not_count_for = [user.username]
+        self.best_submission.save()
+        self.assertEqual(self.most_recent_submission, get_ultimate_submission(self.group, user))
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group))
+
+    def test_deleted_submission_not_returned(self) -> None:
+        self.assertEqual(self.best_submission, get_ultimate_submission(self.group))
+        self.best_submission.delete()
+        self.assertEqual(self.most_recent_submission, get_ultimate_submission(self.group))
+
+    def test_test_config_change_invalidates_best_submission_cache(self) -> None:
+        get_ultimate_submission(self.group)
+        bump_test_config_version(self.project.pk)
+        get_ultimate_submission(self.group)
+        self.assertEqual(2, self.mock_load.call_count)
+
+    def test_test_config_change_does_not_invalidate_most_recent_submission_cache(self) -> None:
+        self.project.validate_and_update(
+            ultimate_submission_policy=ag_models.UltimateSubmissionPolicy.most_recent)
+        get_ultimate_submission(self.group)
+        bump_test_config_version(self.project.pk)
+        get_ultimate_submission(self.group)
+        self.mock_load.assert_called_once()
+
+    def test_clear_cached_ultimate_submission(self) -> None:
+        get_ultimate_submission(self.group)
+        clear_cached_ultimate_submission(self.group.pk)
+        get_ultimate_submission(self.group)
+        self.assertEqual(2, self.mock_load.call_count)
+
+    def test_refresh_cached_ultimate_submission(self) -> None:
+        get_ultimate_submission(self.group)
+        refresh_cached_ultimate_submission(self.group)
+        self.assertEqual(2, self.mock_load.call_count)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(self.best_submission, get_ultimate_submission(self.group))
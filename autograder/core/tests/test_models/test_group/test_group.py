@@ -12,6 +12,7 @@ import autograder.core.models as ag_models
 import autograder.core.utils as core_ut
 import autograder.utils.testing as test_ut
 import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.models.group import verification
 from autograder.utils.testing import UnitTestBase
 
 
@@ -558,6 +559,22 @@ class GroupMembershipTestCase(_SetUp):
             ag_models.Group.objects.validate_and_create(
                 members=self.student_users, project=self.project)
 
+    def test_member_roles_and_other_groups_checked_with_one_query_each(self):
+        self.project.validate_and_update(max_group_size=5)
+        ag_models.Group.objects.validate_and_create(
+            members=self.student_users[0:1], project=self.project)
+        new_members = list(obj_build.make_student_users(self.course, 4))
+
+        with self.assertNumQueries(2):
+            verification.verify_users_have_same_enrollment_status(
+                new_members, self.project, 'members', ignore_guest_restrictions=False)
+            verification.verify_users_not_in_other_group(new_members, self.project, 'members')
+
+        with self.assertRaises(exceptions.ValidationError) as cm:
+            verification.verify_users_not_in_other_group(
+                new_members + self.student_users[0:1], self.project, 'members')
+        self.assertIn(self.student_users[0].username, cm.exception.message_dict['members'][0])
+
     def test_exception_on_some_members_not_student(self):
         mixed_group = self.student_users[0:1] + [obj_build.create_dummy_user()]
         with self.assertRaises(exceptions.ValidationError):
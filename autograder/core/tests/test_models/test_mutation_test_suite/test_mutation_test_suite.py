@@ -4,6 +4,7 @@ from django.core import exceptions
 
 from autograder.utils.testing import TransactionUnitTestBase, UnitTestBase
 import autograder.core.models as ag_models
+from autograder.core import constants
 import autograder.utils.testing.model_obj_builders as obj_build
 
 
@@ -35,8 +36,13 @@ class MutationTestSuiteTestCase(UnitTestBase):
 
         self.assertIsInstance(mutation_suite.student_test_validity_check_command,
                               ag_models.Command)
+        self.assertEqual(1, mutation_suite.max_parallel_validity_checks)
         self.assertIsInstance(mutation_suite.grade_buggy_impl_command,
                               ag_models.Command)
+        self.assertEqual(ag_models.StudentTestOrdering.discovery_order,
+                         mutation_suite.student_test_ordering)
+        self.assertEqual(1, mutation_suite.max_parallel_buggy_impls)
+        self.assertFalse(mutation_suite.cache_buggy_impl_results)
 
         self.assertEqual(0, mutation_suite.points_per_exposed_bug)
         self.assertIsNone(mutation_suite.max_points)
@@ -95,9 +101,13 @@ class MutationTestSuiteTestCase(UnitTestBase):
 
             'student_test_validity_check_command': {
                 'cmd': 'python3 validity_check.py ${student_test_name}'},
+            'max_parallel_validity_checks': 5,
             'grade_buggy_impl_command': {
                 'cmd': 'python3 grade.py ${buggy_impl_name} ${student_test_name}'
             },
+            'student_test_ordering': ag_models.StudentTestOrdering.group_history.value,
+            'max_parallel_buggy_impls': 3,
+            'cache_buggy_impl_results': True,
             'points_per_exposed_bug': 42,
             'max_points': 462,
             'deferred': True,
@@ -226,6 +236,26 @@ class MutationTestSuiteTestCase(UnitTestBase):
 
         self.assertIn('max_num_student_tests', cm.exception.message_dict)
 
+    def test_error_invalid_student_test_ordering(self):
+        with self.assertRaises(exceptions.ValidationError) as cm:
+            ag_models.MutationTestSuite.objects.validate_and_create(
+                name=self.name, project=self.project, student_test_ordering='not_an_ordering')
+        self.assertIn('student_test_ordering', cm.exception.message_dict)
+
+    def test_max_parallel_validity_checks_out_of_range(self):
+        for bad_value in [0, -1, constants.MAX_PARALLEL_VALIDITY_CHECKS + 1]:
+            with self.assertRaises(exceptions.ValidationError) as cm:
+                ag_models.MutationTestSuite.objects.validate_and_create(
+                    name=self.name, project=self.project, max_parallel_validity_checks=bad_value)
+            self.assertIn('max_parallel_validity_checks', cm.exception.message_dict)
+
+    def test_max_parallel_buggy_impls_out_of_range(self):
+        for bad_value in [0, -1, constants.MAX_PARALLEL_BUGGY_IMPLS + 1]:
+            with self.assertRaises(exceptions.ValidationError) as cm:
+                ag_models.MutationTestSuite.objects.validate_and_create(
+                    name=self.name, project=self.project, max_parallel_buggy_impls=bad_value)
+            self.assertIn('max_parallel_buggy_impls', cm.exception.message_dict)
+
     def test_validity_check_cmd_missing_placeholders(self):
         with self.assertRaises(exceptions.ValidationError) as cm:
             ag_models.MutationTestSuite.objects.validate_and_create(
@@ -316,7 +346,11 @@ class MutationTestSuiteTestCase(UnitTestBase):
             'max_num_student_tests',
 
             'student_test_validity_check_command',
+            'max_parallel_validity_checks',
             'grade_buggy_impl_command',
+            'student_test_ordering',
+            'max_parallel_buggy_impls',
+            'cache_buggy_impl_results',
             'points_per_exposed_bug',
             'max_points',
             'deferred',
@@ -28,6 +28,7 @@ class MutationTestSuiteResultTestCase(UnitTestBase):
         self.assertSequenceEqual([], result.invalid_tests)
         self.assertSequenceEqual([], result.timed_out_tests)
         self.assertSequenceEqual([], result.bugs_exposed)
+        self.assertEqual({}, result.exposing_tests)
         self.assertIsNone(result.setup_result)
         self.assertIsInstance(result.get_test_names_result, ag_models.AGCommandResult)
 
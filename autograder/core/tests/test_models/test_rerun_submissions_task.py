@@ -33,6 +33,7 @@ class RerunSubmissionsTaskTestCase(UnitTestBase):
         self.assertEqual({}, rerun_task.ag_test_suite_data)
         self.assertTrue(rerun_task.rerun_all_mutation_test_suites)
         self.assertEqual([], rerun_task.mutation_suite_pks)
+        self.assertFalse(rerun_task.rerun_affected_only)
         self.assertEqual(0, rerun_task.num_completed_subtasks)
 
     def test_create_non_defaults(self):
@@ -45,6 +46,7 @@ class RerunSubmissionsTaskTestCase(UnitTestBase):
             ag_test_suite_data={str(self.ag_test_suite.pk): [self.ag_test_case.pk]},
             rerun_all_mutation_test_suites=False,
             mutation_suite_pks=[self.mutation_test_suite.pk],
+            rerun_affected_only=True,
         )  # type: ag_models.RerunSubmissionsTask
 
         self.assertEqual(self.project, rerun_task.project)
@@ -55,6 +57,7 @@ class RerunSubmissionsTaskTestCase(UnitTestBase):
                          rerun_task.ag_test_suite_data)
         self.assertFalse(rerun_task.rerun_all_mutation_test_suites)
         self.assertEqual([self.mutation_test_suite.pk], rerun_task.mutation_suite_pks)
+        self.assertTrue(rerun_task.rerun_affected_only)
 
     def test_progress_computation(self):
         completed_count = 1
@@ -166,6 +169,7 @@ class RerunSubmissionsTaskTestCase(UnitTestBase):
             'ag_test_suite_data',
             'rerun_all_mutation_test_suites',
             'mutation_suite_pks',
+            'rerun_affected_only',
         ]
 
         rerun_task = ag_models.RerunSubmissionsTask.objects.validate_and_create(
@@ -6,7 +6,8 @@ from unittest import mock
 import autograder.core.models as ag_models
 import autograder.core.utils as core_ut
 import autograder.utils.testing.model_obj_builders as obj_build
-from autograder.core.submission_feedback import AGTestCommandResultFeedback, AGTestPreLoader
+from autograder.core.submission_feedback import (
+    AGTestCommandResultFeedback, AGTestPreLoader, update_diff_sizes)
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import get_cmd_fdbk
 from autograder.utils.testing import UnitTestBase
 
@@ -896,6 +897,130 @@ def _get_expected_diff(expected_text: str, actual_output_filename: str):
         return core_ut.get_diff(f.name, actual_output_filename)
 
 
+class CachedDiffTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+
+        submission = obj_build.make_submission()
+        self.project = submission.group.project
+        suite = obj_build.make_ag_test_suite(self.project)
+        ag_test_case = obj_build.make_ag_test_case(suite)
+        self.ag_test_command = obj_build.make_full_ag_test_command(
+            ag_test_case,
+            set_arbitrary_points=False,
+            normal_fdbk_config={
+                'stdout_fdbk_level': ag_models.ValueFeedbackLevel.expected_and_actual,
+                'stderr_fdbk_level': ag_models.ValueFeedbackLevel.expected_and_actual,
+            }
+        )
+        self.result = obj_build.make_incorrect_ag_test_command_result(
+            self.ag_test_command, submission=submission)
+
+    def test_diff_computed_once_and_stored(self):
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        expected_diff = _get_expected_diff(
+            self.ag_test_command.expected_stdout_text, self.result.stdout_filename)
+        self.assertEqual(expected_diff.diff_content, fdbk.stdout_diff.diff_content)
+        self.assertTrue(os.path.isfile(self.result.stdout_diff_filename))
+
+        with mock.patch('autograder.core.utils.get_diff') as mock_get_diff:
+            fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+            self.assertEqual(expected_diff.diff_content, fdbk.stdout_diff.diff_content)
+            self.assertFalse(fdbk.stdout_diff.diff_pass)
+            self.assertEqual(sum(len(line) for line in expected_diff.diff_content),
+                             fdbk.get_stdout_diff_size())
+
+            mock_get_diff.assert_not_called()
+
+    def test_diff_sizes_not_saved_when_computing_feedback(self):
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertFalse(fdbk.diff_sizes_out_of_date)
+        fdbk.get_stdout_diff_size()
+        self.assertTrue(fdbk.diff_sizes_out_of_date)
+
+        self.result.refresh_from_db()
+        self.assertEqual('', self.result.diff_cache_key)
+        self.assertIsNone(self.result.stdout_diff_size)
+        self.assertIsNone(self.result.stderr_diff_size)
+
+    def test_diff_sizes_loaded_from_result(self):
+        update_diff_sizes(self.result)
+        self.result.refresh_from_db()
+        self.assertNotEqual('', self.result.diff_cache_key)
+        self.assertIsNotNone(self.result.stdout_diff_size)
+        self.assertIsNotNone(self.result.stderr_diff_size)
+
+        os.remove(self.result.stderr_diff_filename)
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertEqual(self.result.stdout_diff_size, fdbk.get_stdout_diff_size())
+        self.assertEqual(self.result.stderr_diff_size, fdbk.get_stderr_diff_size())
+        self.assertFalse(fdbk.diff_sizes_out_of_date)
+        self.assertFalse(os.path.exists(self.result.stderr_diff_filename))
+
+    def test_other_stream_output_file_missing(self):
+        os.remove(self.result.stderr_filename)
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        expected_diff = _get_expected_diff(
+            self.ag_test_command.expected_stdout_text, self.result.stdout_filename)
+        self.assertEqual(expected_diff.diff_content, fdbk.stdout_diff.diff_content)
+
+        update_diff_sizes(self.result)
+        self.result.refresh_from_db()
+        self.assertEqual(sum(len(line) for line in expected_diff.diff_content),
+                         self.result.stdout_diff_size)
+        self.assertIsNone(self.result.stderr_diff_size)
+
+    def test_cached_diff_invalidated_when_expected_output_changes(self):
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        old_diff = fdbk.stdout_diff
+        old_size = fdbk.get_stdout_diff_size()
+
+        self.ag_test_command.validate_and_update(expected_stdout_text=_stdout_text(self.result))
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        new_diff = fdbk.stdout_diff
+        self.assertNotEqual(old_diff.diff_content, new_diff.diff_content)
+        self.assertTrue(new_diff.diff_pass)
+        self.assertNotEqual(old_size, fdbk.get_stdout_diff_size())
+
+    def test_cached_diff_invalidated_when_ignore_flags_change(self):
+        self.ag_test_command.validate_and_update(expected_stdout_text='SPAM\n')
+        _write_stdout(self.result, 'spam\n')
+
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertFalse(fdbk.stdout_diff.diff_pass)
+
+        self.ag_test_command.validate_and_update(ignore_case=True)
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertTrue(fdbk.stdout_diff.diff_pass)
+
+    def test_cached_diff_invalidated_when_instructor_file_changes(self):
+        instructor_file = obj_build.make_instructor_file(self.project)
+        self.ag_test_command.validate_and_update(
+            expected_stdout_source=ag_models.ExpectedOutputSource.instructor_file,
+            expected_stdout_instructor_file=instructor_file)
+        _write_stdout(self.result, 'spam\n')
+
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertFalse(fdbk.stdout_diff.diff_pass)
+
+        with instructor_file.open('w') as f:
+            f.write('spam\n')
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertTrue(fdbk.stdout_diff.diff_pass)
+        self.assertEqual(['  spam\n'], fdbk.stdout_diff.diff_content)
+
+    def test_cached_diff_invalidated_when_actual_output_changes(self):
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertFalse(fdbk.stderr_diff.diff_pass)
+
+        _write_stderr(self.result, self.ag_test_command.expected_stderr_text)
+        fdbk = get_cmd_fdbk(self.result, ag_models.FeedbackCategory.normal)
+        self.assertTrue(fdbk.stderr_diff.diff_pass)
+        self.assertEqual(
+            sum(len(line) for line in fdbk.stderr_diff.diff_content),
+            fdbk.get_stderr_diff_size())
+
+
 class InFirstFailedTestFeedbackTestCase(UnitTestBase):
     def setUp(self):
         super().setUp()
@@ -1,8 +1,14 @@
 import json
+import time
 from decimal import Decimal
+from unittest import mock
+
+from django.test import tag
 
 from autograder.core.models import get_submissions_with_results_queryset
-from autograder.core.submission_feedback import update_denormalized_ag_test_results
+from autograder.core.submission_feedback import (
+    AGTestPreLoader, SubmissionResultFeedback, update_denormalized_ag_test_results,
+    update_denormalized_point_totals)
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import (
     get_suite_fdbk, get_submission_fdbk)
 import autograder.core.models as ag_models
@@ -386,3 +392,164 @@ class SubmissionFeedbackTestCase(UnitTestBase):
         for suite_res in result.ag_test_suite_results:
             for test_res in suite_res.ag_test_case_results:
                 self.assertNotIn(self.ag_test_cmd1, test_res.ag_test_command_results)
+
+    def test_denormalized_point_totals_match_computed_totals(self) -> None:
+        self.ag_test_cmd2.validate_and_update(
+            normal_fdbk_config={'visible': False})
+        update_denormalized_point_totals(self.submission.pk)
+        self.submission.refresh_from_db()
+
+        for fdbk_category in ag_models.FeedbackCategory:
+            self.assertIn(fdbk_category.value, self.submission.denormalized_point_totals)
+            computed = SubmissionResultFeedback(
+                self.submission, fdbk_category, AGTestPreLoader(self.project),
+                use_denormalized_point_totals=False)
+            denormalized = get_submission_fdbk(self.submission, fdbk_category)
+            self.assertEqual(computed.total_points, denormalized.total_points)
+            self.assertEqual(computed.total_points_possible, denormalized.total_points_possible)
+
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max)
+        self.assertEqual(self.total_points, fdbk.total_points)
+        self.assertEqual(self.total_points_possible, fdbk.total_points_possible)
+
+    def test_denormalized_point_totals_used(self) -> None:
+        update_denormalized_point_totals(self.submission.pk)
+        self._set_denormalized_max_total_points(42)
+
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max)
+        self.assertEqual(42, fdbk.total_points)
+        self.assertEqual(self.total_points_possible, fdbk.total_points_possible)
+
+    def test_denormalized_point_totals_ignored_after_test_config_changes(self) -> None:
+        update_denormalized_point_totals(self.submission.pk)
+        self._set_denormalized_max_total_points(42)
+
+        self.ag_test_cmd1.validate_and_update(
+            points_for_correct_return_code=self.ag_test_cmd1.points_for_correct_return_code + 2)
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max)
+        self.assertEqual(self.total_points + 2, fdbk.total_points)
+        self.assertEqual(self.total_points_possible + 2, fdbk.total_points_possible)
+
+    def test_denormalized_point_totals_ignored_after_status_changes(self) -> None:
+        update_denormalized_point_totals(self.submission.pk)
+        self._set_denormalized_max_total_points(42)
+
+        self.submission.status = ag_models.Submission.GradingStatus.finished_grading
+        self.submission.save()
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max)
+        self.assertEqual(self.total_points, fdbk.total_points)
+
+    def test_denormalized_point_totals_cleared_when_results_updated(self) -> None:
+        update_denormalized_point_totals(self.submission.pk)
+        self.submission = update_denormalized_ag_test_results(self.submission.pk)
+        self.assertEqual({}, self.submission.denormalized_point_totals)
+
+    def test_point_totals_computed_without_feedback_objects(self) -> None:
+        self.ag_test_cmd1.validate_and_update(
+            normal_fdbk_config={'show_points': True},
+            first_failed_test_normal_fdbk_config={
+                'return_code_fdbk_level': ag_models.ValueFeedbackLevel.correct_or_incorrect,
+                'show_points': True
+            })
+        self.ag_cmd_result1.return_code_correct = False
+        self.ag_cmd_result1.save()
+        self.ag_test_case2.validate_and_update(
+            ultimate_submission_fdbk_config={'visible': False})
+        self.submission = update_denormalized_ag_test_results(self.submission.pk)
+
+        for fdbk_category in ag_models.FeedbackCategory:
+            fdbk = get_submission_fdbk(self.submission, fdbk_category)
+            expected_points = sum((
+                res.total_points for res in
+                fdbk.ag_test_suite_results + fdbk.mutation_test_suite_results
+            ))
+            expected_points_possible = sum((
+                res.total_points_possible for res in
+                fdbk.ag_test_suite_results + fdbk.mutation_test_suite_results
+            ))
+
+            with mock.patch.multiple('autograder.core.submission_feedback',
+                                     AGTestSuiteResultFeedback=mock.DEFAULT,
+                                     AGTestCaseResultFeedback=mock.DEFAULT,
+                                     AGTestCommandResultFeedback=mock.DEFAULT) as fdbk_mocks:
+                fdbk = SubmissionResultFeedback(
+                    self.submission, fdbk_category, AGTestPreLoader(self.project),
+                    use_denormalized_point_totals=False)
+                self.assertEqual(expected_points, fdbk.total_points)
+                self.assertEqual(expected_points_possible, fdbk.total_points_possible)
+
+            for fdbk_mock in fdbk_mocks.values():
+                fdbk_mock.assert_not_called()
+
+    def test_fdbk_objects_have_no_instance_dict(self) -> None:
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max)
+        suite_fdbk = fdbk.ag_test_suite_results[0]
+        case_fdbk = suite_fdbk.ag_test_case_results[0]
+        cmd_fdbk = case_fdbk.ag_test_command_results[0]
+        for obj in fdbk, suite_fdbk, case_fdbk, cmd_fdbk:
+            self.assertFalse(hasattr(obj, '__dict__'), msg=type(obj).__name__)
+
+    def _set_denormalized_max_total_points(self, total_points: int) -> None:
+        self.submission.refresh_from_db()
+        self.submission.denormalized_point_totals[
+            ag_models.FeedbackCategory.max.value]['total_points'] = total_points
+        self.submission.save()
+
+
+@tag('slow', 'benchmark')
+class SubmissionFeedbackBenchmarkTestCase(UnitTestBase):
+    """
+    Measures how long it takes to compute a submission's point totals
+    and full feedback for a project with 500 commands.
+    Run with: ./manage.py test --tag benchmark
+    """
+    num_suites = 10
+    num_cases_per_suite = 10
+    num_cmds_per_case = 5
+    num_repetitions = 20
+
+    def test_totals_and_full_feedback_time(self) -> None:
+        project = obj_build.make_project()
+        submission = obj_build.make_submission(group=obj_build.make_group(project=project))
+        for _ in range(self.num_suites):
+            suite = obj_build.make_ag_test_suite(project)
+            suite_result = ag_models.AGTestSuiteResult.objects.validate_and_create(
+                ag_test_suite=suite, submission=submission)
+            for case_num in range(self.num_cases_per_suite):
+                case = obj_build.make_ag_test_case(suite)
+                case_result = ag_models.AGTestCaseResult.objects.validate_and_create(
+                    ag_test_suite_result=suite_result, ag_test_case=case)
+                for _ in range(self.num_cmds_per_case):
+                    cmd = obj_build.make_full_ag_test_command(case)
+                    if case_num % 3 == 0:
+                        obj_build.make_incorrect_ag_test_command_result(cmd, case_result)
+                    else:
+                        obj_build.make_correct_ag_test_command_result(cmd, case_result)
+
+        submission = get_submissions_with_results_queryset().get(
+            pk=update_denormalized_ag_test_results(submission.pk).pk)
+        preloader = AGTestPreLoader(project)
+
+        print(f'\n{"category":>22} {"totals (ms)":>12} {"totals via objects (ms)":>24} '
+              f'{"full (ms)":>10}')
+        for fdbk_category in ag_models.FeedbackCategory:
+            def make_fdbk() -> SubmissionResultFeedback:
+                return SubmissionResultFeedback(
+                    submission, fdbk_category, preloader, use_denormalized_point_totals=False)
+
+            def totals_via_objects() -> int:
+                return sum(res.total_points for res in make_fdbk().ag_test_suite_results)
+
+            totals_time = self._time(lambda: make_fdbk().total_points)
+            totals_via_objects_time = self._time(totals_via_objects)
+            full_time = self._time(lambda: make_fdbk().to_dict())
+            print(f'{fdbk_category.value:>22} {totals_time:>12.3f} '
+                  f'{totals_via_objects_time:>24.3f} {full_time:>10.3f}')
+
+            self.assertEqual(totals_via_objects(), make_fdbk().total_points)
+
+    def _time(self, func) -> float:
+        start = time.perf_counter()
+        for _ in range(self.num_repetitions):
+            func()
+        return (time.perf_counter() - start) / self.num_repetitions * 1000
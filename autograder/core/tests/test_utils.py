@@ -1,11 +1,15 @@
 import datetime
+import itertools
 import os
+import random
 import tempfile
+from unittest import mock
 
 import pytz
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, override_settings
 
 import autograder.core.models as ag_models
 import autograder.core.utils as core_ut
@@ -162,6 +166,111 @@ cheese\r
                                   ignore_blank_lines=True)
         self.assertTrue(result.diff_pass)
 
+    def test_expected_content_passed_as_bytes(self):
+        self._write_and_seek(self.file2, 'spam\negg\n')
+        result = core_ut.get_diff(b'spam\nsausage\n', self.file2.name)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['  spam\n', '- sausage\n', '+ egg\n'], result.diff_content)
+
+        self.assertTrue(core_ut.outputs_match(b'spam\negg\n', self.file2.name))
+        self.assertFalse(core_ut.outputs_match(b'spam\n', self.file2.name))
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            core_ut.get_diff(b'spam', b'spam', backend='not_a_backend')
+
+
+@override_settings(DIFF_BACKEND='python')
+class PythonDiffBackendTestCase(DiffTestCase):
+    @override_settings(PYTHON_DIFF_MAX_NUM_LINES=3)
+    def test_large_inputs_diffed_with_gnu_diff(self):
+        with mock.patch('autograder.core.utils._get_gnu_diff',
+                        wraps=core_ut._get_gnu_diff) as gnu_diff_mock:
+            result = core_ut.get_diff(b'spam\negg\n', b'spam\nsausage\n')
+            gnu_diff_mock.assert_called_once()
+
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['  spam\n', '- egg\n', '+ sausage\n'], result.diff_content)
+
+    @override_settings(PYTHON_DIFF_MAX_NUM_LINES=3)
+    def test_small_inputs_diffed_in_python(self):
+        with mock.patch('autograder.core.utils._get_gnu_diff') as gnu_diff_mock:
+            result = core_ut.get_diff(b'spam\n', b'egg\n')
+            self.assertTrue(core_ut.outputs_match(b'spam\negg\n', b'spam\negg\n'))
+            gnu_diff_mock.assert_not_called()
+
+        self.assertEqual(['- spam\n', '+ egg\n'], result.diff_content)
+
+
+class DiffBackendEquivalenceTestCase(SimpleTestCase):
+    """
+    Checks that the "python" diff backend produces the same results as
+    GNU diff.
+    """
+    _IGNORE_OPTIONS = (
+        'ignore_case', 'ignore_whitespace', 'ignore_whitespace_changes', 'ignore_blank_lines'
+    )
+
+    def test_handpicked_inputs(self):
+        inputs = [
+            (b'', b''),
+            (b'', b'\n'),
+            (b'spam', b'spam\n'),
+            (b'spam\n', b'SPAM'),
+            (b'spam  egg \n', b' spam egg'),
+            (b'\t\n\n  \nspam\n', b'spam\n \n'),
+            (b'a\nb\nc\nd\n', b'a\nc\nb\nd\n'),
+            (b'x\n\ny\n\n', b'\nx\ny\n'),
+            (b'a\r\nb\r\n', b'a\nb\n'),
+            (b'\x00\x80\xff\n', b'\x00\x80\n'),
+            (b'}\n}\n}\n', b'}\nspam\n}\n}\n'),
+        ]
+        for first, second in inputs:
+            self._check_backends_equivalent(first, second)
+
+    def test_random_inputs(self):
+        rng = random.Random(42)
+        choices = [b'a', b'b', b'A', b'', b' ', b'\t', b'a ', b'  b', b'a  b', b'\r', b'B\x0b']
+        for i in range(100):
+            num_lines = rng.randint(0, 100 if i % 10 == 0 else 10)
+            first_lines = [rng.choice(choices) for _ in range(num_lines)]
+            second_lines = list(first_lines)
+            for _ in range(rng.randint(0, 5)):
+                index = rng.randint(0, len(second_lines))
+                if rng.random() < 0.5 or not second_lines:
+                    second_lines.insert(index, rng.choice(choices))
+                else:
+                    del second_lines[min(index, len(second_lines) - 1)]
+
+            first = b'\n'.join(first_lines) + rng.choice([b'', b'\n'])
+            second = b'\n'.join(second_lines) + rng.choice([b'', b'\n'])
+            self._check_backends_equivalent(first, second)
+
+    @override_settings(PYTHON_DIFF_MAX_NUM_LINES=10000)
+    def test_large_inputs_with_many_repeated_lines(self):
+        rng = random.Random(42)
+        first = b''.join(b'%d\n' % rng.randrange(20) for _ in range(2000))
+        second = b''.join(b'%d\n' % rng.randrange(20) for _ in range(2000))
+        self._check_backends_equivalent(first, second, all_option_combinations=False)
+
+    def _check_backends_equivalent(self, first: bytes, second: bytes,
+                                   all_option_combinations: bool = True):
+        option_values = (
+            itertools.product((False, True), repeat=len(self._IGNORE_OPTIONS))
+            if all_option_combinations else [(False,) * len(self._IGNORE_OPTIONS)]
+        )
+        for values in option_values:
+            kwargs = dict(zip(self._IGNORE_OPTIONS, values))
+            with self.subTest(first=first, second=second, **kwargs):
+                gnu_result = core_ut.get_diff(first, second, **kwargs, backend='gnu')
+                python_result = core_ut.get_diff(first, second, **kwargs, backend='python')
+                self.assertEqual(gnu_result.diff_pass, python_result.diff_pass)
+                self.assertEqual(gnu_result.diff_content, python_result.diff_content)
+
+                self.assertEqual(
+                    gnu_result.diff_pass,
+                    core_ut.outputs_match(first, second, **kwargs, backend='python'))
+
 
 class Get24HourPeriodTestCase(SimpleTestCase):
     def test_dst_start(self):
@@ -186,6 +295,36 @@ class Get24HourPeriodTestCase(SimpleTestCase):
         )
 
 
+class CacheGenerationTestCase(UnitTestBase):
+    def test_generation_unchanged_until_bumped(self) -> None:
+        generation = core_ut.get_cache_generation('spam')
+        self.assertEqual(generation, core_ut.get_cache_generation('spam'))
+
+        core_ut.bump_cache_generation('spam')
+        self.assertEqual(generation + 1, core_ut.get_cache_generation('spam'))
+
+    def test_namespaces_bumped_independently(self) -> None:
+        generation = core_ut.get_cache_generation('spam')
+        other_generation = core_ut.get_cache_generation('egg')
+
+        core_ut.bump_cache_generation('egg')
+        self.assertEqual(generation, core_ut.get_cache_generation('spam'))
+        self.assertNotEqual(other_generation, core_ut.get_cache_generation('egg'))
+
+    @mock.patch('autograder.core.utils.time.time', side_effect=[1, 2])
+    def test_evicted_generation_not_reused(self, *args) -> None:
+        self.assertEqual(1000, core_ut.get_cache_generation('spam'))
+        core_ut.bump_cache_generation('spam')
+        self.assertEqual(1001, core_ut.get_cache_generation('spam'))
+
+        cache.delete('spam_generation')
+        self.assertEqual(2000, core_ut.get_cache_generation('spam'))
+
+    def test_bump_unused_generation(self) -> None:
+        core_ut.bump_cache_generation('spam')
+        self.assertIsNotNone(cache.get('spam_generation'))
+
+
 class CheckFilenameTest(SimpleTestCase):
     def test_valid_filename(self):
         core_ut.check_filename('spAM-eggs_42.cpp')
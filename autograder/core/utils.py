@@ -5,6 +5,8 @@ import enum
 import os
 import re
 import subprocess
+import tempfile
+import time
 import typing
 from typing import List, Tuple, Type, TypeVar, cast
 
@@ -12,9 +14,11 @@ from backports import zoneinfo
 
 from django.conf import settings
 from django.core import exceptions
+from django.core.cache import cache
 from django.utils import timezone
 
 from . import constants as const
+from . import diff
 
 if typing.TYPE_CHECKING:
     from .models.course import Course
@@ -32,17 +36,148 @@ class DiffResult:
 _DIFF_LINE_REGEX = re.compile(r'^(?:  |\+ |- ).*\n+'.encode(), flags=re.MULTILINE)
 
 
-def get_diff(first_filename: str, second_filename: str,
+def get_diff(first: str | bytes, second: str | bytes,
              ignore_case: bool = False,
              ignore_whitespace: bool = False,
              ignore_whitespace_changes: bool = False,
-             ignore_blank_lines: bool = False) -> DiffResult:
+             ignore_blank_lines: bool = False,
+             *,
+             backend: str | None = None) -> DiffResult:
+    """
+    Diffs first and second, each of which can be either the name of a
+    file or the contents to diff.
+    Returns a DiffResult whose diff_content contains every line of
+    first and second, each prefixed with one of the two-letter opcodes
+    used by https://docs.python.org/3.5/library/difflib.html#difflib.Differ
+
+    The ignore_* arguments have the same meaning as GNU diff's
+    --ignore-case, --ignore-all-space, --ignore-space-change, and
+    --ignore-blank-lines flags.
+
+    backend can be "python" to use the implementation in
+    autograder.core.diff or "gnu" to run the GNU diff command line
+    utility. Both produce the same result. Defaults to
+    settings.DIFF_BACKEND. The "python" backend falls back to GNU diff
+    when first and second have more than
+    settings.PYTHON_DIFF_MAX_NUM_LINES lines in total.
+    """
+    if _get_diff_backend(backend) == 'python':
+        first = _read_diff_input(first)
+        second = _read_diff_input(second)
+        if _too_large_for_python_diff(first, second):
+            backend = 'gnu'
+
+    if _get_diff_backend(backend) == 'gnu':
+        with _DiffInputFile(first) as first_filename, _DiffInputFile(second) as second_filename:
+            return _get_gnu_diff(
+                first_filename, second_filename,
+                ignore_case=ignore_case,
+                ignore_whitespace=ignore_whitespace,
+                ignore_whitespace_changes=ignore_whitespace_changes,
+                ignore_blank_lines=ignore_blank_lines)
+
+    assert isinstance(first, bytes) and isinstance(second, bytes)
+    diff_pass, diff_lines = diff.diff_bytes(
+        first, second,
+        ignore_case=ignore_case,
+        ignore_whitespace=ignore_whitespace,
+        ignore_whitespace_changes=ignore_whitespace_changes,
+        ignore_blank_lines=ignore_blank_lines)
+    return DiffResult(
+        diff_pass, [line.decode('utf-8', 'surrogateescape') for line in diff_lines])
+
+
+def outputs_match(first: str | bytes, second: str | bytes,
+                  ignore_case: bool = False,
+                  ignore_whitespace: bool = False,
+                  ignore_whitespace_changes: bool = False,
+                  ignore_blank_lines: bool = False,
+                  *,
+                  backend: str | None = None) -> bool:
+    """
+    Equivalent to get_diff(...).diff_pass, but with the "python"
+    backend this avoids computing the diff in most cases.
+    """
+    if _get_diff_backend(backend) == 'python':
+        first = _read_diff_input(first)
+        second = _read_diff_input(second)
+        # Only inputs that differ in blank lines need a full diff.
+        if ignore_blank_lines and _too_large_for_python_diff(first, second):
+            backend = 'gnu'
+
+    if _get_diff_backend(backend) == 'gnu':
+        return get_diff(
+            first, second,
+            ignore_case=ignore_case,
+            ignore_whitespace=ignore_whitespace,
+            ignore_whitespace_changes=ignore_whitespace_changes,
+            ignore_blank_lines=ignore_blank_lines,
+            backend='gnu').diff_pass
+
+    assert isinstance(first, bytes) and isinstance(second, bytes)
+    return diff.outputs_match(
+        first, second,
+        ignore_case=ignore_case,
+        ignore_whitespace=ignore_whitespace,
+        ignore_whitespace_changes=ignore_whitespace_changes,
+        ignore_blank_lines=ignore_blank_lines)
+
+
+_DIFF_BACKENDS = ('python', 'gnu')
+
+
+def _get_diff_backend(backend: str | None) -> str:
+    if backend is None:
+        backend = settings.DIFF_BACKEND
+    if backend not in _DIFF_BACKENDS:
+        raise ValueError(f'Invalid diff backend: "{backend}"')
+    return backend
+
+
+def _too_large_for_python_diff(first: bytes, second: bytes) -> bool:
+    # The "python" backend can take much longer than GNU diff on large
+    # inputs, especially ones with many repeated lines.
+    return first.count(b'\n') + second.count(b'\n') > settings.PYTHON_DIFF_MAX_NUM_LINES
+
+
+def _read_diff_input(diff_input: str | bytes) -> bytes:
+    if isinstance(diff_input, bytes):
+        return diff_input
+
+    with open(diff_input, 'rb') as f:
+        return f.read()
+
+
+class _DiffInputFile:
+    """
+    A context manager that yields the name of a file containing
+    diff_input, writing it to a temporary file if needed.
+    """
+    def __init__(self, diff_input: str | bytes):
+        self._diff_input = diff_input
+        self._tempfile: typing.IO[bytes] | None = None
+
+    def __enter__(self) -> str:
+        if isinstance(self._diff_input, str):
+            return self._diff_input
+
+        self._tempfile = tempfile.NamedTemporaryFile()
+        self._tempfile.write(self._diff_input)
+        self._tempfile.flush()
+        return self._tempfile.name
+
+    def __exit__(self, *args: object) -> None:
+        if self._tempfile is not None:
+            self._tempfile.close()
+
+
+def _get_gnu_diff(first_filename: str, second_filename: str,
+                  ignore_case: bool = False,
+                  ignore_whitespace: bool = False,
+                  ignore_whitespace_changes: bool = False,
+                  ignore_blank_lines: bool = False) -> DiffResult:
     """
     Diffs first and second using the GNU diff command line utility.
-    Returns an empty list if first and second are considered equivalent.
-    Otherwise, returns a list of strings, each of which are prefixed
-    with one of the two-letter opcodes used by
-    https://docs.python.org/3.5/library/difflib.html#difflib.Differ
     """
     # We're adding newlines at the beginning of each formatted line
     # because GNU diff will otherwise handle missing trailing
@@ -99,6 +234,52 @@ def get_24_hour_period(
     return start_datetime, end_datetime
 
 
+def get_cache_generation(namespace: str) -> int:
+    """
+    Returns the current generation number for the given cache
+    namespace (e.g., "project_42_submission_results").
+
+    Cache keys in a namespace should include its generation number so
+    that bump_cache_generation() can invalidate all of them at once.
+    Such keys should be given a timeout so that keys from old
+    generations eventually expire.
+    """
+    key = _cache_generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        # cache.add() is a no-op if another process set the generation
+        # first, in which case we use theirs.
+        cache.add(key, _initial_cache_generation(), timeout=None)
+        generation = cache.get(key)
+
+    return generation
+
+
+def bump_cache_generation(namespace: str) -> None:
+    """
+    Invalidates all cache keys that include the current generation
+    number of the given cache namespace.
+    """
+    key = _cache_generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The generation hasn't been used yet (or was evicted),
+        # so there's nothing to invalidate.
+        cache.add(key, _initial_cache_generation(), timeout=None)
+
+
+def _cache_generation_key(namespace: str) -> str:
+    return f'{namespace}_generation'
+
+
+def _initial_cache_generation() -> int:
+    # If a generation number is evicted from the cache, starting over
+    # from the current time (rather than from 0) keeps us from reusing
+    # a generation number whose keys haven't expired yet.
+    return int(time.time() * 1000)
+
+
 def check_filename(filename: str) -> None:
     """
     Verifies whether the given filename is valid according to the
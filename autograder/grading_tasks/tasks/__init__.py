@@ -7,8 +7,20 @@ from .grade_ag_test import (
     grade_ag_test_case_impl,
     grade_ag_test_command_impl
 )
+from .buggy_impl_results_cache import clear_buggy_impl_results_cache
 from .grade_mutation_test_suite import (
     grade_mutation_test_suite_impl, grade_deferred_mutation_test_suite)
+from .diff_sizes import (
+    schedule_diff_sizes_update, update_ag_test_command_result_diff_sizes)
+from .point_totals import schedule_point_totals_update, update_project_point_totals
 from .utils import run_ag_test_command, run_ag_command, run_command_from_args
 
-from .queueing import queue_submissions, register_project_queues
+from .queueing import (
+    clear_estimated_grading_time_cache,
+    ensure_project_queues_registered,
+    queue_submission_on_commit,
+    queue_submissions,
+    register_project_queues,
+    request_scheduling_pass,
+    run_scheduling_pass
+)
@@ -0,0 +1,142 @@
+"""
+Fingerprints the inputs of AGTestCommands so that reruns can skip
+commands whose results would not change
+(see RerunSubmissionsTask.rerun_affected_only).
+
+Each AGTestCommandResult records two fingerprints:
+- The execution fingerprint covers everything that can change the
+  command's actual output: the command string, its stdin, its resource
+  limits, and the suite's instructor files (by content), student file
+  patterns, setup command, sandbox image (by tag and last modified
+  time), and network access.
+- The evaluation fingerprint covers everything that the output is
+  checked against: the expected return code, the expected stdout and
+  stderr (by content), and the output comparison settings.
+
+When only the evaluation fingerprint has changed, the result can be
+re-checked against the command's stored output without a sandbox
+(see rerun_submission.reevaluate_unaffected_ag_test_cases()).
+"""
+
+import functools
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+import autograder.core.models as ag_models
+
+from .utils import load_queryset_with_retry
+
+
+class AGTestFingerprinter:
+    """
+    Computes the fingerprints of ag_test_suite's commands.
+    The suite-level inputs are loaded and hashed once, so construct one
+    instance per suite being graded.
+    """
+
+    def __init__(self, ag_test_suite: ag_models.AGTestSuite):
+        instructor_files = load_queryset_with_retry(ag_test_suite.instructor_files_needed.all())
+        student_files = load_queryset_with_retry(ag_test_suite.student_files_needed.all())
+        suite_inputs = {
+            'instructor_files': {
+                instructor_file.name: _hash_file(instructor_file.abspath)
+                for instructor_file in instructor_files
+            },
+            'read_only_instructor_files': ag_test_suite.read_only_instructor_files,
+            'student_files': sorted(student_file.pattern for student_file in student_files),
+            'setup_suite_cmd': ag_test_suite.setup_suite_cmd,
+            # An image can be updated without changing its tag, so
+            # we include its last modified time as well.
+            'docker_image': [
+                ag_test_suite.sandbox_docker_image.tag,
+                ag_test_suite.sandbox_docker_image.last_modified.isoformat(),
+            ],
+            'allow_network_access': ag_test_suite.allow_network_access,
+        }
+        self._suite_inputs_digest = _hash_json(suite_inputs)
+
+    def get_fingerprints(self, ag_test_cmd: ag_models.AGTestCommand) -> Dict[str, str]:
+        """
+        Returns a dictionary containing the execution_fingerprint and
+        evaluation_fingerprint AGTestCommandResult field values for
+        ag_test_cmd.
+        """
+        return {
+            'execution_fingerprint': self.get_execution_fingerprint(ag_test_cmd),
+            'evaluation_fingerprint': get_evaluation_fingerprint(ag_test_cmd),
+        }
+
+    def get_execution_fingerprint(self, ag_test_cmd: ag_models.AGTestCommand) -> str:
+        if ag_test_cmd.stdin_source == ag_models.StdinSource.text:
+            stdin: List[object] = [ag_test_cmd.stdin_source, ag_test_cmd.stdin_text]
+        elif ag_test_cmd.stdin_source == ag_models.StdinSource.instructor_file:
+            stdin = [ag_test_cmd.stdin_source,
+                     _hash_instructor_file(ag_test_cmd.stdin_instructor_file)]
+        else:
+            stdin = [ag_test_cmd.stdin_source]
+
+        return _hash_json({
+            'suite': self._suite_inputs_digest,
+            'cmd': ag_test_cmd.cmd,
+            'stdin': stdin,
+            'time_limit': ag_test_cmd.time_limit,
+            'stack_size_limit': ag_test_cmd.stack_size_limit,
+            'use_virtual_memory_limit': ag_test_cmd.use_virtual_memory_limit,
+            'virtual_memory_limit': ag_test_cmd.virtual_memory_limit,
+            'block_process_spawn': ag_test_cmd.block_process_spawn,
+            'process_spawn_limit': ag_test_cmd.process_spawn_limit,
+        })
+
+
+def get_evaluation_fingerprint(ag_test_cmd: ag_models.AGTestCommand) -> str:
+    def _expected_output(source: str, text: str,
+                         instructor_file: Optional[ag_models.InstructorFile]) -> List[object]:
+        if source == ag_models.ExpectedOutputSource.text:
+            return [source, text]
+        if source == ag_models.ExpectedOutputSource.instructor_file:
+            return [source, _hash_instructor_file(instructor_file)]
+        return [source]
+
+    return _hash_json({
+        'expected_return_code': ag_test_cmd.expected_return_code,
+        'expected_stdout': _expected_output(
+            ag_test_cmd.expected_stdout_source, ag_test_cmd.expected_stdout_text,
+            ag_test_cmd.expected_stdout_instructor_file),
+        'expected_stderr': _expected_output(
+            ag_test_cmd.expected_stderr_source, ag_test_cmd.expected_stderr_text,
+            ag_test_cmd.expected_stderr_instructor_file),
+        'ignore_case': ag_test_cmd.ignore_case,
+        'ignore_whitespace': ag_test_cmd.ignore_whitespace,
+        'ignore_whitespace_changes': ag_test_cmd.ignore_whitespace_changes,
+        'ignore_blank_lines': ag_test_cmd.ignore_blank_lines,
+    })
+
+
+def _hash_instructor_file(instructor_file: Optional[ag_models.InstructorFile]) -> Optional[str]:
+    if instructor_file is None:
+        return None
+
+    return _hash_file(instructor_file.abspath)
+
+
+def _hash_file(path: str) -> str:
+    stat = os.stat(path)
+    return _hash_file_contents(path, stat.st_size, stat.st_mtime_ns)
+
+
+# The size and modification time are part of the cache key so that
+# we re-hash files that instructors have replaced.
+@functools.lru_cache(maxsize=1024)
+def _hash_file_contents(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def _hash_json(data: object) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,145 @@
+"""
+Caches the results of running mutation test suites'
+grade_buggy_impl_command (see MutationTestSuite.cache_buggy_impl_results)
+so that they can be reused across submissions.
+
+Students often resubmit the same test files many times. A cached result
+is keyed by a hash of everything that can change the outcome of the
+command: the contents (and names) of the student and instructor files
+added to the sandbox, the sandbox's docker image, the suite's setup and
+grade_buggy_impl commands (including their resource limits), and the
+concrete command string, which contains the names of the buggy impl
+and student tests being run.
+
+A suite's cached results are flushed by bumping its cache generation
+(see clear_buggy_impl_results_cache()).
+"""
+
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Optional, Sequence
+
+from autograder_sandbox import CompletedCommand
+from django.core.cache import caches
+
+import autograder.core.models as ag_models
+import autograder.core.utils as core_ut
+
+from .utils import load_queryset_with_retry
+
+# Results from old generations are never explicitly deleted, so we
+# let them expire.
+_BUGGY_IMPL_RESULTS_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def clear_buggy_impl_results_cache(mutation_test_suite_pk: int) -> None:
+    """
+    Invalidates all of the given mutation test suite's cached results.
+    """
+    core_ut.bump_cache_generation(_buggy_impl_results_cache_namespace(mutation_test_suite_pk))
+
+
+class BuggyImplResultsCache:
+    """
+    Looks up and stores results of mutation_test_suite's
+    grade_buggy_impl_command for the given student files.
+    Construct a new instance for each submission being graded.
+    """
+
+    def __init__(self, mutation_test_suite: ag_models.MutationTestSuite,
+                 student_file_paths: Sequence[str]):
+        namespace = _buggy_impl_results_cache_namespace(mutation_test_suite.pk)
+        self._key_prefix = f'{namespace}_{core_ut.get_cache_generation(namespace)}'
+
+        instructor_file_paths = [
+            instructor_file.abspath for instructor_file
+            in load_queryset_with_retry(mutation_test_suite.instructor_files_needed.all())
+        ]
+        setup_command = (
+            mutation_test_suite.setup_command.to_dict()
+            if mutation_test_suite.use_setup_command else None)
+        inputs = {
+            'student_files': _hash_files(student_file_paths),
+            'instructor_files': _hash_files(instructor_file_paths),
+            'read_only_instructor_files': mutation_test_suite.read_only_instructor_files,
+            # An image can be updated without changing its tag, so
+            # we include its last modified time as well.
+            'docker_image': [
+                mutation_test_suite.sandbox_docker_image.tag,
+                mutation_test_suite.sandbox_docker_image.last_modified.isoformat(),
+            ],
+            'allow_network_access': mutation_test_suite.allow_network_access,
+            'setup_command': setup_command,
+            'grade_buggy_impl_command': mutation_test_suite.grade_buggy_impl_command.to_dict(),
+        }
+        self._inputs_digest = hashlib.sha256(
+            json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def get(self, cmd_str: str) -> Optional[CompletedCommand]:
+        """
+        Returns the cached result of running cmd_str, or None if there
+        is no cached result.
+        """
+        cached = caches['buggy_impl_results'].get(self._make_key(cmd_str))
+        if cached is None:
+            return None
+
+        return CompletedCommand(
+            return_code=cached['return_code'],
+            stdout=io.BytesIO(cached['stdout']),
+            stderr=io.BytesIO(cached['stderr']),
+            timed_out=False,
+            stdout_truncated=cached['stdout_truncated'],
+            stderr_truncated=cached['stderr_truncated'],
+        )
+
+    def add(self, cmd_str: str, run_result: CompletedCommand) -> None:
+        """
+        Caches run_result as the result of running cmd_str.
+        Results of commands that timed out are not cached, since they
+        can depend on how busy the grading machine was.
+        """
+        if run_result.timed_out:
+            return
+
+        stdout = run_result.stdout.read()
+        run_result.stdout.seek(0)
+        stderr = run_result.stderr.read()
+        run_result.stderr.seek(0)
+        caches['buggy_impl_results'].set(
+            self._make_key(cmd_str),
+            {
+                'return_code': run_result.return_code,
+                'stdout': stdout,
+                'stderr': stderr,
+                'stdout_truncated': run_result.stdout_truncated,
+                'stderr_truncated': run_result.stderr_truncated,
+            },
+            timeout=_BUGGY_IMPL_RESULTS_CACHE_TIMEOUT
+        )
+
+    def _make_key(self, cmd_str: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(self._inputs_digest.encode())
+        digest.update(cmd_str.encode())
+        return f'{self._key_prefix}_{digest.hexdigest()}'
+
+
+def _hash_files(paths: Sequence[str]) -> Dict[str, str]:
+    # Maps the name each file will have in the sandbox to a hash of
+    # its contents.
+    hashes = {}
+    for path in paths:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        hashes[os.path.basename(path)] = digest.hexdigest()
+
+    return hashes
+
+
+def _buggy_impl_results_cache_namespace(mutation_test_suite_pk: int) -> str:
+    return f'mutation_test_suite_{mutation_test_suite_pk}_buggy_impl_results'
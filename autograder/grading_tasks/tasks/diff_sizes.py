@@ -0,0 +1,47 @@
+import celery
+from django.core.cache import cache
+
+import autograder.core.models as ag_models
+from autograder.core.submission_feedback import update_diff_sizes
+
+# If a scheduled update never runs (e.g., because a worker crashed),
+# its flag expires so that the next request schedules a new one.
+_SCHEDULED_FLAG_TIMEOUT = 60 * 60
+
+
+def schedule_diff_sizes_update(cmd_result_pk: int) -> None:
+    """
+    Schedules update_ag_test_command_result_diff_sizes to run for the
+    given AGTestCommandResult, unless it's already scheduled. Call this
+    when feedback for the result had to compute a diff size that isn't
+    stored in the database
+    (see AGTestCommandResultFeedback.diff_sizes_out_of_date).
+    """
+    scheduled = cache.add(
+        _update_scheduled_cache_key(cmd_result_pk), True, timeout=_SCHEDULED_FLAG_TIMEOUT)
+    if not scheduled:
+        return
+
+    from autograder.celery import app
+    update_ag_test_command_result_diff_sizes.apply_async(
+        (cmd_result_pk,), connection=app.connection())
+
+
+@celery.shared_task(queue='small_tasks', acks_late=True)
+def update_ag_test_command_result_diff_sizes(cmd_result_pk: int) -> None:
+    cache.delete(_update_scheduled_cache_key(cmd_result_pk))
+
+    cmd_result = ag_models.AGTestCommandResult.objects.select_related(
+        'ag_test_command__expected_stdout_instructor_file',
+        'ag_test_command__expected_stderr_instructor_file',
+        'ag_test_case_result__ag_test_suite_result__submission__group__project__course',
+    ).filter(pk=cmd_result_pk).first()
+    # The result may have been deleted since the update was scheduled.
+    if cmd_result is None:
+        return
+
+    update_diff_sizes(cmd_result)
+
+
+def _update_scheduled_cache_key(cmd_result_pk: int) -> str:
+    return f'ag_test_command_result_{cmd_result_pk}_diff_sizes_update_scheduled'
@@ -1,13 +1,17 @@
+import concurrent.futures
 import shutil
-import tempfile
 import traceback
 import uuid
-from typing import IO, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 
 import celery
 from autograder_sandbox import AutograderSandbox
+from autograder_sandbox.autograder_sandbox import CompletedCommand
+from django import db
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError
 
 import autograder.core.models as ag_models
 import autograder.core.utils as core_ut
@@ -15,8 +19,12 @@ from autograder.core import constants
 from autograder.core.submission_feedback import update_denormalized_ag_test_results
 from autograder.utils.retry import retry_ag_test_cmd, retry_should_recover
 
+from .ag_test_fingerprints import AGTestFingerprinter
 from .exceptions import SubmissionRejected, TestDeleted
-from .utils import (FileCloser, add_files_to_sandbox, load_queryset_with_retry,
+from .result_writer import (AGTestCommandOutcome, AGTestResultWriter,
+                            get_or_create_ag_test_case_result, save_ag_test_command_result)
+from .sandbox_pool import get_sandbox_pool
+from .utils import (add_files_to_sandbox, load_queryset_with_retry,
                     mark_submission_as_error, run_ag_test_command, run_command_from_args)
 
 
@@ -54,7 +62,17 @@ def grade_ag_test_suite_impl(ag_test_suite: ag_models.AGTestSuite,
                              group: ag_models.Group,
                              *ag_test_cases_to_run: int,
                              on_suite_setup_finished=lambda _: None,
-                             on_test_case_finished=lambda _: None):
+                             on_test_case_finished=lambda _: None,
+                             on_test_case_results_saved=lambda _: None):
+    """
+    Grades the given AGTestSuite for submission.
+
+    Test case results are written to the database in batches (see
+    AGTestResultWriter). on_test_case_finished is called once per
+    test case result after it has been saved, and
+    on_test_case_results_saved is called with each saved batch of test
+    case results.
+    """
     @retry_should_recover
     def get_or_create_suite_result():
         try:
@@ -68,16 +86,24 @@ def grade_ag_test_suite_impl(ag_test_suite: ag_models.AGTestSuite,
     if suite_result is None:
         return
 
-    sandbox = AutograderSandbox(
-        name='submission{}-suite{}-{}'.format(submission.pk, ag_test_suite.pk, uuid.uuid4().hex),
-        environment_variables={
-            'usernames': ' '.join(group.member_names)
-        },
-        allow_network_access=ag_test_suite.allow_network_access,
-        docker_image=ag_test_suite.sandbox_docker_image.tag)
+    fingerprinter = AGTestFingerprinter(ag_test_suite)
+    environment_variables = {
+        'usernames': ' '.join(group.member_names)
+    }
+    if settings.SANDBOX_POOL_SIZE > 0:
+        sandbox_context = get_sandbox_pool(
+            ag_test_suite.sandbox_docker_image.tag, ag_test_suite.allow_network_access
+        ).checkout(environment_variables)
+    else:
+        sandbox_context = AutograderSandbox(
+            name='submission{}-suite{}-{}'.format(
+                submission.pk, ag_test_suite.pk, uuid.uuid4().hex),
+            environment_variables=environment_variables,
+            allow_network_access=ag_test_suite.allow_network_access,
+            docker_image=ag_test_suite.sandbox_docker_image.tag)
     print(ag_test_suite.sandbox_docker_image.to_dict())
-    print(sandbox.docker_image)
-    with sandbox:
+    with sandbox_context as sandbox:
+        print(sandbox.docker_image)
         add_files_to_sandbox(sandbox, ag_test_suite, submission)
 
         try:
@@ -95,10 +121,76 @@ def grade_ag_test_suite_impl(ag_test_suite: ag_models.AGTestSuite,
         if len(ag_test_cases_to_run) != 0:
             ag_test_case_queryset = ag_test_case_queryset.filter(pk__in=ag_test_cases_to_run)
 
-        for ag_test_case in load_queryset_with_retry(ag_test_case_queryset):
+        ag_test_cases = load_queryset_with_retry(ag_test_case_queryset)
+        result_writer = AGTestResultWriter(
+            suite_result,
+            on_test_case_finished=on_test_case_finished,
+            on_batch_saved=on_test_case_results_saved
+        )
+        with result_writer:
+            if ag_test_suite.max_parallel_test_cases > 1:
+                _run_ag_test_cases_in_parallel(
+                    sandbox,
+                    ag_test_cases,
+                    suite_result,
+                    result_writer,
+                    fingerprinter,
+                    max_workers=ag_test_suite.max_parallel_test_cases
+                )
+                return
+
+            for ag_test_case in ag_test_cases:
+                # Don't hold finished results while a long test case runs.
+                result_writer.flush_if_interval_elapsed()
+                print('Grading test case', ag_test_case.name)
+                result_writer.add_test_case_result(
+                    ag_test_case,
+                    run_ag_test_case(sandbox, ag_test_case, suite_result, fingerprinter))
+
+
+def _run_ag_test_cases_in_parallel(
+    sandbox: AutograderSandbox,
+    ag_test_cases: List[ag_models.AGTestCase],
+    suite_result: ag_models.AGTestSuiteResult,
+    result_writer: AGTestResultWriter,
+    fingerprinter: AGTestFingerprinter,
+    *,
+    max_workers: int
+) -> None:
+    """
+    Runs ag_test_cases in sandbox using up to max_workers threads.
+    Results are passed to result_writer from the calling thread, in the
+    same order as ag_test_cases.
+    """
+    def _run_ag_test_case(ag_test_case: ag_models.AGTestCase) -> List[AGTestCommandOutcome]:
+        try:
             print('Grading test case', ag_test_case.name)
-            case_result = grade_ag_test_case_impl(sandbox, ag_test_case, suite_result)
-            on_test_case_finished(case_result)
+            return run_ag_test_case(sandbox, ag_test_case, suite_result, fingerprinter)
+        finally:
+            # Each thread gets its own database connection, which
+            # Django won't close for us.
+            db.connection.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_run_ag_test_case, ag_test_case) for ag_test_case in ag_test_cases
+        ]
+        for ag_test_case, future in zip(ag_test_cases, futures):
+            result_writer.add_test_case_result(
+                ag_test_case, _wait_for_result(future, result_writer))
+
+
+def _wait_for_result(future: 'Future[List[AGTestCommandOutcome]]',
+                     result_writer: AGTestResultWriter) -> List[AGTestCommandOutcome]:
+    """
+    Waits for future to finish, writing results buffered in
+    result_writer whenever they are due.
+    """
+    while True:
+        try:
+            return future.result(timeout=result_writer.time_until_flush())
+        except concurrent.futures.TimeoutError:
+            result_writer.flush_if_interval_elapsed()
 
 
 # This is patched in test cases
@@ -163,22 +255,19 @@ def _run_suite_setup(sandbox: AutograderSandbox,
 def grade_ag_test_case_impl(sandbox: AutograderSandbox,
                             ag_test_case: ag_models.AGTestCase,
                             suite_result: ag_models.AGTestSuiteResult):
-    @retry_should_recover
-    def get_or_create_ag_test_case_result():
-        try:
-            return ag_models.AGTestCaseResult.objects.get_or_create(
-                ag_test_case=ag_test_case, ag_test_suite_result=suite_result)[0]
-        except IntegrityError:
-            # The AGTestCase or AGSuiteResult has been deleted.
-            return None
-
-    case_result = get_or_create_ag_test_case_result()
+    """
+    Runs the commands in ag_test_case and saves the result of each
+    command as soon as it finishes.
+    """
+    case_result = get_or_create_ag_test_case_result(ag_test_case, suite_result)
     if case_result is None:
         return
 
+    fingerprinter = AGTestFingerprinter(ag_test_case.ag_test_suite)
+
     @retry_ag_test_cmd
     def _grade_ag_test_cmd_with_retry(ag_test_cmd, case_result):
-        grade_ag_test_command_impl(sandbox, ag_test_cmd, case_result)
+        grade_ag_test_command_impl(sandbox, ag_test_cmd, case_result, fingerprinter)
 
     for ag_test_cmd in ag_test_case.ag_test_commands.all():
         print('Running command', ag_test_cmd.name)
@@ -187,97 +276,134 @@ def grade_ag_test_case_impl(sandbox: AutograderSandbox,
     return case_result
 
 
-def grade_ag_test_command_impl(sandbox: AutograderSandbox,
-                               ag_test_cmd: ag_models.AGTestCommand,
-                               case_result: ag_models.AGTestCaseResult):
-    with FileCloser() as file_closer:
-        run_result = run_ag_test_command(ag_test_cmd, sandbox, case_result.ag_test_suite_result)
-
-        result_data = {
-            'return_code': run_result.return_code,
-            'timed_out': run_result.timed_out,
-            'stdout_truncated': run_result.stdout_truncated,
-            'stderr_truncated': run_result.stderr_truncated,
-        }
-
-        if ag_test_cmd.expected_return_code == ag_models.ExpectedReturnCode.zero:
-            result_data['return_code_correct'] = run_result.return_code == 0
-        elif ag_test_cmd.expected_return_code == ag_models.ExpectedReturnCode.nonzero:
-            result_data['return_code_correct'] = run_result.return_code != 0
-
-        expected_stdout, expected_stdout_filename = _get_expected_stdout_file_and_name(ag_test_cmd)
-        file_closer.register_file(expected_stdout)
-
-        if expected_stdout_filename is not None:
-            diff = core_ut.get_diff(
-                expected_stdout_filename, run_result.stdout.name,
-                ignore_case=ag_test_cmd.ignore_case,
-                ignore_whitespace=ag_test_cmd.ignore_whitespace,
-                ignore_whitespace_changes=ag_test_cmd.ignore_whitespace_changes,
-                ignore_blank_lines=ag_test_cmd.ignore_blank_lines)
-            result_data['stdout_correct'] = diff.diff_pass
-
-        expected_stderr, expected_stderr_filename = _get_expected_stderr_file_and_name(ag_test_cmd)
-        file_closer.register_file(expected_stderr)
-
-        if expected_stderr_filename is not None:
-            diff = core_ut.get_diff(
-                expected_stderr_filename, run_result.stderr.name,
-                ignore_case=ag_test_cmd.ignore_case,
-                ignore_whitespace=ag_test_cmd.ignore_whitespace,
-                ignore_whitespace_changes=ag_test_cmd.ignore_whitespace_changes,
-                ignore_blank_lines=ag_test_cmd.ignore_blank_lines)
-            result_data['stderr_correct'] = diff.diff_pass
-
-        print(result_data)
-
-        @retry_should_recover
-        def save_ag_test_cmd_result():
-            try:
-                with transaction.atomic():
-                    cmd_result = ag_models.AGTestCommandResult.objects.update_or_create(
-                        defaults=result_data,
-                        ag_test_command=ag_test_cmd,
-                        ag_test_case_result=case_result)[0]  # type: ag_models.AGTestCommandResult
-
-                    with open(cmd_result.stdout_filename, 'wb') as f:
-                        shutil.copyfileobj(run_result.stdout, f)
-                    with open(cmd_result.stderr_filename, 'wb') as f:
-                        shutil.copyfileobj(run_result.stderr, f)
-            except IntegrityError:
-                # The command or case result has likely been deleted
-                return
+def run_ag_test_case(
+    sandbox: AutograderSandbox,
+    ag_test_case: ag_models.AGTestCase,
+    suite_result: ag_models.AGTestSuiteResult,
+    fingerprinter: Optional[AGTestFingerprinter] = None
+) -> List[AGTestCommandOutcome]:
+    """
+    Runs the commands in ag_test_case without saving their results.
+    """
+    @retry_ag_test_cmd
+    def _run_ag_test_cmd_with_retry(ag_test_cmd):
+        return AGTestCommandOutcome(
+            ag_test_cmd,
+            *run_and_check_ag_test_command(sandbox, ag_test_cmd, suite_result, fingerprinter))
 
-        save_ag_test_cmd_result()
+    outcomes = []
+    for ag_test_cmd in load_queryset_with_retry(ag_test_case.ag_test_commands.all()):
+        print('Running command', ag_test_cmd.name)
+        outcomes.append(_run_ag_test_cmd_with_retry(ag_test_cmd))
+
+    return outcomes
 
 
-def _get_expected_stdout_file_and_name(
-        ag_test_cmd: ag_models.AGTestCommand) -> Tuple[Optional[IO[bytes]], Optional[str]]:
-    expected_stdout = None
-    expected_stdout_filename = None
+def grade_ag_test_command_impl(sandbox: AutograderSandbox,
+                               ag_test_cmd: ag_models.AGTestCommand,
+                               case_result: ag_models.AGTestCaseResult,
+                               fingerprinter: Optional[AGTestFingerprinter] = None):
+    result_data, run_result = run_and_check_ag_test_command(
+        sandbox, ag_test_cmd, case_result.ag_test_suite_result, fingerprinter)
+    save_ag_test_command_result(ag_test_cmd, case_result, result_data, run_result)
+
+
+def run_and_check_ag_test_command(
+    sandbox: AutograderSandbox,
+    ag_test_cmd: ag_models.AGTestCommand,
+    suite_result: ag_models.AGTestSuiteResult,
+    fingerprinter: Optional[AGTestFingerprinter] = None
+) -> Tuple[Dict[str, object], CompletedCommand]:
+    """
+    Runs ag_test_cmd and compares its output to the expected output.
+    Returns a dictionary of AGTestCommandResult field values and the
+    CompletedCommand from running the command.
+    If fingerprinter is not None, the fingerprints of ag_test_cmd's
+    inputs are included in the field values.
+    """
+    run_result = run_ag_test_command(ag_test_cmd, sandbox, suite_result)
+
+    result_data: Dict[str, object] = {
+        'return_code': run_result.return_code,
+        'timed_out': run_result.timed_out,
+        'stdout_truncated': run_result.stdout_truncated,
+        'stderr_truncated': run_result.stderr_truncated,
+    }
+    result_data.update(check_ag_test_command_output(
+        ag_test_cmd, run_result.return_code, run_result.stdout.name, run_result.stderr.name))
+    if fingerprinter is not None:
+        result_data.update(fingerprinter.get_fingerprints(ag_test_cmd))
+
+    print(result_data)
+    return result_data, run_result
+
+
+def check_ag_test_command_output(ag_test_cmd: ag_models.AGTestCommand,
+                                 return_code: Optional[int],
+                                 stdout_filename: str,
+                                 stderr_filename: str) -> Dict[str, Optional[bool]]:
+    """
+    Compares the given return code and the contents of stdout_filename
+    and stderr_filename to ag_test_cmd's expected return code and
+    output. Returns a dictionary of the return_code_correct,
+    stdout_correct, and stderr_correct AGTestCommandResult field
+    values. Values that aren't checked are None.
+    """
+    result_data: Dict[str, Optional[bool]] = {
+        'return_code_correct': None,
+        'stdout_correct': None,
+        'stderr_correct': None,
+    }
+
+    if ag_test_cmd.expected_return_code == ag_models.ExpectedReturnCode.zero:
+        result_data['return_code_correct'] = return_code == 0
+    elif ag_test_cmd.expected_return_code == ag_models.ExpectedReturnCode.nonzero:
+        result_data['return_code_correct'] = return_code != 0
+
+    expected_stdout = _get_expected_stdout(ag_test_cmd)
+    if expected_stdout is not None:
+        result_data['stdout_correct'] = core_ut.outputs_match(
+            expected_stdout, stdout_filename,
+            ignore_case=ag_test_cmd.ignore_case,
+            ignore_whitespace=ag_test_cmd.ignore_whitespace,
+            ignore_whitespace_changes=ag_test_cmd.ignore_whitespace_changes,
+            ignore_blank_lines=ag_test_cmd.ignore_blank_lines)
+
+    expected_stderr = _get_expected_stderr(ag_test_cmd)
+    if expected_stderr is not None:
+        result_data['stderr_correct'] = core_ut.outputs_match(
+            expected_stderr, stderr_filename,
+            ignore_case=ag_test_cmd.ignore_case,
+            ignore_whitespace=ag_test_cmd.ignore_whitespace,
+            ignore_whitespace_changes=ag_test_cmd.ignore_whitespace_changes,
+            ignore_blank_lines=ag_test_cmd.ignore_blank_lines)
+
+    return result_data
+
+
+def _get_expected_stdout(ag_test_cmd: ag_models.AGTestCommand) -> Optional[Union[bytes, str]]:
+    """
+    Returns the expected stdout of ag_test_cmd as bytes if it's stored
+    as text, the name of the file that contains it if it's stored in an
+    instructor file, or None if stdout isn't checked.
+    """
     if ag_test_cmd.expected_stdout_source == ag_models.ExpectedOutputSource.text:
-        expected_stdout = tempfile.NamedTemporaryFile()
-        expected_stdout.write(ag_test_cmd.expected_stdout_text.encode())
-        expected_stdout.flush()
-        expected_stdout_filename = expected_stdout.name
+        return ag_test_cmd.expected_stdout_text.encode()
     elif ag_test_cmd.expected_stdout_source == ag_models.ExpectedOutputSource.instructor_file:
         assert ag_test_cmd.expected_stdout_instructor_file is not None
-        expected_stdout_filename = ag_test_cmd.expected_stdout_instructor_file.abspath
+        return ag_test_cmd.expected_stdout_instructor_file.abspath
 
-    return expected_stdout, expected_stdout_filename
+    return None
 
 
-def _get_expected_stderr_file_and_name(
-        ag_test_cmd: ag_models.AGTestCommand) -> Tuple[Optional[IO[bytes]], Optional[str]]:
-    expected_stderr = None
-    expected_stderr_filename = None
+def _get_expected_stderr(ag_test_cmd: ag_models.AGTestCommand) -> Optional[Union[bytes, str]]:
+    """
+    Like _get_expected_stdout(), but for stderr.
+    """
     if ag_test_cmd.expected_stderr_source == ag_models.ExpectedOutputSource.text:
-        expected_stderr = tempfile.NamedTemporaryFile()
-        expected_stderr.write(ag_test_cmd.expected_stderr_text.encode())
-        expected_stderr.flush()
-        expected_stderr_filename = expected_stderr.name
+        return ag_test_cmd.expected_stderr_text.encode()
     elif ag_test_cmd.expected_stderr_source == ag_models.ExpectedOutputSource.instructor_file:
         assert ag_test_cmd.expected_stderr_instructor_file is not None
-        expected_stderr_filename = ag_test_cmd.expected_stderr_instructor_file.abspath
+        return ag_test_cmd.expected_stderr_instructor_file.abspath
 
-    return expected_stderr, expected_stderr_filename
+    return None
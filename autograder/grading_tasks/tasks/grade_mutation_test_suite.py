@@ -1,20 +1,30 @@
+import logging
 import shutil
 import tempfile
+import threading
 import traceback
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import FileIO
-from typing import List, Tuple
+from typing import IO, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import celery
 from autograder_sandbox import AutograderSandbox
 from autograder_sandbox.autograder_sandbox import CompletedCommand
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError, transaction
 
 import autograder.core.models as ag_models
 from autograder.utils.retry import retry_should_recover
 
-from .utils import add_files_to_sandbox, mark_submission_as_error, run_ag_command
+from .buggy_impl_results_cache import BuggyImplResultsCache
+from .sandbox_pool import get_sandbox_pool
+from .student_test_ordering import order_student_tests
+from .utils import (add_files_to_sandbox, get_student_files_to_add, mark_submission_as_error,
+                    run_ag_command)
+
+logger = logging.getLogger(__name__)
 
 
 @celery.shared_task(max_retries=1, acks_late=True)
@@ -40,17 +50,23 @@ def grade_deferred_mutation_test_suite(mutation_test_suite_pk, submission_pk):
 
 def grade_mutation_test_suite_impl(mutation_test_suite: ag_models.MutationTestSuite,
                                    submission: ag_models.Submission):
-    sandbox = AutograderSandbox(
-        name='submission{}-suite{}-{}'.format(
-            submission.pk, mutation_test_suite.pk, uuid.uuid4().hex),
-        environment_variables={
-            'usernames': ' '.join(submission.group.member_names)
-        },
-        allow_network_access=mutation_test_suite.allow_network_access,
-        docker_image=mutation_test_suite.sandbox_docker_image.tag)
+    environment_variables = {
+        'usernames': ' '.join(submission.group.member_names)
+    }
+    if settings.SANDBOX_POOL_SIZE > 0:
+        sandbox_context = get_sandbox_pool(
+            mutation_test_suite.sandbox_docker_image.tag, mutation_test_suite.allow_network_access
+        ).checkout(environment_variables)
+    else:
+        sandbox_context = AutograderSandbox(
+            name='submission{}-suite{}-{}'.format(
+                submission.pk, mutation_test_suite.pk, uuid.uuid4().hex),
+            environment_variables=environment_variables,
+            allow_network_access=mutation_test_suite.allow_network_access,
+            docker_image=mutation_test_suite.sandbox_docker_image.tag)
     print(mutation_test_suite.sandbox_docker_image.to_dict())
-    print(sandbox.docker_image)
-    with sandbox:
+    with sandbox_context as sandbox:
+        print(sandbox.docker_image)
         add_files_to_sandbox(sandbox, mutation_test_suite, submission)
 
         if mutation_test_suite.use_setup_command:
@@ -94,53 +110,48 @@ def grade_mutation_test_suite_impl(mutation_test_suite: ag_models.MutationTestSu
             discarded_tests = student_tests[mutation_test_suite.max_num_student_tests:]
             student_tests = student_tests[:mutation_test_suite.max_num_student_tests]
 
-        valid_tests: List[str] = []
-        invalid_tests: List[str] = []
-        timed_out_tests: List[str] = []
-
-        validity_check_stdout = tempfile.TemporaryFile()
-        validity_check_stderr = tempfile.TemporaryFile()
-        for test in student_tests:
-            validity_cmd = mutation_test_suite.student_test_validity_check_command
-            concrete_cmd = validity_cmd.cmd.replace(
-                ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER, test)
-
-            validity_run_result = run_ag_command(validity_cmd, sandbox,
-                                                 cmd_str_override=concrete_cmd)
-            line = '\n------ {} ------\n'.format(test).encode()
-            validity_check_stdout.write(line)
-            validity_check_stderr.write(line)
-            shutil.copyfileobj(validity_run_result.stdout, validity_check_stdout)
-            shutil.copyfileobj(validity_run_result.stderr, validity_check_stderr)
-
-            if validity_run_result.return_code == 0:
-                valid_tests.append(test)
-            else:
-                invalid_tests.append(test)
+        (valid_tests, invalid_tests, timed_out_tests,
+         validity_check_stdout, validity_check_stderr) = _run_validity_checks(
+            sandbox, mutation_test_suite, student_tests)
 
-            if validity_run_result.timed_out:
-                timed_out_tests.append(test)
+        results_cache = None
+        if mutation_test_suite.cache_buggy_impl_results:
+            results_cache = BuggyImplResultsCache(
+                mutation_test_suite, get_student_files_to_add(mutation_test_suite, submission))
 
+        stats = _BuggyImplRunStats()
         run_individual_tests = (
             ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER
             in mutation_test_suite.grade_buggy_impl_command.cmd
         )
         if run_individual_tests:
+            test_orders = order_student_tests(mutation_test_suite, submission, valid_tests)
             exposed_bugs, buggy_impls_stdout, buggy_impls_stderr = (
                 _run_individual_tests_against_mutants(
-                    sandbox, mutation_test_suite, valid_tests
+                    sandbox, mutation_test_suite, test_orders, results_cache, stats
                 )
             )
         else:
             exposed_bugs, buggy_impls_stdout, buggy_impls_stderr = (
                 _run_test_batches_against_mutants(
-                    sandbox, mutation_test_suite, valid_tests
+                    sandbox, mutation_test_suite, valid_tests, results_cache, stats
                 )
             )
 
+        logger.info(
+            f'submission {submission.pk} mutation test suite {mutation_test_suite.pk}: '
+            f'{stats.num_commands_run} grade_buggy_impl_command runs, '
+            f'{stats.num_cached_results} cached results reused')
+
+        # Buggy impls can finish in any order, so we put their exposing
+        # tests in the same order as exposed_bugs.
+        exposing_tests = {
+            bug: stats.exposing_tests[bug] for bug in exposed_bugs if bug in stats.exposing_tests
+        }
         _save_results(mutation_test_suite, submission,
                       setup_run_result,
                       student_tests, discarded_tests, invalid_tests, timed_out_tests, exposed_bugs,
+                      exposing_tests=exposing_tests,
                       get_test_names_run_result=get_test_names_result,
                       validity_check_stdout=validity_check_stdout,
                       validity_check_stderr=validity_check_stderr,
@@ -148,67 +159,249 @@ def grade_mutation_test_suite_impl(mutation_test_suite: ag_models.MutationTestSu
                       buggy_impls_stderr=buggy_impls_stderr)
 
 
+def _run_validity_checks(
+    sandbox: AutograderSandbox,
+    mutation_test_suite: ag_models.MutationTestSuite,
+    student_tests: List[str],
+) -> Tuple[List[str], List[str], List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]:
+    # Returns whether the test is valid and whether the check timed out.
+    def _run_validity_check(
+        test: str, stdout: IO[bytes], stderr: IO[bytes]
+    ) -> Tuple[bool, bool]:
+        validity_cmd = mutation_test_suite.student_test_validity_check_command
+        concrete_cmd = validity_cmd.cmd.replace(
+            ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER, test)
+
+        validity_run_result = run_ag_command(validity_cmd, sandbox,
+                                             cmd_str_override=concrete_cmd)
+        line = '\n------ {} ------\n'.format(test).encode()
+        stdout.write(line)
+        stderr.write(line)
+        shutil.copyfileobj(validity_run_result.stdout, stdout)
+        shutil.copyfileobj(validity_run_result.stderr, stderr)
+
+        return validity_run_result.return_code == 0, validity_run_result.timed_out
+
+    valid_tests: List[str] = []
+    invalid_tests: List[str] = []
+    timed_out_tests: List[str] = []
+    validity_check_stdout = tempfile.TemporaryFile()
+    validity_check_stderr = tempfile.TemporaryFile()
+
+    validity_check_results = _run_with_ordered_output(
+        student_tests, _run_validity_check, validity_check_stdout, validity_check_stderr,
+        max_workers=mutation_test_suite.max_parallel_validity_checks)
+    for test, (valid, timed_out) in zip(student_tests, validity_check_results):
+        if valid:
+            valid_tests.append(test)
+        else:
+            invalid_tests.append(test)
+
+        if timed_out:
+            timed_out_tests.append(test)
+
+    return (valid_tests, invalid_tests, timed_out_tests,
+            validity_check_stdout, validity_check_stderr)
+
+
+class _BuggyImplRunStats:
+    """
+    Counts the grade_buggy_impl_command runs made while grading a
+    submission and records which student test exposed each buggy impl.
+    """
+
+    def __init__(self) -> None:
+        self.num_commands_run = 0
+        self.num_cached_results = 0
+        self.exposing_tests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record_command(self, *, cached: bool) -> None:
+        with self._lock:
+            if cached:
+                self.num_cached_results += 1
+            else:
+                self.num_commands_run += 1
+
+    def record_exposing_test(self, bug: str, test: str) -> None:
+        with self._lock:
+            self.exposing_tests[bug] = test
+
+
 def _run_individual_tests_against_mutants(
     sandbox: AutograderSandbox,
     mutation_test_suite: ag_models.MutationTestSuite,
-    valid_tests: List[str],
+    test_orders: Dict[str, List[str]],
+    results_cache: Optional[BuggyImplResultsCache],
+    stats: _BuggyImplRunStats,
 ) -> Tuple[List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]:
-    exposed_bugs: List[str] = []
-    buggy_impls_stdout = tempfile.TemporaryFile()
-    buggy_impls_stderr = tempfile.TemporaryFile()
-    for bug in mutation_test_suite.buggy_impl_names:
-        for valid_test in valid_tests:
+    """
+    test_orders should map each buggy impl name to the valid student
+    tests, in the order they should be run against that buggy impl.
+    """
+    def _run_tests_against_mutant(bug: str, stdout: IO[bytes], stderr: IO[bytes]) -> bool:
+        for valid_test in test_orders[bug]:
             cmd_str = mutation_test_suite.grade_buggy_impl_command.cmd.replace(
                 ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER, valid_test
             ).replace(ag_models.MutationTestSuite.BUGGY_IMPL_NAME_PLACEHOLDER, bug)
 
-            buggy_impl_run_result = run_ag_command(
-                mutation_test_suite.grade_buggy_impl_command,
-                sandbox,
-                cmd_str_override=cmd_str
-            )
+            buggy_impl_run_result = _run_grade_buggy_impl_command(
+                sandbox, mutation_test_suite, cmd_str, results_cache, stats)
             line = '\n----- Bug "{}" with Test "{}" -----\n'.format(bug, valid_test).encode()
-            buggy_impls_stdout.write(line)
-            buggy_impls_stderr.write(line)
-            shutil.copyfileobj(buggy_impl_run_result.stdout, buggy_impls_stdout)
-            shutil.copyfileobj(buggy_impl_run_result.stderr, buggy_impls_stderr)
+            stdout.write(line)
+            stderr.write(line)
+            shutil.copyfileobj(buggy_impl_run_result.stdout, stdout)
+            shutil.copyfileobj(buggy_impl_run_result.stderr, stderr)
 
             if buggy_impl_run_result.return_code != 0:
-                exposed_bugs.append(bug)
-                break
+                stats.record_exposing_test(bug, valid_test)
+                return True
 
-    return exposed_bugs, buggy_impls_stdout, buggy_impls_stderr
+        return False
+
+    return _run_against_mutants(mutation_test_suite, _run_tests_against_mutant)
 
 
 def _run_test_batches_against_mutants(
     sandbox: AutograderSandbox,
     mutation_test_suite: ag_models.MutationTestSuite,
     valid_tests: List[str],
+    results_cache: Optional[BuggyImplResultsCache],
+    stats: _BuggyImplRunStats,
 ) -> Tuple[List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]:
-    exposed_bugs: List[str] = []
-    buggy_impls_stdout = tempfile.TemporaryFile()
-    buggy_impls_stderr = tempfile.TemporaryFile()
-    for bug in mutation_test_suite.buggy_impl_names:
+    def _run_test_batch_against_mutant(bug: str, stdout: IO[bytes], stderr: IO[bytes]) -> bool:
         cmd_str = mutation_test_suite.grade_buggy_impl_command.cmd.replace(
             ag_models.MutationTestSuite.ALL_STUDENT_TEST_NAMES_PLACEHOLDER,
             ' '.join([f'"{test_name}"' for test_name in valid_tests])
         ).replace(ag_models.MutationTestSuite.BUGGY_IMPL_NAME_PLACEHOLDER, bug)
 
-        buggy_impl_run_result = run_ag_command(
-            mutation_test_suite.grade_buggy_impl_command, sandbox, cmd_str_override=cmd_str)
+        buggy_impl_run_result = _run_grade_buggy_impl_command(
+            sandbox, mutation_test_suite, cmd_str, results_cache, stats)
 
         line = f'\n----- Bug "{bug}" with all_valid_tests -----\n'.encode()
-        buggy_impls_stdout.write(line)
-        buggy_impls_stderr.write(line)
-        shutil.copyfileobj(buggy_impl_run_result.stdout, buggy_impls_stdout)
-        shutil.copyfileobj(buggy_impl_run_result.stderr, buggy_impls_stderr)
+        stdout.write(line)
+        stderr.write(line)
+        shutil.copyfileobj(buggy_impl_run_result.stdout, stdout)
+        shutil.copyfileobj(buggy_impl_run_result.stderr, stderr)
 
-        if buggy_impl_run_result.return_code != 0:
-            exposed_bugs.append(bug)
+        return buggy_impl_run_result.return_code != 0
+
+    return _run_against_mutants(mutation_test_suite, _run_test_batch_against_mutant)
+
+
+def _run_grade_buggy_impl_command(
+    sandbox: AutograderSandbox,
+    mutation_test_suite: ag_models.MutationTestSuite,
+    cmd_str: str,
+    results_cache: Optional[BuggyImplResultsCache],
+    stats: _BuggyImplRunStats,
+) -> CompletedCommand:
+    """
+    Runs mutation_test_suite.grade_buggy_impl_command with cmd_str as
+    the command string, unless results_cache contains its result.
+    """
+    if results_cache is not None:
+        cached_result = results_cache.get(cmd_str)
+        if cached_result is not None:
+            stats.record_command(cached=True)
+            return cached_result
+
+    stats.record_command(cached=False)
+    run_result = run_ag_command(
+        mutation_test_suite.grade_buggy_impl_command, sandbox, cmd_str_override=cmd_str)
+    if results_cache is not None:
+        results_cache.add(cmd_str, run_result)
+
+    return run_result
+
+
+def _run_against_mutants(
+    mutation_test_suite: ag_models.MutationTestSuite,
+    run_against_mutant: Callable[[str, IO[bytes], IO[bytes]], bool],
+) -> Tuple[List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]:
+    """
+    Calls run_against_mutant for each of mutation_test_suite's buggy
+    impls, using up to mutation_test_suite.max_parallel_buggy_impls
+    threads. run_against_mutant should run the given buggy impl, write
+    its output to the given stdout and stderr files, and return True if
+    the buggy impl was exposed.
+    Returns the names of the exposed bugs and the combined stdout and
+    stderr of all the buggy impls, both in the same order as
+    mutation_test_suite.buggy_impl_names.
+    """
+    buggy_impls_stdout = tempfile.TemporaryFile()
+    buggy_impls_stderr = tempfile.TemporaryFile()
+    exposed = _run_with_ordered_output(
+        mutation_test_suite.buggy_impl_names, run_against_mutant,
+        buggy_impls_stdout, buggy_impls_stderr,
+        max_workers=mutation_test_suite.max_parallel_buggy_impls)
+    exposed_bugs = [
+        bug for bug, was_exposed in zip(mutation_test_suite.buggy_impl_names, exposed)
+        if was_exposed
+    ]
 
     return exposed_bugs, buggy_impls_stdout, buggy_impls_stderr
 
 
+_ResultType = TypeVar('_ResultType')
+
+
+def _run_with_ordered_output(
+    names: List[str],
+    run: Callable[[str, IO[bytes], IO[bytes]], _ResultType],
+    stdout: IO[bytes],
+    stderr: IO[bytes],
+    *,
+    max_workers: int
+) -> List[_ResultType]:
+    """
+    Calls run(name, stdout, stderr) for each name in names, using up to
+    max_workers threads, and returns the results in the same order as
+    names.
+    When max_workers is greater than 1, each call writes its output to
+    its own temporary files, which are then appended to stdout and
+    stderr in the order of names. This way, the combined output is the
+    same as when the calls are made one at a time.
+    """
+    if max_workers <= 1:
+        return [run(name, stdout, stderr) for name in names]
+
+    def _run_buffered(name: str) -> Tuple[_ResultType, IO[bytes], IO[bytes]]:
+        buffered_stdout = tempfile.TemporaryFile()
+        buffered_stderr = tempfile.TemporaryFile()
+        try:
+            return run(name, buffered_stdout, buffered_stderr), buffered_stdout, buffered_stderr
+        except BaseException:
+            buffered_stdout.close()
+            buffered_stderr.close()
+            raise
+
+    results: List[_ResultType] = []
+    futures: List['Future[Tuple[_ResultType, IO[bytes], IO[bytes]]]'] = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_run_buffered, name) for name in names]
+            for future in futures:
+                result, buffered_stdout, buffered_stderr = future.result()
+                buffered_stdout.seek(0)
+                buffered_stderr.seek(0)
+                shutil.copyfileobj(buffered_stdout, stdout)
+                shutil.copyfileobj(buffered_stderr, stderr)
+
+                results.append(result)
+    finally:
+        # The executor waits for all the calls to finish before exiting,
+        # so if one of them raised an exception, the buffers of the
+        # calls after it still need to be closed.
+        for future in futures:
+            if not future.cancelled() and future.exception() is None:
+                _, buffered_stdout, buffered_stderr = future.result()
+                buffered_stdout.close()
+                buffered_stderr.close()
+
+    return results
+
+
 @retry_should_recover
 def _save_results(mutation_test_suite: ag_models.MutationTestSuite,
                   submission: ag_models.Submission,
@@ -218,6 +411,7 @@ def _save_results(mutation_test_suite: ag_models.MutationTestSuite,
                   invalid_tests: List[str],
                   timed_out_tests: List[str],
                   bugs_exposed: List[str],
+                  exposing_tests: Optional[Dict[str, str]] = None,
                   get_test_names_run_result: CompletedCommand = None,
                   validity_check_stdout: FileIO = None,
                   validity_check_stderr: FileIO = None,
@@ -230,12 +424,18 @@ def _save_results(mutation_test_suite: ag_models.MutationTestSuite,
                 'discarded_tests': discarded_tests,
                 'invalid_tests': invalid_tests,
                 'timed_out_tests': timed_out_tests,
-                'bugs_exposed': bugs_exposed
+                'bugs_exposed': bugs_exposed,
+                'exposing_tests': exposing_tests if exposing_tests is not None else {},
             }
             result = ag_models.MutationTestSuiteResult.objects.update_or_create(
                 defaults=result_kwargs,
                 mutation_test_suite=mutation_test_suite,
                 submission=submission)[0]  # type: ag_models.MutationTestSuiteResult
+            # The submission's point totals can no longer be trusted.
+            # See autograder.core.submission_feedback.update_denormalized_point_totals
+            ag_models.Submission.objects.filter(
+                pk=submission.pk
+            ).update(denormalized_point_totals={})
 
             if setup_run_result is not None:
                 setup_result = ag_models.AGCommandResult.objects.validate_and_create(
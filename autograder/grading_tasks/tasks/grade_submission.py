@@ -1,15 +1,20 @@
-from autograder.core.models.submission import Submission
+import json
 import traceback
+from typing import Dict, List
 
 import celery
 
 from django.conf import settings
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models.expressions import F
 from django.utils import timezone
 
 import autograder.core.models as ag_models
 from autograder.core.caching import delete_cached_submission_result
+from autograder.core.models.get_ultimate_submissions import refresh_cached_ultimate_submission
+from autograder.core.submission_feedback import (
+    compact_denormalized_ag_test_results_in_bulk, update_denormalized_point_totals
+)
 from autograder.utils.retry import retry_should_recover
 
 from .grade_mutation_test_suite import (
@@ -113,7 +118,7 @@ class SubmissionGrader:
             self.submission,
             self.group,
             on_suite_setup_finished=self.save_denormalized_ag_test_suite_result,
-            on_test_case_finished=self.save_denormalized_ag_test_case_result,
+            on_test_case_results_saved=self.save_denormalized_ag_test_case_results,
         )
 
     @retry_should_recover
@@ -136,28 +141,55 @@ class SubmissionGrader:
         self,
         ag_test_suite_result: ag_models.AGTestSuiteResult
     ) -> None:
-        with transaction.atomic():
-            submission = Submission.objects.select_for_update().get(pk=self.submission.pk)
-            key = str(ag_test_suite_result.ag_test_suite_id)
-            submission.denormalized_ag_test_results[key] = ag_test_suite_result.to_dict()
-            submission.save()
-            self._submission = submission
+        key = str(ag_test_suite_result.ag_test_suite_id)
+        serialized = ag_test_suite_result.to_dict()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                '''UPDATE core_submission
+                SET denormalized_ag_test_results = jsonb_set(
+                    denormalized_ag_test_results, %s, %s::jsonb)
+                WHERE core_submission.id = %s
+                ''',
+                ([key], json.dumps(serialized), self.submission.pk)
+            )
+
+        # Keep our copy in sync in case we save the submission later.
+        self.submission.denormalized_ag_test_results[key] = serialized
 
     @retry_should_recover
-    def save_denormalized_ag_test_case_result(
+    def save_denormalized_ag_test_case_results(
         self,
-        ag_test_case_result: ag_models.AGTestCaseResult
+        ag_test_case_results: List[ag_models.AGTestCaseResult]
     ) -> None:
-        with transaction.atomic():
-            submission = Submission.objects.select_for_update().get(pk=self.submission.pk)
-            print(submission.denormalized_ag_test_results)
+        """
+        Updates the submission's denormalized results with a batch of
+        AGTestCaseResults. Each batch is merged into the stored results
+        with one JSONB update per suite, so that we don't rewrite the
+        whole submission row.
+        """
+        serialized_by_suite: Dict[str, Dict[str, object]] = {}
+        for ag_test_case_result in ag_test_case_results:
             ag_test_case = ag_test_case_result.ag_test_case
-            submission.denormalized_ag_test_results[
-                str(ag_test_case.ag_test_suite_id)
-            ]['ag_test_case_results'][str(ag_test_case.pk)] = ag_test_case_result.to_dict()
-
-            submission.save()
-            self._submission = submission
+            serialized_by_suite.setdefault(str(ag_test_case.ag_test_suite_id), {})[
+                str(ag_test_case.pk)] = ag_test_case_result.to_dict()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            for suite_key, serialized in serialized_by_suite.items():
+                path = [suite_key, 'ag_test_case_results']
+                cursor.execute(
+                    '''UPDATE core_submission
+                    SET denormalized_ag_test_results = jsonb_set(
+                        denormalized_ag_test_results, %s,
+                        (denormalized_ag_test_results #> %s) || %s::jsonb)
+                    WHERE core_submission.id = %s
+                    ''',
+                    (path, path, json.dumps(serialized), self.submission.pk)
+                )
+
+        # Keep our copy in sync in case we save the submission later.
+        for suite_key, serialized in serialized_by_suite.items():
+            self.submission.denormalized_ag_test_results[suite_key][
+                'ag_test_case_results'].update(serialized)
 
     def send_non_deferred_tests_finished_email(self) -> None:
         if self.project.send_email_on_non_deferred_tests_finished:
@@ -174,6 +206,7 @@ class SubmissionGrader:
             _mark_submission_as_finished_impl(self.submission.pk)
             return
 
+        self.update_denormalized_point_totals()
         callback = mark_submission_as_finished.s(self.submission.pk).on_error(on_chord_error.s())
         celery.chord(deferred_task_signatures)(callback)
 
@@ -186,6 +219,10 @@ class SubmissionGrader:
             non_deferred_grading_end_time=timezone.now()
         )
 
+    @retry_should_recover
+    def update_denormalized_point_totals(self) -> None:
+        update_denormalized_point_totals(self.submission.pk)
+
     def get_deferred_suite_task_signatures(self):
         deferred_ag_test_suites = load_queryset_with_retry(
             self.project.ag_test_suites.filter(deferred=True))
@@ -220,7 +257,27 @@ class SubmissionGrader:
 @celery.shared_task(acks_late=True)
 def grade_submission(submission_pk):
     grader = SubmissionGrader(submission_pk)
-    return grader.grade_submission()
+    try:
+        return grader.grade_submission()
+    finally:
+        _queue_waiting_submissions()
+
+
+def _queue_waiting_submissions() -> None:
+    """
+    When the number of in-flight submissions is limited, submissions
+    may be waiting for this one to finish, so we run a scheduling pass.
+    """
+    if not (settings.GRADING_MAX_SUBMISSIONS_IN_FLIGHT
+            or settings.GRADING_COURSE_MAX_SUBMISSIONS_IN_FLIGHT):
+        return
+
+    from .queueing import queue_received_submissions
+    try:
+        queue_received_submissions()
+    except Exception:
+        print('Error queueing waiting submissions')
+        traceback.print_exc()
 
 
 @celery.shared_task(queue='small_tasks', acks_late=True)
@@ -242,7 +299,15 @@ def _mark_submission_as_finished_impl(submission_pk):
     ag_models.Submission.objects.filter(
         pk=submission_pk
     ).update(status=ag_models.Submission.GradingStatus.finished_grading)
+    # Results of suites that aren't deferred are added to the
+    # submission's JSON results one at a time while it's being graded.
+    if settings.COMPACT_DENORMALIZED_AG_TEST_RESULTS:
+        with transaction.atomic():
+            compact_denormalized_ag_test_results_in_bulk(
+                ag_models.Submission.objects.filter(pk=submission_pk))
+    update_denormalized_point_totals(submission_pk)
 
     submission = ag_models.Submission.objects.select_related(
         'group__project').get(pk=submission_pk)
     delete_cached_submission_result(submission)
+    refresh_cached_ultimate_submission(submission.group)
@@ -0,0 +1,85 @@
+from typing import List
+
+import celery
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+import autograder.core.models as ag_models
+from autograder.core.ag_test_config_cache import get_test_config_version
+from autograder.core.submission_feedback import update_denormalized_point_totals_in_bulk
+from autograder.utils.retry import retry_should_recover
+
+# Only submissions with these statuses have totals worth keeping up
+# to date. The totals of other submissions are computed when they
+# finish grading.
+_STATUSES_WITH_POINT_TOTALS = (
+    ag_models.Submission.GradingStatus.waiting_for_deferred,
+    ag_models.Submission.GradingStatus.finished_grading,
+)
+
+# Submissions are locked and updated in chunks of this many.
+_SUBMISSIONS_PER_CHUNK = 100
+
+# If a scheduled update never runs (e.g., because a worker crashed),
+# its flag expires so that the next change schedules a new one.
+_SCHEDULED_FLAG_EXTRA_TIMEOUT = 60 * 60
+
+
+def schedule_point_totals_update(project_pk: int) -> None:
+    """
+    Schedules update_project_point_totals to run for the given project
+    in settings.POINT_TOTALS_UPDATE_DELAY seconds, unless it's already
+    scheduled. Call this after the project's test config version has
+    been bumped.
+
+    The delay lets us recompute the totals once after a series of
+    changes to the project's tests (e.g., while an instructor is
+    editing point values) rather than after each change.
+    """
+    scheduled = cache.add(
+        _update_scheduled_cache_key(project_pk), True,
+        timeout=settings.POINT_TOTALS_UPDATE_DELAY + _SCHEDULED_FLAG_EXTRA_TIMEOUT)
+    if not scheduled:
+        return
+
+    from autograder.celery import app
+    update_project_point_totals.apply_async(
+        (project_pk,), countdown=settings.POINT_TOTALS_UPDATE_DELAY,
+        connection=app.connection())
+
+
+@celery.shared_task(queue='small_tasks', acks_late=True)
+def update_project_point_totals(project_pk: int) -> None:
+    """
+    Recomputes the denormalized point totals of the given project's
+    submissions that were computed with an outdated test config
+    version.
+    """
+    # Clear the flag first so that changes made while we're running
+    # schedule another update.
+    cache.delete(_update_scheduled_cache_key(project_pk))
+
+    test_config_version = get_test_config_version(project_pk)
+    submission_pks = list(
+        ag_models.Submission.objects.filter(
+            project=project_pk,
+            status__in=_STATUSES_WITH_POINT_TOTALS
+        ).exclude(
+            denormalized_point_totals__test_config_version=test_config_version
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+
+    for i in range(0, len(submission_pks), _SUBMISSIONS_PER_CHUNK):
+        _update_point_totals_chunk(submission_pks[i:i + _SUBMISSIONS_PER_CHUNK])
+
+
+@retry_should_recover
+def _update_point_totals_chunk(submission_pks: List[int]) -> None:
+    with transaction.atomic():
+        update_denormalized_point_totals_in_bulk(
+            ag_models.Submission.objects.filter(pk__in=submission_pks))
+
+
+def _update_scheduled_cache_key(project_pk: int) -> str:
+    return f'project_{project_pk}_point_totals_update_scheduled'
@@ -1,21 +1,51 @@
 import logging
+from typing import List, Optional, Protocol, Sequence, Tuple
 
 import celery
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Sum, F
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
 
 import autograder.core.models as ag_models
 from .grade_submission import grade_submission
+from .scheduling import (PendingSubmission, get_project_queue_metrics, get_scheduler,
+                         load_in_flight_usage, load_pending_submissions, lock_scheduler)
 
+logger = logging.getLogger(__name__)
+
+
+def get_estimated_grading_time(project_pk: int) -> int:
+    """
+    Returns an upper bound (in seconds) on how long it takes to grade
+    the non-deferred tests for a submission to the given project.
+    The result is cached until clear_estimated_grading_time_cache()
+    is called for the project.
+    """
+    cache_key = _estimated_grading_time_cache_key(project_pk)
+    result = cache.get(cache_key)
+    if result is None:
+        result = _estimated_grading_time(project_pk)
+        cache.set(cache_key, result, timeout=None)
+
+    return result
+
+
+def clear_estimated_grading_time_cache(project_pk: int) -> None:
+    cache.delete(_estimated_grading_time_cache_key(project_pk))
+
+
+def _estimated_grading_time_cache_key(project_pk: int) -> str:
+    return f'project_{project_pk}_estimated_grading_time'
 
-def _estimated_grading_time(project_pk: int):
-    ag_test_time_max = sum(
-        command.time_limit for command in
-        ag_models.AGTestCommand.objects.filter(
-            ag_test_case__ag_test_suite__project=project_pk
-        ).exclude(ag_test_case__ag_test_suite__deferred=True)
-    )
+
+def _estimated_grading_time(project_pk: int) -> int:
+    ag_test_time_max = ag_models.AGTestCommand.objects.filter(
+        ag_test_case__ag_test_suite__project=project_pk
+    ).exclude(
+        ag_test_case__ag_test_suite__deferred=True
+    ).aggregate(total=Sum('time_limit'))['total'] or 0
 
     mutation_test_suite_time_max = sum(
         suite.student_test_validity_check_command.time_limit * suite.max_num_student_tests
@@ -26,27 +56,183 @@ def _estimated_grading_time(project_pk: int):
     return ag_test_time_max + mutation_test_suite_time_max
 
 
+def queue_submission_on_commit(submission_pk: int) -> None:
+    """
+    Requests a scheduling pass (see request_scheduling_pass) as soon as
+    the current transaction commits so that the given newly-created
+    submission can be queued for grading right away. If that fails
+    (e.g. because the broker is unreachable), the submission will be
+    queued by the next run of queue_submissions.
+    """
+    def _request_scheduling_pass() -> None:
+        try:
+            request_scheduling_pass()
+        except Exception:
+            logger.exception(
+                f'Error queueing submission {submission_pk}. '
+                'It will be queued by the next run of queue_submissions.')
+
+    transaction.on_commit(_request_scheduling_pass)
+
+
+# If a requested scheduling pass never runs (e.g., because a worker
+# crashed), its flag expires so that later requests send a new one.
+_SCHEDULING_PASS_REQUESTED_TIMEOUT = 60
+_SCHEDULING_PASS_REQUESTED_CACHE_KEY = 'scheduling_pass_requested'
+
+
+def request_scheduling_pass() -> None:
+    """
+    Sends run_scheduling_pass to a worker, unless a previously
+    requested pass hasn't started yet. This way, a burst of new
+    submissions results in one scheduling pass instead of one per
+    submission, and the web server never waits on the scheduler lock.
+    """
+    requested = cache.add(
+        _SCHEDULING_PASS_REQUESTED_CACHE_KEY, True, timeout=_SCHEDULING_PASS_REQUESTED_TIMEOUT)
+    if not requested:
+        return
+
+    from autograder.celery import app
+    run_scheduling_pass.apply_async(connection=app.connection())
+
+
+@celery.shared_task(queue='small_tasks', acks_late=True)
+def run_scheduling_pass() -> None:
+    # Clear the flag before scheduling so that submissions created
+    # while this pass runs request another one.
+    cache.delete(_SCHEDULING_PASS_REQUESTED_CACHE_KEY)
+    queue_received_submissions()
+
+
 @celery.shared_task
 def queue_submissions():
+    """
+    Queues received submissions that are allowed to be graded now and
+    logs grading queue metrics for each project. Submissions are
+    normally queued as soon as they are created or as soon as other
+    submissions finish grading, so this task mainly picks up
+    submissions that could not be queued at those times.
+    """
+    queued = queue_received_submissions()
+    if queued:
+        logger.info(f'queued {len(queued)} submissions')
+
+    for project_pk, metrics in get_project_queue_metrics().items():
+        logger.info(f'project {project_pk} grading queue: {metrics}')
+
+
+class SubmissionBroker(Protocol):
+    def send_submissions(self, submissions: Sequence[Tuple[int, str]]) -> None:
+        """
+        Sends each (submission pk, queue name) pair in "submissions"
+        to the given queue, in order.
+        """
+        ...
+
+
+class CeleryBroker:
+    """
+    Sends submissions to the grade_submission task's celery queues.
+    """
+    def send_submissions(self, submissions: Sequence[Tuple[int, str]]) -> None:
+        from autograder.celery import app
+
+        with app.connection() as broker_connection:
+            for submission_pk, queue_name in submissions:
+                grade_submission.apply_async(
+                    [submission_pk], queue=queue_name, connection=broker_connection)
+
+
+def queue_received_submissions(broker: Optional[SubmissionBroker] = None) -> List[int]:
+    """
+    Runs a scheduling pass: uses the FairShareScheduler to choose which
+    received submissions to queue for grading, marks them as queued,
+    and sends them to the broker in the order the scheduler chose.
+    Returns the pks of the submissions that were queued.
+
+    Only one scheduling pass can run at a time.
+    """
+    if broker is None:
+        broker = CeleryBroker()
+
     with transaction.atomic():
-        to_queue = list(ag_models.Submission.objects.select_for_update().filter(
-            status=ag_models.Submission.GradingStatus.received).reverse())
-        print(to_queue)
+        lock_scheduler()
+        pending = load_pending_submissions(get_estimated_grading_time)
+        if not pending:
+            return []
 
+        usage = load_in_flight_usage(get_estimated_grading_time)
+        now = timezone.now()
+        to_queue = get_scheduler().schedule(pending, usage, now)
+
+        # Submissions removed from the queue since we loaded them
+        # won't be marked as queued.
+        marked_pks = {
+            submission_pk for submission_pk, _
+            in _mark_received_submissions_as_queued([sub.pk for sub in to_queue])
+        }
+        to_queue = [sub for sub in to_queue if sub.pk in marked_pks]
         for submission in to_queue:
             print('adding submission{} to queue for grading'.format(submission.pk))
-            submission.status = ag_models.Submission.GradingStatus.queued
-            submission.save()
+            logger.info(
+                f'submission {submission.pk} (project {submission.project_pk}) '
+                f'queued after waiting {(now - submission.timestamp).total_seconds()}s')
+
+        for project_pk in {submission.project_pk for submission in to_queue}:
+            ensure_project_queues_registered(project_pk)
+        broker.send_submissions([
+            (submission.pk, _get_queue_name(submission)) for submission in to_queue
+        ])
+
+    return [submission.pk for submission in to_queue]
+
+
+def _get_queue_name(submission: PendingSubmission) -> str:
+    if submission.estimated_grading_time / 60 > 10:
+        return settings.SUBMISSION_QUEUE_TMPL.format(submission.project_pk)
+
+    return settings.FAST_QUEUE_TMPL.format(submission.project_pk)
 
-            if _estimated_grading_time(submission.project_id) / 60 > 10:
-                queue_name_tmpl = settings.SUBMISSION_QUEUE_TMPL.format(submission.project_id)
-            else:
-                queue_name_tmpl = settings.FAST_QUEUE_TMPL.format(submission.project_id)
 
-            grade_submission.apply_async(
-                [submission.pk], queue=queue_name_tmpl.format(submission.project_id))
+def _mark_received_submissions_as_queued(
+    submission_pks: Sequence[int]
+) -> List[Tuple[int, int]]:
+    """
+    Changes the status of the submissions in submission_pks that are
+    still received to queued using a single query.
+    Returns a list of (submission pk, project pk) tuples for the
+    submissions that were updated.
+    """
+    if not submission_pks:
+        return []
 
-        print('queued {} submissions'.format(to_queue))
+    meta = ag_models.Submission._meta
+    pk_column = meta.pk.column
+    status_column = meta.get_field('status').column
+    last_modified_column = meta.get_field('last_modified').column
+    project_column = meta.get_field('project').column
+
+    # SKIP LOCKED keeps us from waiting on submissions that are locked
+    # by, e.g., a request to remove them from the queue.
+    query = f'''
+        UPDATE {meta.db_table} SET {status_column} = %s, {last_modified_column} = %s
+        WHERE {pk_column} IN (
+            SELECT {pk_column} FROM {meta.db_table}
+            WHERE {status_column} = %s AND {pk_column} = ANY(%s)
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING {pk_column}, {project_column}
+    '''
+    params = [
+        ag_models.Submission.GradingStatus.queued,
+        timezone.now(),
+        ag_models.Submission.GradingStatus.received,
+        list(submission_pks),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
 
 
 @celery.shared_task(acks_late=True, autoretry_for=(Exception,), default_retry_delay=5)
@@ -59,13 +245,12 @@ def register_project_queues(worker_names=None, project_pks=None):
             get_worker_prefix(worker_name) in settings.WORKER_PREFIX_TO_QUEUE_TMPLS
         ]
 
-    logger = logging.getLogger(__name__)
     logger.info(f'worker names: {", ".join(worker_names)}')
     if not worker_names:
         return
 
     if not project_pks:
-        project_pks = [project.pk for project in ag_models.Project.objects.all()]
+        project_pks = get_project_pks_to_register()
     logger.info(f'{len(project_pks)} projects to register')
 
     for worker_name in worker_names:
@@ -78,3 +263,81 @@ def register_project_queues(worker_names=None, project_pks=None):
 
 def get_worker_prefix(worker_hostname: str):
     return worker_hostname.split('@')[0]
+
+
+def get_project_pks_to_register() -> List[int]:
+    """
+    Returns the pks of the projects whose queues grading workers should
+    consume from when they start.
+
+    When settings.PROJECT_QUEUE_REGISTRATION_MODE is "all", this
+    is every project. When it is "active", this is only the projects
+    that currently accept submissions or have submissions that are
+    being graded. Other projects' queues are registered on demand by
+    ensure_project_queues_registered().
+    """
+    if settings.PROJECT_QUEUE_REGISTRATION_MODE == 'all':
+        return list(ag_models.Project.objects.values_list('pk', flat=True))
+
+    now = timezone.now()
+    accepting_submissions = ag_models.Project.objects.filter(
+        visible_to_students=True, disallow_student_submissions=False
+    ).filter(
+        Q(closing_time__isnull=True)
+        | Q(closing_time__gt=now)
+        | Q(groups__extended_due_date__gt=now)
+    )
+    has_active_submissions = ag_models.Project.objects.filter(
+        submissions__status__in=[
+            ag_models.Submission.GradingStatus.received,
+            ag_models.Submission.GradingStatus.queued,
+            ag_models.Submission.GradingStatus.being_graded,
+            ag_models.Submission.GradingStatus.waiting_for_deferred,
+        ]
+    )
+    return sorted(
+        set(accepting_submissions.values_list('pk', flat=True))
+        | set(has_active_submissions.values_list('pk', flat=True))
+    )
+
+
+def ensure_project_queues_registered(project_pk: int) -> None:
+    """
+    When settings.PROJECT_QUEUE_REGISTRATION_MODE is "active", makes
+    sure that grading workers consume from the given project's queues.
+    Call this before sending tasks to a project's queues.
+
+    Registration requests are sent at most once per
+    PROJECT_QUEUE_REGISTRATION_TIMEOUT seconds per project and whenever
+    a grading worker starts (see clear_registered_project_queues()).
+    Tasks sent before the workers finish registering wait in the queue.
+    """
+    if settings.PROJECT_QUEUE_REGISTRATION_MODE == 'all':
+        return
+
+    # cache.add() only sets the key if it isn't already set, so only
+    # one caller sends the registration request.
+    newly_added = cache.add(
+        _project_queues_registered_cache_key(project_pk), True,
+        timeout=settings.PROJECT_QUEUE_REGISTRATION_TIMEOUT)
+    if not newly_added:
+        return
+
+    from autograder.celery import app
+    register_project_queues.apply_async(
+        kwargs={'project_pks': [project_pk]}, queue='small_tasks',
+        connection=app.connection())
+
+
+def clear_registered_project_queues() -> None:
+    """
+    Forgets which projects' queues have been registered on demand so
+    that a newly started worker gets registered for those projects the
+    next time they are needed.
+    """
+    keys = cache.client.iter_keys('project_*_queues_registered', itersize=5000)
+    cache.delete_many(list(keys))
+
+
+def _project_queues_registered_cache_key(project_pk: int) -> str:
+    return f'project_{project_pk}_queues_registered'
@@ -1,19 +1,26 @@
-from autograder.core.submission_feedback import update_denormalized_ag_test_results
+from autograder.core.submission_feedback import (
+    update_denormalized_ag_test_results, update_denormalized_point_totals
+)
+import os
 import traceback
+from typing import List, Optional, Sequence, Tuple
 
 import celery
 from django.db import transaction
-from django.db.models import F, Value
+from django.db.models import F, Prefetch, Value
 from django.db.models.functions import Concat
+from django.utils import timezone
 
 import autograder.core.models as ag_models
 from autograder.core.caching import clear_submission_results_cache
+from autograder.core.models.get_ultimate_submissions import clear_cached_ultimate_submission
 from autograder.grading_tasks.tasks.grade_mutation_test_suite import grade_mutation_test_suite_impl
 from autograder.grading_tasks.tasks.utils import load_queryset_with_retry
 from autograder.utils.retry import retry_should_recover
 
+from .ag_test_fingerprints import AGTestFingerprinter, get_evaluation_fingerprint
 from .exceptions import RerunCancelled
-from .grade_ag_test import grade_ag_test_suite_impl
+from .grade_ag_test import check_ag_test_command_output, grade_ag_test_suite_impl
 
 # See autograder/rest_api/tests/test_views/test_rerun_submissions_task_views.py
 # for tests that cover this module.
@@ -95,12 +102,16 @@ class SubmissionRerunner:
 
         if (str(suite.pk) in self.rerun_task.ag_test_suite_data
                 or self.rerun_task.rerun_all_ag_test_suites):
-            grade_ag_test_suite_impl(
-                suite,
-                self.submission,
-                self.group,
-                *self.rerun_task.ag_test_suite_data.get(str(suite.pk), []),
-            )
+            ag_test_case_pks = self.rerun_task.ag_test_suite_data.get(str(suite.pk), [])
+            if self.rerun_task.rerun_affected_only:
+                ag_test_case_pks = reevaluate_unaffected_ag_test_cases(
+                    suite, self.submission, ag_test_case_pks)
+                print(f'Rerunning {len(ag_test_case_pks)} affected test cases in {suite.name}')
+
+            # grade_ag_test_suite_impl() reruns every test case if we
+            # don't pass it any.
+            if not self.rerun_task.rerun_affected_only or ag_test_case_pks:
+                grade_ag_test_suite_impl(suite, self.submission, self.group, *ag_test_case_pks)
             self.update_rerun_progress()
             self._update_denormalized_ag_test_results()
 
@@ -135,8 +146,13 @@ class SubmissionRerunner:
                 and self.rerun_task.rerun_all_mutation_test_suites):
             _mark_submission_as_finished_after_rerun(self._submission_pk)
 
+        self.update_denormalized_point_totals()
         _clear_cached_submission_results_impl(self.project.pk)
 
+    @retry_should_recover
+    def update_denormalized_point_totals(self) -> None:
+        update_denormalized_point_totals(self._submission_pk)
+
     @retry_should_recover
     def record_submission_grading_error(self, error_msg: str) -> None:
         with transaction.atomic():
@@ -150,6 +166,116 @@ class SubmissionRerunner:
             )
 
 
+def reevaluate_unaffected_ag_test_cases(
+    ag_test_suite: ag_models.AGTestSuite,
+    submission: ag_models.Submission,
+    ag_test_case_pks: Sequence[int] = ()
+) -> List[int]:
+    """
+    Brings submission's results for the given AGTestCases in
+    ag_test_suite (or all of its AGTestCases if ag_test_case_pks is
+    empty) up to date without running anything in a sandbox, where
+    possible.
+
+    Results whose evaluation fingerprint is out of date are re-checked
+    against the output stored when they were recorded.
+    Returns the pks of the AGTestCases that need to be rerun because
+    the execution fingerprint of at least one of their commands has
+    changed or because some of their results are missing.
+    """
+    ag_test_case_queryset = ag_test_suite.ag_test_cases.prefetch_related(
+        Prefetch(
+            'ag_test_commands',
+            ag_models.AGTestCommand.objects.select_related(
+                'stdin_instructor_file',
+                'expected_stdout_instructor_file',
+                'expected_stderr_instructor_file',
+            )
+        )
+    )
+    if ag_test_case_pks:
+        ag_test_case_queryset = ag_test_case_queryset.filter(pk__in=ag_test_case_pks)
+    ag_test_cases = load_queryset_with_retry(ag_test_case_queryset)
+
+    cmd_results = {
+        cmd_result.ag_test_command_id: cmd_result
+        for cmd_result in load_queryset_with_retry(
+            ag_models.AGTestCommandResult.objects.filter(
+                ag_test_case_result__ag_test_suite_result__ag_test_suite=ag_test_suite,
+                ag_test_case_result__ag_test_suite_result__submission=submission,
+            ).select_related('ag_test_case_result__ag_test_suite_result__submission')
+        )
+    }
+    case_pks_with_results = set(
+        load_queryset_with_retry(
+            ag_models.AGTestCaseResult.objects.filter(
+                ag_test_suite_result__ag_test_suite=ag_test_suite,
+                ag_test_suite_result__submission=submission,
+            ).values_list('ag_test_case_id', flat=True)
+        )
+    )
+
+    fingerprinter = AGTestFingerprinter(ag_test_suite)
+
+    def _needs_rerun(ag_test_cmd: ag_models.AGTestCommand,
+                     cmd_result: Optional[ag_models.AGTestCommandResult]) -> bool:
+        if cmd_result is None:
+            return True
+
+        # We can only re-check output that we still have.
+        output_missing = (not os.path.exists(cmd_result.stdout_filename)
+                          or not os.path.exists(cmd_result.stderr_filename))
+        return (output_missing
+                or cmd_result.execution_fingerprint
+                != fingerprinter.get_execution_fingerprint(ag_test_cmd))
+
+    ag_test_cases_to_rerun: List[int] = []
+    to_reevaluate: List[Tuple[ag_models.AGTestCommand, ag_models.AGTestCommandResult]] = []
+    for ag_test_case in ag_test_cases:
+        if ag_test_case.pk not in case_pks_with_results:
+            ag_test_cases_to_rerun.append(ag_test_case.pk)
+            continue
+
+        ag_test_cmds = list(ag_test_case.ag_test_commands.all())
+        case_cmd_results = [cmd_results.get(ag_test_cmd.pk) for ag_test_cmd in ag_test_cmds]
+        if any(_needs_rerun(ag_test_cmd, cmd_result)
+               for ag_test_cmd, cmd_result in zip(ag_test_cmds, case_cmd_results)):
+            ag_test_cases_to_rerun.append(ag_test_case.pk)
+            continue
+
+        to_reevaluate += [
+            (ag_test_cmd, cmd_result)
+            for ag_test_cmd, cmd_result in zip(ag_test_cmds, case_cmd_results)
+            if cmd_result.evaluation_fingerprint != get_evaluation_fingerprint(ag_test_cmd)
+        ]
+
+    _reevaluate_ag_test_command_results(to_reevaluate)
+    return ag_test_cases_to_rerun
+
+
+@retry_should_recover
+def _reevaluate_ag_test_command_results(
+    to_reevaluate: List[Tuple[ag_models.AGTestCommand, ag_models.AGTestCommandResult]]
+) -> None:
+    if not to_reevaluate:
+        return
+
+    now = timezone.now()
+    fields_to_update = {'last_modified', 'evaluation_fingerprint'}
+    for ag_test_cmd, cmd_result in to_reevaluate:
+        result_data = check_ag_test_command_output(
+            ag_test_cmd, cmd_result.return_code,
+            cmd_result.stdout_filename, cmd_result.stderr_filename)
+        for field_name, value in result_data.items():
+            setattr(cmd_result, field_name, value)
+        cmd_result.evaluation_fingerprint = get_evaluation_fingerprint(ag_test_cmd)
+        cmd_result.last_modified = now
+        fields_to_update.update(result_data.keys())
+
+    ag_models.AGTestCommandResult.objects.bulk_update(
+        [cmd_result for _, cmd_result in to_reevaluate], fields=sorted(fields_to_update))
+
+
 @retry_should_recover
 def _mark_submission_as_finished_after_rerun(submission_pk: int):
     print(submission_pk)
@@ -160,6 +286,11 @@ def _mark_submission_as_finished_after_rerun(submission_pk: int):
             status=ag_models.Submission.GradingStatus.finished_grading
         ).update(status=ag_models.Submission.GradingStatus.finished_grading)
 
+        group_pk = ag_models.Submission.objects.filter(
+            pk=submission_pk
+        ).values_list('group_id', flat=True).get()
+        clear_cached_ultimate_submission(group_pk)
+
 
 @retry_should_recover
 def _clear_cached_submission_results_impl(project_pk: int):
@@ -0,0 +1,258 @@
+import shutil
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from autograder_sandbox.autograder_sandbox import CompletedCommand
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+
+import autograder.core.models as ag_models
+from autograder.utils.retry import retry_should_recover
+
+
+class AGTestCommandOutcome:
+    """
+    The data recorded from running an AGTestCommand that has not yet
+    been saved to the database.
+    """
+    def __init__(self, ag_test_cmd: ag_models.AGTestCommand,
+                 result_data: Dict[str, object],
+                 run_result: CompletedCommand):
+        self.ag_test_cmd = ag_test_cmd
+        self.result_data = result_data
+        self.run_result = run_result
+
+
+class AGTestResultWriter:
+    """
+    Buffers the results of AGTestCases that belong to one
+    AGTestSuiteResult and writes them to the database in batches.
+
+    A batch is written once flush_num_cases test cases have been added
+    or once flush_interval seconds have passed since the previous batch
+    was written, whichever comes first. The interval is checked when a
+    result is added and whenever flush_if_interval_elapsed() is called,
+    so callers should call flush_if_interval_elapsed() while waiting
+    for a test case to finish (see time_until_flush()).
+    Call flush() (or use this object as a context manager) to write any
+    remaining results.
+
+    After a batch is written, on_test_case_finished is called once for
+    each test case result in the batch (in the order they were added),
+    followed by one call to on_batch_saved with the whole batch.
+    """
+    def __init__(
+        self,
+        suite_result: ag_models.AGTestSuiteResult,
+        *,
+        on_test_case_finished: Callable[[Optional[ag_models.AGTestCaseResult]], None] = (
+            lambda _: None),
+        on_batch_saved: Callable[[List[ag_models.AGTestCaseResult]], None] = lambda _: None,
+        flush_num_cases: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ):
+        self._suite_result = suite_result
+        self._on_test_case_finished = on_test_case_finished
+        self._on_batch_saved = on_batch_saved
+
+        self._flush_num_cases = (
+            flush_num_cases if flush_num_cases is not None
+            else settings.AG_TEST_RESULT_FLUSH_NUM_CASES)
+        self._flush_interval = (
+            flush_interval if flush_interval is not None
+            else settings.AG_TEST_RESULT_FLUSH_INTERVAL)
+
+        self._pending: List[Tuple[ag_models.AGTestCase, List[AGTestCommandOutcome]]] = []
+        self._last_flush_time = time.monotonic()
+
+    def __enter__(self) -> 'AGTestResultWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # If grading failed, the submission will be marked as an error,
+        # so there's no need to save partial results.
+        if exc_type is None:
+            self.flush()
+
+    def add_test_case_result(self, ag_test_case: ag_models.AGTestCase,
+                             cmd_outcomes: List[AGTestCommandOutcome]) -> None:
+        self._pending.append((ag_test_case, cmd_outcomes))
+
+        if len(self._pending) >= self._flush_num_cases:
+            self.flush()
+        else:
+            self.flush_if_interval_elapsed()
+
+    def time_until_flush(self) -> Optional[float]:
+        """
+        Returns the number of seconds until the buffered results are due
+        to be written, or None if no results are buffered.
+        """
+        if not self._pending:
+            return None
+
+        return max(0.0, self._last_flush_time + self._flush_interval - time.monotonic())
+
+    def flush_if_interval_elapsed(self) -> None:
+        """
+        Writes the buffered results if flush_interval seconds have
+        passed since the previous batch was written.
+        """
+        if self.time_until_flush() == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+
+        try:
+            case_results = self._save_batch()
+        except IntegrityError:
+            # Something in the batch was deleted while we were grading.
+            # Fall back to saving results one at a time so that we
+            # only skip the results that belong to deleted objects.
+            case_results = self._save_one_at_a_time()
+
+        self._pending = []
+        self._last_flush_time = time.monotonic()
+
+        saved_case_results = [result for result in case_results if result is not None]
+        prefetch_related_objects(saved_case_results, 'ag_test_command_results')
+
+        for case_result in case_results:
+            self._on_test_case_finished(case_result)
+        if saved_case_results:
+            self._on_batch_saved(saved_case_results)
+
+    @retry_should_recover
+    def _save_batch(self) -> List[Optional[ag_models.AGTestCaseResult]]:
+        with transaction.atomic():
+            case_results = self._get_or_create_case_results(
+                [ag_test_case for ag_test_case, _ in self._pending])
+
+            existing_cmd_results = {
+                (cmd_result.ag_test_command_id, cmd_result.ag_test_case_result_id): cmd_result
+                for cmd_result in ag_models.AGTestCommandResult.objects.filter(
+                    ag_test_case_result__in=case_results)
+            }
+
+            now = timezone.now()
+            to_create: List[ag_models.AGTestCommandResult] = []
+            to_update: List[ag_models.AGTestCommandResult] = []
+            fields_to_update = {'last_modified'}
+            saved: List[Tuple[ag_models.AGTestCommandResult, AGTestCommandOutcome]] = []
+            for case_result, (_, cmd_outcomes) in zip(case_results, self._pending):
+                for outcome in cmd_outcomes:
+                    cmd_result = existing_cmd_results.get(
+                        (outcome.ag_test_cmd.pk, case_result.pk))
+                    if cmd_result is None:
+                        cmd_result = ag_models.AGTestCommandResult(
+                            ag_test_command=outcome.ag_test_cmd,
+                            ag_test_case_result=case_result,
+                            **outcome.result_data)
+                        to_create.append(cmd_result)
+                    else:
+                        for field_name, value in outcome.result_data.items():
+                            setattr(cmd_result, field_name, value)
+                        cmd_result.last_modified = now
+                        cmd_result.ag_test_case_result = case_result
+                        fields_to_update.update(outcome.result_data.keys())
+                        to_update.append(cmd_result)
+
+                    saved.append((cmd_result, outcome))
+
+            ag_models.AGTestCommandResult.objects.bulk_create(to_create)
+            if to_update:
+                ag_models.AGTestCommandResult.objects.bulk_update(
+                    to_update, fields=sorted(fields_to_update))
+
+            for cmd_result, outcome in saved:
+                _write_cmd_output_files(cmd_result, outcome.run_result)
+
+        return list(case_results)
+
+    def _get_or_create_case_results(
+        self, ag_test_cases: Sequence[ag_models.AGTestCase]
+    ) -> List[ag_models.AGTestCaseResult]:
+        existing = {
+            case_result.ag_test_case_id: case_result
+            for case_result in ag_models.AGTestCaseResult.objects.filter(
+                ag_test_suite_result=self._suite_result,
+                ag_test_case__in=ag_test_cases)
+        }
+        to_create = [
+            ag_models.AGTestCaseResult(
+                ag_test_case=ag_test_case, ag_test_suite_result=self._suite_result)
+            for ag_test_case in ag_test_cases if ag_test_case.pk not in existing
+        ]
+        ag_models.AGTestCaseResult.objects.bulk_create(to_create)
+        for case_result in to_create:
+            existing[case_result.ag_test_case_id] = case_result
+
+        result = []
+        for ag_test_case in ag_test_cases:
+            case_result = existing[ag_test_case.pk]
+            # Avoid extra queries when computing output filenames.
+            case_result.ag_test_case = ag_test_case
+            case_result.ag_test_suite_result = self._suite_result
+            result.append(case_result)
+
+        return result
+
+    def _save_one_at_a_time(self) -> List[Optional[ag_models.AGTestCaseResult]]:
+        result = []
+        for ag_test_case, cmd_outcomes in self._pending:
+            case_result = get_or_create_ag_test_case_result(ag_test_case, self._suite_result)
+            if case_result is not None:
+                for outcome in cmd_outcomes:
+                    save_ag_test_command_result(
+                        outcome.ag_test_cmd, case_result, outcome.result_data, outcome.run_result)
+
+            result.append(case_result)
+
+        return result
+
+
+@retry_should_recover
+def get_or_create_ag_test_case_result(
+    ag_test_case: ag_models.AGTestCase,
+    suite_result: ag_models.AGTestSuiteResult
+) -> Optional[ag_models.AGTestCaseResult]:
+    try:
+        return ag_models.AGTestCaseResult.objects.get_or_create(
+            ag_test_case=ag_test_case, ag_test_suite_result=suite_result)[0]
+    except IntegrityError:
+        # The AGTestCase or AGSuiteResult has been deleted.
+        return None
+
+
+@retry_should_recover
+def save_ag_test_command_result(ag_test_cmd: ag_models.AGTestCommand,
+                                case_result: ag_models.AGTestCaseResult,
+                                result_data: Dict[str, object],
+                                run_result: CompletedCommand) -> None:
+    try:
+        with transaction.atomic():
+            cmd_result = ag_models.AGTestCommandResult.objects.update_or_create(
+                defaults=result_data,
+                ag_test_command=ag_test_cmd,
+                ag_test_case_result=case_result)[0]  # type: ag_models.AGTestCommandResult
+
+            _write_cmd_output_files(cmd_result, run_result)
+    except IntegrityError:
+        # The command or case result has likely been deleted
+        return
+
+
+def _write_cmd_output_files(cmd_result: ag_models.AGTestCommandResult,
+                            run_result: CompletedCommand) -> None:
+    # The output files may have already been read (e.g. by a previous
+    # attempt to save the results).
+    run_result.stdout.seek(0)
+    with open(cmd_result.stdout_filename, 'wb') as f:
+        shutil.copyfileobj(run_result.stdout, f)
+    run_result.stderr.seek(0)
+    with open(cmd_result.stderr_filename, 'wb') as f:
+        shutil.copyfileobj(run_result.stderr, f)
@@ -0,0 +1,294 @@
+import atexit
+import contextlib
+import logging
+import queue
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from autograder_sandbox import AutograderSandbox, CompletedCommand
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSandbox(AutograderSandbox):
+    """
+    A sandbox whose container is started before we know which
+    submission it will be used for.
+
+    Docker only lets us set a container's environment variables when
+    the container is created, so the environment variables for the
+    current checkout are instead passed to each command via "env".
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_environment_variables: Mapping[str, str] = {}
+
+    @property
+    def environment_variables(self) -> Mapping[str, str]:
+        return {**super().environment_variables, **self.checkout_environment_variables}
+
+    def run_command(self, args: List[str], *run_args, **run_kwargs) -> CompletedCommand:
+        return super().run_command(
+            self.add_checkout_environment_variables(args), *run_args, **run_kwargs)
+
+    def add_checkout_environment_variables(self, args: List[str]) -> List[str]:
+        if not self.checkout_environment_variables:
+            return args
+
+        return ['env'] + [
+            '{}={}'.format(key, value)
+            for key, value in self.checkout_environment_variables.items()
+        ] + args
+
+
+class SandboxPoolStats:
+    """
+    Counters recorded by a SandboxPool.
+
+    hits: The number of checkouts that were given an already-running
+        sandbox.
+    misses: The number of checkouts that had to wait for a sandbox to
+        be started.
+    num_resets: The number of used sandboxes that were reset and
+        returned to the pool.
+    total_reset_time: The total number of seconds spent resetting
+        used sandboxes.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.num_resets = 0
+        self.total_reset_time = 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'num_resets': self.num_resets,
+            'total_reset_time': self.total_reset_time,
+        }
+
+
+SandboxFactory = Callable[..., PooledSandbox]
+
+
+class SandboxPool:
+    """
+    Keeps up to "size" running sandboxes created from one docker image
+    (with one network access setting) ready to be checked out.
+
+    Checked out sandboxes are always in a clean state. When a sandbox
+    is returned, it is reset in a background thread and put back in
+    the pool. If the pool is empty when a sandbox is requested, a new
+    sandbox is started in the foreground (a "miss") and the pool is
+    refilled in the background.
+    """
+    def __init__(self, docker_image: str, allow_network_access: bool, *,
+                 size: int,
+                 sandbox_factory: Optional[SandboxFactory] = None):
+        self.docker_image = docker_image
+        self.allow_network_access = allow_network_access
+        self.size = size
+        self.stats = SandboxPoolStats()
+
+        self._sandbox_factory = (
+            sandbox_factory if sandbox_factory is not None else PooledSandbox)
+        self._ready: 'queue.Queue[PooledSandbox]' = queue.Queue()
+        self._lock = threading.Lock()
+        # The number of sandboxes that are either in self._ready or
+        # are being started or reset by the background executor.
+        self._num_pooled = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max(size, 1))
+
+    @contextlib.contextmanager
+    def checkout(
+        self, environment_variables: Optional[Mapping[str, str]] = None
+    ) -> Iterator[PooledSandbox]:
+        """
+        Yields a running sandbox. The sandbox is reset and returned to
+        the pool when the context manager exits.
+        """
+        sandbox = self._get_ready_sandbox()
+        if sandbox is None:
+            with self._lock:
+                self.stats.misses += 1
+            self.fill()
+            sandbox = self._start_sandbox()
+        else:
+            with self._lock:
+                self.stats.hits += 1
+
+        sandbox.checkout_environment_variables = dict(environment_variables or {})
+        try:
+            yield sandbox
+        finally:
+            sandbox.checkout_environment_variables = {}
+            self._return_sandbox(sandbox)
+
+    def fill(self) -> None:
+        """
+        Starts sandboxes in the background until the pool has "size"
+        sandboxes that are ready or being prepared.
+        """
+        with self._lock:
+            if self._closed:
+                return
+
+            num_to_start = self.size - self._num_pooled
+            self._num_pooled += max(num_to_start, 0)
+
+        try:
+            for _ in range(num_to_start):
+                self._executor.submit(self._start_and_add_to_pool)
+        except RuntimeError:
+            # The pool was closed after we checked self._closed.
+            pass
+
+    def close(self) -> None:
+        """
+        Waits for background work to finish and destroys all sandboxes
+        currently in the pool.
+        """
+        with self._lock:
+            self._closed = True
+
+        self._executor.shutdown(wait=True)
+        while True:
+            sandbox = self._get_ready_sandbox()
+            if sandbox is None:
+                break
+            _destroy_quietly(sandbox)
+
+    def _get_ready_sandbox(self) -> Optional[PooledSandbox]:
+        try:
+            sandbox = self._ready.get_nowait()
+        except queue.Empty:
+            return None
+
+        with self._lock:
+            self._num_pooled -= 1
+        return sandbox
+
+    def _start_sandbox(self) -> PooledSandbox:
+        sandbox = self._sandbox_factory(
+            name='pooled-sandbox-{}'.format(uuid.uuid4().hex),
+            docker_image=self.docker_image,
+            allow_network_access=self.allow_network_access)
+        sandbox.__enter__()
+        return sandbox
+
+    def _start_and_add_to_pool(self) -> None:
+        try:
+            sandbox = self._start_sandbox()
+        except Exception:
+            print('Error starting pooled sandbox for', self.docker_image)
+            traceback.print_exc()
+            with self._lock:
+                self._num_pooled -= 1
+            return
+
+        self._ready.put(sandbox)
+
+    def _return_sandbox(self, sandbox: PooledSandbox) -> None:
+        with self._lock:
+            keep = not self._closed and self._num_pooled < self.size
+            if keep:
+                self._num_pooled += 1
+
+        try:
+            if keep:
+                self._executor.submit(self._reset_and_add_to_pool, sandbox)
+            else:
+                self._executor.submit(_destroy_quietly, sandbox)
+        except RuntimeError:
+            # The pool was closed after we checked self._closed.
+            _destroy_quietly(sandbox)
+
+    def _reset_and_add_to_pool(self, sandbox: PooledSandbox) -> None:
+        start_time = time.monotonic()
+        try:
+            sandbox.reset()
+        except Exception:
+            print('Error resetting pooled sandbox', sandbox.name)
+            traceback.print_exc()
+            with self._lock:
+                self._num_pooled -= 1
+            _destroy_quietly(sandbox)
+            self.fill()
+            return
+
+        with self._lock:
+            self.stats.num_resets += 1
+            self.stats.total_reset_time += time.monotonic() - start_time
+
+        self._ready.put(sandbox)
+
+
+def _destroy_quietly(sandbox: AutograderSandbox) -> None:
+    try:
+        sandbox.__exit__(None, None, None)
+    except Exception:
+        print('Error destroying sandbox', sandbox.name)
+        traceback.print_exc()
+
+
+_pools: Dict[Tuple[str, bool], SandboxPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_sandbox_pool(docker_image: str, allow_network_access: bool) -> SandboxPool:
+    """
+    Returns this worker process's SandboxPool for the given docker
+    image and network access setting, creating it if needed.
+    The size of new pools is determined by settings.SANDBOX_POOL_SIZE.
+    """
+    key = (docker_image, allow_network_access)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SandboxPool(
+                docker_image, allow_network_access, size=settings.SANDBOX_POOL_SIZE)
+        return _pools[key]
+
+
+def get_sandbox_pool_stats() -> Dict[str, Dict[str, object]]:
+    """
+    Returns a dictionary of (docker image, network access) -> pool
+    stats for every pool in this worker process. The keys have the
+    form "<docker image>" or "<docker image> (network)".
+    """
+    with _pools_lock:
+        return {
+            _pool_name(docker_image, allow_network_access): pool.stats.to_dict()
+            for (docker_image, allow_network_access), pool in _pools.items()
+        }
+
+
+# Celery's prefork pool processes exit with os._exit() (e.g., when
+# they're replaced after max_tasks_per_child tasks), which skips atexit
+# handlers, so we also close the pools when a worker process shuts down.
+@receiver([worker_process_shutdown, worker_shutdown])
+@atexit.register
+def close_sandbox_pools(**kwargs: object) -> None:
+    """
+    Logs the stats of and closes every sandbox pool in this process.
+    """
+    with _pools_lock:
+        pools = list(_pools.items())
+        _pools.clear()
+
+    for (docker_image, allow_network_access), pool in pools:
+        logger.info('Sandbox pool stats for %s: %s',
+                    _pool_name(docker_image, allow_network_access), pool.stats.to_dict())
+        pool.close()
+
+
+def _pool_name(docker_image: str, allow_network_access: bool) -> str:
+    return docker_image + (' (network)' if allow_network_access else '')
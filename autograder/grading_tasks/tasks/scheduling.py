@@ -0,0 +1,321 @@
+import datetime
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from backports import zoneinfo
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+import autograder.core.models as ag_models
+import autograder.core.utils as core_ut
+
+# Submissions with these statuses are taking up (or are about to take
+# up) a non-deferred grading worker.
+IN_FLIGHT_STATUSES = (
+    ag_models.Submission.GradingStatus.queued,
+    ag_models.Submission.GradingStatus.being_graded,
+)
+
+
+class PendingSubmission:
+    """
+    The information the FairShareScheduler needs about a submission
+    that is waiting to be queued for grading.
+    """
+    def __init__(self, pk: int, *,
+                 project_pk: int,
+                 course_pk: int,
+                 timestamp: datetime.datetime,
+                 estimated_grading_time: int,
+                 is_staff: bool = False,
+                 is_first_of_day: bool = False):
+        self.pk = pk
+        self.project_pk = project_pk
+        self.course_pk = course_pk
+        self.timestamp = timestamp
+        self.estimated_grading_time = estimated_grading_time
+        self.is_staff = is_staff
+        self.is_first_of_day = is_first_of_day
+
+    @property
+    def is_priority(self) -> bool:
+        return self.is_staff or self.is_first_of_day
+
+    def __repr__(self) -> str:
+        return f'PendingSubmission({self.pk}, project_pk={self.project_pk})'
+
+
+class InFlightUsage:
+    """
+    The grading resources currently used by each project and course.
+
+    project_costs: (project pk -> the sum of the estimated grading
+        times of that project's in-flight submissions)
+    course_counts: (course pk -> the number of that course's in-flight
+        submissions)
+    """
+    def __init__(self, project_costs: Optional[Mapping[int, float]] = None,
+                 course_counts: Optional[Mapping[int, int]] = None):
+        self.project_costs: Dict[int, float] = defaultdict(float, project_costs or {})
+        self.course_counts: Dict[int, int] = defaultdict(int, course_counts or {})
+
+    @property
+    def num_in_flight(self) -> int:
+        return sum(self.course_counts.values())
+
+    def add(self, submission: PendingSubmission) -> None:
+        self.project_costs[submission.project_pk] += _cost(submission)
+        self.course_counts[submission.course_pk] += 1
+
+
+class FairShareScheduler:
+    """
+    Decides which pending submissions should be queued for grading and
+    in what order.
+
+    Projects get a weighted fair share of the grading workers: the next
+    submission to be queued comes from the project whose in-flight
+    submissions use the least estimated grading time relative to its
+    weight. Within a project, submissions are queued oldest first.
+
+    To keep any submission from starving, each second a submission has
+    spent waiting offsets aging_rate seconds of its project's usage.
+    Staff submissions and a group's first submission of the day get an
+    extra priority_boost seconds.
+
+    max_in_flight limits the total number of in-flight submissions, and
+    course_quota limits the number of in-flight submissions per course.
+    None means no limit.
+    """
+    def __init__(self, *,
+                 max_in_flight: Optional[int] = None,
+                 course_quota: Optional[int] = None,
+                 project_weights: Optional[Mapping[int, float]] = None,
+                 priority_boost: float = 0,
+                 aging_rate: float = 1):
+        self.max_in_flight = max_in_flight
+        self.course_quota = course_quota
+        self.project_weights = project_weights if project_weights is not None else {}
+        self.priority_boost = priority_boost
+        self.aging_rate = aging_rate
+
+    def schedule(self, pending: Iterable[PendingSubmission],
+                 usage: InFlightUsage,
+                 now: datetime.datetime) -> List[PendingSubmission]:
+        """
+        Returns the submissions in pending that should be queued now,
+        in the order they should be queued. usage is updated to include
+        the returned submissions.
+        """
+        queues_by_project: Dict[int, List[PendingSubmission]] = defaultdict(list)
+        for submission in sorted(pending, key=lambda sub: (sub.timestamp, sub.pk)):
+            queues_by_project[submission.project_pk].append(submission)
+
+        result = []
+        while queues_by_project:
+            if (self.max_in_flight is not None
+                    and usage.num_in_flight >= self.max_in_flight):
+                break
+
+            candidates = [
+                queue[0] for queue in queues_by_project.values()
+                if (self.course_quota is None
+                    or usage.course_counts[queue[0].course_pk] < self.course_quota)
+            ]
+            if not candidates:
+                break
+
+            next_submission = min(
+                candidates,
+                key=lambda sub: (self._score(sub, usage, now), sub.timestamp, sub.pk))
+            result.append(next_submission)
+            usage.add(next_submission)
+
+            project_queue = queues_by_project[next_submission.project_pk]
+            project_queue.pop(0)
+            if not project_queue:
+                del queues_by_project[next_submission.project_pk]
+
+        return result
+
+    def _score(self, submission: PendingSubmission, usage: InFlightUsage,
+               now: datetime.datetime) -> float:
+        weight = self.project_weights.get(submission.project_pk, 1)
+        wait_time = max((now - submission.timestamp).total_seconds(), 0)
+        score = usage.project_costs[submission.project_pk] / weight
+        score -= self.aging_rate * wait_time
+        if submission.is_priority:
+            score -= self.priority_boost
+
+        return score
+
+
+def _cost(submission: PendingSubmission) -> float:
+    # Projects with no tests still take up a worker for a moment.
+    return max(submission.estimated_grading_time, 1)
+
+
+def get_scheduler() -> FairShareScheduler:
+    return FairShareScheduler(
+        max_in_flight=settings.GRADING_MAX_SUBMISSIONS_IN_FLIGHT or None,
+        course_quota=settings.GRADING_COURSE_MAX_SUBMISSIONS_IN_FLIGHT or None,
+        project_weights=settings.GRADING_PROJECT_WEIGHTS,
+        priority_boost=settings.GRADING_PRIORITY_BOOST,
+        aging_rate=settings.GRADING_AGING_RATE,
+    )
+
+
+def lock_scheduler() -> None:
+    """
+    Prevents other scheduling passes from running until the current
+    transaction ends, so that concurrent passes don't exceed
+    the in-flight limits.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [_SCHEDULER_LOCK_ID])
+
+
+# An arbitrary constant that identifies the scheduler's advisory lock.
+_SCHEDULER_LOCK_ID = 4137
+
+
+def load_pending_submissions(
+    get_estimated_grading_time: Callable[[int], int]
+) -> List[PendingSubmission]:
+    """
+    Loads all received submissions as PendingSubmissions.
+    """
+    submissions = list(
+        ag_models.Submission.objects.filter(
+            status=ag_models.Submission.GradingStatus.received
+        ).select_related('project').defer(
+            'denormalized_ag_test_results', 'compact_ag_test_results')
+    )
+    if not submissions:
+        return []
+
+    staff = _load_staff_usernames_by_course({sub.project.course_id for sub in submissions})
+    first_of_day_pks = _get_first_of_day_submission_pks(submissions)
+
+    return [
+        PendingSubmission(
+            submission.pk,
+            project_pk=submission.project_id,
+            course_pk=submission.project.course_id,
+            timestamp=submission.timestamp,
+            estimated_grading_time=get_estimated_grading_time(submission.project_id),
+            is_staff=submission.submitter in staff[submission.project.course_id],
+            is_first_of_day=submission.pk in first_of_day_pks,
+        )
+        for submission in submissions
+    ]
+
+
+def load_in_flight_usage(get_estimated_grading_time: Callable[[int], int]) -> InFlightUsage:
+    usage = InFlightUsage()
+    counts = ag_models.Submission.objects.filter(
+        status__in=IN_FLIGHT_STATUSES
+    ).values_list('project_id', 'project__course_id').annotate(num_submissions=Count('pk'))
+    for project_pk, course_pk, num_submissions in counts:
+        cost = max(get_estimated_grading_time(project_pk), 1)
+        usage.project_costs[project_pk] += cost * num_submissions
+        usage.course_counts[course_pk] += num_submissions
+
+    return usage
+
+
+def _load_staff_usernames_by_course(course_pks: Iterable[int]) -> Dict[int, Set[str]]:
+    result: Dict[int, Set[str]] = defaultdict(set)
+    for through_model in ag_models.Course.admins.through, ag_models.Course.staff.through:
+        rows = through_model.objects.filter(
+            course__in=course_pks
+        ).values_list('course_id', 'user__username')
+        for course_pk, username in rows:
+            result[course_pk].add(username)
+
+    return result
+
+
+def _get_first_of_day_submission_pks(
+    submissions: Sequence[ag_models.Submission]
+) -> Set[int]:
+    """
+    Returns the pks of the submissions in "submissions" that are their
+    group's first submission in the 24 hour period (as defined by
+    the project's submission limit reset time) that they were made in.
+    """
+    period_starts = {}
+    for submission in submissions:
+        project = submission.project
+        period_starts[submission.pk] = core_ut.get_24_hour_period(
+            project.submission_limit_reset_time,
+            submission.timestamp.astimezone(
+                zoneinfo.ZoneInfo(project.submission_limit_reset_timezone))  # type: ignore
+        )[0]
+
+    earlier_submissions: Dict[int, List[Tuple[int, datetime.datetime]]] = defaultdict(list)
+    rows = ag_models.Submission.objects.filter(
+        group__in={submission.group_id for submission in submissions},
+        timestamp__gte=min(period_starts.values()),
+    ).values_list('group_id', 'pk', 'timestamp')
+    for group_pk, pk, timestamp in rows:
+        earlier_submissions[group_pk].append((pk, timestamp))
+
+    return {
+        submission.pk for submission in submissions
+        if not any(
+            period_starts[submission.pk] <= timestamp < submission.timestamp
+            or (timestamp == submission.timestamp and pk < submission.pk)
+            for pk, timestamp in earlier_submissions[submission.group_id]
+        )
+    }
+
+
+def get_project_queue_metrics(
+    project_pks: Optional[Iterable[int]] = None
+) -> Dict[int, Dict[str, object]]:
+    """
+    Returns a dictionary of (project pk -> grading queue metrics) for
+    every project that has submissions waiting for or being graded.
+    The metrics for each project are:
+        num_received: The number of submissions waiting to be queued.
+        num_queued: The number of submissions waiting for a worker.
+        num_being_graded: The number of submissions being graded.
+        max_wait_time: The number of seconds the oldest received or
+            queued submission has been waiting, or None if no
+            submissions are waiting.
+    """
+    waiting_statuses = (
+        ag_models.Submission.GradingStatus.received,
+        ag_models.Submission.GradingStatus.queued,
+    )
+    queryset = ag_models.Submission.objects.filter(
+        status__in=waiting_statuses + (ag_models.Submission.GradingStatus.being_graded,))
+    if project_pks is not None:
+        queryset = queryset.filter(project__in=project_pks)
+
+    rows = queryset.order_by().values('project_id').annotate(
+        num_received=Count(
+            'pk', filter=Q(status=ag_models.Submission.GradingStatus.received)),
+        num_queued=Count(
+            'pk', filter=Q(status=ag_models.Submission.GradingStatus.queued)),
+        num_being_graded=Count(
+            'pk', filter=Q(status=ag_models.Submission.GradingStatus.being_graded)),
+        oldest_waiting=Min('timestamp', filter=Q(status__in=waiting_statuses)),
+    )
+
+    now = timezone.now()
+    return {
+        row['project_id']: {
+            'num_received': row['num_received'],
+            'num_queued': row['num_queued'],
+            'num_being_graded': row['num_being_graded'],
+            'max_wait_time': (
+                None if row['oldest_waiting'] is None
+                else (now - row['oldest_waiting']).total_seconds()
+            ),
+        }
+        for row in rows
+    }
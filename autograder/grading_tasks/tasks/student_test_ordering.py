@@ -0,0 +1,65 @@
+"""
+Chooses the order in which a submission's student tests are run
+against each of a mutation test suite's buggy impls (see
+MutationTestSuite.student_test_ordering).
+
+When student tests are run individually, no more tests are run against
+a buggy impl once one of them exposes it. Running the tests that are
+most likely to expose a buggy impl first therefore reduces the number
+of commands run without changing which buggy impls are exposed.
+How likely a test is to expose a buggy impl is estimated from earlier
+results' MutationTestSuiteResult.exposing_tests.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import autograder.core.models as ag_models
+
+from .utils import load_queryset_with_retry
+
+# The maximum number of earlier results (most recent first) that we
+# count exposed buggy impls from.
+_MAX_PREVIOUS_RESULTS = 500
+
+
+def order_student_tests(mutation_test_suite: ag_models.MutationTestSuite,
+                        submission: ag_models.Submission,
+                        student_tests: List[str]) -> Dict[str, List[str]]:
+    """
+    Returns a dictionary that maps each of mutation_test_suite's buggy
+    impl names to student_tests, in the order they should be run
+    against that buggy impl.
+
+    Tests are ranked by how many times they exposed the buggy impl in
+    earlier results, then by how many times they exposed any buggy
+    impl. Ties keep the order of student_tests.
+    """
+    ordering = mutation_test_suite.student_test_ordering
+    if ordering == ag_models.StudentTestOrdering.discovery_order:
+        return {bug: student_tests for bug in mutation_test_suite.buggy_impl_names}
+
+    previous_results = ag_models.MutationTestSuiteResult.objects.filter(
+        mutation_test_suite=mutation_test_suite
+    ).exclude(submission=submission)
+    if ordering == ag_models.StudentTestOrdering.group_history:
+        previous_results = previous_results.filter(submission__group=submission.group_id)
+
+    previous_exposing_tests = load_queryset_with_retry(
+        previous_results.order_by('-pk').values_list(
+            'exposing_tests', flat=True)[:_MAX_PREVIOUS_RESULTS])
+
+    num_times_exposed_bug: Dict[str, Counter[str]] = defaultdict(Counter)
+    num_bugs_exposed: Counter[str] = Counter()
+    for exposing_tests in previous_exposing_tests:
+        for bug, test in exposing_tests.items():
+            num_times_exposed_bug[bug][test] += 1
+            num_bugs_exposed[test] += 1
+
+    # sorted() is stable, so ties keep the order of student_tests.
+    return {
+        bug: sorted(
+            student_tests,
+            key=lambda test: (-num_times_exposed_bug[bug][test], -num_bugs_exposed[test]))
+        for bug in mutation_test_suite.buggy_impl_names
+    }
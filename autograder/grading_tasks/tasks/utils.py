@@ -26,19 +26,7 @@ def mark_submission_as_error(submission_pk: int, error_msg: str) -> None:
 def add_files_to_sandbox(sandbox: AutograderSandbox,
                          suite: Union[ag_models.AGTestSuite, ag_models.MutationTestSuite],
                          submission: ag_models.Submission) -> None:
-    student_files_to_add = []
-    for student_file in load_queryset_with_retry(suite.student_files_needed.all()):
-        matching_files = fnmatch.filter(submission.submitted_filenames,
-                                        student_file.pattern)
-
-        @retry_should_recover
-        def _get_submission_dir():
-            return core_ut.get_submission_dir(submission)
-
-        student_files_to_add += [
-            os.path.join(_get_submission_dir(), filename)
-            for filename in matching_files]
-
+    student_files_to_add = get_student_files_to_add(suite, submission)
     if student_files_to_add:
         sandbox.add_files(*student_files_to_add)
 
@@ -54,6 +42,30 @@ def add_files_to_sandbox(sandbox: AutograderSandbox,
         sandbox.add_files(*project_files_to_add, **owner_and_read_only)
 
 
+def get_student_files_to_add(
+    suite: Union[ag_models.AGTestSuite, ag_models.MutationTestSuite],
+    submission: ag_models.Submission
+) -> List[str]:
+    """
+    Returns the absolute paths of the files in submission that match
+    one of suite's student_files_needed.
+    """
+    student_files_to_add = []
+    for student_file in load_queryset_with_retry(suite.student_files_needed.all()):
+        matching_files = fnmatch.filter(submission.submitted_filenames,
+                                        student_file.pattern)
+
+        @retry_should_recover
+        def _get_submission_dir():
+            return core_ut.get_submission_dir(submission)
+
+        student_files_to_add += [
+            os.path.join(_get_submission_dir(), filename)
+            for filename in matching_files]
+
+    return student_files_to_add
+
+
 def run_ag_test_command(cmd: ag_models.AGTestCommand,
                         sandbox: AutograderSandbox,
                         ag_test_suite_result: ag_models.AGTestSuiteResult) -> CompletedCommand:
@@ -0,0 +1,110 @@
+from typing import Callable
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.grading_tasks.tasks.ag_test_fingerprints import (
+    AGTestFingerprinter, get_evaluation_fingerprint)
+from autograder.utils.testing import UnitTestBase
+
+
+class AGTestFingerprintsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        self.instructor_file = obj_build.make_instructor_file(self.project)
+        self.expected_output_file = obj_build.make_instructor_file(self.project)
+        self.ag_test_suite = obj_build.make_ag_test_suite(
+            self.project, instructor_files_needed=[self.instructor_file])
+        self.ag_test_cmd = obj_build.make_full_ag_test_command(
+            obj_build.make_ag_test_case(self.ag_test_suite),
+            stdin_source=ag_models.StdinSource.text,
+            stdin_text='spam',
+            expected_stdout_source=ag_models.ExpectedOutputSource.instructor_file,
+            expected_stdout_instructor_file=self.expected_output_file,
+        )
+
+    def test_fingerprints_unchanged(self) -> None:
+        self.assertEqual(
+            AGTestFingerprinter(self.ag_test_suite).get_fingerprints(self.ag_test_cmd),
+            AGTestFingerprinter(self.ag_test_suite).get_fingerprints(self.ag_test_cmd))
+
+    def test_command_changed(self) -> None:
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_cmd.validate_and_update(cmd='echo egg'))
+
+    def test_stdin_changed(self) -> None:
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_cmd.validate_and_update(stdin_text='egg'))
+
+    def test_resource_limits_changed(self) -> None:
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_cmd.validate_and_update(time_limit=3))
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_cmd.validate_and_update(use_virtual_memory_limit=True))
+
+    def test_instructor_file_contents_changed(self) -> None:
+        def _update_instructor_file() -> None:
+            with open(self.instructor_file.abspath, 'w') as f:
+                f.write('new contents')
+
+        self._assert_only_execution_fingerprint_changed(_update_instructor_file)
+
+    def test_suite_settings_changed(self) -> None:
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_suite.validate_and_update(setup_suite_cmd='make'))
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_suite.validate_and_update(
+                sandbox_docker_image=obj_build.make_sandbox_docker_image(self.project.course)))
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_suite.validate_and_update(
+                student_files_needed=[obj_build.make_expected_student_file(self.project)]))
+
+    def test_docker_image_updated(self) -> None:
+        self._assert_only_execution_fingerprint_changed(
+            lambda: self.ag_test_suite.sandbox_docker_image.save())
+
+    def test_expected_output_file_contents_changed(self) -> None:
+        def _update_expected_output() -> None:
+            with open(self.expected_output_file.abspath, 'w') as f:
+                f.write('new expected output')
+
+        self._assert_only_evaluation_fingerprint_changed(_update_expected_output)
+
+    def test_expected_output_settings_changed(self) -> None:
+        self._assert_only_evaluation_fingerprint_changed(
+            lambda: self.ag_test_cmd.validate_and_update(expected_stderr_text='egg'))
+        self._assert_only_evaluation_fingerprint_changed(
+            lambda: self.ag_test_cmd.validate_and_update(
+                expected_return_code=ag_models.ExpectedReturnCode.nonzero))
+        self._assert_only_evaluation_fingerprint_changed(
+            lambda: self.ag_test_cmd.validate_and_update(ignore_case=True))
+
+    def test_points_changed_fingerprints_unchanged(self) -> None:
+        original = AGTestFingerprinter(self.ag_test_suite).get_fingerprints(self.ag_test_cmd)
+        self.ag_test_cmd.validate_and_update(points_for_correct_stdout=10)
+        self.assertEqual(
+            original, AGTestFingerprinter(self.ag_test_suite).get_fingerprints(self.ag_test_cmd))
+
+    def _assert_only_execution_fingerprint_changed(self, update: Callable[[], object]) -> None:
+        original_execution = AGTestFingerprinter(
+            self.ag_test_suite).get_execution_fingerprint(self.ag_test_cmd)
+        original_evaluation = get_evaluation_fingerprint(self.ag_test_cmd)
+
+        update()
+
+        self.assertNotEqual(
+            original_execution,
+            AGTestFingerprinter(self.ag_test_suite).get_execution_fingerprint(self.ag_test_cmd))
+        self.assertEqual(original_evaluation, get_evaluation_fingerprint(self.ag_test_cmd))
+
+    def _assert_only_evaluation_fingerprint_changed(self, update: Callable[[], object]) -> None:
+        original_execution = AGTestFingerprinter(
+            self.ag_test_suite).get_execution_fingerprint(self.ag_test_cmd)
+        original_evaluation = get_evaluation_fingerprint(self.ag_test_cmd)
+
+        update()
+
+        self.assertEqual(
+            original_execution,
+            AGTestFingerprinter(self.ag_test_suite).get_execution_fingerprint(self.ag_test_cmd))
+        self.assertNotEqual(original_evaluation, get_evaluation_fingerprint(self.ag_test_cmd))
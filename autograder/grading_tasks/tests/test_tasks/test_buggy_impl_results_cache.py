@@ -0,0 +1,143 @@
+import io
+import os
+import tempfile
+
+from autograder_sandbox import CompletedCommand
+
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.grading_tasks.tasks.buggy_impl_results_cache import (
+    BuggyImplResultsCache, clear_buggy_impl_results_cache)
+from autograder.utils.testing import UnitTestBase
+
+
+class BuggyImplResultsCacheTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        self.mutation_suite = obj_build.make_mutation_test_suite(
+            self.project,
+            instructor_files_needed=[obj_build.make_instructor_file(self.project)],
+            buggy_impl_names=['bug1'],
+        )
+
+        self.student_files_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.student_files_dir.cleanup)
+        self.student_file_path = os.path.join(self.student_files_dir.name, 'student_tests.cpp')
+        with open(self.student_file_path, 'w') as f:
+            f.write('spam')
+
+        self.cmd_str = 'echo bug1 test1'
+
+    def test_cached_result_reused(self) -> None:
+        run_result = self._make_run_result(return_code=1)
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, run_result)
+
+        # The run result's output should still be readable.
+        self.assertEqual(b'stdout', run_result.stdout.read())
+        self.assertEqual(b'stderr', run_result.stderr.read())
+
+        cached = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).get(
+            self.cmd_str)
+        self.assertIsNotNone(cached)
+        self.assertEqual(1, cached.return_code)
+        self.assertEqual(b'stdout', cached.stdout.read())
+        self.assertEqual(b'stderr', cached.stderr.read())
+        self.assertFalse(cached.timed_out)
+        self.assertFalse(cached.stdout_truncated)
+        self.assertTrue(cached.stderr_truncated)
+
+    def test_no_cached_result(self) -> None:
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_different_cmd_str_not_reused(self) -> None:
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        results_cache.add(self.cmd_str, self._make_run_result())
+        self.assertIsNone(results_cache.get('echo bug1 test2'))
+
+    def test_different_student_file_contents_not_reused(self) -> None:
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, self._make_run_result())
+
+        with open(self.student_file_path, 'w') as f:
+            f.write('egg')
+
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_different_instructor_file_contents_not_reused(self) -> None:
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, self._make_run_result())
+
+        instructor_file = self.mutation_suite.instructor_files_needed.first()
+        with open(instructor_file.abspath, 'w') as f:
+            f.write('new contents')
+
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_different_command_limits_not_reused(self) -> None:
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, self._make_run_result())
+
+        self.mutation_suite.validate_and_update(grade_buggy_impl_command={'time_limit': 3})
+
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_different_docker_image_not_reused(self) -> None:
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, self._make_run_result())
+
+        image = obj_build.make_sandbox_docker_image(self.project.course)
+        self.mutation_suite.validate_and_update(sandbox_docker_image=image)
+
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_docker_image_updated_not_reused(self) -> None:
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, self._make_run_result())
+
+        image = self.mutation_suite.sandbox_docker_image
+        image.save()
+
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_other_suite_results_not_reused(self) -> None:
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, self._make_run_result())
+
+        other_suite = obj_build.make_mutation_test_suite(
+            self.project,
+            instructor_files_needed=list(self.mutation_suite.instructor_files_needed.all()),
+            buggy_impl_names=['bug1'],
+        )
+        results_cache = BuggyImplResultsCache(other_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_timed_out_result_not_cached(self) -> None:
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        results_cache.add(self.cmd_str, self._make_run_result(return_code=None, timed_out=True))
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def test_clear_cache(self) -> None:
+        BuggyImplResultsCache(self.mutation_suite, [self.student_file_path]).add(
+            self.cmd_str, self._make_run_result())
+
+        clear_buggy_impl_results_cache(self.mutation_suite.pk)
+
+        results_cache = BuggyImplResultsCache(self.mutation_suite, [self.student_file_path])
+        self.assertIsNone(results_cache.get(self.cmd_str))
+
+    def _make_run_result(self, return_code=0, timed_out=False) -> CompletedCommand:
+        return CompletedCommand(
+            return_code=return_code,
+            stdout=io.BytesIO(b'stdout'),
+            stderr=io.BytesIO(b'stderr'),
+            timed_out=timed_out,
+            stdout_truncated=False,
+            stderr_truncated=True,
+        )
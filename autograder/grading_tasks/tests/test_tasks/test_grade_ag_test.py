@@ -15,6 +15,8 @@ from autograder.core import constants
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import \
     get_submission_fdbk
 from autograder.grading_tasks import tasks
+from autograder.grading_tasks.tasks.ag_test_fingerprints import (
+    AGTestFingerprinter, get_evaluation_fingerprint)
 from autograder.utils.testing import TransactionUnitTestBase, UnitTestBase
 
 
@@ -660,6 +662,17 @@ class AGTestSuiteRerunTestCase(UnitTestBase):
         self.assertIsNone(suite_result.setup_return_code)
         self.assertFalse(suite_result.setup_timed_out)
 
+    def test_input_fingerprints_recorded(self, *args) -> None:
+        tasks.grade_ag_test_suite_impl(self.ag_test_suite, self.submission, self.submission.group)
+
+        fingerprinter = AGTestFingerprinter(self.ag_test_suite)
+        for ag_test_cmd in self.ag_test_cmd_1, self.ag_test_cmd_2:
+            result = ag_test_cmd.agtestcommandresult_set.get()
+            self.assertEqual(fingerprinter.get_execution_fingerprint(ag_test_cmd),
+                             result.execution_fingerprint)
+            self.assertEqual(get_evaluation_fingerprint(ag_test_cmd),
+                             result.evaluation_fingerprint)
+
 
 @mock.patch('autograder.utils.retry.sleep')
 class NoRetryOnObjectNotFoundTestCase(TransactionUnitTestBase):
@@ -858,3 +871,64 @@ class GradeAGTestSuiteCallbacksTestCase(TransactionUnitTestBase):
         case_result = call2.args[0]
         self.assertEqual(ag_test_case2, case_result.ag_test_case)
         self.assertEqual(self.submission, case_result.ag_test_suite_result.submission)
+
+
+@tag('slow', 'sandbox')
+@mock.patch('autograder.utils.retry.sleep')
+class ParallelAGTestCasesTestCase(TransactionUnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.submission = obj_build.make_submission()
+        self.project = self.submission.group.project
+        self.ag_test_suite = obj_build.make_ag_test_suite(
+            self.project, max_parallel_test_cases=4)
+
+        self.ag_test_cases = []
+        for i in range(6):
+            ag_test_case = obj_build.make_ag_test_case(self.ag_test_suite)
+            # Make earlier tests take longer so that they finish last.
+            ag_models.AGTestCommand.objects.validate_and_create(
+                ag_test_case=ag_test_case,
+                name='cmd',
+                cmd=f'sleep {(6 - i) * 0.25}; echo {i}',
+                expected_stdout_source=ag_models.ExpectedOutputSource.text,
+                expected_stdout_text=f'{i}\n',
+            )
+            self.ag_test_cases.append(ag_test_case)
+
+        self.test_case_finished_callback = mock.Mock()
+
+    def test_results_recorded_and_callbacks_called_in_order(self, *args) -> None:
+        tasks.grade_ag_test_suite_impl(
+            self.ag_test_suite,
+            self.submission,
+            self.submission.group,
+            on_test_case_finished=self.test_case_finished_callback
+        )
+
+        self.assertEqual(
+            len(self.ag_test_cases), self.test_case_finished_callback.call_count)
+        for ag_test_case, call in zip(self.ag_test_cases,
+                                      self.test_case_finished_callback.call_args_list):
+            case_result = call.args[0]
+            self.assertEqual(ag_test_case, case_result.ag_test_case)
+
+            cmd_result = case_result.ag_test_command_results.get()
+            self.assertTrue(cmd_result.stdout_correct)
+
+    def test_rerun_subset_of_tests_in_parallel(self, *args) -> None:
+        to_rerun = [self.ag_test_cases[1].pk, self.ag_test_cases[4].pk]
+        tasks.grade_ag_test_suite_impl(
+            self.ag_test_suite,
+            self.submission,
+            self.submission.group,
+            *to_rerun,
+            on_test_case_finished=self.test_case_finished_callback
+        )
+
+        self.assertSequenceEqual(
+            to_rerun,
+            [call.args[0].ag_test_case.pk
+             for call in self.test_case_finished_callback.call_args_list]
+        )
+        self.assertEqual(2, ag_models.AGTestCommandResult.objects.count())
@@ -1,13 +1,16 @@
 import os
+import threading
+from typing import IO, List
 from unittest import mock
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import tag
+from django.test import SimpleTestCase, tag
 
 import autograder.core.models as ag_models
 import autograder.utils.testing.model_obj_builders as obj_build
 from autograder.core import constants
 from autograder.grading_tasks import tasks
+from autograder.grading_tasks.tasks.grade_mutation_test_suite import _run_with_ordered_output
 from autograder.utils.testing import TransactionUnitTestBase, UnitTestBase
 from autograder_sandbox.autograder_sandbox import AutograderSandbox, CompletedCommand
 import tempfile
@@ -311,6 +314,205 @@ class MutationTestSuiteGradingEdgeCaseTestCase(UnitTestBase):
         self.assertSequenceEqual(test_names.split(), result.student_tests)
         self.assertSequenceEqual([], result.invalid_tests)
 
+    def test_validity_checks_run_in_parallel(self, *args) -> None:
+        tests = ['test1', 'test2', 'test3', 'test4']
+        # Later tests finish first, so the output would be out of order
+        # if we recorded it as each command finished.
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='parallel',
+            project=self.project,
+            get_student_test_names_command={'cmd': 'echo {}'.format(' '.join(tests))},
+            student_test_validity_check_command={
+                'cmd': ('test=${student_test_name}; sleep 0.$((5 - ${test#test})); '
+                        'echo ${student_test_name}; '
+                        'echo err ${student_test_name} >&2; '
+                        'case ${student_test_name} in '
+                        '  test2) exit 1;; '
+                        '  test3) sleep 3;; '
+                        'esac'),
+                'time_limit': 2,
+            },
+            max_parallel_validity_checks=4,
+        )
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=mutation_suite)
+        self.assertSequenceEqual(tests, result.student_tests)
+        self.assertSequenceEqual(['test2', 'test3'], result.invalid_tests)
+        self.assertSequenceEqual(['test3'], result.timed_out_tests)
+
+        expected_stdout = ''
+        expected_stderr = ''
+        for test in tests:
+            header = f'\n------ {test} ------\n'
+            expected_stdout += header + f'{test}\n'
+            expected_stderr += header + f'err {test}\n'
+
+        with open(result.validity_check_stdout_filename) as f:
+            self.assertEqual(expected_stdout, f.read())
+        with open(result.validity_check_stderr_filename) as f:
+            self.assertEqual(expected_stderr, f.read())
+
+    def test_buggy_impls_graded_in_parallel(self, *args) -> None:
+        tests = ['test1', 'test2', 'test3']
+        bugs = ['bug1', 'bug2', 'bug3', 'bug4']
+        # Later bugs finish first, so the output would be out of order
+        # if we recorded it as each command finished.
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='parallel',
+            project=self.project,
+            buggy_impl_names=bugs,
+            get_student_test_names_command={'cmd': 'echo {}'.format(' '.join(tests))},
+            grade_buggy_impl_command={
+                'cmd': ('bug=${buggy_impl_name}; sleep 0.$((5 - ${bug#bug})); '
+                        'echo ${buggy_impl_name} ${student_test_name}; '
+                        'echo ${student_test_name} >&2; '
+                        'case ${buggy_impl_name}-${student_test_name} in '
+                        '  bug1-test2|bug3-test1) exit 1;; '
+                        'esac')
+            },
+            max_parallel_buggy_impls=4,
+        )
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=mutation_suite)
+        self.assertSequenceEqual(['bug1', 'bug3'], result.bugs_exposed)
+
+        # Testing stops for each bug once a test exposes it.
+        tests_run = {
+            'bug1': ['test1', 'test2'],
+            'bug2': tests,
+            'bug3': ['test1'],
+            'bug4': tests,
+        }
+        expected_stdout = ''
+        expected_stderr = ''
+        for bug in bugs:
+            for test in tests_run[bug]:
+                header = f'\n----- Bug "{bug}" with Test "{test}" -----\n'
+                expected_stdout += header + f'{bug} {test}\n'
+                expected_stderr += header + f'{test}\n'
+
+        with open(result.grade_buggy_impls_stdout_filename) as f:
+            self.assertEqual(expected_stdout, f.read())
+        with open(result.grade_buggy_impls_stderr_filename) as f:
+            self.assertEqual(expected_stderr, f.read())
+
+    def test_buggy_impls_graded_in_parallel_tests_run_in_batch(self, *args) -> None:
+        bugs = ['bug1', 'bug2', 'bug3', 'bug4']
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='parallel',
+            project=self.project,
+            buggy_impl_names=bugs,
+            get_student_test_names_command={'cmd': 'echo test1 test2'},
+            grade_buggy_impl_command={
+                'cmd': ('bug=${buggy_impl_name}; sleep 0.$((5 - ${bug#bug})); '
+                        'echo ${buggy_impl_name}; '
+                        'echo ${all_valid_test_names} >&2; '
+                        '[ ${buggy_impl_name} != bug2 ]')
+            },
+            max_parallel_buggy_impls=4,
+        )
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=mutation_suite)
+        self.assertSequenceEqual(['bug2'], result.bugs_exposed)
+
+        expected_stdout = ''
+        expected_stderr = ''
+        for bug in bugs:
+            header = f'\n----- Bug "{bug}" with all_valid_tests -----\n'
+            expected_stdout += header + f'{bug}\n'
+            expected_stderr += header + 'test1 test2\n'
+
+        with open(result.grade_buggy_impls_stdout_filename) as f:
+            self.assertEqual(expected_stdout, f.read())
+        with open(result.grade_buggy_impls_stderr_filename) as f:
+            self.assertEqual(expected_stderr, f.read())
+
+    def test_buggy_impl_results_reused_for_identical_submission(self, *args) -> None:
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='cached',
+            project=self.project,
+            buggy_impl_names=['bug1', 'bug2'],
+            get_student_test_names_command={'cmd': 'echo test1 test2'},
+            grade_buggy_impl_command={
+                'cmd': ('echo ${buggy_impl_name} ${student_test_name}; '
+                        '[ ${buggy_impl_name}-${student_test_name} != bug2-test2 ]')
+            },
+            cache_buggy_impl_results=True,
+        )
+        other_submission = obj_build.make_submission(
+            group=obj_build.make_group(project=self.project))
+
+        run_ag_command = tasks.grade_mutation_test_suite.run_ag_command
+        with mock.patch('autograder.grading_tasks.tasks.grade_mutation_test_suite.run_ag_command',
+                        wraps=run_ag_command) as mock_run_ag_command:
+            tasks.grade_submission_task(self.submission.pk)
+            num_commands_first_submission = mock_run_ag_command.call_count
+
+            mock_run_ag_command.reset_mock()
+            tasks.grade_submission_task(other_submission.pk)
+            num_commands_second_submission = mock_run_ag_command.call_count
+
+        # get_student_test_names_command, 2 validity checks, and 4 buggy
+        # impl runs (bug2 is only exposed by the last test).
+        self.assertEqual(7, num_commands_first_submission)
+        self.assertEqual(3, num_commands_second_submission)
+
+        first_result, second_result = [
+            ag_models.MutationTestSuiteResult.objects.get(
+                mutation_test_suite=mutation_suite, submission=submission)
+            for submission in (self.submission, other_submission)
+        ]
+        self.assertSequenceEqual(['bug2'], first_result.bugs_exposed)
+        self.assertSequenceEqual(first_result.bugs_exposed, second_result.bugs_exposed)
+        with open(first_result.grade_buggy_impls_stdout_filename) as first, \
+                open(second_result.grade_buggy_impls_stdout_filename) as second:
+            self.assertEqual(first.read(), second.read())
+
+        tasks.clear_buggy_impl_results_cache(mutation_suite.pk)
+        with mock.patch('autograder.grading_tasks.tasks.grade_mutation_test_suite.run_ag_command',
+                        wraps=run_ag_command) as mock_run_ag_command:
+            tasks.grade_submission_task(other_submission.pk)
+            self.assertEqual(7, mock_run_ag_command.call_count)
+
+    def test_group_history_ordering_runs_killer_tests_first(self, *args) -> None:
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='ordered',
+            project=self.project,
+            buggy_impl_names=['bug1', 'bug2'],
+            get_student_test_names_command={'cmd': 'echo test1 test2 test3 test4'},
+            grade_buggy_impl_command={
+                'cmd': 'echo ${buggy_impl_name}; [ ${student_test_name} != test4 ]'
+            },
+            student_test_ordering=ag_models.StudentTestOrdering.group_history,
+        )
+        # UnitTestBase disables logging, so we check the logged
+        # number of commands run with a mock logger.
+        logger_path = 'autograder.grading_tasks.tasks.grade_mutation_test_suite.logger'
+        with mock.patch(logger_path) as mock_logger:
+            tasks.grade_submission_task(self.submission.pk)
+        self.assertIn('8 grade_buggy_impl_command runs', mock_logger.info.call_args[0][0])
+
+        first_result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=mutation_suite, submission=self.submission)
+        self.assertSequenceEqual(['bug1', 'bug2'], first_result.bugs_exposed)
+        self.assertEqual({'bug1': 'test4', 'bug2': 'test4'}, first_result.exposing_tests)
+
+        next_submission = obj_build.make_submission(group=self.submission.group)
+        with mock.patch(logger_path) as mock_logger:
+            tasks.grade_submission_task(next_submission.pk)
+        self.assertIn('2 grade_buggy_impl_command runs', mock_logger.info.call_args[0][0])
+
+        next_result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=mutation_suite, submission=next_submission)
+        self.assertSequenceEqual(first_result.bugs_exposed, next_result.bugs_exposed)
+        self.assertEqual(first_result.exposing_tests, next_result.exposing_tests)
+
     def test_get_test_names_stdout_and_stderr(self, *args):
         test_names = 'test1 test2 test3'
         stderr = 'stderry'
@@ -531,3 +733,39 @@ class NoRetryOnObjectNotFoundTestCase(TransactionUnitTestBase):
         tasks.grade_deferred_mutation_test_suite(suite.pk, submission.pk)
         tasks.grade_mutation_test_suite_impl(suite, submission)
         sleep_mock.assert_not_called()
+
+
+class RunWithOrderedOutputTestCase(SimpleTestCase):
+    def test_output_in_order_of_names(self) -> None:
+        def _run(name: str, stdout: IO[bytes], stderr: IO[bytes]) -> str:
+            stdout.write(f'{name} out\n'.encode())
+            stderr.write(f'{name} err\n'.encode())
+            return name.upper()
+
+        names = ['a', 'b', 'c', 'd']
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            results = _run_with_ordered_output(names, _run, stdout, stderr, max_workers=3)
+
+            self.assertEqual(['A', 'B', 'C', 'D'], results)
+            stdout.seek(0)
+            stderr.seek(0)
+            self.assertEqual(b'a out\nb out\nc out\nd out\n', stdout.read())
+            self.assertEqual(b'a err\nb err\nc err\nd err\n', stderr.read())
+
+    def test_all_buffers_closed_when_call_raises(self) -> None:
+        buffers: List[IO[bytes]] = []
+        lock = threading.Lock()
+
+        def _run(name: str, stdout: IO[bytes], stderr: IO[bytes]) -> None:
+            with lock:
+                buffers.extend([stdout, stderr])
+            if name == 'a':
+                raise ValueError
+
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            with self.assertRaises(ValueError):
+                _run_with_ordered_output(['a', 'b', 'c'], _run, stdout, stderr, max_workers=2)
+
+        self.assertEqual(6, len(buffers))
+        for buffer in buffers:
+            self.assertTrue(buffer.closed)
@@ -2,7 +2,7 @@ from unittest import mock
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import tag
+from django.test import override_settings, tag
 
 import autograder.core.models as ag_models
 import autograder.utils.testing.model_obj_builders as obj_build
@@ -546,7 +546,7 @@ class DenormalizedResultsUpdateTestCase(UnitTestBase):
     class _MockSubmissionGrader(SubmissionGrader):
         """
         Preserves original behavior of SubmissionGrader, but records
-        intermediate values of self.submission for later inspection.
+        intermediate saved values of the submission for later inspection.
         """
         def __init__(self, *args, **kwargs):
             super().__init__(*args, **kwargs)
@@ -554,11 +554,13 @@ class DenormalizedResultsUpdateTestCase(UnitTestBase):
 
         def save_denormalized_ag_test_suite_result(self, *args) -> None:
             super().save_denormalized_ag_test_suite_result(*args)
-            self.denormalized_result_snapshots.append(self.submission)
+            self.denormalized_result_snapshots.append(
+                ag_models.Submission.objects.get(pk=self.submission_pk))
 
-        def save_denormalized_ag_test_case_result(self, *args) -> None:
-            super().save_denormalized_ag_test_case_result(*args)
-            self.denormalized_result_snapshots.append(self.submission)
+        def save_denormalized_ag_test_case_results(self, *args) -> None:
+            super().save_denormalized_ag_test_case_results(*args)
+            self.denormalized_result_snapshots.append(
+                ag_models.Submission.objects.get(pk=self.submission_pk))
 
     def setUp(self):
         super().setUp()
@@ -568,6 +570,7 @@ class DenormalizedResultsUpdateTestCase(UnitTestBase):
 
         self.maxDiff = None
 
+    @override_settings(AG_TEST_RESULT_FLUSH_NUM_CASES=1)
     def test_denormalized_results_updated_after_suite_setup_and_test_case(
         self,
         mock_update_denormed: mock.Mock,
@@ -614,6 +617,76 @@ class DenormalizedResultsUpdateTestCase(UnitTestBase):
         )
         self.assertEqual(final_fdbk.to_dict(), snapshot3_fdbk.to_dict())
 
+    @override_settings(AG_TEST_RESULT_FLUSH_NUM_CASES=2, AG_TEST_RESULT_FLUSH_INTERVAL=600)
+    def test_denormalized_results_updated_once_per_batch_of_test_cases(
+        self,
+        mock_update_denormed: mock.Mock,
+        *args
+    ) -> None:
+        suite = obj_build.make_ag_test_suite(self.project, setup_suite_cmd='true')
+        for i in range(3):
+            obj_build.make_ag_test_case(suite)
+
+        self.submission_grader.grade_submission()
+        # Suite setup, one batch of 2 test cases, then the last test case.
+        self.assertEqual(3, len(self.submission_grader.denormalized_result_snapshots))
+
+        num_case_results = [
+            len(SubmissionResultFeedback(
+                snapshot, FeedbackCategory.max, AGTestPreLoader(self.project)
+            ).ag_test_suite_results[0].ag_test_case_results)
+            for snapshot in self.submission_grader.denormalized_result_snapshots
+        ]
+        self.assertEqual([0, 2, 3], num_case_results)
+
+        mock_update_denormed.assert_not_called()
+        update_denormalized_ag_test_results(self.submission.pk)
+        self.submission.refresh_from_db()
+        final_fdbk = SubmissionResultFeedback(
+            self.submission,
+            FeedbackCategory.max,
+            AGTestPreLoader(self.project)
+        )
+        last_snapshot_fdbk = SubmissionResultFeedback(
+            self.submission_grader.denormalized_result_snapshots[-1],
+            FeedbackCategory.max,
+            AGTestPreLoader(self.project)
+        )
+        self.assertEqual(final_fdbk.to_dict(), last_snapshot_fdbk.to_dict())
+
+    def test_test_case_results_merged_without_rewriting_submission(self, *args) -> None:
+        suite = obj_build.make_ag_test_suite(self.project)
+        suite_result = ag_models.AGTestSuiteResult.objects.validate_and_create(
+            ag_test_suite=suite, submission=self.submission)
+        case_results = [
+            ag_models.AGTestCaseResult.objects.validate_and_create(
+                ag_test_case=obj_build.make_ag_test_case(suite),
+                ag_test_suite_result=suite_result)
+            for _ in range(2)
+        ]
+
+        grader = SubmissionGrader(self.submission.pk)
+        grader._submission = ag_models.Submission.objects.get(pk=self.submission.pk)
+        grader.save_denormalized_ag_test_suite_result(suite_result)
+        grader.save_denormalized_ag_test_case_results(case_results[:1])
+
+        # Other columns changed since the grader loaded the submission
+        # should be left alone.
+        ag_models.Submission.objects.filter(
+            pk=self.submission.pk
+        ).update(status=ag_models.Submission.GradingStatus.removed_from_queue)
+        grader.save_denormalized_ag_test_case_results(case_results[1:])
+
+        self.submission.refresh_from_db()
+        self.assertEqual(
+            ag_models.Submission.GradingStatus.removed_from_queue, self.submission.status)
+        self.assertEqual(
+            {str(case_result.ag_test_case_id) for case_result in case_results},
+            set(self.submission.denormalized_ag_test_results[str(suite.pk)][
+                'ag_test_case_results']))
+        self.assertEqual(grader.submission.denormalized_ag_test_results,
+                         self.submission.denormalized_ag_test_results)
+
     def test_denormalized_results_updated_after_suite_setup_even_if_no_setup(
         self,
         mock_update_denormed: mock.Mock,
@@ -0,0 +1,104 @@
+from unittest import mock
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.ag_test_config_cache import get_test_config_version
+from autograder.core.submission_feedback import (update_denormalized_ag_test_results,
+                                                 update_denormalized_point_totals)
+from autograder.grading_tasks.tasks.point_totals import (
+    schedule_point_totals_update, update_project_point_totals)
+from autograder.utils.testing import UnitTestBase
+
+
+class UpdateProjectPointTotalsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        suite = obj_build.make_ag_test_suite(self.project)
+        self.cmd = obj_build.make_full_ag_test_command(
+            obj_build.make_ag_test_case(suite), set_arbitrary_points=True)
+
+    def test_outdated_totals_updated(self) -> None:
+        outdated = self._make_submission(
+            status=ag_models.Submission.GradingStatus.finished_grading)
+        update_denormalized_point_totals(outdated.pk)
+        outdated.refresh_from_db()
+        old_version = outdated.denormalized_point_totals['test_config_version']
+
+        self.cmd.validate_and_update(points_for_correct_stdout=10)
+        self.assertNotEqual(old_version, get_test_config_version(self.project.pk))
+
+        missing = self._make_submission(
+            status=ag_models.Submission.GradingStatus.waiting_for_deferred)
+
+        update_project_point_totals(self.project.pk)
+
+        for submission in outdated, missing:
+            submission.refresh_from_db()
+            self.assertEqual(get_test_config_version(self.project.pk),
+                             submission.denormalized_point_totals['test_config_version'])
+            self.assertEqual(
+                self.cmd.points_for_correct_return_code + 10 + self.cmd.points_for_correct_stderr,
+                submission.denormalized_point_totals[
+                    ag_models.FeedbackCategory.max.value]['total_points'])
+
+    def test_up_to_date_totals_not_updated(self) -> None:
+        submission = self._make_submission(
+            status=ag_models.Submission.GradingStatus.finished_grading)
+        update_denormalized_point_totals(submission.pk)
+        submission.refresh_from_db()
+        up_to_date_totals = submission.denormalized_point_totals
+
+        update_project_point_totals(self.project.pk)
+        submission.refresh_from_db()
+        self.assertEqual(up_to_date_totals, submission.denormalized_point_totals)
+
+        with self.assertNumQueries(1):
+            update_project_point_totals(self.project.pk)
+
+    def test_submissions_still_being_graded_not_updated(self) -> None:
+        submission = self._make_submission(status=ag_models.Submission.GradingStatus.being_graded)
+        update_project_point_totals(self.project.pk)
+        submission.refresh_from_db()
+        self.assertEqual({}, submission.denormalized_point_totals)
+
+    def test_other_project_submissions_not_updated(self) -> None:
+        other_submission = obj_build.make_finished_submission()
+        update_project_point_totals(self.project.pk)
+        other_submission.refresh_from_db()
+        self.assertEqual({}, other_submission.denormalized_point_totals)
+
+    def _make_submission(self, **kwargs) -> ag_models.Submission:
+        submission = obj_build.make_submission(
+            group=obj_build.make_group(project=self.project), **kwargs)
+        obj_build.make_correct_ag_test_command_result(self.cmd, submission=submission)
+        return update_denormalized_ag_test_results(submission.pk)
+
+
+@mock.patch('autograder.grading_tasks.tasks.point_totals.update_project_point_totals.apply_async')
+class SchedulePointTotalsUpdateTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+
+    def test_update_scheduled_once(self, mock_apply_async) -> None:
+        schedule_point_totals_update(self.project.pk)
+        schedule_point_totals_update(self.project.pk)
+        mock_apply_async.assert_called_once()
+        self.assertEqual((self.project.pk,), mock_apply_async.call_args[0][0])
+
+        other_project = obj_build.make_project()
+        schedule_point_totals_update(other_project.pk)
+        self.assertEqual(2, mock_apply_async.call_count)
+
+    def test_update_scheduled_again_after_update_starts(self, mock_apply_async) -> None:
+        schedule_point_totals_update(self.project.pk)
+        update_project_point_totals(self.project.pk)
+        schedule_point_totals_update(self.project.pk)
+        self.assertEqual(2, mock_apply_async.call_count)
+
+    def test_test_config_change_schedules_update(self, mock_apply_async) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            obj_build.make_ag_test_suite(self.project)
+        mock_apply_async.assert_called_once()
+        self.assertEqual((self.project.pk,), mock_apply_async.call_args[0][0])
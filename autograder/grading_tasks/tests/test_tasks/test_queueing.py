@@ -1,16 +1,27 @@
+import datetime
+import time
 from unittest import mock
 
+from django.conf import settings
+from django.db import connection
 from django.urls import reverse
-from django.test import tag
+from django.test import override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 import autograder.core.models as ag_models
+from autograder.core import constants
 import autograder.utils.testing.model_obj_builders as obj_build
-from autograder.utils.testing import TransactionUnitTestBase, sleeper_subtest
+from autograder.utils.testing import TransactionUnitTestBase, UnitTestBase, sleeper_subtest
 
+from autograder.celery import app, detect_queues
 from autograder.grading_tasks import tasks
+from autograder.grading_tasks.tasks.queueing import (ensure_project_queues_registered,
+                                                     get_estimated_grading_time,
+                                                     get_project_pks_to_register)
 
 
 @tag('slow')
@@ -41,3 +52,281 @@ class RaceConditionTestCase(TransactionUnitTestBase):
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
 
         self.assertEqual(ag_models.Submission.GradingStatus.finished_grading, submission.status)
+
+
+@mock.patch('autograder.grading_tasks.tasks.queueing.grade_submission')
+class QueueSubmissionsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+
+    def test_queue_all_received_submissions(self, grade_submission_mock) -> None:
+        received1 = obj_build.make_submission(group=obj_build.make_group(project=self.project))
+        received2 = obj_build.make_submission(group=obj_build.make_group(project=self.project))
+        being_graded = obj_build.make_submission(
+            group=obj_build.make_group(project=self.project),
+            status=ag_models.Submission.GradingStatus.being_graded)
+
+        with CaptureQueriesContext(connection) as queries:
+            tasks.queue_submissions()
+
+        num_updates = len([
+            query for query in queries.captured_queries
+            if query['sql'].lstrip().startswith('UPDATE')
+        ])
+        self.assertEqual(1, num_updates)
+
+        for submission in received1, received2:
+            submission.refresh_from_db()
+            self.assertEqual(ag_models.Submission.GradingStatus.queued, submission.status)
+
+        being_graded.refresh_from_db()
+        self.assertEqual(ag_models.Submission.GradingStatus.being_graded, being_graded.status)
+
+        queue_name = settings.FAST_QUEUE_TMPL.format(self.project.pk)
+        grade_submission_mock.apply_async.assert_has_calls([
+            mock.call([received1.pk], queue=queue_name, connection=mock.ANY),
+            mock.call([received2.pk], queue=queue_name, connection=mock.ANY),
+        ])
+
+    def test_queue_submission_on_commit(self, grade_submission_mock) -> None:
+        group = obj_build.make_group(project=self.project)
+        client = APIClient()
+        client.force_authenticate(group.members.first())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('submissions', kwargs={'pk': group.pk}),
+                                   {'submitted_files': []}, format='multipart')
+            self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+            grade_submission_mock.apply_async.assert_not_called()
+
+        submission = ag_models.Submission.objects.get(pk=response.data['pk'])
+        self.assertEqual(ag_models.Submission.GradingStatus.queued, submission.status)
+        grade_submission_mock.apply_async.assert_called_once_with(
+            [submission.pk], queue=settings.FAST_QUEUE_TMPL.format(self.project.pk),
+            connection=mock.ANY)
+
+    def test_queue_submission_on_commit_broker_error(self, grade_submission_mock) -> None:
+        grade_submission_mock.apply_async.side_effect = Exception('Broker unreachable')
+        group = obj_build.make_group(project=self.project)
+        client = APIClient()
+        client.force_authenticate(group.members.first())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('submissions', kwargs={'pk': group.pk}),
+                                   {'submitted_files': []}, format='multipart')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        # The submission is left for queue_submissions to pick up.
+        submission = ag_models.Submission.objects.get(pk=response.data['pk'])
+        self.assertEqual(ag_models.Submission.GradingStatus.received, submission.status)
+
+        grade_submission_mock.apply_async.side_effect = None
+        tasks.queue_submissions()
+        submission.refresh_from_db()
+        self.assertEqual(ag_models.Submission.GradingStatus.queued, submission.status)
+
+    def test_burst_of_submissions_requests_one_scheduling_pass(
+        self, grade_submission_mock
+    ) -> None:
+        groups = [obj_build.make_group(project=self.project) for _ in range(3)]
+        with mock.patch(
+            'autograder.grading_tasks.tasks.queueing.run_scheduling_pass'
+        ) as run_scheduling_pass_mock:
+            for group in groups:
+                client = APIClient()
+                client.force_authenticate(group.members.first())
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = client.post(reverse('submissions', kwargs={'pk': group.pk}),
+                                           {'submitted_files': []}, format='multipart')
+                self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+            run_scheduling_pass_mock.apply_async.assert_called_once()
+
+        self.assertEqual(3, ag_models.Submission.objects.filter(
+            status=ag_models.Submission.GradingStatus.received).count())
+        grade_submission_mock.apply_async.assert_not_called()
+
+        # Running the requested pass queues all the submissions and
+        # lets later submissions request a new pass.
+        tasks.run_scheduling_pass()
+        self.assertEqual(3, ag_models.Submission.objects.filter(
+            status=ag_models.Submission.GradingStatus.queued).count())
+        with mock.patch(
+            'autograder.grading_tasks.tasks.queueing.run_scheduling_pass'
+        ) as run_scheduling_pass_mock:
+            tasks.request_scheduling_pass()
+            run_scheduling_pass_mock.apply_async.assert_called_once()
+
+    def test_slow_project_submission_sent_to_slow_queue(self, grade_submission_mock) -> None:
+        ag_test_case = obj_build.make_ag_test_case(
+            obj_build.make_ag_test_suite(self.project))
+        # 7 * 90 seconds is more than the 10 minute fast queue cutoff.
+        for _ in range(7):
+            obj_build.make_full_ag_test_command(
+                ag_test_case, time_limit=constants.MAX_SUBPROCESS_TIMEOUT)
+        submission = obj_build.make_submission(group=obj_build.make_group(project=self.project))
+
+        tasks.queue_submissions()
+        grade_submission_mock.apply_async.assert_called_once_with(
+            [submission.pk], queue=settings.SUBMISSION_QUEUE_TMPL.format(self.project.pk),
+            connection=mock.ANY)
+
+
+class EstimatedGradingTimeTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        self.suite = obj_build.make_ag_test_suite(self.project)
+        self.ag_test_case = obj_build.make_ag_test_case(self.suite)
+        self.cmd = obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=5)
+        obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=7)
+
+        deferred_suite = obj_build.make_ag_test_suite(self.project, deferred=True)
+        obj_build.make_full_ag_test_command(
+            obj_build.make_ag_test_case(deferred_suite), time_limit=9)
+
+    def test_estimate_cached(self) -> None:
+        self.assertEqual(12, get_estimated_grading_time(self.project.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(12, get_estimated_grading_time(self.project.pk))
+
+    def test_cache_cleared_when_command_changed(self) -> None:
+        self.assertEqual(12, get_estimated_grading_time(self.project.pk))
+        self.cmd.validate_and_update(time_limit=8)
+        self.assertEqual(15, get_estimated_grading_time(self.project.pk))
+
+        obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=1)
+        self.assertEqual(16, get_estimated_grading_time(self.project.pk))
+
+        self.cmd.delete()
+        self.assertEqual(8, get_estimated_grading_time(self.project.pk))
+
+    def test_cache_cleared_when_suite_changed(self) -> None:
+        self.assertEqual(12, get_estimated_grading_time(self.project.pk))
+        self.suite.validate_and_update(deferred=True)
+        self.assertEqual(0, get_estimated_grading_time(self.project.pk))
+
+
+@mock.patch.object(app.control, 'add_consumer')
+class ProjectQueueRegistrationTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.course = obj_build.make_course()
+        self.inactive_project = obj_build.make_project(self.course)
+        self.open_project = obj_build.make_project(self.course, visible_to_students=True)
+        self.closed_project = obj_build.make_project(
+            self.course, visible_to_students=True,
+            closing_time=timezone.now() - datetime.timedelta(days=1))
+
+        self.worker_name = settings.SUBMISSION_WORKER_PREFIX + '@host'
+
+    def test_all_mode_registers_every_project(self, add_consumer_mock) -> None:
+        self.assertCountEqual(
+            [self.inactive_project.pk, self.open_project.pk, self.closed_project.pk],
+            get_project_pks_to_register())
+
+        detect_queues(mock.Mock(hostname=self.worker_name))
+        self.assertEqual(6, add_consumer_mock.call_count)
+
+    @override_settings(PROJECT_QUEUE_REGISTRATION_MODE='active')
+    def test_active_mode_registers_active_projects(self, add_consumer_mock) -> None:
+        self.assertEqual([self.open_project.pk], get_project_pks_to_register())
+
+        detect_queues(mock.Mock(hostname=self.worker_name))
+        add_consumer_mock.assert_has_calls([
+            mock.call(settings.SUBMISSION_QUEUE_TMPL.format(self.open_project.pk),
+                      destination=[self.worker_name]),
+            mock.call(settings.FAST_QUEUE_TMPL.format(self.open_project.pk),
+                      destination=[self.worker_name]),
+        ], any_order=True)
+        self.assertEqual(2, add_consumer_mock.call_count)
+
+    @override_settings(PROJECT_QUEUE_REGISTRATION_MODE='active')
+    def test_project_with_extension_is_active(self, add_consumer_mock) -> None:
+        obj_build.make_group(
+            project=self.closed_project,
+            extended_due_date=timezone.now() + datetime.timedelta(days=1))
+        self.assertCountEqual(
+            [self.open_project.pk, self.closed_project.pk], get_project_pks_to_register())
+
+    @override_settings(PROJECT_QUEUE_REGISTRATION_MODE='active')
+    def test_project_with_submissions_being_graded_is_active(self, add_consumer_mock) -> None:
+        obj_build.make_submission(
+            group=obj_build.make_group(project=self.inactive_project),
+            status=ag_models.Submission.GradingStatus.waiting_for_deferred)
+        obj_build.make_submission(
+            group=obj_build.make_group(project=self.closed_project),
+            status=ag_models.Submission.GradingStatus.finished_grading)
+        self.assertCountEqual(
+            [self.open_project.pk, self.inactive_project.pk], get_project_pks_to_register())
+
+    @override_settings(PROJECT_QUEUE_REGISTRATION_MODE='active')
+    def test_ensure_project_queues_registered_sends_one_request(self, add_consumer_mock) -> None:
+        with mock.patch.object(tasks.register_project_queues, 'apply_async') as apply_async_mock:
+            ensure_project_queues_registered(self.inactive_project.pk)
+            ensure_project_queues_registered(self.inactive_project.pk)
+            apply_async_mock.assert_called_once_with(
+                kwargs={'project_pks': [self.inactive_project.pk]}, queue='small_tasks',
+                connection=mock.ANY)
+
+            # A worker starting clears the record of which projects
+            # have been registered.
+            detect_queues(mock.Mock(hostname=self.worker_name))
+            ensure_project_queues_registered(self.inactive_project.pk)
+            self.assertEqual(2, apply_async_mock.call_count)
+
+    def test_ensure_project_queues_registered_does_nothing_in_all_mode(
+        self, add_consumer_mock
+    ) -> None:
+        with mock.patch.object(tasks.register_project_queues, 'apply_async') as apply_async_mock:
+            ensure_project_queues_registered(self.inactive_project.pk)
+            apply_async_mock.assert_not_called()
+
+    @override_settings(PROJECT_QUEUE_REGISTRATION_MODE='active')
+    @mock.patch('autograder.grading_tasks.tasks.queueing.grade_submission')
+    def test_queueing_submission_registers_project(
+        self, grade_submission_mock, add_consumer_mock
+    ) -> None:
+        obj_build.make_submission(group=obj_build.make_group(project=self.inactive_project))
+        with mock.patch.object(tasks.register_project_queues, 'apply_async') as apply_async_mock:
+            tasks.queue_submissions()
+
+        apply_async_mock.assert_called_once_with(
+            kwargs={'project_pks': [self.inactive_project.pk]}, queue='small_tasks',
+            connection=mock.ANY)
+        grade_submission_mock.apply_async.assert_called_once()
+
+
+@tag('slow', 'benchmark')
+@mock.patch.object(app.control, 'add_consumer')
+class WorkerStartupBenchmarkTestCase(UnitTestBase):
+    """
+    Compares how long it takes a grading worker to register its queues
+    at startup in each registration mode as the number of projects
+    grows. Run with: ./manage.py test --tag benchmark
+    """
+    num_active_projects = 5
+
+    def test_worker_startup_time_vs_num_projects(self, add_consumer_mock) -> None:
+        course = obj_build.make_course()
+        for _ in range(self.num_active_projects):
+            obj_build.make_project(course, visible_to_students=True)
+
+        worker = mock.Mock(hostname=settings.SUBMISSION_WORKER_PREFIX + '@host')
+        num_projects = self.num_active_projects
+        print(f'\n{"projects":>10} {"mode":>8} {"seconds":>10} {"add_consumer calls":>20}')
+        for target_num_projects in [50, 200, 800]:
+            for _ in range(target_num_projects - num_projects):
+                obj_build.make_project(course)
+            num_projects = target_num_projects
+
+            for mode, expected_num_projects in [('all', num_projects),
+                                                ('active', self.num_active_projects)]:
+                add_consumer_mock.reset_mock()
+                with override_settings(PROJECT_QUEUE_REGISTRATION_MODE=mode):
+                    start = time.perf_counter()
+                    detect_queues(worker)
+                    elapsed = time.perf_counter() - start
+
+                print(f'{num_projects:>10} {mode:>8} {elapsed:>10.3f} '
+                      f'{add_consumer_mock.call_count:>20}')
+                self.assertEqual(expected_num_projects * 2, add_consumer_mock.call_count)
@@ -0,0 +1,48 @@
+from unittest import mock
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.grading_tasks.tasks.result_writer import AGTestResultWriter
+from autograder.utils.testing import UnitTestBase
+
+
+@mock.patch('autograder.grading_tasks.tasks.result_writer.time.monotonic')
+class AGTestResultWriterFlushIntervalTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        submission = obj_build.make_submission()
+        suite = obj_build.make_ag_test_suite(submission.group.project)
+        self.ag_test_cases = [obj_build.make_ag_test_case(suite) for _ in range(2)]
+        self.suite_result = ag_models.AGTestSuiteResult.objects.validate_and_create(
+            ag_test_suite=suite, submission=submission)
+
+    def test_buffered_results_written_once_interval_elapsed(self, monotonic_mock) -> None:
+        monotonic_mock.return_value = 100
+        writer = AGTestResultWriter(self.suite_result, flush_num_cases=10, flush_interval=5)
+        self.assertIsNone(writer.time_until_flush())
+
+        monotonic_mock.return_value = 101
+        writer.add_test_case_result(self.ag_test_cases[0], [])
+        self.assertEqual(0, ag_models.AGTestCaseResult.objects.count())
+        self.assertEqual(4, writer.time_until_flush())
+
+        monotonic_mock.return_value = 104
+        writer.flush_if_interval_elapsed()
+        self.assertEqual(0, ag_models.AGTestCaseResult.objects.count())
+
+        monotonic_mock.return_value = 105
+        self.assertEqual(0, writer.time_until_flush())
+        writer.flush_if_interval_elapsed()
+        self.assertEqual(1, ag_models.AGTestCaseResult.objects.count())
+        self.assertIsNone(writer.time_until_flush())
+
+    def test_result_added_after_interval_written_immediately(self, monotonic_mock) -> None:
+        monotonic_mock.return_value = 100
+        writer = AGTestResultWriter(self.suite_result, flush_num_cases=10, flush_interval=5)
+
+        monotonic_mock.return_value = 106
+        writer.add_test_case_result(self.ag_test_cases[0], [])
+        self.assertEqual(1, ag_models.AGTestCaseResult.objects.count())
+
+        writer.add_test_case_result(self.ag_test_cases[1], [])
+        self.assertEqual(1, ag_models.AGTestCaseResult.objects.count())
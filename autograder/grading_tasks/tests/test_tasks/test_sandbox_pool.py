@@ -0,0 +1,167 @@
+import time
+from unittest import mock
+
+from autograder_sandbox import AutograderSandbox
+from celery.signals import worker_process_shutdown
+from django.test import SimpleTestCase, override_settings
+
+from autograder.grading_tasks.tasks import sandbox_pool
+from autograder.grading_tasks.tasks.sandbox_pool import (PooledSandbox, SandboxPool,
+                                                         get_sandbox_pool)
+from autograder.utils.testing.fake_sandbox import FakeSandbox
+
+
+class SandboxPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sandboxes = []
+
+        def _make_sandbox(**kwargs):
+            sandbox = FakeSandbox(**kwargs)
+            self.sandboxes.append(sandbox)
+            return sandbox
+
+        self.pool = SandboxPool('some/image:1', False, size=2, sandbox_factory=_make_sandbox)
+        self.addCleanup(self.pool.close)
+
+    def test_first_checkout_is_a_miss_and_fills_pool(self):
+        with self.pool.checkout() as sandbox:
+            self.assertTrue(sandbox.is_running)
+            self.assertEqual('some/image:1', sandbox.docker_image)
+            self.assertFalse(sandbox.allow_network_access)
+
+        self._wait_for_ready_sandboxes(2)
+        self.assertEqual(1, self.pool.stats.misses)
+        self.assertEqual(0, self.pool.stats.hits)
+        # The sandbox we started in the foreground is destroyed because
+        # the pool was already filled in the background.
+        self.assertEqual(3, len(self.sandboxes))
+        self.pool.close()
+        self.assertEqual(1, sandbox.num_destroys)
+
+    def test_checkout_from_filled_pool_is_a_hit(self):
+        self.pool.fill()
+        self._wait_for_ready_sandboxes(2)
+
+        with self.pool.checkout() as sandbox:
+            self.assertTrue(sandbox.is_running)
+            self.assertEqual(1, sandbox.num_starts)
+
+        self._wait_for_ready_sandboxes(2)
+        self.assertEqual(1, self.pool.stats.hits)
+        self.assertEqual(0, self.pool.stats.misses)
+        self.assertEqual(2, len(self.sandboxes))
+
+    def test_returned_sandbox_reset_before_reuse(self):
+        self.pool.size = 1
+        self.pool.fill()
+        self._wait_for_ready_sandboxes(1)
+
+        with self.pool.checkout() as sandbox:
+            pass
+
+        self._wait_for_ready_sandboxes(1)
+        with self.pool.checkout() as reused_sandbox:
+            self.assertIs(sandbox, reused_sandbox)
+            self.assertTrue(reused_sandbox.is_running)
+            self.assertEqual(1, reused_sandbox.num_destroys)
+            self.assertEqual(2, reused_sandbox.num_starts)
+
+        self._wait_for_ready_sandboxes(1)
+        self.assertEqual(2, self.pool.stats.num_resets)
+        self.assertGreaterEqual(self.pool.stats.total_reset_time, 0)
+
+    def test_failed_reset_sandbox_discarded(self):
+        self.pool.size = 1
+        self.pool.fill()
+        self._wait_for_ready_sandboxes(1)
+
+        with self.pool.checkout() as sandbox:
+            sandbox.reset = mock.Mock(side_effect=Exception('docker broke'))
+
+        self._wait_for_ready_sandboxes(1)
+        with self.pool.checkout() as new_sandbox:
+            self.assertIsNot(sandbox, new_sandbox)
+
+        self.assertEqual(0, self.pool.stats.num_resets)
+
+    def test_environment_variables_set_per_checkout(self):
+        with self.pool.checkout({'usernames': 'steve stove'}) as sandbox:
+            self.assertEqual({'usernames': 'steve stove'}, sandbox.environment_variables)
+            sandbox.run_command(['bash', '-c', 'echo $usernames'])
+
+        self.assertEqual(
+            [['env', 'usernames=steve stove', 'bash', '-c', 'echo $usernames']],
+            sandbox.run_command_args)
+        self.assertEqual({}, sandbox.environment_variables)
+
+    def test_close_destroys_ready_sandboxes(self):
+        self.pool.fill()
+        self.pool.close()
+
+        self.assertEqual(2, len(self.sandboxes))
+        for sandbox in self.sandboxes:
+            self.assertFalse(sandbox.is_running)
+
+        with self.pool.checkout() as sandbox:
+            pass
+
+        self.assertFalse(sandbox.is_running)
+        self.assertEqual(3, len(self.sandboxes))
+
+    def _wait_for_ready_sandboxes(self, num_sandboxes: int, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while self.pool._ready.qsize() < num_sandboxes:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(.01)
+
+
+class PooledSandboxTestCase(SimpleTestCase):
+    def test_checkout_environment_variables_passed_to_run_command(self):
+        sandbox = PooledSandbox()
+        sandbox.checkout_environment_variables = {'usernames': 'spam egg'}
+        with mock.patch.object(AutograderSandbox, 'run_command') as run_command_mock:
+            sandbox.run_command(['bash', '-c', 'true'], as_root=False, timeout=5)
+
+        run_command_mock.assert_called_once_with(
+            ['env', 'usernames=spam egg', 'bash', '-c', 'true'], as_root=False, timeout=5)
+
+    def test_no_checkout_environment_variables(self):
+        sandbox = PooledSandbox()
+        with mock.patch.object(AutograderSandbox, 'run_command') as run_command_mock:
+            sandbox.run_command(['bash', '-c', 'true'])
+
+        run_command_mock.assert_called_once_with(['bash', '-c', 'true'])
+
+
+class GetSandboxPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(sandbox_pool._pools, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(SANDBOX_POOL_SIZE=3)
+    def test_one_pool_per_image_and_network_setting(self):
+        pool = get_sandbox_pool('image1', False)
+        self.assertEqual(3, pool.size)
+        self.assertIs(pool, get_sandbox_pool('image1', False))
+        self.assertIsNot(pool, get_sandbox_pool('image1', True))
+        self.assertIsNot(pool, get_sandbox_pool('image2', False))
+
+        pool.stats.hits = 4
+        stats = sandbox_pool.get_sandbox_pool_stats()
+        self.assertEqual({'image1', 'image1 (network)', 'image2'}, set(stats))
+        self.assertEqual(4, stats['image1']['hits'])
+
+    def test_pools_closed_and_stats_logged_on_worker_process_shutdown(self):
+        pool = get_sandbox_pool('image1', True)
+        pool.stats.misses = 2
+        with mock.patch.object(pool, 'close') as close_mock, \
+                self.assertLogs(sandbox_pool.logger, 'INFO') as logs:
+            worker_process_shutdown.send(sender=None, pid=42, exitcode=0)
+
+        close_mock.assert_called_once_with()
+        self.assertEqual({}, sandbox_pool._pools)
+        self.assertIn('image1 (network)', logs.output[0])
+        self.assertIn("'misses': 2", logs.output[0])
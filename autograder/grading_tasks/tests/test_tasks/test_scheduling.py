@@ -0,0 +1,234 @@
+import datetime
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.grading_tasks.tasks.queueing import (get_estimated_grading_time,
+                                                     queue_received_submissions)
+from autograder.grading_tasks.tasks.scheduling import (FairShareScheduler, InFlightUsage,
+                                                       PendingSubmission,
+                                                       get_project_queue_metrics,
+                                                       load_pending_submissions)
+from autograder.utils.testing import UnitTestBase
+from autograder.utils.testing.in_memory_broker import InMemoryBroker
+
+
+class FairShareSchedulerTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.next_pk = 1
+
+    def test_no_limits_all_submissions_scheduled(self) -> None:
+        pending = [self._make_pending(project_pk=pk % 3, seconds_ago=pk) for pk in range(10)]
+        result = FairShareScheduler().schedule(pending, InFlightUsage(), self.now)
+        self.assertCountEqual(pending, result)
+
+    def test_submissions_in_same_project_scheduled_oldest_first(self) -> None:
+        newer = self._make_pending(project_pk=1, seconds_ago=5)
+        older = self._make_pending(project_pk=1, seconds_ago=10)
+        result = FairShareScheduler().schedule([newer, older], InFlightUsage(), self.now)
+        self.assertEqual([older, newer], result)
+
+    def test_projects_share_workers_fairly(self) -> None:
+        busy_project_submissions = [
+            self._make_pending(project_pk=1, seconds_ago=100 - i) for i in range(5)]
+        other_project_submission = self._make_pending(project_pk=2, seconds_ago=1)
+
+        scheduler = FairShareScheduler(max_in_flight=2, aging_rate=0)
+        result = scheduler.schedule(
+            busy_project_submissions + [other_project_submission], InFlightUsage(), self.now)
+        self.assertEqual([busy_project_submissions[0], other_project_submission], result)
+
+    def test_project_with_in_flight_submissions_waits(self) -> None:
+        busy = self._make_pending(project_pk=1, seconds_ago=100)
+        idle = self._make_pending(project_pk=2, seconds_ago=1)
+
+        usage = InFlightUsage(project_costs={1: 60}, course_counts={1: 1})
+        scheduler = FairShareScheduler(max_in_flight=2, aging_rate=0)
+        self.assertEqual([idle], scheduler.schedule([busy, idle], usage, self.now))
+        self.assertEqual(2, usage.num_in_flight)
+        self.assertEqual(60, usage.project_costs[2])
+
+    def test_project_weights(self) -> None:
+        usage = InFlightUsage(project_costs={1: 60, 2: 100}, course_counts={1: 2})
+        project1 = self._make_pending(project_pk=1, seconds_ago=1)
+        project2 = self._make_pending(project_pk=2, seconds_ago=1)
+
+        scheduler = FairShareScheduler(max_in_flight=3, aging_rate=0)
+        self.assertEqual([project1], scheduler.schedule([project1, project2], usage, self.now))
+
+        usage = InFlightUsage(project_costs={1: 60, 2: 100}, course_counts={1: 2})
+        scheduler = FairShareScheduler(max_in_flight=3, aging_rate=0, project_weights={2: 2})
+        self.assertEqual([project2], scheduler.schedule([project1, project2], usage, self.now))
+
+    def test_course_quota(self) -> None:
+        course1_submissions = [
+            self._make_pending(project_pk=pk, course_pk=1, seconds_ago=10) for pk in range(3)]
+        course2_submission = self._make_pending(project_pk=5, course_pk=2, seconds_ago=1)
+
+        usage = InFlightUsage(course_counts={1: 1})
+        scheduler = FairShareScheduler(course_quota=2)
+        result = scheduler.schedule(
+            course1_submissions + [course2_submission], usage, self.now)
+        self.assertEqual([course1_submissions[0], course2_submission], result)
+
+    def test_priority_submissions_scheduled_first(self) -> None:
+        regular = self._make_pending(project_pk=1, seconds_ago=100)
+        staff = self._make_pending(project_pk=2, seconds_ago=1, is_staff=True)
+        first_of_day = self._make_pending(project_pk=3, seconds_ago=1, is_first_of_day=True)
+
+        scheduler = FairShareScheduler(max_in_flight=2, priority_boost=300)
+        result = scheduler.schedule([regular, staff, first_of_day], InFlightUsage(), self.now)
+        self.assertCountEqual([staff, first_of_day], result)
+
+    def test_waiting_submissions_eventually_scheduled(self) -> None:
+        usage = InFlightUsage(project_costs={1: 600, 2: 0}, course_counts={1: 2})
+        old = self._make_pending(project_pk=1, seconds_ago=1000)
+        new = self._make_pending(project_pk=2, seconds_ago=0)
+
+        scheduler = FairShareScheduler(max_in_flight=3, aging_rate=1)
+        self.assertEqual([old], scheduler.schedule([old, new], usage, self.now))
+
+    def test_max_in_flight_reached(self) -> None:
+        usage = InFlightUsage(course_counts={1: 4})
+        pending = [self._make_pending(project_pk=1, seconds_ago=1)]
+        self.assertEqual(
+            [], FairShareScheduler(max_in_flight=4).schedule(pending, usage, self.now))
+
+    def _make_pending(self, *, project_pk: int, seconds_ago: int, course_pk: int = 1,
+                      estimated_grading_time: int = 60,
+                      is_staff: bool = False, is_first_of_day: bool = False):
+        pk = self.next_pk
+        self.next_pk += 1
+        return PendingSubmission(
+            pk,
+            project_pk=project_pk,
+            course_pk=course_pk,
+            timestamp=self.now - datetime.timedelta(seconds=seconds_ago),
+            estimated_grading_time=estimated_grading_time,
+            is_staff=is_staff,
+            is_first_of_day=is_first_of_day,
+        )
+
+
+class QueueReceivedSubmissionsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.course = obj_build.make_course()
+        self.project1 = obj_build.make_project(self.course)
+        self.project2 = obj_build.make_project(self.course)
+        self.broker = InMemoryBroker()
+
+    @override_settings(GRADING_MAX_SUBMISSIONS_IN_FLIGHT=2, GRADING_AGING_RATE=0)
+    def test_in_flight_limit_and_fair_share(self) -> None:
+        project1_submissions = [self._make_submission(self.project1) for _ in range(3)]
+        project2_submission = self._make_submission(self.project2)
+
+        queued = queue_received_submissions(self.broker)
+        self.assertEqual([project1_submissions[0].pk, project2_submission.pk], queued)
+        self.assertEqual(queued, self.broker.sent_submission_pks)
+        self._assert_status(ag_models.Submission.GradingStatus.queued,
+                            project1_submissions[0], project2_submission)
+        self._assert_status(ag_models.Submission.GradingStatus.received,
+                            *project1_submissions[1:])
+
+        # Nothing finished, so nothing else is queued.
+        self.assertEqual([], queue_received_submissions(self.broker))
+
+        project2_submission.status = ag_models.Submission.GradingStatus.finished_grading
+        project2_submission.save()
+        self.assertEqual([project1_submissions[1].pk], queue_received_submissions(self.broker))
+
+    @override_settings(GRADING_MAX_SUBMISSIONS_IN_FLIGHT=4, GRADING_AGING_RATE=0)
+    def test_project_weights_setting(self) -> None:
+        project1_submissions = [self._make_submission(self.project1) for _ in range(4)]
+        project2_submissions = [self._make_submission(self.project2) for _ in range(4)]
+
+        with override_settings(GRADING_PROJECT_WEIGHTS={self.project1.pk: 3}):
+            queued = queue_received_submissions(self.broker)
+
+        self.assertCountEqual(
+            [submission.pk for submission in project1_submissions[:3]]
+            + [project2_submissions[0].pk],
+            queued)
+
+    @override_settings(GRADING_COURSE_MAX_SUBMISSIONS_IN_FLIGHT=1)
+    def test_course_quota(self) -> None:
+        other_project = obj_build.make_project()
+        submission1 = self._make_submission(self.project1)
+        submission2 = self._make_submission(self.project2)
+        other_course_submission = self._make_submission(other_project)
+
+        queued = queue_received_submissions(self.broker)
+        self.assertCountEqual([submission1.pk, other_course_submission.pk], queued)
+        self._assert_status(ag_models.Submission.GradingStatus.received, submission2)
+
+    def test_removed_from_queue_not_queued(self) -> None:
+        submission = self._make_submission(
+            self.project1, status=ag_models.Submission.GradingStatus.removed_from_queue)
+        self.assertEqual([], queue_received_submissions(self.broker))
+        self._assert_status(ag_models.Submission.GradingStatus.removed_from_queue, submission)
+
+    def test_staff_and_first_of_day_submissions_detected(self) -> None:
+        staff_group = obj_build.make_group(
+            project=self.project1, members_role=obj_build.UserRole.staff)
+        staff_submission = obj_build.make_submission(
+            group=staff_group, submitter=staff_group.members.first().username)
+
+        student_group = obj_build.make_group(project=self.project1)
+        first = obj_build.make_submission(
+            group=student_group, submitter=student_group.members.first().username,
+            status=ag_models.Submission.GradingStatus.finished_grading)
+        second = obj_build.make_submission(
+            group=student_group, submitter=student_group.members.first().username)
+
+        pending = {
+            submission.pk: submission
+            for submission in load_pending_submissions(get_estimated_grading_time)
+        }
+        self.assertCountEqual([staff_submission.pk, second.pk], pending)
+        self.assertTrue(pending[staff_submission.pk].is_staff)
+        self.assertTrue(pending[staff_submission.pk].is_first_of_day)
+        self.assertFalse(pending[second.pk].is_staff)
+        self.assertFalse(pending[second.pk].is_first_of_day)
+
+        first.delete()
+        pending = {
+            submission.pk: submission
+            for submission in load_pending_submissions(get_estimated_grading_time)
+        }
+        self.assertTrue(pending[second.pk].is_first_of_day)
+
+    def test_project_queue_metrics(self) -> None:
+        received = self._make_submission(
+            self.project1, timestamp=timezone.now() - datetime.timedelta(minutes=5))
+        self._make_submission(self.project1, status=ag_models.Submission.GradingStatus.queued)
+        self._make_submission(
+            self.project2, status=ag_models.Submission.GradingStatus.being_graded)
+        self._make_submission(
+            self.project2, status=ag_models.Submission.GradingStatus.finished_grading)
+
+        metrics = get_project_queue_metrics()
+        self.assertEqual({self.project1.pk, self.project2.pk}, set(metrics))
+
+        self.assertEqual(1, metrics[self.project1.pk]['num_received'])
+        self.assertEqual(1, metrics[self.project1.pk]['num_queued'])
+        self.assertEqual(0, metrics[self.project1.pk]['num_being_graded'])
+        self.assertGreaterEqual(
+            metrics[self.project1.pk]['max_wait_time'],
+            (timezone.now() - received.timestamp).total_seconds() - 1)
+
+        self.assertEqual(0, metrics[self.project2.pk]['num_received'])
+        self.assertEqual(1, metrics[self.project2.pk]['num_being_graded'])
+        self.assertIsNone(metrics[self.project2.pk]['max_wait_time'])
+
+    def _make_submission(self, project: ag_models.Project, **kwargs) -> ag_models.Submission:
+        return obj_build.make_submission(group=obj_build.make_group(project=project), **kwargs)
+
+    def _assert_status(self, status: str, *submissions: ag_models.Submission):
+        for submission in submissions:
+            submission.refresh_from_db()
+            self.assertEqual(status, submission.status)
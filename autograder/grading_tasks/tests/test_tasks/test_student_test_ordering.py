@@ -0,0 +1,88 @@
+from typing import Dict
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.grading_tasks.tasks.student_test_ordering import order_student_tests
+from autograder.utils.testing import UnitTestBase
+
+
+class OrderStudentTestsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        self.mutation_suite = obj_build.make_mutation_test_suite(
+            self.project, buggy_impl_names=['bug1', 'bug2', 'bug3'])
+        self.group = obj_build.make_group(project=self.project)
+        self.submission = obj_build.make_submission(group=self.group)
+        self.student_tests = ['test1', 'test2', 'test3', 'test4']
+
+    def test_discovery_order(self) -> None:
+        self._make_previous_result(self.group, {'bug1': 'test4'})
+        self.assertEqual(
+            {bug: self.student_tests for bug in self.mutation_suite.buggy_impl_names},
+            order_student_tests(self.mutation_suite, self.submission, self.student_tests))
+
+    def test_group_history(self) -> None:
+        self.mutation_suite.validate_and_update(
+            student_test_ordering=ag_models.StudentTestOrdering.group_history)
+        self._make_previous_result(self.group, {'bug1': 'test3', 'bug2': 'test4'})
+        self._make_previous_result(self.group, {'bug1': 'test3', 'bug2': 'test2'})
+        self._make_previous_result(self.group, {'bug1': 'test4'})
+        # Other groups' results should be ignored.
+        self._make_previous_result(
+            obj_build.make_group(project=self.project), {'bug3': 'test1'})
+
+        self.assertEqual(
+            {
+                # test3 exposed bug1 twice and test4 exposed it once.
+                'bug1': ['test3', 'test4', 'test2', 'test1'],
+                # test2 and test4 exposed bug2 once, but test4 exposed
+                # more bugs in total.
+                'bug2': ['test4', 'test2', 'test3', 'test1'],
+                # No test exposed bug3, so tests are ranked by the
+                # total number of bugs they exposed.
+                'bug3': ['test3', 'test4', 'test2', 'test1'],
+            },
+            order_student_tests(self.mutation_suite, self.submission, self.student_tests))
+
+    def test_project_history(self) -> None:
+        self.mutation_suite.validate_and_update(
+            student_test_ordering=ag_models.StudentTestOrdering.project_history)
+        self._make_previous_result(self.group, {'bug1': 'test3'})
+        self._make_previous_result(
+            obj_build.make_group(project=self.project), {'bug1': 'test2', 'bug3': 'test2'})
+        self._make_previous_result(
+            obj_build.make_group(project=self.project), {'bug1': 'test2'})
+
+        self.assertEqual(
+            {
+                'bug1': ['test2', 'test3', 'test1', 'test4'],
+                'bug2': ['test2', 'test3', 'test1', 'test4'],
+                'bug3': ['test2', 'test3', 'test1', 'test4'],
+            },
+            order_student_tests(self.mutation_suite, self.submission, self.student_tests))
+
+    def test_current_submission_and_other_suites_ignored(self) -> None:
+        self.mutation_suite.validate_and_update(
+            student_test_ordering=ag_models.StudentTestOrdering.project_history)
+        ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=self.mutation_suite, submission=self.submission,
+            exposing_tests={'bug1': 'test4'})
+        other_suite = obj_build.make_mutation_test_suite(
+            self.project, buggy_impl_names=['bug1'])
+        ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=other_suite,
+            submission=obj_build.make_submission(group=self.group),
+            exposing_tests={'bug1': 'test4'})
+
+        self.assertEqual(
+            {bug: self.student_tests for bug in self.mutation_suite.buggy_impl_names},
+            order_student_tests(self.mutation_suite, self.submission, self.student_tests))
+
+    def _make_previous_result(self, group: ag_models.Group,
+                              exposing_tests: Dict[str, str]) -> None:
+        ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=self.mutation_suite,
+            submission=obj_build.make_submission(group=group),
+            exposing_tests=exposing_tests,
+            bugs_exposed=list(exposing_tests))
@@ -597,6 +597,26 @@ class ListHandgradingResultsViewTestCase(UnitTestBase):
     def test_get_paginated_results_some_groups_have_no_result(self):
         self.do_handgrading_results_test(self.handgrader, num_results=2, num_groups=4)
 
+    def test_get_paginated_results_streamed(self):
+        groups = [obj_build.make_group(2, project=self.project) for _ in range(4)]
+        for group in groups[:2]:
+            hg_models.HandgradingResult.objects.validate_and_create(
+                submission=obj_build.make_finished_submission(group=group),
+                group=group, handgrading_rubric=self.rubric, finished_grading=True)
+
+        self.client.force_authenticate(self.staff)
+        url = reverse('handgrading_results', kwargs={'pk': self.project.pk})
+        for page_num in 1, 2:
+            query_params = {'page_size': 3, 'page': page_num}
+            response = self.client.get(url + '?' + urlencode(query_params))
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+            query_params['stream'] = 'true'
+            streamed_response = self.client.get(url + '?' + urlencode(query_params))
+            self.assertEqual(status.HTTP_200_OK, streamed_response.status_code)
+            self.assertTrue(streamed_response.streaming)
+            self.assertEqual(response.content, b''.join(streamed_response.streaming_content))
+
     def test_non_staff_non_handgrader_get_handgrading_results_permission_denied(self):
         [student] = obj_build.make_student_users(self.course, 1)
         self.client.force_authenticate(student)
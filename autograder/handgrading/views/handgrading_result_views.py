@@ -1,6 +1,7 @@
 import copy
 import itertools
 from collections import OrderedDict
+from typing import Dict
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
@@ -22,6 +23,8 @@ from autograder.rest_api.schema import (
     as_content_obj, as_paginated_content_obj, as_schema_ref
 )
 from autograder.rest_api.serve_file import serve_file
+from autograder.rest_api.stream_json import (
+    prefetch_in_chunks, stream_paginated_json_list, stream_requested)
 from autograder.rest_api.views.ag_model_views import (
     AGModelAPIView, NestedModelView, convert_django_validation_error,
     handle_object_does_not_exist_404, require_query_params
@@ -289,6 +292,7 @@ class ListHandgradingResultsView(AGModelAPIView):
                     }
                 },
                 {'$ref': '#/components/parameters/includeStaff'},
+                {'$ref': '#/components/parameters/stream'},
             ],
             'responses': {
                 '200': {
@@ -346,11 +350,12 @@ class ListHandgradingResultsView(AGModelAPIView):
             'comments'
         )
 
-        groups = project.groups.prefetch_related(
+        group_related_lookups = [
             'members',
             'submissions',
             Prefetch('handgrading_result', hg_result_queryset),
-        ).all()
+        ]
+        groups = project.groups.all()
 
         include_staff = self.request.query_params.get('include_staff', 'true') == 'true'
         if not include_staff:
@@ -361,18 +366,30 @@ class ListHandgradingResultsView(AGModelAPIView):
             groups = groups.exclude(members__in=staff)
 
         paginator = HandgradingResultPaginator()
-        page = paginator.paginate_queryset(queryset=groups, request=self.request, view=self)
+        if stream_requested(self.request):
+            # Load each chunk's related objects as we go rather than
+            # loading them for the whole page up front.
+            page = paginator.paginate_queryset(queryset=groups, request=self.request, view=self)
+            return stream_paginated_json_list(
+                paginator,
+                (_serialize_group_with_handgrading_result(group)
+                 for group in prefetch_in_chunks(page, *group_related_lookups))
+            )
+
+        page = paginator.paginate_queryset(
+            queryset=groups.prefetch_related(*group_related_lookups),
+            request=self.request, view=self)
+        return paginator.get_paginated_response(
+            [_serialize_group_with_handgrading_result(group) for group in page])
 
-        results = []
-        for group in page:
-            data = group.to_dict()
-            if not hasattr(group, 'handgrading_result'):
-                data['handgrading_result'] = None
-            else:
-                data['handgrading_result'] = utils.filter_dict(
-                    group.handgrading_result.to_dict(),
-                    ['finished_grading', 'total_points', 'total_points_possible'])
 
-            results.append(data)
+def _serialize_group_with_handgrading_result(group: ag_models.Group) -> Dict[str, object]:
+    data = group.to_dict()
+    if not hasattr(group, 'handgrading_result'):
+        data['handgrading_result'] = None
+    else:
+        data['handgrading_result'] = utils.filter_dict(
+            group.handgrading_result.to_dict(),
+            ['finished_grading', 'total_points', 'total_points_possible'])
 
-        return paginator.get_paginated_response(results)
+    return data
@@ -112,11 +112,25 @@ values:
         'schema': {'type': 'integer'}
     }
 
+    stream: ParameterObject = {
+        'name': 'stream',
+        'in': 'query',
+        'description': ('When "true", the response body is streamed, writing each '
+                        'item in the results as soon as it is loaded. The response '
+                        'data is the same either way. Defaults to "false".'),
+        'schema': {
+            'type': 'string',
+            'enum': ['true', 'false'],
+            'default': 'false',
+        }
+    }
+
     return {
         'feedbackCategory': fdbk_category,
         'requiredFeedbackCategory': fdbk_category,
         'includeStaff': include_staff,
-        'page': page
+        'page': page,
+        'stream': stream,
     }
 
 
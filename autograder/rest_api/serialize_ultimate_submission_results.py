@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, Iterator, List
 
 from django.utils import timezone
 
 import autograder.core.models as ag_models
+from autograder.core.caching import get_cached_submission_feedback
 from autograder.core.models.get_ultimate_submissions import get_ultimate_submission
 from autograder.core.submission_feedback import SubmissionResultFeedback
 
@@ -52,7 +53,23 @@ def serialize_ultimate_submission_results(
         ...
     ]
     """
-    results = []
+    return list(iter_ultimate_submission_results(
+        ultimate_submissions,
+        full_results=full_results,
+        include_handgrading=include_handgrading,
+        include_pending_extensions=include_pending_extensions))
+
+
+def iter_ultimate_submission_results(
+    ultimate_submissions: Iterable[SubmissionResultFeedback],
+    *, full_results: bool,
+    include_handgrading: bool = False,
+    include_pending_extensions: bool = False,
+) -> Iterator[dict]:
+    """
+    Like serialize_ultimate_submission_results(), but yields each
+    user's data as soon as it's serialized.
+    """
     for submission_fdbk in ultimate_submissions:
         submission = submission_fdbk.submission
         group = submission.group
@@ -95,9 +112,7 @@ def serialize_ultimate_submission_results(
             else:
                 user_data['ultimate_submission'] = submission_data
 
-            results.append(user_data)
-
-    return results
+            yield user_data
 
 
 def get_submission_data_with_results(submission_fdbk: SubmissionResultFeedback,
@@ -106,13 +121,8 @@ def get_submission_data_with_results(submission_fdbk: SubmissionResultFeedback,
                                      group: ag_models.Group | None = None):
     submission_data = submission_fdbk.submission.to_dict()
 
-    if not full_results:
-        submission_results = {
-            'total_points': str(submission_fdbk.total_points),
-            'total_points_possible': str(submission_fdbk.total_points_possible)
-        }
-    else:
-        submission_results = submission_fdbk.to_dict()
+    submission_results = dict(get_cached_submission_feedback(
+        submission_fdbk.submission, submission_fdbk, totals_only=not full_results))
 
     if include_handgrading:
         assert group is not None, "'group' is required when 'include_handgrading' is True"
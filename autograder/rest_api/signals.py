@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from autograder.core.ag_test_config_cache import (
+    bump_test_config_version, test_config_version_bumped
+)
 from autograder.core.caching import clear_submission_results_cache
 import autograder.core.models as ag_models
-from autograder.grading_tasks.tasks import register_project_queues
+from autograder.core.models.get_ultimate_submissions import clear_cached_ultimate_submission
+from autograder.grading_tasks.tasks import (
+    clear_estimated_grading_time_cache, register_project_queues, schedule_point_totals_update
+)
 
 
 @receiver(post_save, sender=ag_models.Project)
@@ -11,51 +18,117 @@ def on_project_created(sender, instance, created, **kwargs):
     if not created:
         return
 
+    # In 'active' mode, the project's queues are registered the first
+    # time a submission to it is queued.
+    if settings.PROJECT_QUEUE_REGISTRATION_MODE == 'active':
+        return
+
     from autograder.celery import app
     register_project_queues.apply_async(
         kwargs={'project_pks': [instance.pk]}, queue='small_tasks',
         connection=app.connection())
 
 
+@receiver(test_config_version_bumped)
+def on_test_config_version_bumped(sender, project_pk: int, **kwargs):
+    schedule_point_totals_update(project_pk)
+
+
 @receiver(post_save, sender=ag_models.AGTestSuite)
 def on_ag_test_suite_save(sender, instance: ag_models.AGTestSuite, created, **kwargs):
+    clear_estimated_grading_time_cache(instance.project_id)
+    bump_test_config_version(instance.project_id)
     if not created:
         clear_submission_results_cache(instance.project_id)
 
 
 @receiver(post_delete, sender=ag_models.AGTestSuite)
 def on_ag_test_suite_delete(sender, instance: ag_models.AGTestSuite, *args, **kwargs):
+    clear_estimated_grading_time_cache(instance.project_id)
+    bump_test_config_version(instance.project_id)
     clear_submission_results_cache(instance.project_id)
 
 
 @receiver(post_save, sender=ag_models.AGTestCase)
 def on_ag_test_case_save(sender, instance: ag_models.AGTestCase, created, **kwargs):
+    clear_estimated_grading_time_cache(instance.ag_test_suite.project_id)
+    bump_test_config_version(instance.ag_test_suite.project_id)
     if not created:
         clear_submission_results_cache(instance.ag_test_suite.project_id)
 
 
 @receiver(post_delete, sender=ag_models.AGTestCase)
 def on_ag_test_case_delete(sender, instance: ag_models.AGTestCase, *args, **kwargs):
+    clear_estimated_grading_time_cache(instance.ag_test_suite.project_id)
+    bump_test_config_version(instance.ag_test_suite.project_id)
     clear_submission_results_cache(instance.ag_test_suite.project_id)
 
 
 @receiver(post_save, sender=ag_models.AGTestCommand)
 def on_ag_test_command_save(sender, instance: ag_models.AGTestCommand, created, **kwargs):
+    clear_estimated_grading_time_cache(instance.ag_test_case.ag_test_suite.project_id)
+    bump_test_config_version(instance.ag_test_case.ag_test_suite.project_id)
     if not created:
         clear_submission_results_cache(instance.ag_test_case.ag_test_suite.project_id)
 
 
 @receiver(post_delete, sender=ag_models.AGTestCommand)
 def on_ag_test_command_delete(sender, instance: ag_models.AGTestCommand, *args, **kwargs):
+    clear_estimated_grading_time_cache(instance.ag_test_case.ag_test_suite.project_id)
+    bump_test_config_version(instance.ag_test_case.ag_test_suite.project_id)
     clear_submission_results_cache(instance.ag_test_case.ag_test_suite.project_id)
 
 
 @receiver(post_save, sender=ag_models.MutationTestSuite)
 def on_mutation_test_suite_save(sender, instance: ag_models.MutationTestSuite, created, **kwargs):
+    clear_estimated_grading_time_cache(instance.project_id)
+    bump_test_config_version(instance.project_id)
     if not created:
         clear_submission_results_cache(instance.project_id)
 
 
 @receiver(post_delete, sender=ag_models.MutationTestSuite)
 def on_mutation_test_suite_delete(sender, instance: ag_models.MutationTestSuite, *args, **kwargs):
+    clear_estimated_grading_time_cache(instance.project_id)
+    bump_test_config_version(instance.project_id)
     clear_submission_results_cache(instance.project_id)
+
+
+# Test commands hold a reference to the instructor files they use as
+# expected output, so renaming or deleting one changes the cached
+# test configuration.
+@receiver(post_save, sender=ag_models.InstructorFile)
+def on_instructor_file_save(sender, instance: ag_models.InstructorFile, created, **kwargs):
+    if not created:
+        bump_test_config_version(instance.project_id)
+
+
+@receiver(post_delete, sender=ag_models.InstructorFile)
+def on_instructor_file_delete(sender, instance: ag_models.InstructorFile, *args, **kwargs):
+    bump_test_config_version(instance.project_id)
+
+
+@receiver(post_save, sender=ag_models.Submission)
+def on_submission_save(sender, instance: ag_models.Submission, created, **kwargs):
+    clear_cached_ultimate_submission(instance.group_id)
+
+
+@receiver(post_delete, sender=ag_models.Submission)
+def on_submission_delete(sender, instance: ag_models.Submission, *args, **kwargs):
+    clear_cached_ultimate_submission(instance.group_id)
+
+
+# Mutation test suite results count towards a submission's total
+# points, so they can change which submission is the best one.
+@receiver(post_save, sender=ag_models.MutationTestSuiteResult)
+def on_mutation_test_suite_result_save(
+    sender, instance: ag_models.MutationTestSuiteResult, created, **kwargs
+):
+    clear_cached_ultimate_submission(instance.submission.group_id)
+
+
+@receiver(post_delete, sender=ag_models.MutationTestSuiteResult)
+def on_mutation_test_suite_result_delete(
+    sender, instance: ag_models.MutationTestSuiteResult, *args, **kwargs
+):
+    clear_cached_ultimate_submission(instance.submission.group_id)
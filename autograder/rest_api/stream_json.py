@@ -0,0 +1,143 @@
+"""
+Helpers for list endpoints that can render their results as a
+streamed JSON array instead of building the whole list in memory.
+
+Streaming is opt-in: views check stream_requested() and, when it
+returns True, pass a generator of already-serialized items to
+stream_json_list() or stream_paginated_json_list(). Each item is
+encoded and written as soon as it's produced, so the time to first
+byte and the response's peak memory usage don't grow with the number
+of items.
+
+Note that once a streamed response has started, its status code can
+no longer change. Views should do their permission checks and
+query param validation before returning a streamed response.
+"""
+
+import itertools
+from typing import Iterable, Iterator, Optional, Sequence, TypeVar, Union
+
+from django.db.models import Model, Prefetch, QuerySet, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+STREAM_QUERY_PARAM = 'stream'
+
+# The default number of objects that iter_queryset_in_chunks() loads
+# per query.
+DEFAULT_CHUNK_SIZE = 50
+
+ModelType = TypeVar('ModelType', bound=Model)
+
+
+def stream_requested(request: Request) -> bool:
+    """
+    Returns True if the request's query string contains "stream=true".
+    """
+    return request.query_params.get(STREAM_QUERY_PARAM) == 'true'
+
+
+def stream_json_list(items: Iterable[object],
+                     status_code: int = status.HTTP_200_OK) -> StreamingHttpResponse:
+    """
+    Returns a response whose body is a JSON array of the given items.
+    The items are encoded the same way DRF's JSONRenderer would
+    encode them.
+    """
+    return StreamingHttpResponse(
+        _iter_json_array(items), status=status_code, content_type='application/json')
+
+
+def stream_paginated_json_list(paginator: PageNumberPagination,
+                               items: Iterable[object]) -> StreamingHttpResponse:
+    """
+    Returns a response with the same envelope as
+    PageNumberPagination.get_paginated_response() ("count", "next",
+    "previous", and "results"), with the given items streamed as the
+    "results" array.
+    paginator.paginate_queryset() must have already been called.
+    """
+    encoder = _make_encoder()
+    envelope = _encode(encoder, {
+        'count': paginator.page.paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+    })
+    # Drop the closing brace so that we can append the results.
+    head = envelope[:-1] + ',' + _encode(encoder, 'results') + encoder.key_separator
+
+    return StreamingHttpResponse(
+        itertools.chain([head], _iter_json_array(items, encoder), ['}']),
+        status=status.HTTP_200_OK,
+        content_type='application/json'
+    )
+
+
+def iter_queryset_in_chunks(queryset: QuerySet[ModelType],
+                            chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[ModelType]:
+    """
+    Yields the objects in the given queryset, in the queryset's order,
+    loading chunk_size of them (and their prefetched related objects)
+    at a time.
+
+    We load the queryset's primary keys up front rather than using
+    QuerySet.iterator() because iterator() ignores prefetch_related().
+    Objects that are deleted while we're iterating are skipped.
+    """
+    pks = list(queryset.values_list('pk', flat=True))
+    for i in range(0, len(pks), chunk_size):
+        chunk_pks = pks[i:i + chunk_size]
+        objs = queryset.in_bulk(chunk_pks)
+        for pk in chunk_pks:
+            if pk in objs:
+                yield objs[pk]
+
+
+def prefetch_in_chunks(objs: Sequence[ModelType],
+                       *related_lookups: Union[str, Prefetch],
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[ModelType]:
+    """
+    Yields the given objects, loading their related objects with
+    prefetch_related_objects() one chunk at a time.
+    Use this for objects that were already loaded (e.g., a page from
+    a paginator) without calling prefetch_related().
+    """
+    for i in range(0, len(objs), chunk_size):
+        chunk = objs[i:i + chunk_size]
+        prefetch_related_objects(chunk, *related_lookups)
+        yield from chunk
+
+
+def _iter_json_array(items: Iterable[object],
+                     encoder: Optional[encoders.JSONEncoder] = None) -> Iterator[str]:
+    if encoder is None:
+        encoder = _make_encoder()
+
+    yield '['
+    for index, item in enumerate(items):
+        if index == 0:
+            yield _encode(encoder, item)
+        else:
+            yield encoder.item_separator + _encode(encoder, item)
+    yield ']'
+
+
+def _make_encoder() -> encoders.JSONEncoder:
+    # Mirrors the options DRF's JSONRenderer uses when the request
+    # doesn't ask for indentation.
+    return encoders.JSONEncoder(
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=SHORT_SEPARATORS if api_settings.COMPACT_JSON else LONG_SEPARATORS
+    )
+
+
+def _encode(encoder: encoders.JSONEncoder, obj: object) -> str:
+    # JSONRenderer escapes these characters, which are valid JSON but
+    # not valid JavaScript.
+    return encoder.encode(obj).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
@@ -1,12 +1,15 @@
 import csv
 import os
+import shutil
 import traceback
 import uuid
 import zipfile
-from typing import Sequence, Callable, Iterator, Tuple, List
+from typing import Dict, Sequence, Callable, Iterator, Tuple
 
 from celery import shared_task
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q, QuerySet
 
 import autograder.core.models as ag_models
 from autograder.core.models.get_ultimate_submissions import get_ultimate_submissions
@@ -20,25 +23,14 @@ from autograder.rest_api.views.submission_views.all_ultimate_submission_results_
 
 @shared_task(queue='project_downloads', acks_late=True)
 def all_submission_files_task(project_pk, task_pk, include_staff, *args, **kwargs):
-    _make_download_file_task_impl(project_pk, task_pk, include_staff,
-                                  _get_all_submissions, _make_submission_archive)
+    _start_chunked_download_task(project_pk, task_pk, include_staff)
 
 
 def _get_all_submissions(
         project: ag_models.Project,
-        groups: Sequence[ag_models.Group]) -> Tuple[List[SubmissionResultFeedback], int]:
-    ag_test_loader = AGTestPreLoader(project)
-    mutation_test_suite_loader = MutationTestSuitePreLoader(project)
-    submissions = [
-        SubmissionResultFeedback(
-            submission,
-            ag_models.FeedbackCategory.max,
-            ag_test_loader,
-            mutation_test_suite_loader
-        )
-        for submission in ag_models.Submission.objects.filter(group__in=groups)
-    ]
-    return submissions, len(submissions)
+        groups: Sequence[ag_models.Group]) -> Tuple[Iterator[SubmissionResultFeedback], int]:
+    return _stream_submission_fdbks(
+        project, ag_models.Submission.objects.filter(group__in=groups))
 
 
 @shared_task(queue='project_downloads', acks_late=True)
@@ -49,30 +41,21 @@ def ultimate_submission_files_task(project_pk, task_pk, include_staff, *args, **
 
 @shared_task(queue='project_downloads', acks_late=True)
 def all_submission_scores_task(project_pk, task_pk, include_staff, *args, **kwargs):
-    def _get_all_finished_grading_submissions(
-            project: ag_models.Project, groups: Sequence[ag_models.Group]
-    ) -> Tuple[List[SubmissionResultFeedback], int]:
-        submissions = ag_models.get_submissions_with_results_queryset(
+    _start_chunked_download_task(project_pk, task_pk, include_staff)
+
+
+def _get_all_finished_grading_submissions(
+        project: ag_models.Project,
+        groups: Sequence[ag_models.Group]) -> Tuple[Iterator[SubmissionResultFeedback], int]:
+    return _stream_submission_fdbks(
+        project,
+        ag_models.get_submissions_with_results_queryset(
             base_manager=ag_models.Submission.objects.filter(
                 group__in=groups,
                 status=ag_models.Submission.GradingStatus.finished_grading
             )
         )
-        ag_test_loader = AGTestPreLoader(project)
-        mutation_test_suite_loader = MutationTestSuitePreLoader(project)
-        fdbks = [
-            SubmissionResultFeedback(
-                submission,
-                ag_models.FeedbackCategory.max,
-                ag_test_loader,
-                mutation_test_suite_loader
-            )
-            for submission in submissions
-        ]
-        return fdbks, len(submissions)
-
-    _make_download_file_task_impl(project_pk, task_pk, include_staff,
-                                  _get_all_finished_grading_submissions, _make_scores_csv)
+    )
 
 
 @shared_task(queue='project_downloads', acks_late=True)
@@ -87,33 +70,98 @@ GetSubmissionsFnType = Callable[[ag_models.Project, Sequence[ag_models.Group]],
                                 Tuple[Iterator[SubmissionResultFeedback], int]]
 
 
+# Submissions (and their results) are loaded from the database this
+# many at a time so that memory use doesn't grow with the size of the
+# project.
+_CHUNK_SIZE = 200
+
+
+def _stream_submission_fdbks(
+    project: ag_models.Project,
+    submissions: QuerySet[ag_models.Submission]
+) -> Tuple[Iterator[SubmissionResultFeedback], int]:
+    """
+    Returns a generator of max feedback for the submissions in the
+    given queryset (newest first) and the number of submissions it
+    will generate.
+    """
+    ag_test_loader = AGTestPreLoader(project)
+    mutation_test_suite_loader = MutationTestSuitePreLoader(project)
+    fdbks = (
+        SubmissionResultFeedback(
+            submission,
+            ag_models.FeedbackCategory.max,
+            ag_test_loader,
+            mutation_test_suite_loader
+        )
+        for submission in _iter_in_chunks(submissions.select_related('group__project'))
+    )
+    return fdbks, submissions.count()
+
+
+def _iter_in_chunks(submissions: QuerySet[ag_models.Submission]) -> Iterator[ag_models.Submission]:
+    """
+    Yields the submissions in the given queryset, newest first, loading
+    _CHUNK_SIZE of them at a time.
+
+    We page through the submissions by pk rather than using
+    QuerySet.iterator() because iterator() ignores prefetch_related().
+    """
+    submissions = submissions.order_by('-pk')
+    chunk = list(submissions[:_CHUNK_SIZE])
+    while chunk:
+        yield from chunk
+        chunk = list(submissions.filter(pk__lt=chunk[-1].pk)[:_CHUNK_SIZE])
+
+
 def _get_ultimate_submissions(
         project: ag_models.Project,
         groups: Sequence[ag_models.Group]) -> Tuple[Iterator[SubmissionResultFeedback], int]:
-    submissions = get_ultimate_submissions(
-        project, filter_groups=groups, ag_test_preloader=AGTestPreLoader(project))
-    return submissions, len(groups)
+    ag_test_preloader = AGTestPreLoader(project)
+
+    # get_ultimate_submissions() loads all of the given groups'
+    # submissions at once, so we pass it a chunk of groups at a time.
+    def _generate_ultimate_submissions() -> Iterator[SubmissionResultFeedback]:
+        for i in range(0, len(groups), _CHUNK_SIZE):
+            yield from get_ultimate_submissions(
+                project,
+                filter_groups=groups[i:i + _CHUNK_SIZE],
+                ag_test_preloader=ag_test_preloader)
+
+    return _generate_ultimate_submissions(), len(groups)
 
 
+# Called with a percentage indicating how much of a download file
+# has been generated.
+UpdateProgressFnType = Callable[[float], None]
+
 # Given a task, an iterator of SubmissionResultFeedbacks,
 # the number of submissions that iterator will generate,
-# and a destination filename, create
-# a downloadable file with the given destination filename, updating
-# the task's progress field as the file is generated.
+# a destination filename, and a function to report progress with,
+# create a downloadable file with the given destination filename.
 MakeDownloadFnType = Callable[
-    [ag_models.DownloadTask, Iterator[SubmissionResultFeedback], int, str], None]
+    [ag_models.DownloadTask, Iterator[SubmissionResultFeedback], int, str,
+     UpdateProgressFnType],
+    None
+]
 
 
 def _make_download_file_task_impl(project_pk, task_pk, include_staff,
                                   get_submissions_fn: GetSubmissionsFnType,
                                   make_download_fn: MakeDownloadFnType):
     task = ag_models.DownloadTask.objects.get(pk=task_pk)
+
+    def _update_progress(progress: float) -> None:
+        task.progress = progress
+        task.save()
+        print('Updated task {} progress: {}'.format(task.pk, task.progress))
+
     try:
         project = ag_models.Project.objects.get(pk=project_pk)
         groups = _get_groups(project, include_staff)
         submissions, num_submissions = get_submissions_fn(project, groups)
         result_filename = _make_download_result_filename(project, task)
-        make_download_fn(task, submissions, num_submissions, result_filename)
+        make_download_fn(task, submissions, num_submissions, result_filename, _update_progress)
         task.result_filename = result_filename
         task.progress = 100
         task.save()
@@ -123,15 +171,183 @@ def _make_download_file_task_impl(project_pk, task_pk, include_staff,
         task.save()
 
 
+# Merges the download file segments with the given filenames (in order)
+# into a file with the given destination filename.
+MergeSegmentsFnType = Callable[[Sequence[str], str], None]
+
+# All submission files and scores downloads are split into chunks of
+# this many groups. Each chunk is generated by a separate celery task
+# (so that several workers can work on the same download) and written
+# to its own segment file. Once every chunk is finished, the segments
+# are merged into the final download file.
+_GROUPS_PER_CHUNK = 100
+
+
+def _start_chunked_download_task(project_pk, task_pk, include_staff):
+    task = ag_models.DownloadTask.objects.get(pk=task_pk)
+    try:
+        project = ag_models.Project.objects.get(pk=project_pk)
+        group_pks = [group.pk for group in _get_groups(project, include_staff)]
+        # Empty downloads get one empty chunk so that we still generate
+        # e.g. a CSV file with just the header row.
+        chunks = [
+            group_pks[i:i + _GROUPS_PER_CHUNK]
+            for i in range(0, len(group_pks), _GROUPS_PER_CHUNK)
+        ] or [[]]
+
+        task.result_filename = _make_download_result_filename(project, task)
+        task.chunk_progress = [0] * len(chunks)
+        task.save()
+    except Exception:
+        traceback.print_exc()
+        task.error_msg = traceback.format_exc()
+        task.save()
+        return
+
+    from autograder.celery import app
+    with app.connection() as connection:
+        for chunk_index, chunk_group_pks in enumerate(chunks):
+            make_download_chunk_task.apply_async(
+                (task_pk, chunk_index, chunk_group_pks), connection=connection)
+
+
+@shared_task(queue='project_downloads', acks_late=True)
+def make_download_chunk_task(task_pk, chunk_index, group_pks, *args, **kwargs):
+    """
+    Generates the segment of a chunked download that contains the
+    submissions belonging to the groups with the given pks. If this
+    was the last unfinished chunk, starts merging the segments.
+
+    If the segment has already been generated (e.g., because the worker
+    died before acknowledging this task), does not regenerate it.
+    """
+    task = ag_models.DownloadTask.objects.select_related('project__course').get(pk=task_pk)
+    # Once the merge has started, the segments may already be merged
+    # and deleted.
+    if task.has_error or task.merge_started:
+        return
+
+    try:
+        segment_filename = _get_segment_filename(task, chunk_index)
+        if task.chunk_progress[chunk_index] != 100 or not os.path.isfile(segment_filename):
+            get_submissions_fn, make_download_fn, _ = _CHUNKED_DOWNLOAD_FNS[task.download_type]
+            groups = list(task.project.groups.filter(pk__in=group_pks))
+            submissions, num_submissions = get_submissions_fn(task.project, groups)
+
+            # Write to a temporary file first so that a partially written
+            # segment is never mistaken for a finished one.
+            tmp_filename = segment_filename + '.tmp'
+            make_download_fn(
+                task, submissions, num_submissions, tmp_filename,
+                lambda progress: _update_chunk_progress(task_pk, chunk_index, progress))
+            os.replace(tmp_filename, segment_filename)
+
+        start_merge = _update_chunk_progress(task_pk, chunk_index, 100)
+    except Exception:
+        traceback.print_exc()
+        ag_models.DownloadTask.objects.filter(pk=task_pk).update(
+            error_msg=traceback.format_exc())
+        return
+
+    if start_merge:
+        from autograder.celery import app
+        merge_download_chunks_task.apply_async((task_pk,), connection=app.connection())
+
+
+def _update_chunk_progress(task_pk: int, chunk_index: int, progress: float) -> bool:
+    """
+    Records the progress of the given chunk and updates the task's
+    overall progress. Returns True if every chunk is finished and the
+    caller should start the merge. Because the merge is claimed while
+    the task is locked, this returns True at most once per task, even
+    if a finished chunk's celery task is redelivered.
+    """
+    with transaction.atomic():
+        task = ag_models.DownloadTask.objects.select_for_update().get(pk=task_pk)
+        # The merge task is responsible for the progress from here on.
+        if task.merge_started:
+            return False
+
+        task.chunk_progress[chunk_index] = int(progress)
+        # A progress of 100 means that the result is ready to download,
+        # which isn't true until the segments are merged.
+        task.progress = min(sum(task.chunk_progress) // len(task.chunk_progress), 99)
+        task.merge_started = all(chunk_progress == 100 for chunk_progress in task.chunk_progress)
+        task.save()
+
+    return task.merge_started
+
+
+@shared_task(queue='project_downloads', acks_late=True)
+def merge_download_chunks_task(task_pk, *args, **kwargs):
+    task = ag_models.DownloadTask.objects.get(pk=task_pk)
+    if task.progress == 100 or task.has_error:
+        return
+
+    try:
+        segment_filenames = [
+            _get_segment_filename(task, chunk_index)
+            for chunk_index in range(len(task.chunk_progress))
+        ]
+        _, _, merge_segments_fn = _CHUNKED_DOWNLOAD_FNS[task.download_type]
+
+        tmp_filename = task.result_filename + '.tmp'
+        merge_segments_fn(segment_filenames, tmp_filename)
+        os.replace(tmp_filename, task.result_filename)
+
+        task.progress = 100
+        task.save()
+    except Exception:
+        traceback.print_exc()
+        task.error_msg = traceback.format_exc()
+        task.save()
+        return
+
+    for filename in segment_filenames:
+        os.remove(filename)
+
+
+def _get_segment_filename(task: ag_models.DownloadTask, chunk_index: int) -> str:
+    return '{}.part{}'.format(task.result_filename, chunk_index)
+
+
+def _merge_archives(segment_filenames: Sequence[str], dest_filename: str):
+    with zipfile.ZipFile(dest_filename, 'w') as merged:
+        for segment_filename in segment_filenames:
+            with zipfile.ZipFile(segment_filename) as segment:
+                for info in segment.infolist():
+                    force_zip64 = info.file_size > zipfile.ZIP64_LIMIT
+                    with segment.open(info) as src, \
+                            merged.open(info, 'w', force_zip64=force_zip64) as dest:
+                        shutil.copyfileobj(src, dest)
+
+
+def _merge_csvs(segment_filenames: Sequence[str], dest_filename: str):
+    with open(dest_filename, 'w', newline='') as merged:
+        writer = csv.writer(merged)
+        for index, segment_filename in enumerate(segment_filenames):
+            with open(segment_filename, newline='') as segment:
+                reader = csv.reader(segment)
+                # Every segment starts with the same header row.
+                header = next(reader)
+                if index == 0:
+                    writer.writerow(header)
+                writer.writerows(reader)
+
+
 def _get_groups(project, include_staff) -> Sequence[ag_models.Group]:
-    groups = project.groups.all()
-    groups = filter(lambda group: group.submissions.count(), groups)
+    groups = project.groups.filter(
+        Exists(ag_models.Submission.objects.filter(group=OuterRef('pk'))))
     if not include_staff:
-        groups = filter(
-            lambda group: not project.course.is_staff(group.members.first()), groups)
-    groups = list(groups)
+        course = project.course
+        staff_memberships = ag_models.Group.members.through.objects.filter(
+            group=OuterRef('pk')
+        ).filter(
+            Q(user__in=course.staff.all()) | Q(user__in=course.admins.all())
+        )
+        groups = groups.exclude(Exists(staff_memberships))
 
-    return groups
+    return list(groups)
 
 
 def _make_download_result_filename(project: ag_models.project,
@@ -149,7 +365,8 @@ _PROGRESS_UPDATE_FREQUENCY = 50
 
 def _make_submission_archive(task: ag_models.DownloadTask,
                              submission_fdbks: Iterator[SubmissionResultFeedback],
-                             num_submissions, dest_filename):
+                             num_submissions, dest_filename,
+                             update_progress: UpdateProgressFnType):
     with open(dest_filename, 'wb') as archive:
         with zipfile.ZipFile(archive, 'w') as z:
             for index, fdbk in enumerate(submission_fdbks):
@@ -164,14 +381,13 @@ def _make_submission_archive(task: ag_models.DownloadTask,
                         z.write(filename, arcname=target_name)
 
                 if index % _PROGRESS_UPDATE_FREQUENCY == 0:
-                    task.progress = (index / num_submissions) * 100
-                    task.save()
-                    print('Updated task {} progress: {}'.format(task.pk, task.progress))
+                    update_progress((index / num_submissions) * 100)
 
 
 def _make_scores_csv(task: ag_models.DownloadTask,
                      submission_fdbks: Iterator[SubmissionResultFeedback],
-                     num_submissions: int, dest_filename: str):
+                     num_submissions: int, dest_filename: str,
+                     update_progress: UpdateProgressFnType):
     with open(dest_filename, 'w', newline='') as csv_file:
         project = task.project  # type: ag_models.Project
 
@@ -203,14 +419,13 @@ def _make_scores_csv(task: ag_models.DownloadTask,
             writer.writerow(row)
 
             if progress_index % _PROGRESS_UPDATE_FREQUENCY == 0:
-                task.progress = (progress_index / num_submissions) * 100
-                task.save()
-                print('Updated task {} progress: {}'.format(task.pk, task.progress))
+                update_progress((progress_index / num_submissions) * 100)
 
 
 def _make_ultimate_submission_scores_csv(task: ag_models.DownloadTask,
                                          submission_fdbks: Iterator[SubmissionResultFeedback],
-                                         num_submissions: int, dest_filename: str):
+                                         num_submissions: int, dest_filename: str,
+                                         update_progress: UpdateProgressFnType):
     project_has_handgrading = False
     if hasattr(task.project, 'handgrading_rubric'):
         project_has_handgrading = True
@@ -261,9 +476,7 @@ def _make_ultimate_submission_scores_csv(task: ag_models.DownloadTask,
             writer.writerow(row)
 
             if progress_index % _PROGRESS_UPDATE_FREQUENCY == 0:
-                task.progress = (progress_index / num_submissions) * 100
-                task.save()
-                print('Updated task {} progress: {}'.format(task.pk, task.progress))
+                update_progress((progress_index / num_submissions) * 100)
 
 
 AG_SUITE_TOTAL_TMPL = '{} Total'
@@ -318,3 +531,13 @@ def _make_test_detail_columns(submission_fdbk_dict: dict):
         row[mutation_suite_total_possible_header] = suite_fdbk['total_points_possible']
 
     return row
+
+
+_CHUNKED_DOWNLOAD_FNS: Dict[str, Tuple[GetSubmissionsFnType,
+                                       MakeDownloadFnType,
+                                       MergeSegmentsFnType]] = {
+    ag_models.DownloadType.all_submission_files: (
+        _get_all_submissions, _make_submission_archive, _merge_archives),
+    ag_models.DownloadType.all_scores: (
+        _get_all_finished_grading_submissions, _make_scores_csv, _merge_csvs),
+}
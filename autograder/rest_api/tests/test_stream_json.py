@@ -0,0 +1,114 @@
+import datetime
+import decimal
+from typing import Iterator
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.handgrading.views.handgrading_result_views import HandgradingResultPaginator
+from autograder.rest_api.stream_json import (
+    iter_queryset_in_chunks, prefetch_in_chunks, stream_json_list, stream_paginated_json_list,
+    stream_requested)
+from autograder.utils.testing import UnitTestBase
+
+
+class StreamJSONTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.items = [
+            {
+                'pk': i,
+                'name': f'spam eggé {i}',
+                'points': decimal.Decimal('1.5'),
+                'timestamp': datetime.datetime(2020, 1, 2, 3, 4, 5),
+                'nullable': None,
+                'nested': [{'pk': i}, 'str'],
+            }
+            for i in range(7)
+        ]
+
+    def test_stream_list_matches_json_renderer(self) -> None:
+        response = stream_json_list(iter(self.items))
+        self.assertTrue(response.streaming)
+        self.assertEqual('application/json', response['Content-Type'])
+        self.assertEqual(JSONRenderer().render(self.items),
+                         b''.join(response.streaming_content))
+
+    def test_stream_empty_list(self) -> None:
+        response = stream_json_list(iter([]))
+        self.assertEqual(b'[]', b''.join(response.streaming_content))
+
+    def test_stream_paginated_list_matches_paginated_response(self) -> None:
+        for query_string in ['', 'page_size=3', 'page_size=3&page=2', 'page_size=3&page=3']:
+            request = Request(APIRequestFactory().get('/?' + query_string))
+
+            paginator = HandgradingResultPaginator()
+            page = paginator.paginate_queryset(self.items, request)
+            expected = JSONRenderer().render(paginator.get_paginated_response(page).data)
+
+            paginator = HandgradingResultPaginator()
+            page = paginator.paginate_queryset(self.items, request)
+            response = stream_paginated_json_list(paginator, iter(page))
+            self.assertEqual(expected, b''.join(response.streaming_content))
+
+    def test_items_serialized_lazily(self) -> None:
+        num_items_produced = 0
+
+        def _generate_items() -> Iterator[dict]:
+            nonlocal num_items_produced
+            for item in self.items:
+                num_items_produced += 1
+                yield item
+
+        response = stream_json_list(_generate_items())
+        self.assertEqual(0, num_items_produced)
+
+        chunks = iter(response.streaming_content)
+        self.assertEqual(b'[', next(chunks))
+        next(chunks)
+        self.assertEqual(1, num_items_produced)
+
+    def test_stream_requested(self) -> None:
+        factory = APIRequestFactory()
+        self.assertTrue(stream_requested(Request(factory.get('/?stream=true'))))
+        self.assertFalse(stream_requested(Request(factory.get('/?stream=false'))))
+        self.assertFalse(stream_requested(Request(factory.get('/'))))
+
+
+class IterInChunksTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        for _ in range(5):
+            obj_build.make_group(num_members=2, project=self.project)
+
+        self.groups = self.project.groups.prefetch_related('members')
+        self.expected = [group.to_dict() for group in self.groups]
+
+    def test_iter_queryset_in_chunks(self) -> None:
+        with self.assertNumQueries(1):
+            groups = iter_queryset_in_chunks(self.groups, chunk_size=2)
+            self.assertEqual(self.expected[:2], [next(groups).to_dict() for _ in range(2)])
+
+        # One query for each chunk's groups and one for their members.
+        with self.assertNumQueries(4):
+            self.assertEqual(self.expected[2:], [group.to_dict() for group in groups])
+
+    def test_iter_queryset_in_chunks_skips_deleted_objects(self) -> None:
+        groups = iter_queryset_in_chunks(self.groups, chunk_size=2)
+        self.assertEqual(self.expected[0], next(groups).to_dict())
+
+        ag_models.Group.objects.get(pk=self.expected[3]['pk']).delete()
+        self.assertEqual(self.expected[1:3] + self.expected[4:],
+                         [group.to_dict() for group in groups])
+
+    def test_prefetch_in_chunks(self) -> None:
+        page = list(self.project.groups.all())
+        with self.assertNumQueries(3):
+            self.assertEqual(
+                self.expected,
+                [group.to_dict() for group in prefetch_in_chunks(page, 'members', chunk_size=2)])
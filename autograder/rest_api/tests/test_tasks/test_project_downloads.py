@@ -22,6 +22,7 @@ from autograder.core.submission_feedback import (
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import (
     get_submission_fdbk)
 from autograder.core.submission_feedback import MutationTestSuitePreLoader
+from autograder.rest_api.tasks import project_downloads
 from autograder.utils.testing import UnitTestBase
 
 
@@ -102,6 +103,94 @@ class DownloadSubmissionFilesTestCase(UnitTestBase):
             self.group1_submission2, self.group2_submission1, staff_submission2]
         self.do_download_submissions_test(url, most_recent_submissions)
 
+    @mock.patch('autograder.rest_api.tasks.project_downloads._CHUNK_SIZE', new=1)
+    def test_download_all_files_in_chunks(self):
+        url = reverse('all-submission-files-task', kwargs={'pk': self.project.pk})
+        self.do_download_submissions_test(
+            url, [self.group1_submission1, self.group1_submission2, self.group2_submission1])
+
+    @mock.patch('autograder.rest_api.tasks.project_downloads._CHUNK_SIZE', new=1)
+    def test_download_ultimate_submission_files_in_chunks(self):
+        url = reverse('ultimate-submission-files-task', kwargs={'pk': self.project.pk})
+        url += '?include_staff=true'
+        self.do_download_submissions_test(
+            url, [self.group1_submission2, self.group2_submission1, self.staff_submission1])
+
+    @mock.patch('autograder.rest_api.tasks.project_downloads._GROUPS_PER_CHUNK', new=1)
+    def test_download_all_files_split_into_group_chunks(self):
+        url = reverse('all-submission-files-task', kwargs={'pk': self.project.pk})
+        url += '?include_staff=true'
+        self.do_download_submissions_test(
+            url, [self.group1_submission1, self.group1_submission2,
+                  self.group2_submission1, self.staff_submission1])
+
+        task = ag_models.DownloadTask.objects.get(project=self.project)
+        self.assertEqual([100, 100, 100], task.chunk_progress)
+        self.assertFalse(os.path.exists(task.result_filename + '.part0'))
+
+    @mock.patch('autograder.rest_api.tasks.project_downloads._GROUPS_PER_CHUNK', new=1)
+    def test_finished_chunks_not_regenerated(self):
+        make_archive_mock = mock.Mock(wraps=project_downloads._make_submission_archive)
+        chunked_download_fns = {
+            ag_models.DownloadType.all_submission_files: (
+                project_downloads._get_all_submissions,
+                make_archive_mock,
+                project_downloads._merge_archives,
+            )
+        }
+        url = reverse('all-submission-files-task', kwargs={'pk': self.project.pk})
+        self.client.force_authenticate(self.admin)
+        with mock.patch.dict(project_downloads._CHUNKED_DOWNLOAD_FNS, chunked_download_fns), \
+                mock.patch.object(project_downloads.merge_download_chunks_task, 'apply_async'):
+            response = self.client.post(url)
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+        self.assertEqual(2, make_archive_mock.call_count)
+
+        task = ag_models.DownloadTask.objects.get(pk=response.data['pk'])
+        self.assertEqual([100, 100], task.chunk_progress)
+        self.assertEqual(99, task.progress)
+
+        # Simulate the second chunk's worker dying partway through.
+        task.chunk_progress[1] = 40
+        task.merge_started = False
+        task.save()
+        os.remove(task.result_filename + '.part1')
+
+        make_archive_mock.reset_mock()
+        # Chunks are made from groups in their default order.
+        groups = self.project.groups.filter(
+            pk__in=[self.student_group1.pk, self.student_group2.pk])
+        with mock.patch.dict(project_downloads._CHUNKED_DOWNLOAD_FNS, chunked_download_fns):
+            for chunk_index, group in enumerate(groups):
+                project_downloads.make_download_chunk_task(task.pk, chunk_index, [group.pk])
+        make_archive_mock.assert_called_once()
+
+        task.refresh_from_db()
+        self.assertEqual(100, task.progress)
+        with open(task.result_filename, 'rb') as result:
+            self._check_zip_content(
+                result,
+                self._get_expected_filenames(
+                    [self.group1_submission1, self.group1_submission2, self.group2_submission1]))
+
+    @mock.patch('autograder.rest_api.tasks.project_downloads._GROUPS_PER_CHUNK', new=1)
+    def test_redelivered_chunk_does_not_start_second_merge(self):
+        url = reverse('all-submission-files-task', kwargs={'pk': self.project.pk})
+        self.do_download_submissions_test(
+            url, [self.group1_submission1, self.group1_submission2, self.group2_submission1])
+
+        task = ag_models.DownloadTask.objects.get(project=self.project)
+        self.assertTrue(task.merge_started)
+        with mock.patch.object(project_downloads.merge_download_chunks_task,
+                               'apply_async') as merge_mock:
+            project_downloads.make_download_chunk_task(task.pk, 0, [self.student_group1.pk])
+            self.assertFalse(project_downloads._update_chunk_progress(task.pk, 0, 100))
+        merge_mock.assert_not_called()
+
+        task.refresh_from_db()
+        self.assertEqual(100, task.progress)
+        self.assertTrue(os.path.isfile(task.result_filename))
+
     def test_download_all_submission_files_no_submissions(self):
         ag_models.Submission.objects.all().delete()
 
@@ -900,6 +989,24 @@ class DownloadAllSubmissionGradesTestCase(UnitTestBase):
         url = reverse('all-submission-scores-task', kwargs={'pk': self.project.pk})
         self.do_download_scores_test(url, self.project, [])
 
+    @mock.patch('autograder.rest_api.tasks.project_downloads._CHUNK_SIZE', new=2)
+    def test_download_all_scores_in_chunks(self):
+        url = reverse('all-submission-scores-task', kwargs={'pk': self.project.pk})
+        url += '?include_staff=true'
+        self.do_download_scores_test(
+            url, self.project,
+            [self.group1_submission1_best, self.group1_submission2,
+             self.group2_only_submission, self.staff_submission1])
+
+    @mock.patch('autograder.rest_api.tasks.project_downloads._GROUPS_PER_CHUNK', new=1)
+    def test_download_all_scores_split_into_group_chunks(self):
+        url = reverse('all-submission-scores-task', kwargs={'pk': self.project.pk})
+        url += '?include_staff=true'
+        self.do_download_scores_test(
+            url, self.project,
+            [self.group1_submission1_best, self.group1_submission2,
+             self.group2_only_submission, self.staff_submission1])
+
     def test_include_staff_all_scores(self):
         url = reverse('all-submission-scores-task', kwargs={'pk': self.project.pk})
         url += '?include_staff=true'
@@ -1,3 +1,5 @@
+import functools
+
 from django.core.cache import cache
 from django.urls import reverse
 
@@ -185,7 +187,9 @@ class CachedSubmissionResultInvalidationTestCase(UnitTestBase):
         self.ag_test_suite = obj_build.make_ag_test_suite(self.project)
         self.ag_test_case = obj_build.make_ag_test_case(self.ag_test_suite)
 
-        self.key = submission_fdbk_cache_key(
+        # The cache key changes when the results cache is cleared.
+        self.get_key = functools.partial(
+            submission_fdbk_cache_key,
             project_pk=self.project.pk, submission_pk=self.submission.pk)
 
         get_cached_submission_feedback(
@@ -201,25 +205,25 @@ class CachedSubmissionResultInvalidationTestCase(UnitTestBase):
     def test_set_order_invalidates_cached_submission_result_fdbk(self):
         url = reverse('ag_test_case_order',
                       kwargs={'ag_test_suite_pk': self.ag_test_suite.pk})
-        with self.assert_cache_key_invalidated(self.key):
+        with self.assert_cache_key_invalidated(self.get_key):
             response = self.client.put(url, [self.ag_test_case.pk])
             self.assertEqual(status.HTTP_200_OK, response.status_code)
 
     def test_update_invalidates_cached_submission_result_fdbk(self):
         url = reverse('ag-test-case-detail', kwargs={'pk': self.ag_test_case.pk})
-        with self.assert_cache_key_invalidated(self.key):
+        with self.assert_cache_key_invalidated(self.get_key):
             response = self.client.patch(url, {'name': 'WAAAA'})
             self.assertEqual(status.HTTP_200_OK, response.status_code)
 
     def test_delete_invalidates_cached_submission_result_fdbk(self):
         url = reverse('ag-test-case-detail', kwargs={'pk': self.ag_test_case.pk})
-        with self.assert_cache_key_invalidated(self.key):
+        with self.assert_cache_key_invalidated(self.get_key):
             response = self.client.delete(url)
             self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
 
     def test_create_does_not_invalidate_cache(self):
         url = reverse('ag_test_cases', kwargs={'ag_test_suite_pk': self.ag_test_suite.pk})
-        self.assertIsNotNone(cache.get(self.key))
+        self.assertIsNotNone(cache.get(self.get_key()))
         response = self.client.post(url, {'name': 'Wee'})
         self.assertEqual(status.HTTP_201_CREATED, response.status_code)
-        self.assertIsNotNone(cache.get(self.key))
+        self.assertIsNotNone(cache.get(self.get_key()))
@@ -69,6 +69,25 @@ class ListGroupsTestCase(AGViewTestBase):
         self.do_list_objects_test(
             self.client, staff, self.url, self.build_groups(self.project), check_order=True)
 
+    def test_admin_list_groups_streamed(self):
+        self.build_groups(self.project)
+        admin = obj_build.make_admin_user(self.project.course)
+        self.client.force_authenticate(admin)
+
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        streamed_response = self.client.get(self.url + '?stream=true')
+        self.assertEqual(status.HTTP_200_OK, streamed_response.status_code)
+        self.assertTrue(streamed_response.streaming)
+        self.assertEqual(response.content, b''.join(streamed_response.streaming_content))
+
+    def test_student_list_groups_streamed_permission_denied(self):
+        self.project.validate_and_update(visible_to_students=True)
+        student = obj_build.make_student_user(self.project.course)
+        self.build_groups(self.project)
+        self.do_permission_denied_get_test(self.client, student, self.url + '?stream=true')
+
     def test_student_list_groups_permission_denied(self):
         self.project.validate_and_update(visible_to_students=True)
         student = obj_build.make_student_user(self.project.course)
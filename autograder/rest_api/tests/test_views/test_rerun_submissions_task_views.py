@@ -13,9 +13,11 @@ from autograder.core.submission_feedback import AGTestPreLoader, SubmissionResul
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import \
     get_submission_fdbk
 from autograder.grading_tasks import tasks
+from autograder.grading_tasks.tasks.ag_test_fingerprints import (
+    AGTestFingerprinter, get_evaluation_fingerprint)
 from autograder.grading_tasks.tasks.rerun_submission import SubmissionRerunner, rerun_submission
 from autograder.rest_api.tests.test_views.ag_view_test_base import AGViewTestBase
-from autograder.utils.testing import TransactionUnitTestBase
+from autograder.utils.testing import TransactionUnitTestBase, UnitTestBase
 
 
 class _MockException(Exception):
@@ -413,10 +415,11 @@ class CreateAndGetRerunSubmissionsTasksTestCase(AGViewTestBase):
             self.submission1, ag_models.FeedbackCategory.normal, AGTestPreLoader(self.project))
         get_cached_submission_feedback(self.submission1, fdbk)
 
-        key = submission_fdbk_cache_key(
-            project_pk=self.project.pk, submission_pk=self.submission1.pk)
+        def get_key() -> str:
+            return submission_fdbk_cache_key(
+                project_pk=self.project.pk, submission_pk=self.submission1.pk)
 
-        with self.assert_cache_key_invalidated(key):
+        with self.assert_cache_key_invalidated(get_key):
             self.do_rerun_submissions_test_case({}, (self.submission1, self.total_points_possible))
 
     def do_rerun_submissions_test_case(
@@ -665,3 +668,127 @@ class RejectSubmissionTestCase(TransactionUnitTestBase):
                 ag_test_suite_result__submission=submission
             ).count()
         )
+
+
+@mock.patch('autograder.grading_tasks.tasks.rerun_submission.grade_ag_test_suite_impl')
+class RerunAffectedOnlyTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.submission = obj_build.make_finished_submission()
+        self.project = self.submission.group.project
+        self.ag_test_suite = obj_build.make_ag_test_suite(self.project)
+
+        self.ag_test_case_1 = obj_build.make_ag_test_case(self.ag_test_suite)
+        self.ag_test_cmd_1 = obj_build.make_full_ag_test_command(self.ag_test_case_1)
+        self.cmd_result_1 = obj_build.make_correct_ag_test_command_result(
+            self.ag_test_cmd_1, submission=self.submission)
+
+        self.ag_test_case_2 = obj_build.make_ag_test_case(self.ag_test_suite)
+        self.ag_test_cmd_2 = obj_build.make_full_ag_test_command(self.ag_test_case_2)
+        self.cmd_result_2 = obj_build.make_correct_ag_test_command_result(
+            self.ag_test_cmd_2,
+            ag_test_case_result=ag_models.AGTestCaseResult.objects.validate_and_create(
+                ag_test_suite_result=self.cmd_result_1.ag_test_case_result.ag_test_suite_result,
+                ag_test_case=self.ag_test_case_2))
+
+        fingerprinter = AGTestFingerprinter(self.ag_test_suite)
+        for cmd_result in self.cmd_result_1, self.cmd_result_2:
+            ag_models.AGTestCommandResult.objects.filter(pk=cmd_result.pk).update(
+                **fingerprinter.get_fingerprints(cmd_result.ag_test_command))
+
+    def test_nothing_changed_nothing_rerun(self, grade_suite_mock) -> None:
+        rerun_task = self._rerun()
+        grade_suite_mock.assert_not_called()
+        self.assertEqual(100, rerun_task.progress)
+
+    def test_expected_output_changed_output_rechecked(self, grade_suite_mock) -> None:
+        self.ag_test_cmd_1.validate_and_update(expected_stdout_text='new expected output')
+
+        self._rerun()
+        grade_suite_mock.assert_not_called()
+
+        self.cmd_result_1.refresh_from_db()
+        self.assertFalse(self.cmd_result_1.stdout_correct)
+        self.assertTrue(self.cmd_result_1.return_code_correct)
+        self.assertTrue(self.cmd_result_1.stderr_correct)
+        self.assertEqual(get_evaluation_fingerprint(self.ag_test_cmd_1),
+                         self.cmd_result_1.evaluation_fingerprint)
+
+        self.cmd_result_2.refresh_from_db()
+        self.assertTrue(self.cmd_result_2.stdout_correct)
+
+        # ag_test_cmd_1 loses 2 points for correct stdout and gets a
+        # 2 point deduction.
+        self.submission.refresh_from_db()
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max)
+        self.assertEqual(8, fdbk.total_points)
+
+    def test_expected_output_no_longer_checked(self, grade_suite_mock) -> None:
+        self.ag_test_cmd_1.validate_and_update(
+            expected_stdout_source=ag_models.ExpectedOutputSource.none)
+
+        self._rerun()
+        grade_suite_mock.assert_not_called()
+
+        self.cmd_result_1.refresh_from_db()
+        self.assertIsNone(self.cmd_result_1.stdout_correct)
+
+    def test_command_changed_affected_test_case_rerun(self, grade_suite_mock) -> None:
+        self.ag_test_cmd_2.validate_and_update(cmd='echo egg')
+
+        self._rerun()
+        grade_suite_mock.assert_called_once_with(
+            self.ag_test_suite, self.submission, self.submission.group, self.ag_test_case_2.pk)
+
+    def test_suite_setup_changed_all_test_cases_rerun(self, grade_suite_mock) -> None:
+        self.ag_test_suite.validate_and_update(setup_suite_cmd='make')
+
+        self._rerun()
+        grade_suite_mock.assert_called_once_with(
+            self.ag_test_suite, self.submission, self.submission.group,
+            self.ag_test_case_1.pk, self.ag_test_case_2.pk)
+
+    def test_results_missing_test_cases_rerun(self, grade_suite_mock) -> None:
+        ag_test_case_3 = obj_build.make_ag_test_case(self.ag_test_suite)
+        obj_build.make_full_ag_test_command(ag_test_case_3)
+        obj_build.make_full_ag_test_command(self.ag_test_case_2)
+
+        self._rerun()
+        grade_suite_mock.assert_called_once_with(
+            self.ag_test_suite, self.submission, self.submission.group,
+            self.ag_test_case_2.pk, ag_test_case_3.pk)
+
+    def test_results_without_fingerprints_rerun(self, grade_suite_mock) -> None:
+        ag_models.AGTestCommandResult.objects.filter(pk=self.cmd_result_1.pk).update(
+            execution_fingerprint='', evaluation_fingerprint='')
+
+        self._rerun()
+        grade_suite_mock.assert_called_once_with(
+            self.ag_test_suite, self.submission, self.submission.group, self.ag_test_case_1.pk)
+
+    def test_only_requested_test_cases_considered(self, grade_suite_mock) -> None:
+        self.ag_test_cmd_1.validate_and_update(cmd='echo egg')
+        self.ag_test_cmd_2.validate_and_update(cmd='echo egg')
+
+        self._rerun(
+            rerun_all_ag_test_suites=False,
+            ag_test_suite_data={str(self.ag_test_suite.pk): [self.ag_test_case_1.pk]})
+        grade_suite_mock.assert_called_once_with(
+            self.ag_test_suite, self.submission, self.submission.group, self.ag_test_case_1.pk)
+
+    def test_rerun_affected_only_false_everything_rerun(self, grade_suite_mock) -> None:
+        self._rerun(rerun_affected_only=False)
+        grade_suite_mock.assert_called_once_with(
+            self.ag_test_suite, self.submission, self.submission.group)
+
+    def _rerun(self, **rerun_task_kwargs) -> ag_models.RerunSubmissionsTask:
+        rerun_task = ag_models.RerunSubmissionsTask.objects.validate_and_create(
+            project=self.project,
+            creator=obj_build.make_user(),
+            **{'rerun_affected_only': True, **rerun_task_kwargs}
+        )
+        SubmissionRerunner(self.submission.pk, rerun_task.pk).rerun_submission()
+
+        rerun_task.refresh_from_db()
+        self.assertEqual('', rerun_task.error_msg)
+        return rerun_task
@@ -1,3 +1,6 @@
+import functools
+from unittest import mock
+
 from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
@@ -173,6 +176,39 @@ class GetUpdateDeleteMutationTestSuiteTestCase(AGViewTestBase):
             self.mutation_suite, self.client, staff, self.url)
 
 
+class ClearBuggyImplResultsCacheTestCase(AGViewTestBase):
+    def setUp(self):
+        super().setUp()
+        self.mutation_suite = obj_build.make_mutation_test_suite()
+        self.course = self.mutation_suite.project.course
+
+        self.client = APIClient()
+        self.url = reverse('mutation-test-suite-buggy-impl-results-cache',
+                           kwargs={'pk': self.mutation_suite.pk})
+
+    def test_admin_clear_cache(self):
+        [admin] = obj_build.make_admin_users(self.course, 1)
+        self.client.force_authenticate(admin)
+
+        with mock.patch('autograder.rest_api.views.mutation_test_suite_views'
+                        '.clear_buggy_impl_results_cache') as mock_clear_cache:
+            response = self.client.delete(self.url)
+
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        mock_clear_cache.assert_called_once_with(self.mutation_suite.pk)
+
+    def test_non_admin_clear_cache_permission_denied(self):
+        [staff] = obj_build.make_staff_users(self.course, 1)
+        self.client.force_authenticate(staff)
+
+        with mock.patch('autograder.rest_api.views.mutation_test_suite_views'
+                        '.clear_buggy_impl_results_cache') as mock_clear_cache:
+            response = self.client.delete(self.url)
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+        mock_clear_cache.assert_not_called()
+
+
 class CachedSubmissionResultInvalidationTestCase(AGViewTestBase):
     def setUp(self):
         super().setUp()
@@ -181,7 +217,9 @@ class CachedSubmissionResultInvalidationTestCase(AGViewTestBase):
         self.project = self.submission.group.project
         self.mutation_test_suite = obj_build.make_mutation_test_suite(self.project)
 
-        self.key = submission_fdbk_cache_key(
+        # The cache key changes when the results cache is cleared.
+        self.get_key = functools.partial(
+            submission_fdbk_cache_key,
             project_pk=self.project.pk, submission_pk=self.submission.pk)
 
         get_cached_submission_feedback(
@@ -196,25 +234,25 @@ class CachedSubmissionResultInvalidationTestCase(AGViewTestBase):
 
     def test_set_order_invalidates_cached_submission_result_fdbk(self):
         url = reverse('mutation_test_suite_order', kwargs={'project_pk': self.project.pk})
-        with self.assert_cache_key_invalidated(self.key):
+        with self.assert_cache_key_invalidated(self.get_key):
             response = self.client.put(url, [self.mutation_test_suite.pk])
             self.assertEqual(status.HTTP_200_OK, response.status_code)
 
     def test_update_invalidates_cached_submission_result_fdbk(self):
         url = reverse('student-test-suite-detail', kwargs={'pk': self.mutation_test_suite.pk})
-        with self.assert_cache_key_invalidated(self.key):
+        with self.assert_cache_key_invalidated(self.get_key):
             response = self.client.patch(url, {'name': 'WAAAA'})
             self.assertEqual(status.HTTP_200_OK, response.status_code)
 
     def test_delete_invalidates_cached_submission_result_fdbk(self):
         url = reverse('student-test-suite-detail', kwargs={'pk': self.mutation_test_suite.pk})
-        with self.assert_cache_key_invalidated(self.key):
+        with self.assert_cache_key_invalidated(self.get_key):
             response = self.client.delete(url)
             self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
 
     def test_create_does_not_invalidate_cache(self):
         url = reverse('mutation_test_suites', kwargs={'project_pk': self.project.pk})
-        self.assertIsNotNone(cache.get(self.key))
+        self.assertIsNotNone(cache.get(self.get_key()))
         response = self.client.post(url, {'name': 'Wee'})
         self.assertEqual(status.HTTP_201_CREATED, response.status_code)
-        self.assertIsNotNone(cache.get(self.key))
+        self.assertIsNotNone(cache.get(self.get_key()))
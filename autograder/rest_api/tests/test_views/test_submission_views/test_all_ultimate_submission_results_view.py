@@ -1,5 +1,7 @@
 import datetime
+import json
 from typing import Optional
+from unittest import mock
 from urllib.parse import urlencode
 
 from django.contrib.auth.models import User
@@ -288,6 +290,42 @@ class AllUltimateSubmissionResultsViewTestCase(UnitTestBase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertSequenceEqual(page_two, response.data['results'])
 
+    @mock.patch('autograder.rest_api.views.submission_views'
+                '.all_ultimate_submission_results_view.DEFAULT_CHUNK_SIZE', new=1)
+    def test_get_results_streamed(self):
+        for i in range(3):
+            self._make_group_with_submissions(2)
+
+        admin = obj_build.make_admin_user(self.course)
+        self.client.force_authenticate(admin)
+
+        for page in 1, 2:
+            query_params = {
+                'full_results': 'true',
+                'groups_per_page': 2,
+                'page': page,
+            }
+            response = self.client.get(f'{self.base_url}?{urlencode(query_params)}')
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+            query_params['stream'] = 'true'
+            streamed_response = self.client.get(f'{self.base_url}?{urlencode(query_params)}')
+            self.assertEqual(status.HTTP_200_OK, streamed_response.status_code)
+            self.assertTrue(streamed_response.streaming)
+
+            streamed_content = b''.join(streamed_response.streaming_content)
+            self.assertEqual(response.content, streamed_content)
+            self.assertEqual(
+                response.data['count'], json.loads(streamed_content)['count'])
+
+    def test_non_staff_get_results_streamed_permission_denied(self):
+        student_group1, student_submission1 = self._make_group_with_submissions(1)
+        self.client.force_authenticate(student_group1.members.first())
+        response = self.client.get(f'{self.base_url}?stream=true')
+
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+        self.assertFalse(response.streaming)
+
     def test_non_staff_get_results_permission_denied(self):
         student_group1, student_submission1 = self._make_group_with_submissions(1)
         self.client.force_authenticate(student_group1.members.first())
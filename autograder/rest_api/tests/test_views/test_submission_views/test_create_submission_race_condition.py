@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.test import tag
 from django.urls import reverse
 from rest_framework import status
@@ -17,6 +19,13 @@ class RaceConditionTestCase(test_ut.TransactionUnitTestBase):
         super().setUp()
         self.client = APIClient()
 
+        # Submissions created by these tests shouldn't be graded.
+        patcher = mock.patch(
+            'autograder.rest_api.views.submission_views.submission_views'
+            '.queue_submission_on_commit')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_simultaneous_create_race_condition_prevented(self) -> None:
         project = obj_build.make_project()
         group = obj_build.make_group(project=project, members_role=obj_build.UserRole.admin)
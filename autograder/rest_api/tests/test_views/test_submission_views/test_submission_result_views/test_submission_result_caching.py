@@ -1,14 +1,22 @@
 from unittest import mock
 
+from django.core.cache import cache
 from django.db.models import signals
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 import autograder.core.models as ag_models
 import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.caching import (
+    delete_cached_submission_result, get_cached_submission_feedback,
+    get_submission_results_cache_stats, reset_submission_results_cache_stats,
+    submission_fdbk_cache_key
+)
 from autograder.core.models.ag_test.ag_test_command import AGTestCommandFeedbackConfig
 from autograder.core.submission_feedback import update_denormalized_ag_test_results
+from autograder.core.tasks import log_submission_results_cache_stats
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import \
     get_submission_fdbk
 from autograder.grading_tasks.tasks import mark_submission_as_finished
@@ -18,6 +26,8 @@ from autograder.utils.testing import UnitTestBase
 # Disable cache invalidation from editing commands.
 @mock.patch('autograder.rest_api.signals.clear_submission_results_cache',
             new=lambda *args, **kwargs: None)
+@mock.patch('autograder.core.caching.get_test_config_version',
+            new=lambda project_pk: 'unchanged')
 class SubmissionResultsCachingTestCase(UnitTestBase):
     def setUp(self):
         super().setUp()
@@ -64,7 +74,7 @@ class SubmissionResultsCachingTestCase(UnitTestBase):
                                              ag_models.FeedbackCategory.normal).to_dict(),
                          response.data)
 
-    def test_non_normal_feedback_results_not_cached(self):
+    def test_non_normal_feedback_results_cached(self):
         cmd = obj_build.make_full_ag_test_command(
             normal_fdbk_config=AGTestCommandFeedbackConfig.max_fdbk_config(),
             ultimate_submission_fdbk_config=AGTestCommandFeedbackConfig.max_fdbk_config(),
@@ -81,23 +91,18 @@ class SubmissionResultsCachingTestCase(UnitTestBase):
         self.client.force_authenticate(admin_group.members.first())
 
         for fdbk_category in ag_models.FeedbackCategory:
-            if fdbk_category == ag_models.FeedbackCategory.normal:
-                continue
-
             url = self._make_url(submission, fdbk_category=fdbk_category)
             old_response = self.client.get(url)
-            self.assertEqual(
-                get_submission_fdbk(submission, fdbk_category).to_dict(),
-                old_response.data)
+            old_results = get_submission_fdbk(submission, fdbk_category).to_dict()
+            self.assertEqual(old_results, old_response.data)
 
             cmd.validate_and_update(
                 points_for_correct_return_code=cmd.points_for_correct_return_code + 1)
 
             new_response = self.client.get(url)
-            self.assertNotEqual(old_response.data, new_response.data)
-
-            self.assertEqual(get_submission_fdbk(submission, fdbk_category).to_dict(),
-                             new_response.data)
+            self.assertEqual(old_results, new_response.data)
+            self.assertNotEqual(get_submission_fdbk(submission, fdbk_category).to_dict(),
+                                new_response.data)
 
     # In autograder.grading_tasks.tasks.grade_submission.mark_submission_as_finished,
     # the cached submission results will be cleared. This allows us to cache results
@@ -353,3 +358,136 @@ class SubmissionResultsCachingTestCase(UnitTestBase):
             url += '&use_cache=false'
 
         return url
+
+
+class SubmissionResultsCacheInvalidationTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.cmd = obj_build.make_full_ag_test_command(
+            staff_viewer_fdbk_config=AGTestCommandFeedbackConfig.max_fdbk_config())
+        self.project = self.cmd.ag_test_case.ag_test_suite.project
+        self.submission = obj_build.make_finished_submission(
+            group=obj_build.make_group(project=self.project))
+        self.cmd_result = obj_build.make_correct_ag_test_command_result(
+            self.cmd, submission=self.submission)
+        self.submission = update_denormalized_ag_test_results(self.submission.pk)
+
+        reset_submission_results_cache_stats()
+
+    # Only the test config version should invalidate the cached results.
+    @mock.patch('autograder.rest_api.signals.clear_submission_results_cache',
+                new=lambda *args, **kwargs: None)
+    def test_test_config_change_invalidates_cached_results(self):
+        old_results = self._get_cached_results()
+        self.assertEqual(old_results, self._get_cached_results())
+
+        self.cmd.validate_and_update(
+            points_for_correct_return_code=self.cmd.points_for_correct_return_code + 1)
+        new_results = self._get_cached_results()
+        self.assertNotEqual(old_results, new_results)
+        self.assertEqual(self._get_fresh_results(), new_results)
+
+    def test_grading_status_change_invalidates_cached_results(self):
+        self.submission.status = ag_models.Submission.GradingStatus.waiting_for_deferred
+        self.submission.save()
+        old_results = self._get_cached_results()
+
+        self.cmd_result.return_code_correct = False
+        self.cmd_result.save()
+        self.submission = update_denormalized_ag_test_results(self.submission.pk)
+        self.assertEqual(old_results, self._get_cached_results())
+
+        self.submission.status = ag_models.Submission.GradingStatus.finished_grading
+        self.submission.save()
+        new_results = self._get_cached_results()
+        self.assertNotEqual(old_results, new_results)
+        self.assertEqual(self._get_fresh_results(), new_results)
+
+    def test_submission_being_graded_not_cached(self):
+        self.submission.status = ag_models.Submission.GradingStatus.being_graded
+        self.submission.save()
+        self._get_cached_results()
+        self.assertIsNone(cache.get(self._cache_key()))
+
+    def test_totals_only_cached_separately(self):
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.staff_viewer)
+        totals = get_cached_submission_feedback(self.submission, fdbk, totals_only=True)
+        self.assertEqual(
+            {
+                'total_points': str(fdbk.total_points),
+                'total_points_possible': str(fdbk.total_points_possible),
+            },
+            totals
+        )
+        self.assertIsNotNone(cache.get(self._cache_key(totals_only=True)))
+        self.assertIsNone(cache.get(self._cache_key()))
+
+        self.assertEqual(fdbk.to_dict(), self._get_cached_results())
+        self.assertIsNotNone(cache.get(self._cache_key()))
+
+        delete_cached_submission_result(self.submission)
+        self.assertIsNone(cache.get(self._cache_key(totals_only=True)))
+        self.assertIsNone(cache.get(self._cache_key()))
+
+    @override_settings(SUBMISSION_RESULTS_CACHE_STATS=True)
+    def test_cache_hit_ratio_counters(self):
+        self._get_cached_results()
+        self._get_cached_results()
+        self._get_cached_results()
+
+        stats = get_submission_results_cache_stats()
+        self.assertEqual(
+            {'hits': 2, 'misses': 1, 'hit_ratio': 2 / 3},
+            stats[ag_models.FeedbackCategory.staff_viewer.value])
+        self.assertEqual(
+            {'hits': 0, 'misses': 0, 'hit_ratio': None},
+            stats[ag_models.FeedbackCategory.normal.value])
+
+        reset_submission_results_cache_stats()
+        self.assertEqual(
+            {'hits': 0, 'misses': 0, 'hit_ratio': None},
+            get_submission_results_cache_stats()[ag_models.FeedbackCategory.staff_viewer.value])
+
+    def test_cache_lookups_not_counted_when_stats_disabled(self):
+        with override_settings(SUBMISSION_RESULTS_CACHE_STATS=False), \
+                mock.patch.object(cache, 'incr') as incr_mock:
+            self._get_cached_results()
+            self._get_cached_results()
+
+        incr_mock.assert_not_called()
+        self.assertEqual(
+            {'hits': 0, 'misses': 0, 'hit_ratio': None},
+            get_submission_results_cache_stats()[ag_models.FeedbackCategory.staff_viewer.value])
+
+    @override_settings(SUBMISSION_RESULTS_CACHE_STATS=True)
+    def test_log_cache_stats_task(self):
+        self._get_cached_results()
+        self._get_cached_results()
+
+        with self.assertLogs('autograder.core.tasks', 'INFO') as logs:
+            log_submission_results_cache_stats()
+
+        self.assertIn(
+            'INFO:autograder.core.tasks:submission results cache '
+            f'({ag_models.FeedbackCategory.staff_viewer.value}): '
+            "{'hits': 1, 'misses': 1, 'hit_ratio': 0.5}",
+            logs.output)
+        self.assertEqual(
+            {'hits': 0, 'misses': 0, 'hit_ratio': None},
+            get_submission_results_cache_stats()[ag_models.FeedbackCategory.staff_viewer.value])
+
+    def _get_cached_results(self) -> dict:
+        return get_cached_submission_feedback(
+            self.submission,
+            get_submission_fdbk(self.submission, ag_models.FeedbackCategory.staff_viewer))
+
+    def _get_fresh_results(self) -> dict:
+        return get_submission_fdbk(
+            self.submission, ag_models.FeedbackCategory.staff_viewer).to_dict()
+
+    def _cache_key(self, totals_only: bool = False) -> str:
+        return submission_fdbk_cache_key(
+            project_pk=self.project.pk,
+            submission_pk=self.submission.pk,
+            fdbk_category=ag_models.FeedbackCategory.staff_viewer,
+            totals_only=totals_only)
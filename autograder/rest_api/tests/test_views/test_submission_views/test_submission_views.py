@@ -1558,6 +1558,20 @@ class ListSubmissionsWithResultsTestCase(AGViewTestBase):
         self.assertEqual(self.ag_test_cmd.ultimate_submission_fdbk_config.to_dict(),
                          self._get_cmd_result(response.data[1])['fdbk_settings'])
 
+    def test_student_get_submissions_streamed(self) -> None:
+        url = reverse('list-submissions-with-results',
+                      kwargs={'pk': self.student_group.pk})
+
+        self.client.force_authenticate(self.student_group.members.first())
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        streamed_response = self.client.get(url + '?stream=true')
+        self.assertEqual(status.HTTP_200_OK, streamed_response.status_code)
+        self.assertTrue(streamed_response.streaming)
+        self.assertEqual('application/json', streamed_response['Content-Type'])
+        self.assertEqual(response.content, b''.join(streamed_response.streaming_content))
+
     def _compare_submission_data(self, submissions: Iterable[ag_models.Submission], response):
         self.assertEqual(
             [utils.exclude_dict(submission.to_dict(), 'results') for submission in submissions],
@@ -196,6 +196,9 @@ urlpatterns = [
         views.MutationTestSuiteOrderView.as_view(), name='mutation_test_suite_order'),
     path('mutation_test_suites/<int:pk>/', views.MutationTestSuiteDetailView.as_view(),
          name='student-test-suite-detail'),
+    path('mutation_test_suites/<int:pk>/buggy_impl_results_cache/',
+         views.ClearBuggyImplResultsCacheView.as_view(),
+         name='mutation-test-suite-buggy-impl-results-cache'),
 
     path('projects/<int:project_pk>/rerun_submissions_tasks/',
          views.RerunSubmissionsTaskListCreateView.as_view(),
@@ -16,7 +16,8 @@ from .group_invitation_views import (AcceptGroupInvitationView, GroupInvitationD
                                      ListCreateGroupInvitationView)
 from .group_views import (CreateSoloGroupView, GroupDetailView, GroupUltimateSubmissionView,
                           ListCreateGroupsView, MergeGroupsView)
-from .mutation_test_suite_views import (MutationTestSuiteDetailView,
+from .mutation_test_suite_views import (ClearBuggyImplResultsCacheView,
+                                        MutationTestSuiteDetailView,
                                         MutationTestSuiteListCreateView,
                                         MutationTestSuiteOrderView)
 from .oauth2callback import oauth2_callback
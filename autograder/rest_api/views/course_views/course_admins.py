@@ -6,7 +6,7 @@ from rest_framework import exceptions, response, status
 
 import autograder.core.models as ag_models
 import autograder.rest_api.permissions as ag_permissions
-from autograder.core.models.course import clear_cached_user_roles
+from autograder.core.models.course import refresh_cached_user_roles
 from autograder.rest_api.schema import (APITags, CustomViewSchema, as_array_content_obj,
                                         as_schema_ref)
 from autograder.rest_api.serialize_user import serialize_user
@@ -92,7 +92,7 @@ class CourseAdminViewSet(NestedModelView):
         course = self.get_object()
         self.add_admins(course, request.data['new_admins'])
 
-        clear_cached_user_roles(course.pk)
+        refresh_cached_user_roles(course.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
     @transaction.atomic()
@@ -101,7 +101,7 @@ class CourseAdminViewSet(NestedModelView):
         course = self.get_object()
         self.remove_admins(course, request.data['remove_admins'])
 
-        clear_cached_user_roles(course.pk)
+        refresh_cached_user_roles(course.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
     def add_admins(self, course: ag_models.Course, usernames):
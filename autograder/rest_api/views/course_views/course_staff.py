@@ -5,7 +5,7 @@ from rest_framework import response, status
 
 import autograder.core.models as ag_models
 import autograder.rest_api.permissions as ag_permissions
-from autograder.core.models.course import clear_cached_user_roles
+from autograder.core.models.course import refresh_cached_user_roles
 from autograder.rest_api.schema import (APITags, CustomViewSchema, as_array_content_obj,
                                         as_schema_ref)
 from autograder.rest_api.serialize_user import serialize_user
@@ -89,7 +89,7 @@ class CourseStaffViewSet(NestedModelView):
         course = self.get_object()
         self.add_staff(course, request.data['new_staff'])
 
-        clear_cached_user_roles(course.pk)
+        refresh_cached_user_roles(course.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
     @transaction.atomic()
@@ -98,7 +98,7 @@ class CourseStaffViewSet(NestedModelView):
         course = self.get_object()
         self.remove_staff(course, request.data['remove_staff'])
 
-        clear_cached_user_roles(course.pk)
+        refresh_cached_user_roles(course.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
     def add_staff(self, course, usernames):
@@ -5,7 +5,7 @@ from rest_framework import response, status
 
 import autograder.core.models as ag_models
 import autograder.rest_api.permissions as ag_permissions
-from autograder.core.models.course import clear_cached_user_roles
+from autograder.core.models.course import refresh_cached_user_roles
 from autograder.rest_api.schema import (APITags, CustomViewSchema, as_array_content_obj,
                                         as_schema_ref)
 from autograder.rest_api.serialize_user import serialize_user
@@ -114,7 +114,7 @@ class CourseStudentsViewSet(NestedModelView):
         course = self.get_object()
         self.add_students(course, request.data['new_students'])
 
-        clear_cached_user_roles(course.pk)
+        refresh_cached_user_roles(course.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
     @transaction.atomic()
@@ -131,7 +131,7 @@ class CourseStudentsViewSet(NestedModelView):
         course = self.get_object()
         course.students.set(new_roster, clear=True)
 
-        clear_cached_user_roles(course.pk)
+        refresh_cached_user_roles(course.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
     @transaction.atomic()
@@ -140,7 +140,7 @@ class CourseStudentsViewSet(NestedModelView):
         course = self.get_object()
         self.remove_students(course, request.data['remove_students'])
 
-        clear_cached_user_roles(course.pk)
+        refresh_cached_user_roles(course.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
     def add_students(self, course: ag_models.Course, usernames):
@@ -19,6 +19,8 @@ from autograder.core.models.get_ultimate_submissions import get_ultimate_submiss
 from autograder.rest_api import permissions as ag_permissions
 from autograder.rest_api.schema import (AGListViewSchemaMixin, AGRetrieveViewSchemaMixin, APITags,
                                         CustomViewSchema, RequestBodyObject, as_content_obj)
+from autograder.rest_api.stream_json import (iter_queryset_in_chunks, stream_json_list,
+                                             stream_requested)
 from autograder.rest_api.views.ag_model_views import (AGModelAPIView, AGModelDetailView,
                                                       NestedModelView,
                                                       convert_django_validation_error,
@@ -50,6 +52,9 @@ class _ListCreateGroupSchema(AGListViewSchemaMixin, CustomViewSchema):
 
 class ListCreateGroupsView(NestedModelView):
     schema = _ListCreateGroupSchema([APITags.groups], api_class=ag_models.Group, data={
+        'GET': {
+            'parameters': [{'$ref': '#/components/parameters/stream'}],
+        },
         'POST': {
             'operation_id': 'createGroup',
             'request': _MEMBER_NAMES_REQUEST_BODY,
@@ -79,12 +84,18 @@ class ListCreateGroupsView(NestedModelView):
             manager = manager.prefetch_related(
                 'members',
                 Prefetch('submissions',
-                         ag_models.Submission.objects.defer('denormalized_ag_test_results'))
+                         ag_models.Submission.objects.defer(
+                             'denormalized_ag_test_results', 'compact_ag_test_results'))
             )
 
         return manager
 
     def get(self, *args, **kwargs):
+        if stream_requested(self.request):
+            groups = self.get_nested_manager().all()
+            return stream_json_list(
+                self.serialize_object(group) for group in iter_queryset_in_chunks(groups))
+
         return self.do_list()
 
     @convert_django_validation_error
@@ -1,14 +1,16 @@
 from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from rest_framework import response
+from rest_framework import response, status
 from rest_framework.views import APIView
 
 import autograder.core.models as ag_models
 import autograder.rest_api.permissions as ag_permissions
 from autograder.core.caching import clear_submission_results_cache
+from autograder.grading_tasks.tasks import clear_buggy_impl_results_cache
 from autograder.rest_api.schema import (AGDetailViewSchemaGenerator,
-                                        AGListCreateViewSchemaGenerator, APITags, OrderViewSchema)
+                                        AGListCreateViewSchemaGenerator, APITags,
+                                        CustomViewSchema, OrderViewSchema)
 from autograder.rest_api.views.ag_model_views import (AGModelAPIView, AGModelDetailView,
                                                       NestedModelView)
 
@@ -70,3 +72,26 @@ class MutationTestSuiteDetailView(AGModelDetailView):
 
     def delete(self, *args, **kwargs):
         return self.do_delete()
+
+
+class ClearBuggyImplResultsCacheView(AGModelAPIView):
+    schema = CustomViewSchema([APITags.mutation_test_suites], {
+        'DELETE': {'operation_id': 'clearBuggyImplResultsCache'}
+    })
+
+    permission_classes = [
+        ag_permissions.is_admin(lambda mutation_suite: mutation_suite.project.course)]
+
+    model_manager = ag_models.MutationTestSuite.objects.select_related('project__course')
+
+    def delete(self, *args, **kwargs):
+        """
+        Discards the mutation test suite's cached buggy impl results
+        (see cache_buggy_impl_results), so that the suite's buggy impls
+        are run again the next time each submission is graded.
+        """
+        with transaction.atomic():
+            mutation_suite = self.get_object()
+
+        clear_buggy_impl_results_cache(mutation_suite.pk)
+        return response.Response(status=status.HTTP_204_NO_CONTENT)
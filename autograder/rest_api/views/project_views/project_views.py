@@ -11,6 +11,7 @@ from rest_framework.response import Response
 import autograder.core.models as ag_models
 import autograder.handgrading.models as hg_models
 import autograder.rest_api.permissions as ag_permissions
+from autograder.core.ag_test_config_cache import bump_test_config_version
 from autograder.core.caching import clear_submission_results_cache
 from autograder.core.models.copy_project_and_course import copy_project
 from autograder.handgrading.import_handgrading_rubric import import_handgrading_rubric
@@ -311,6 +312,7 @@ class ClearResultsCacheView(AGModelAPIView):
             project = self.get_object()
 
         clear_submission_results_cache(project.pk)
+        bump_test_config_version(project.pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
 
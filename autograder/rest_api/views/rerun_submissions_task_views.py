@@ -61,6 +61,7 @@ class RerunSubmissionsTaskListCreateView(NestedModelView):
             ).set(queue=settings.RERUN_QUEUE_TMPL.format(project.pk))
             for submission in submissions
         ]
+        tasks.ensure_project_queues_registered(project.pk)
         from autograder.celery import app
         celery.group(signatures, app=app).apply_async()
 
@@ -1,4 +1,5 @@
 import itertools
+from typing import Iterator
 
 from django.utils import timezone
 from drf_composable_permissions.p import P
@@ -11,8 +12,10 @@ from autograder.core.models.get_ultimate_submissions import get_ultimate_submiss
 from autograder.core.submission_feedback import AGTestPreLoader, SubmissionResultFeedback
 from autograder.rest_api.schema import (
     APITags, CustomViewSchema, as_paginated_content_obj, as_schema_ref)
-from autograder.rest_api.serialize_ultimate_submission_results import \
-    serialize_ultimate_submission_results
+from autograder.rest_api.serialize_ultimate_submission_results import (
+    iter_ultimate_submission_results, serialize_ultimate_submission_results)
+from autograder.rest_api.stream_json import (
+    DEFAULT_CHUNK_SIZE, stream_paginated_json_list, stream_requested)
 from autograder.rest_api.views.ag_model_views import AGModelAPIView
 
 
@@ -77,7 +80,8 @@ class AllUltimateSubmissionResults(AGModelAPIView):
                         'default': 'false',
                     }
                 },
-                {'$ref': '#/components/parameters/includeStaff'}
+                {'$ref': '#/components/parameters/includeStaff'},
+                {'$ref': '#/components/parameters/stream'},
             ],
             'responses': {
                 '200': {
@@ -140,11 +144,28 @@ class AllUltimateSubmissionResults(AGModelAPIView):
         page = paginator.paginate_queryset(queryset=groups, request=self.request, view=self)
 
         ag_test_preloader = AGTestPreLoader(project)
-        ultimate_submissions = get_ultimate_submissions(
-            project, filter_groups=page, ag_test_preloader=ag_test_preloader)
-
         include_pending_extensions = (
             self.request.query_params.get('include_pending_extensions') == 'true')
+
+        if stream_requested(self.request):
+            # get_ultimate_submissions() loads all of the given groups'
+            # submissions at once, so we pass it a chunk of groups at
+            # a time.
+            def _generate_ultimate_submissions() -> Iterator[SubmissionResultFeedback]:
+                for i in range(0, len(page), DEFAULT_CHUNK_SIZE):
+                    yield from get_ultimate_submissions(
+                        project,
+                        filter_groups=page[i:i + DEFAULT_CHUNK_SIZE],
+                        ag_test_preloader=ag_test_preloader,
+                        totals_only=not full_results)
+
+            return stream_paginated_json_list(paginator, iter_ultimate_submission_results(
+                _generate_ultimate_submissions(), full_results=full_results,
+                include_pending_extensions=include_pending_extensions))
+
+        ultimate_submissions = get_ultimate_submissions(
+            project, filter_groups=page, ag_test_preloader=ag_test_preloader,
+            totals_only=not full_results)
         results = serialize_ultimate_submission_results(
             ultimate_submissions, full_results=full_results,
             include_pending_extensions=include_pending_extensions)
@@ -17,6 +17,7 @@ from autograder.core.submission_feedback import (
     AGTestCommandResultFeedback, AGTestPreLoader, AGTestSuiteResultFeedback,
     SubmissionResultFeedback
 )
+from autograder.grading_tasks.tasks import schedule_diff_sizes_update
 from autograder.rest_api.schema import APITags, CustomViewSchema, as_content_obj
 from autograder.rest_api.serve_file import serve_file
 from autograder.rest_api.views.ag_model_views import AGModelAPIView, require_query_params
@@ -90,18 +91,11 @@ class SubmissionResultsView(SubmissionResultsViewBase):
 
     def _make_response(self, submission_fdbk: SubmissionResultFeedback,
                        fdbk_category: ag_models.FeedbackCategory) -> HttpResponse:
-        if (fdbk_category != ag_models.FeedbackCategory.normal
-                or self.request.query_params.get('use_cache', 'true') != 'true'):
+        if self.request.query_params.get('use_cache', 'true') != 'true':
             return response.Response(submission_fdbk.to_dict())
 
-        submission = self.get_object()
-        not_done_enough_to_cache = (
-            submission.status != ag_models.Submission.GradingStatus.waiting_for_deferred
-            and submission.status != ag_models.Submission.GradingStatus.finished_grading)
-        if not_done_enough_to_cache:
-            return response.Response(submission_fdbk.to_dict())
-
-        return response.Response(get_cached_submission_feedback(submission, submission_fdbk))
+        return response.Response(
+            get_cached_submission_feedback(submission_fdbk.submission, submission_fdbk))
 
 
 class _OutputViewSchema(CustomViewSchema):
@@ -306,14 +300,17 @@ class AGTestCommandResultOutputSizeView(SubmissionResultsViewBase):
         cmd_fdbk = _find_ag_test_cmd_result(submission_fdbk, cmd_result_pk)
         if cmd_fdbk is None:
             return response.Response(None)
-        return response.Response({
+        output_sizes = {
             'stdout_size': cmd_fdbk.get_stdout_size(),
             'stdout_truncated': cmd_fdbk.stdout_truncated,
             'stderr_size': cmd_fdbk.get_stderr_size(),
             'stderr_truncated': cmd_fdbk.stderr_truncated,
             'stdout_diff_size': cmd_fdbk.get_stdout_diff_size(),
             'stderr_diff_size': cmd_fdbk.get_stderr_diff_size(),
-        })
+        }
+        if cmd_fdbk.diff_sizes_out_of_date:
+            schedule_diff_sizes_update(cmd_fdbk.pk)
+        return response.Response(output_sizes)
 
 
 def _get_cmd_result_output(
@@ -1,6 +1,6 @@
 import copy
 import datetime
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
@@ -18,6 +18,7 @@ from autograder.core.submission_email_receipts import send_submission_received_e
 from autograder.core.submission_feedback import (
     AGTestPreLoader, MutationTestSuitePreLoader, SubmissionResultFeedback
 )
+from autograder.grading_tasks.tasks import queue_submission_on_commit
 from autograder.rest_api.serve_file import serve_file
 from autograder.rest_api.schema import (
     AGDetailViewSchemaGenerator, AGListViewSchemaMixin, APITags, CustomViewDict, CustomViewSchema,
@@ -26,6 +27,8 @@ from autograder.rest_api.schema import (
 from autograder.rest_api.serialize_ultimate_submission_results import (
     get_submission_data_with_results
 )
+from autograder.rest_api.stream_json import (
+    iter_queryset_in_chunks, stream_json_list, stream_requested)
 from autograder.rest_api.views.ag_model_views import (
     AGModelAPIView, AGModelDetailView, NestedModelView, convert_django_validation_error,
     require_query_params
@@ -93,7 +96,8 @@ class ListCreateSubmissionView(NestedModelView):
         return self.do_list()
 
     def get_nested_manager(self):
-        return super().get_nested_manager().defer('denormalized_ag_test_results')
+        return super().get_nested_manager().defer(
+            'denormalized_ag_test_results', 'compact_ag_test_results')
 
     @convert_django_validation_error
     def post(self, request, *args, **kwargs):
@@ -116,6 +120,7 @@ class ListCreateSubmissionView(NestedModelView):
             test_ut.mocking_hook()
 
             submission = self._create_submission_if_allowed(request, group, timestamp)
+            queue_submission_on_commit(submission.pk)
 
         if group.project.send_email_on_submission_received:
             send_submission_received_email(group, submission)
@@ -258,7 +263,10 @@ class ListSubmissionsWithResults(AGModelAPIView):
     schema = CustomViewSchema([APITags.submissions], {
         'GET': {
             'operation_id': 'listSubmissionsWithResults',
-            'parameters': [{'$ref': '#/components/parameters/feedbackCategory'}],
+            'parameters': [
+                {'$ref': '#/components/parameters/feedbackCategory'},
+                {'$ref': '#/components/parameters/stream'},
+            ],
             'responses': {
                 '200': {
                     'content': {
@@ -301,30 +309,37 @@ class ListSubmissionsWithResults(AGModelAPIView):
         ag_test_preloader = AGTestPreLoader(group.project)
         mutation_test_suite_preloader = MutationTestSuitePreLoader(group.project)
 
-        submissions = []
-        for submission in submissions_queryset:
-            if feedback_category is not None:
-                fdbk_category = feedback_category
-            elif user_roles['is_staff']:
-                fdbk_category = (ag_models.FeedbackCategory.max if is_group_member
-                                 else ag_models.FeedbackCategory.staff_viewer)
-            elif submission.is_past_daily_limit:
-                fdbk_category = ag_models.FeedbackCategory.past_limit_submission
-            else:
-                fdbk_category = ag_models.FeedbackCategory.normal
-
-            serialized = get_submission_data_with_results(
-                SubmissionResultFeedback(
-                    submission,
-                    fdbk_category,
-                    ag_test_preloader,
-                    mutation_test_suite_preloader
-                ),
-                full_results=True
-            )
-            submissions.append(serialized)
+        def _serialize_submissions(
+            submissions: Iterable[ag_models.Submission]
+        ) -> Iterator[Dict[str, object]]:
+            for submission in submissions:
+                if feedback_category is not None:
+                    fdbk_category = feedback_category
+                elif user_roles['is_staff']:
+                    fdbk_category = (ag_models.FeedbackCategory.max if is_group_member
+                                     else ag_models.FeedbackCategory.staff_viewer)
+                elif submission.is_past_daily_limit:
+                    fdbk_category = ag_models.FeedbackCategory.past_limit_submission
+                else:
+                    fdbk_category = ag_models.FeedbackCategory.normal
+
+                serialized = get_submission_data_with_results(
+                    SubmissionResultFeedback(
+                        submission,
+                        fdbk_category,
+                        ag_test_preloader,
+                        mutation_test_suite_preloader
+                    ),
+                    full_results=True
+                )
+                yield serialized
+
+        if stream_requested(self.request):
+            return stream_json_list(
+                _serialize_submissions(iter_queryset_in_chunks(submissions_queryset)))
 
-        return response.Response(status=status.HTTP_200_OK, data=submissions)
+        return response.Response(
+            status=status.HTTP_200_OK, data=list(_serialize_submissions(submissions_queryset)))
 
 
 class SubmissionDetailView(AGModelDetailView):
@@ -168,6 +168,32 @@ CACHES = {
             "SERIALIZER": "django_redis.serializers.json.JSONSerializer",
         }
     },
+    # Stores pickled model objects, which the default cache's JSON
+    # serializer can't handle. See autograder.core.ag_test_config_cache.
+    'test_config': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://{host}:{port}'.format(
+            host=os.environ.get('AG_REDIS_HOST', 'localhost'),
+            port=os.environ.get('AG_REDIS_PORT', '6379')),
+        'KEY_PREFIX': 'test_config',
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SERIALIZER": "django_redis.serializers.pickle.PickleSerializer",
+        }
+    },
+    # Stores the (binary) output of mutation test suite commands. See
+    # autograder.grading_tasks.tasks.buggy_impl_results_cache.
+    'buggy_impl_results': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://{host}:{port}'.format(
+            host=os.environ.get('AG_REDIS_HOST', 'localhost'),
+            port=os.environ.get('AG_REDIS_PORT', '6379')),
+        'KEY_PREFIX': 'buggy_impl_results',
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SERIALIZER": "django_redis.serializers.pickle.PickleSerializer",
+        }
+    },
 }
 
 # See https://docs.djangoproject.com/en/2.2/ref/settings/#std:setting-EMAIL_HOST
@@ -245,6 +271,73 @@ SANDBOX_IMAGE_REGISTRY_HOST = os.environ.get(
     'SANDBOX_IMAGE_REGISTRY_HOST', '127.0.0.1')
 SANDBOX_IMAGE_REGISTRY_PORT = os.environ.get('SANDBOX_IMAGE_REGISTRY_PORT', '5001')
 
+# The implementation used to compare and diff expected and actual
+# output. "python" uses autograder.core.diff, and "gnu" runs the GNU
+# diff command line utility. Both produce the same results.
+# The "python" backend avoids starting a process, but it is much slower
+# than GNU diff on large inputs, so it falls back to GNU diff when the
+# two inputs have more than PYTHON_DIFF_MAX_NUM_LINES lines in total.
+DIFF_BACKEND = os.environ.get('DIFF_BACKEND', 'gnu')
+PYTHON_DIFF_MAX_NUM_LINES = int(os.environ.get('PYTHON_DIFF_MAX_NUM_LINES', '2000'))
+
+# While an AGTestSuite is being graded, test case results are buffered
+# and written to the database in batches. A batch is written once this
+# many test cases have finished or once this many seconds have passed
+# since the last write, whichever comes first. When a suite's test
+# cases are run one at a time, the interval is only checked between
+# test cases, so a long-running test case can delay the write of
+# results that finished before it started by up to its own run time.
+AG_TEST_RESULT_FLUSH_NUM_CASES = int(os.environ.get('AG_TEST_RESULT_FLUSH_NUM_CASES', '10'))
+AG_TEST_RESULT_FLUSH_INTERVAL = float(os.environ.get('AG_TEST_RESULT_FLUSH_INTERVAL', '5'))
+
+# The number of idle, already-started sandboxes that each grading
+# worker process keeps for every (docker image, network access)
+# combination it has graded with. Set to 0 to start a new sandbox for
+# every suite instead.
+SANDBOX_POOL_SIZE = int(os.environ.get('SANDBOX_POOL_SIZE', '0'))
+
+# When True, submissions' denormalized AG test results are stored in
+# the compact binary format described in
+# autograder.core.compact_ag_test_results rather than as JSON.
+# Existing submissions can be converted in either direction with
+# "./manage.py compact_ag_test_results".
+COMPACT_DENORMALIZED_AG_TEST_RESULTS = (
+    os.environ.get('COMPACT_DENORMALIZED_AG_TEST_RESULTS', 'false').lower() == 'true')
+
+# When True, hits and misses of the submission results cache are
+# counted (at the cost of an extra cache round trip per lookup) and
+# periodically logged by autograder.core.tasks.log_submission_results_cache_stats.
+SUBMISSION_RESULTS_CACHE_STATS = (
+    os.environ.get('SUBMISSION_RESULTS_CACHE_STATS', 'false').lower() == 'true')
+
+# Submissions are queued for grading by a weighted fair-share scheduler
+# (see autograder.grading_tasks.tasks.scheduling). These settings limit
+# the total number of submissions that can be queued or being graded
+# at once and the number per course. 0 means no limit.
+GRADING_MAX_SUBMISSIONS_IN_FLIGHT = int(
+    os.environ.get('GRADING_MAX_SUBMISSIONS_IN_FLIGHT', '0'))
+GRADING_COURSE_MAX_SUBMISSIONS_IN_FLIGHT = int(
+    os.environ.get('GRADING_COURSE_MAX_SUBMISSIONS_IN_FLIGHT', '0'))
+# Staff submissions and a group's first submission of the day are
+# scheduled as if they had been waiting this many extra seconds.
+GRADING_PRIORITY_BOOST = float(os.environ.get('GRADING_PRIORITY_BOOST', '300'))
+# How many seconds of a project's in-flight grading time are offset by
+# each second a submission spends waiting to be queued.
+GRADING_AGING_RATE = float(os.environ.get('GRADING_AGING_RATE', '1'))
+# The relative share of the grading workers given to specific projects,
+# as space-separated "<project pk>:<weight>" pairs, e.g., "42:2 57:0.5".
+# Projects that aren't listed have a weight of 1.
+GRADING_PROJECT_WEIGHTS = {
+    int(project_pk): float(weight) for project_pk, weight in (
+        pair.split(':') for pair in os.environ.get('GRADING_PROJECT_WEIGHTS', '').split())
+}
+
+# When a project's tests change, its submissions' denormalized point
+# totals are recomputed by a background task that starts this many
+# seconds after the first change.
+# See autograder.grading_tasks.tasks.point_totals.
+POINT_TOTALS_UPDATE_DELAY = int(os.environ.get('POINT_TOTALS_UPDATE_DELAY', '60'))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
@@ -23,10 +23,22 @@ CELERY_RESULT_PERSISTENT = True
 BROKER_POOL_LIMIT = None
 
 CELERYBEAT_SCHEDULE = {
+    # Submissions are queued for grading as soon as they are created.
+    # This periodic task only picks up submissions that couldn't be
+    # queued at that time (e.g. because the broker was unreachable).
     'queue-submissions': {
         'task': 'autograder.grading_tasks.tasks.queueing.queue_submissions',
         'schedule': datetime.timedelta(
-            seconds=int(os.environ.get('AG_SUBMISSION_LISTENER_INTERVAL', '5'))),
+            seconds=int(os.environ.get('AG_SUBMISSION_LISTENER_INTERVAL', '30'))),
+        'options': {
+            'queue': 'periodic_tasks'
+        }
+    },
+    # Only logs anything when SUBMISSION_RESULTS_CACHE_STATS is True.
+    'log-submission-results-cache-stats': {
+        'task': 'autograder.core.tasks.log_submission_results_cache_stats',
+        'schedule': datetime.timedelta(
+            seconds=int(os.environ.get('AG_CACHE_STATS_LOG_INTERVAL', '300'))),
         'options': {
             'queue': 'periodic_tasks'
         }
@@ -54,3 +66,17 @@ WORKER_PREFIX_TO_QUEUE_TMPLS = {
     DEFERRED_WORKER_PREFIX: [DEFERRED_QUEUE_TMPL],
     RERUN_WORKER_PREFIX: [RERUN_QUEUE_TMPL],
 }
+
+# Which projects' queues grading workers consume from.
+#   'all': Workers register every project's queues when they start, and
+#       new projects' queues are registered when the project is created.
+#   'active': Workers only register the queues of projects that accept
+#       submissions or have submissions being graded when they start.
+#       Other projects' queues are registered the first time a task is
+#       sent to them. Use this on deployments with many projects, where
+#       registering every queue makes worker startup slow.
+PROJECT_QUEUE_REGISTRATION_MODE = os.environ.get('AG_PROJECT_QUEUE_REGISTRATION_MODE', 'all')
+# In 'active' mode, how long (in seconds) to wait before re-sending
+# a registration request for a project that has already been registered.
+PROJECT_QUEUE_REGISTRATION_TIMEOUT = int(
+    os.environ.get('AG_PROJECT_QUEUE_REGISTRATION_TIMEOUT', str(60 * 60 * 24)))
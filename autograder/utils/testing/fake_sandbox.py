@@ -0,0 +1,49 @@
+import tempfile
+from typing import List
+
+from autograder_sandbox import CompletedCommand
+
+from autograder.grading_tasks.tasks.sandbox_pool import PooledSandbox
+
+
+class FakeSandbox(PooledSandbox):
+    """
+    A sandbox that doesn't start a docker container. Use it as the
+    sandbox_factory of a SandboxPool in tests that don't need to
+    actually run commands.
+
+    Every command "succeeds" with empty output. Calls to run_command
+    and add_files are recorded in run_command_args and added_files.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_starts = 0
+        self.num_destroys = 0
+        self.run_command_args: List[List[str]] = []
+        self.added_files: List[str] = []
+
+    @property
+    def is_running(self) -> bool:
+        return self._is_running
+
+    def _create_and_start(self) -> None:
+        self.num_starts += 1
+        self._is_running = True
+
+    def _destroy(self) -> None:
+        self.num_destroys += 1
+        self._is_running = False
+
+    def _stop(self) -> None:
+        pass
+
+    def add_files(self, *filenames: str, **kwargs) -> None:
+        self.added_files += filenames
+
+    def run_command(self, args: List[str], *run_args, **run_kwargs) -> CompletedCommand:
+        self.run_command_args.append(self.add_checkout_environment_variables(args))
+
+        return CompletedCommand(
+            return_code=0, timed_out=False,
+            stdout=tempfile.NamedTemporaryFile(), stderr=tempfile.NamedTemporaryFile(),
+            stdout_truncated=False, stderr_truncated=False)
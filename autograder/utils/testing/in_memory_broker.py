@@ -0,0 +1,22 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+
+class InMemoryBroker:
+    """
+    A SubmissionBroker (see autograder.grading_tasks.tasks.queueing)
+    that records the submissions sent to each queue instead of sending
+    them to celery.
+    """
+    def __init__(self):
+        self.queues: Dict[str, List[int]] = defaultdict(list)
+        self.sent: List[Tuple[int, str]] = []
+
+    def send_submissions(self, submissions: Sequence[Tuple[int, str]]) -> None:
+        for submission_pk, queue_name in submissions:
+            self.queues[queue_name].append(submission_pk)
+            self.sent.append((submission_pk, queue_name))
+
+    @property
+    def sent_submission_pks(self) -> List[int]:
+        return [submission_pk for submission_pk, _ in self.sent]
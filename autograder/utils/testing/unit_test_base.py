@@ -5,8 +5,8 @@ import os
 import shutil
 from contextlib import contextmanager
 from typing import (
-    Any, Collection, ContextManager, Iterable, Iterator, Mapping, Optional, Protocol, Sequence,
-    Type, TypeVar, cast
+    Any, Callable, Collection, ContextManager, Iterable, Iterator, Mapping, Optional, Protocol,
+    Sequence, Type, TypeVar, Union, cast
 )
 from unittest import mock
 
@@ -104,19 +104,28 @@ class _CustomAssertsMixin:
         def __exit__(self, *args: object) -> None:
             self.test_case_object.assertEqual(self.original_count, self.queryset.count())
 
-    def assert_cache_key_invalidated(self, cache_key: str) -> ContextManager[None]:
+    def assert_cache_key_invalidated(
+        self, cache_key: Union[str, Callable[[], str]]
+    ) -> ContextManager[None]:
+        """
+        cache_key can also be a function that returns the cache key.
+        Use a function for keys that are invalidated by changing the key
+        (e.g., keys that include a cache generation number).
+        """
         return _assert_cache_key_invalidated(cache_key)
 
 
 @contextmanager
-def _assert_cache_key_invalidated(cache_key: str) -> Iterator[None]:
-    if cache.get(cache_key) is None:
-        raise AssertionError(f'Cache key "{cache_key}" not present before expected invalidation.')
+def _assert_cache_key_invalidated(cache_key: Union[str, Callable[[], str]]) -> Iterator[None]:
+    get_cache_key = cache_key if callable(cache_key) else lambda: cache_key
+    if cache.get(get_cache_key()) is None:
+        raise AssertionError(
+            f'Cache key "{get_cache_key()}" not present before expected invalidation.')
 
     yield
 
-    if cache.get(cache_key) is not None:
-        raise AssertionError(f'Cache key "{cache_key}" unexpectedly present.')
+    if cache.get(get_cache_key()) is not None:
+        raise AssertionError(f'Cache key "{get_cache_key()}" unexpectedly present.')
 
 
 _T = TypeVar('_T')